@@ -7,10 +7,9 @@ Runs hourly optimization and provides enhanced trading decisions
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from pathlib import Path
 import json
 from app.core.logger import setup_logger
-from app.core.config import get_config
+from app.core.config import get_config, state_file
 from app.ai.dynamic_decision_engine import (
     get_dynamic_decision_engine,
     DynamicRiskAdjuster,
@@ -43,64 +42,47 @@ class DecisionOrchestrator:
         self.mt5 = get_mt5_client()
         self.data = get_data_provider()
         
-        self.report_file = Path(__file__).parent.parent.parent / "data" / "hourly_optimization_report.json"
+        self.report_file = state_file("hourly_optimization_report.json")
         self.report_file.parent.mkdir(parents=True, exist_ok=True)
         
         self.last_optimization_time = {}
         self.optimization_interval_seconds = 3600  # 1 hour
+        self.max_concurrency = max(1, self.config.ai.optimization_concurrency)
     
     async def hourly_optimization(self) -> Dict[str, Any]:
         """
         Run hourly optimization for all tickers
         - Analyze performance from last hour
-        - Adjust risk parameters
+        - Adjust risk
         - Optimize indicators
         - Generate reports
+        
+        Symbols are processed concurrently in worker threads (at most
+        `max_concurrency` at a time); a failing symbol only affects its own
+        entry in the report.
         """
         logger.info("🔄 Starting hourly optimization...")
         
-        symbols = self.config.trading.default_symbols
-        optimization_results = {}
+        now = datetime.now()
+        symbols = [
+            symbol for symbol in self.config.trading.default_symbols
+            # Check if enough time has passed since last optimization
+            if (now - self.last_optimization_time.get(symbol, datetime.min)).total_seconds()
+            >= self.optimization_interval_seconds
+        ]
         
-        for symbol in symbols:
-            try:
-                # Check if enough time has passed since last optimization
-                last_opt = self.last_optimization_time.get(symbol, datetime.min)
-                if (datetime.now() - last_opt).total_seconds() < self.optimization_interval_seconds:
-                    continue
-                
-                # 1. Analyze performance
-                performance = self.performance_tracker.calculate_ticker_metrics(symbol, hours=1)
-                
-                # 2. Adjust risk
-                dynamic_risk = self.risk_adjuster.get_dynamic_risk(symbol)
-                
-                # 3. Optimize indicators
-                optimal_indicators = self.indicator_optimizer.get_optimal_indicators(symbol)
-                
-                optimization_results[symbol] = {
-                    "timestamp": datetime.now().isoformat(),
-                    "performance": performance,
-                    "dynamic_risk": {
-                        "base_risk": dynamic_risk["base_risk_pct"],
-                        "adjusted_risk": dynamic_risk["adjusted_risk_pct"],
-                        "multiplier": dynamic_risk["multiplier"],
-                    },
-                    "indicators": optimal_indicators.get("indicators", {}),
-                    "status": "optimized"
-                }
-                
-                self.last_optimization_time[symbol] = datetime.now()
-                
-                logger.info(
-                    f"✅ Optimized {symbol}: "
-                    f"Risk={dynamic_risk['adjusted_risk_pct']:.2f}%, "
-                    f"Score={dynamic_risk['multiplier']:.2f}x"
-                )
-                
-            except Exception as e:
-                logger.error(f"Error optimizing {symbol}: {e}")
-                optimization_results[symbol] = {"error": str(e)}
+        # 1-2. Performance and risk for all symbols: one grouped query, one save each
+        performances = self.performance_tracker.calculate_all_metrics(symbols, hours=1)
+        risks = await asyncio.to_thread(self.risk_adjuster.get_dynamic_risk_batch, symbols, performances)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def optimize(symbol: str):
+            async with semaphore:
+                return symbol, await asyncio.to_thread(
+                    self._optimize_symbol, symbol, performances[symbol], risks[symbol])
+        
+        optimization_results = dict(await asyncio.gather(*(optimize(s) for s in symbols)))
         
         # Generate report
         report = {
@@ -115,6 +97,36 @@ class DecisionOrchestrator:
         
         return report
     
+    def _optimize_symbol(self, symbol: str, performance: Dict, dynamic_risk: Dict) -> Dict[str, Any]:
+        """Optimize one ticker's indicators (runs in a worker thread)"""
+        try:
+            # 3. Optimize indicators (CPU-bound backtests, safe to overlap)
+            optimal_indicators = self.indicator_optimizer.get_optimal_indicators(symbol)
+            
+            self.last_optimization_time[symbol] = datetime.now()
+            
+            logger.info(
+                f"✅ Optimized {symbol}: "
+                f"Risk={dynamic_risk['adjusted_risk_pct']:.2f}%, "
+                f"Score={dynamic_risk['multiplier']:.2f}x"
+            )
+            
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "performance": performance,
+                "dynamic_risk": {
+                    "base_risk": dynamic_risk["base_risk_pct"],
+                    "adjusted_risk": dynamic_risk["adjusted_risk_pct"],
+                    "multiplier": dynamic_risk["multiplier"],
+                },
+                "indicators": optimal_indicators.get("indicators", {}),
+                "status": "optimized"
+            }
+            
+        except Exception as e:
+            logger.error(f"Error optimizing {symbol}: {e}")
+            return {"error": str(e)}
+    
     async def run_backtests(self, symbols: Optional[List[str]] = None, days: int = 7) -> Dict:
         """
         Run backtests for symbols to validate strategy
@@ -211,11 +223,13 @@ class DecisionOrchestrator:
         """Get current optimization status for all tickers"""
         symbols = self.config.trading.default_symbols
         status = {}
+        performances = self.performance_tracker.calculate_all_metrics(symbols)
+        risks = self.risk_adjuster.get_dynamic_risk_batch(symbols, performances)
         
         for symbol in symbols:
-            risk = self.risk_adjuster.get_dynamic_risk(symbol)
+            risk = risks[symbol]
             indicators = self.indicator_optimizer.get_optimal_indicators(symbol)
-            performance = self.performance_tracker.calculate_ticker_metrics(symbol)
+            performance = performances[symbol]
             
             status[symbol] = {
                 "risk_multiplier": risk["multiplier"],
@@ -10,11 +10,10 @@ Features:
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple, List
-from pathlib import Path
 from app.ai.decision_engine import DecisionEngine
 from app.ai.schemas import TradingDecision
 from app.core.logger import setup_logger
-from app.core.config import get_config
+from app.core.config import get_config, state_file
 from app.core.database import get_database_manager
 from app.trading.mt5_client import get_mt5_client
 from app.trading.risk import get_risk_manager
@@ -28,7 +27,7 @@ class TickerPerformanceTracker:
     
     def __init__(self):
         self.db = get_database_manager()
-        self.cache_file = Path(__file__).parent.parent.parent / "data" / "ticker_performance.json"
+        self.cache_file = state_file("ticker_performance.json")
         self.cache_file.parent.mkdir(parents=True, exist_ok=True)
         self.performance_data = self._load_cache()
         
@@ -43,10 +42,12 @@ class TickerPerformanceTracker:
         return {}
     
     def _save_cache(self):
-        """Save performance data to cache"""
+        """Save performance data to cache (atomic replace)"""
         try:
-            with open(self.cache_file, 'w') as f:
+            tmp_file = self.cache_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'w') as f:
                 json.dump(self.performance_data, f, indent=2, default=str)
+            tmp_file.replace(self.cache_file)
         except Exception as e:
             logger.error(f"Could not save performance cache: {e}")
     
@@ -61,86 +62,97 @@ class TickerPerformanceTracker:
         Returns:
             Dict with performance metrics
         """
+        return self.calculate_all_metrics([symbol], hours=hours)[symbol]
+    
+    def calculate_all_metrics(self, symbols: List[str], hours: int = 1) -> Dict[str, Dict]:
+        """
+        Calculate performance metrics for many tickers in one pass
+        
+        All symbols are aggregated by a single grouped SQL query and the
+        cache file is written once at the end.
+        
+        Args:
+            symbols: Ticker symbols
+            hours: Number of hours to analyze
+        
+        Returns:
+            Dict of symbol -> performance metrics
+        """
         try:
-            # Get trades from last N hours
             since_time = datetime.now() - timedelta(hours=hours)
-            trades = self.db.get_trades(symbol=symbol, days=hours/24)
-            
-            if not trades:
-                return {
-                    "symbol": symbol,
-                    "trades": 0,
-                    "wins": 0,
-                    "losses": 0,
-                    "win_rate": 0.5,
-                    "profit_factor": 1.0,
-                    "total_pnl": 0.0,
-                    "avg_win": 0.0,
-                    "avg_loss": 0.0,
-                    "sharpe_ratio": 0.0,
-                }
-            
-            # Analyze closed trades
-            winning_trades = []
-            losing_trades = []
-            
-            for trade in trades:
-                pnl = trade.get('pnl', 0)
-                if pnl > 0:
-                    winning_trades.append(pnl)
-                elif pnl < 0:
-                    losing_trades.append(abs(pnl))
-            
-            total_trades = len(winning_trades) + len(losing_trades)
-            if total_trades == 0:
-                return {
-                    "symbol": symbol,
-                    "trades": len(trades),
-                    "win_rate": 0.5,
-                    "profit_factor": 1.0,
-                    "status": "no_closed_trades"
-                }
-            
-            win_rate = len(winning_trades) / total_trades
-            total_wins = sum(winning_trades) if winning_trades else 0
-            total_losses = sum(losing_trades) if losing_trades else 0
-            
-            profit_factor = total_wins / total_losses if total_losses > 0 else (1.0 if total_wins > 0 else 1.0)
-            avg_win = total_wins / len(winning_trades) if winning_trades else 0.0
-            avg_loss = total_losses / len(losing_trades) if losing_trades else 0.0
-            
-            # Sharpe Ratio (simplified)
-            if winning_trades and losing_trades:
-                returns = winning_trades + [-x for x in losing_trades]
-                mean_return = sum(returns) / len(returns)
-                variance = sum((x - mean_return)**2 for x in returns) / len(returns)
-                sharpe = mean_return / (variance**0.5) if variance > 0 else 0
-            else:
-                sharpe = 0.0
-            
-            metrics = {
+            stats = self.db.get_symbol_trade_stats(since_time, symbols)
+        except Exception as e:
+            logger.error(f"Error calculating ticker metrics: {e}")
+            return {symbol: {"symbol": symbol, "error": str(e)} for symbol in symbols}
+        
+        results = {symbol: self._metrics_from_stats(symbol, stats.get(symbol)) for symbol in symbols}
+        
+        # Cache results (only symbols that traded)
+        traded = {symbol: m for symbol, m in results.items() if "last_updated" in m}
+        if traded:
+            self.performance_data = {**self.performance_data, **traded}
+            self._save_cache()
+        
+        return results
+    
+    @staticmethod
+    def _metrics_from_stats(symbol: str, row: Optional[Dict]) -> Dict:
+        """Metrics for one symbol from its grouped aggregates"""
+        wins = (row or {}).get("winning_trades") or 0
+        losses = (row or {}).get("losing_trades") or 0
+        total_trades = wins + losses
+        
+        if not row:
+            return {
                 "symbol": symbol,
-                "trades": total_trades,
-                "wins": len(winning_trades),
-                "losses": len(losing_trades),
-                "win_rate": win_rate,
-                "profit_factor": profit_factor,
-                "total_pnl": total_wins - total_losses,
-                "avg_win": avg_win,
-                "avg_loss": avg_loss,
-                "sharpe_ratio": sharpe,
-                "last_updated": datetime.now().isoformat(),
+                "trades": 0,
+                "wins": 0,
+                "losses": 0,
+                "win_rate": 0.5,
+                "profit_factor": 1.0,
+                "total_pnl": 0.0,
+                "avg_win": 0.0,
+                "avg_loss": 0.0,
+                "sharpe_ratio": 0.0,
             }
-            
-            # Cache result
-            self.performance_data[symbol] = metrics
-            self._save_cache()
-            
-            return metrics
-            
-        except Exception as e:
-            logger.error(f"Error calculating metrics for {symbol}: {e}")
-            return {"symbol": symbol, "error": str(e)}
+        if total_trades == 0:
+            return {
+                "symbol": symbol,
+                "trades": row["total_trades"],
+                "win_rate": 0.5,
+                "profit_factor": 1.0,
+                "status": "no_closed_trades"
+            }
+        
+        total_wins = row["gross_profit"] or 0.0
+        total_losses = row["gross_loss"] or 0.0
+        
+        win_rate = wins / total_trades
+        profit_factor = total_wins / total_losses if total_losses > 0 else 1.0
+        avg_win = total_wins / wins if wins else 0.0
+        avg_loss = total_losses / losses if losses else 0.0
+        
+        # Sharpe Ratio (simplified, per trade; breakeven trades add nothing to either sum)
+        if wins and losses:
+            mean_return = (row["net_profit"] or 0.0) / total_trades
+            variance = max((row["sum_sq_profit"] or 0.0) / total_trades - mean_return ** 2, 0.0)
+            sharpe = mean_return / (variance ** 0.5) if variance > 0 else 0
+        else:
+            sharpe = 0.0
+        
+        return {
+            "symbol": symbol,
+            "trades": total_trades,
+            "wins": wins,
+            "losses": losses,
+            "win_rate": win_rate,
+            "profit_factor": profit_factor,
+            "total_pnl": total_wins - total_losses,
+            "avg_win": avg_win,
+            "avg_loss": avg_loss,
+            "sharpe_ratio": sharpe,
+            "last_updated": datetime.now().isoformat(),
+        }
 
 
 class DynamicRiskAdjuster:
@@ -150,7 +162,7 @@ class DynamicRiskAdjuster:
         self.config = get_config()
         self.risk = get_risk_manager()
         self.tracker = TickerPerformanceTracker()
-        self.params_file = Path(__file__).parent.parent.parent / "data" / "dynamic_risk_params.json"
+        self.params_file = state_file("dynamic_risk_params.json")
         self.params_file.parent.mkdir(parents=True, exist_ok=True)
         self.ticker_params = self._load_params()
         self.last_adjustment = {}
@@ -174,12 +186,32 @@ class DynamicRiskAdjuster:
         except Exception as e:
             logger.error(f"Could not save dynamic risk params: {e}")
     
-    def get_dynamic_risk(self, symbol: str) -> Dict:
+    def get_dynamic_risk_batch(self, symbols: List[str],
+                               metrics: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Dynamic risk for many tickers, saving the params file once
+        
+        Args:
+            symbols: Ticker symbols
+            metrics: Precomputed metrics by symbol (computed in one batch if None)
+        """
+        if metrics is None:
+            metrics = self.tracker.calculate_all_metrics(symbols, hours=1)
+        results = {
+            symbol: self.get_dynamic_risk(symbol, metrics=metrics.get(symbol, {}), persist=False)
+            for symbol in symbols
+        }
+        self._save_params()
+        return results
+    
+    def get_dynamic_risk(self, symbol: str, metrics: Optional[Dict] = None, persist: bool = True) -> Dict:
         """
         Calculate dynamic risk parameters for a ticker
         
         Args:
             symbol: Ticker symbol
+            metrics: Precomputed performance metrics (queried if None)
+            persist: Save the params file after updating
         
         Returns:
             Dict with adjusted risk parameters
@@ -190,7 +222,8 @@ class DynamicRiskAdjuster:
         base_max_positions = self.config.trading.default_max_positions
         
         # Get performance metrics (last hour)
-        metrics = self.tracker.calculate_ticker_metrics(symbol, hours=1)
+        if metrics is None:
+            metrics = self.tracker.calculate_ticker_metrics(symbol, hours=1)
         
         # Adjust based on win rate
         win_rate = metrics.get("win_rate", 0.5)
@@ -233,7 +266,8 @@ class DynamicRiskAdjuster:
         
         # Cache
         self.ticker_params[symbol] = adjusted_params
-        self._save_params()
+        if persist:
+            self._save_params()
         
         logger.info(
             f"🎯 Dynamic risk for {symbol}: "
@@ -3,8 +3,6 @@
 import json
 from typing import Optional, Dict, List
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
 from app.core.logger import setup_logger
 from app.core.config import get_config
 from app.ai.gemini_client import get_gemini_client
@@ -3,9 +3,10 @@
 import json
 import re
 import hashlib
-from typing import Optional, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
-import google.generativeai as genai
 from app.core.config import get_config
 from app.core.logger import setup_logger
 
@@ -69,7 +70,10 @@ class GeminiClient:
     def __init__(self):
         self.config = get_config()
         self.model = None
-        self._prompt_cache: Dict[str, Dict[str, Any]] = {}  # hash -> response
+        # hash -> (cached_at, response), oldest first; bounded by age and count
+        self._prompt_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.cache_ttl_seconds = self.config.ai.response_cache_minutes * 60
+        self.cache_max_entries = self.config.ai.response_cache_max_entries
         
         # Skip Gemini initialization if API key is not configured
         if not self.config.ai.gemini_api_key:
@@ -77,6 +81,8 @@ class GeminiClient:
             return
             
         try:
+            # Imported here: google.generativeai takes ~0.7s to import and is only needed with a key
+            import google.generativeai as genai
             genai.configure(api_key=self.config.ai.gemini_api_key)
             # Get model from config or use default
             primary_model = getattr(self.config.ai, "gemini_model", "gemini-2.0-pro-exp-02-05")
@@ -128,9 +134,11 @@ class GeminiClient:
         ).hexdigest()
         
         # Check cache
-        if use_cache and prompt_hash in self._prompt_cache:
-            logger.debug("Using cached Gemini response")
-            return self._prompt_cache[prompt_hash]
+        if use_cache:
+            cached = self._cached_response(prompt_hash)
+            if cached is not None:
+                logger.debug("Using cached Gemini response")
+                return cached
         
         try:
             # Contract: force strict JSON or explicit unavailable sentinel
@@ -196,7 +204,7 @@ class GeminiClient:
                 }
 
             if use_cache:
-                self._prompt_cache[prompt_hash] = result
+                self._cache_response(prompt_hash, result)
 
             logger.debug("Gemini response parsed successfully")
             return result
@@ -209,6 +217,36 @@ class GeminiClient:
         """Clear prompt cache"""
         self._prompt_cache.clear()
         logger.debug("Gemini cache cleared")
+    
+    def _cached_response(self, prompt_hash: str) -> Optional[Dict[str, Any]]:
+        entry = self._prompt_cache.get(prompt_hash)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= self.cache_ttl_seconds:
+            self._prompt_cache.pop(prompt_hash, None)
+            return None
+        return entry[1]
+    
+    def _cache_response(self, prompt_hash: str, result: Dict[str, Any], cached_at: Optional[float] = None):
+        self._prompt_cache[prompt_hash] = (time.time() if cached_at is None else cached_at, result)
+        self._prompt_cache.move_to_end(prompt_hash)
+        while len(self._prompt_cache) > self.cache_max_entries:
+            self._prompt_cache.popitem(last=False)
+    
+    def snapshot_state(self) -> Dict[str, Tuple[float, Dict[str, Any]]]:
+        """Cached responses with their timestamps, for a warm-start snapshot"""
+        return dict(self._prompt_cache)
+    
+    def restore_state(self, state: Dict[str, Tuple[float, Dict[str, Any]]]) -> int:
+        """Load the responses of a snapshot still within the TTL (entries already cached win)"""
+        now = time.time()
+        fresh = {h: entry for h, entry in state.items()
+                 if now - entry[0] < self.cache_ttl_seconds and h not in self._prompt_cache}
+        merged = sorted({**fresh, **self._prompt_cache}.items(), key=lambda item: item[1][0])
+        self._prompt_cache.clear()
+        for prompt_hash, (cached_at, result) in merged:
+            self._cache_response(prompt_hash, result, cached_at)
+        return sum(1 for h in fresh if h in self._prompt_cache)
 
 
 # Global Gemini client instance
@@ -4,20 +4,21 @@ This wrapper is optional and only used if an ONNX model path is provided.
 Expected model output: probabilities or scores for classes [SELL, HOLD, BUY].
 """
 
-from typing import List, Optional, Tuple
+import importlib.util
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import numpy as np
 
-try:
-    import onnxruntime as ort
-    ONNX_AVAILABLE = True
-except Exception:  # pragma: no cover
-    ONNX_AVAILABLE = False
+if TYPE_CHECKING:
+    import onnxruntime
+
+# onnxruntime is imported on first load, not at import time (strategy imports this module)
+ONNX_AVAILABLE = importlib.util.find_spec("onnxruntime") is not None
 
 
 class OnnxClassifier:
     """Simple ONNX runtime wrapper for 3-class classification."""
 
-    def __init__(self, session: "ort.InferenceSession"):
+    def __init__(self, session: "onnxruntime.InferenceSession"):
         self.session = session
         self.input_name = session.get_inputs()[0].name
         # Use first output
@@ -49,6 +50,7 @@ def load_onnx_classifier(path: str) -> Optional[OnnxClassifier]:
     if not ONNX_AVAILABLE:
         return None
     try:
+        import onnxruntime as ort
         sess = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
         return OnnxClassifier(sess)
     except Exception:
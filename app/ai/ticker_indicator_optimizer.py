@@ -4,12 +4,15 @@ Assigns optimized indicator parameters to each ticker based on historical perfor
 """
 
 import json
-from datetime import datetime, timedelta
-from pathlib import Path
+import threading
+from datetime import datetime
 from typing import Dict, Any, Optional
+from app.core.config import state_file
 from app.core.logger import setup_logger
 from app.core.database import get_database_manager
 from app.trading.strategy import TradingStrategy
+from app.backtest.param_search import DEFAULT_INDICATOR_PARAMS, optimize_indicators
+from app.backtest.walk_forward import PromotionGate, WalkForwardOptimizer
 
 logger = setup_logger("ticker_indicator_optimizer")
 
@@ -20,9 +23,10 @@ class TickerIndicatorOptimizer:
     def __init__(self):
         self.db = get_database_manager()
         self.strategy = TradingStrategy()
-        self.config_file = Path(__file__).parent.parent.parent / "data" / "ticker_indicators.json"
+        self.config_file = state_file("ticker_indicators.json")
         self.config_file.parent.mkdir(parents=True, exist_ok=True)
         self.ticker_configs = self._load_configs()
+        self._configs_lock = threading.Lock()
         
         # Default indicator ranges to test
         self.test_ranges = {
@@ -32,6 +36,20 @@ class TickerIndicatorOptimizer:
             "ema_slow_period": [20, 30, 40, 50],
             "atr_multiplier": [1.0, 1.5, 2.0, 2.5, 3.0],
         }
+        
+        # Search settings
+        self.timeframe = "M15"
+        self.history_bars = 4000  # ~6 weeks of M15 bars
+        self.min_bars = 300
+        self.search_method = "bayesian"  # grid, random, bayesian
+        self.search_iterations = 60
+        self.max_workers = 4
+        
+        # Walk-forward validation: only out-of-sample survivors are promoted
+        self.walk_forward_enabled = True
+        self.train_bars = 1000
+        self.test_bars = 250
+        self.promotion_gate = PromotionGate()
     
     def _load_configs(self) -> Dict:
         """Load saved indicator configurations"""
@@ -44,10 +62,12 @@ class TickerIndicatorOptimizer:
         return {}
     
     def _save_configs(self):
-        """Save indicator configurations"""
+        """Save indicator configurations (atomic replace)"""
         try:
-            with open(self.config_file, 'w') as f:
+            tmp_file = self.config_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'w') as f:
                 json.dump(self.ticker_configs, f, indent=2, default=str)
+            tmp_file.replace(self.config_file)
             logger.info(f"💾 Saved indicator configs for {len(self.ticker_configs)} tickers")
         except Exception as e:
             logger.error(f"Could not save ticker indicator configs: {e}")
@@ -78,15 +98,20 @@ class TickerIndicatorOptimizer:
         # Optimize indicators
         optimal = self._optimize_indicators_for_ticker(symbol)
         
-        # Cache result
-        self.ticker_configs[symbol] = optimal
-        self._save_configs()
+        # Cache result (symbols may be optimized concurrently)
+        with self._configs_lock:
+            self.ticker_configs = {**self.ticker_configs, symbol: optimal}
+            self._save_configs()
         
         return optimal
     
     def _optimize_indicators_for_ticker(self, symbol: str) -> Dict[str, Any]:
         """
-        Test different indicator combinations and find best performing one
+        Search `test_ranges` for the parameters with the best backtest score
+        
+        Each candidate is replayed over recent bars with a vectorized
+        backtest (see app.backtest.param_search); candidates run in parallel
+        and share indicator columns.
         
         Args:
             symbol: Ticker symbol
@@ -95,58 +120,41 @@ class TickerIndicatorOptimizer:
             Dict with optimal indicator parameters
         """
         try:
-            # Get recent trades for this ticker
-            since_time = datetime.now() - timedelta(days=7)  # Last 7 days
-            trades = self.db.get_trades(symbol=symbol, days=7)
+            bars = self.strategy.data.get_ohlc_data(symbol, self.timeframe, self.history_bars)
             
-            if len(trades) < 10:
+            if bars is None or len(bars) < self.min_bars:
                 logger.warning(
-                    f"⚠️  Insufficient trade history for {symbol} ({len(trades)} trades), "
-                    f"using defaults"
+                    f"⚠️  Insufficient bar history for {symbol} "
+                    f"({0 if bars is None else len(bars)} bars), using defaults"
                 )
                 return self._get_default_indicators(symbol)
             
-            # Analyze which indicator combinations worked best
-            best_config = None
-            best_score = -float('inf')
+            if self.walk_forward_enabled:
+                return self._walk_forward_for_ticker(symbol, bars)
             
-            # Test combinations (simplified - test top 5 variations)
-            test_count = 0
-            for rsi_buy in self.test_ranges["rsi_buy"][:3]:
-                for rsi_sell in self.test_ranges["rsi_sell"][-3:]:
-                    for ema_fast in self.test_ranges["ema_fast_period"][:2]:
-                        for ema_slow in self.test_ranges["ema_slow_period"][-2:]:
-                            test_count += 1
-                            
-                            # Score this combination (simplified)
-                            score = self._score_indicator_combo(
-                                symbol=symbol,
-                                rsi_buy=rsi_buy,
-                                rsi_sell=rsi_sell,
-                                ema_fast=ema_fast,
-                                ema_slow=ema_slow,
-                                trades=trades
-                            )
-                            
-                            if score > best_score:
-                                best_score = score
-                                best_config = {
-                                    "rsi_buy": rsi_buy,
-                                    "rsi_sell": rsi_sell,
-                                    "ema_fast_period": ema_fast,
-                                    "ema_slow_period": ema_slow,
-                                    "score": score,
-                                }
+            search = optimize_indicators(
+                bars,
+                self.test_ranges,
+                method=self.search_method,
+                n_iter=self.search_iterations,
+                max_workers=self.max_workers,
+            )
+            best_config = search["params"]
             
             if not best_config:
                 return self._get_default_indicators(symbol)
             
+            metrics = search["metrics"]
+            best_score = metrics["score"]
             result = {
                 "symbol": symbol,
-                "indicators": best_config,
-                "trades_analyzed": len(trades),
+                "indicators": {**best_config, "score": best_score},
+                "metrics": metrics,
+                "bars_analyzed": len(bars),
+                "timeframe": self.timeframe,
                 "optimization_score": best_score,
-                "test_combinations": test_count,
+                "test_combinations": search["evaluated"],
+                "search_method": self.search_method,
                 "last_updated": datetime.now().isoformat(),
             }
             
@@ -154,7 +162,9 @@ class TickerIndicatorOptimizer:
                 f"✅ Optimized indicators for {symbol}: "
                 f"RSI({best_config['rsi_buy']}, {best_config['rsi_sell']}) "
                 f"EMA({best_config['ema_fast_period']}, {best_config['ema_slow_period']}) "
-                f"score={best_score:.2f}"
+                f"ATRx{best_config['atr_multiplier']} "
+                f"score={best_score:.2f} trades={metrics['trades']} "
+                f"({search['evaluated']} candidates)"
             )
             
             return result
@@ -163,64 +173,76 @@ class TickerIndicatorOptimizer:
             logger.error(f"Error optimizing indicators for {symbol}: {e}")
             return self._get_default_indicators(symbol)
     
-    def _score_indicator_combo(
-        self,
-        symbol: str,
-        rsi_buy: int,
-        rsi_sell: int,
-        ema_fast: int,
-        ema_slow: int,
-        trades: list
-    ) -> float:
+    def _walk_forward_for_ticker(self, symbol: str, bars) -> Dict[str, Any]:
         """
-        Score an indicator combination based on trade history
+        Walk-forward the search and promote only parameters that pass the gate
         
-        Returns:
-            Score (profit_factor * win_rate * sharpe_ratio)
+        The candidate is optimized on the latest `train_bars`; if the
+        out-of-sample checks fail, the previously promoted parameters (or
+        the defaults) stay live and the rejection is recorded.
         """
-        try:
-            # Count trades that match this indicator criteria (simplified)
-            wins = 0
-            losses = 0
-            winning_pnl = 0
-            losing_pnl = 0
-            
-            for trade in trades:
-                pnl = trade.get('pnl', 0)
-                if pnl > 0:
-                    wins += 1
-                    winning_pnl += pnl
-                elif pnl < 0:
-                    losses += 1
-                    losing_pnl += abs(pnl)
-            
-            total = wins + losses
-            if total == 0:
-                return 0.0
-            
-            win_rate = wins / total
-            profit_factor = winning_pnl / losing_pnl if losing_pnl > 0 else (1.0 if winning_pnl > 0 else 0.0)
-            
-            # Composite score (40% profit factor, 40% win rate, 20% indicator alignment)
-            score = (profit_factor * 0.4) + (win_rate * 0.4) + (0.2 * (1.0 if rsi_buy < rsi_sell else 0.5))
-            
-            return score
-            
-        except Exception as e:
-            logger.debug(f"Error scoring combination: {e}")
-            return 0.0
+        wf = WalkForwardOptimizer(
+            self.test_ranges,
+            train_bars=self.train_bars,
+            test_bars=self.test_bars,
+            method=self.search_method,
+            n_iter=self.search_iterations,
+            max_workers=self.max_workers,
+            gate=self.promotion_gate,
+        ).run(bars, symbol)
+        
+        summary = {
+            "folds": len(wf.folds),
+            "out_of_sample": {k: v for k, v in wf.out_of_sample.items() if k != "returns"},
+            "efficiency": wf.efficiency,
+            "instability": wf.instability,
+            "positive_fold_ratio": wf.positive_fold_ratio,
+            "stability": {
+                name: {k: v for k, v in stats.items() if k != "values"}
+                for name, stats in wf.stability.items()
+            },
+            "promoted": wf.promoted,
+            "rejection_reasons": wf.rejection_reasons,
+        }
+        now = datetime.now().isoformat()
+        
+        if not wf.promoted:
+            previous = self.ticker_configs.get(symbol)
+            base = previous if previous and "indicators" in previous else self._get_default_indicators(symbol)
+            logger.info(
+                f"⏸️  Keeping current indicators for {symbol}: "
+                f"{'; '.join(wf.rejection_reasons)}"
+            )
+            return {**base, "walk_forward": summary, "last_updated": now}
+        
+        metrics = {k: v for k, v in wf.recommended_in_sample.items() if k != "returns"}
+        logger.info(
+            f"✅ Promoted indicators for {symbol}: {wf.recommended} "
+            f"(OOS PF={summary['out_of_sample'].get('profit_factor', 0.0):.2f}, "
+            f"WFE={wf.efficiency:.2f})"
+        )
+        return {
+            "symbol": symbol,
+            "indicators": {**wf.recommended, "score": metrics["score"]},
+            "metrics": metrics,
+            "bars_analyzed": len(bars),
+            "timeframe": self.timeframe,
+            "optimization_score": metrics["score"],
+            "search_method": self.search_method,
+            "walk_forward": summary,
+            "promoted_at": now,
+            "last_updated": now,
+        }
+    
+    def is_validated(self, symbol: str) -> bool:
+        """True if the latest walk-forward run for `symbol` passed the promotion gate"""
+        return bool(self.ticker_configs.get(symbol, {}).get("walk_forward", {}).get("promoted"))
     
     def _get_default_indicators(self, symbol: str) -> Dict[str, Any]:
         """Get default indicator configuration"""
         return {
             "symbol": symbol,
-            "indicators": {
-                "rsi_buy": 35,
-                "rsi_sell": 65,
-                "ema_fast_period": 12,
-                "ema_slow_period": 26,
-                "atr_multiplier": 2.0,
-            },
+            "indicators": dict(DEFAULT_INDICATOR_PARAMS),
             "note": "default_configuration",
             "last_updated": datetime.now().isoformat(),
         }
@@ -1,13 +1,17 @@
 """Optimized API endpoints for historical data and performance metrics"""
 
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
+import json
 from typing import List, Dict, Any, Optional
 import pandas as pd
 
-from app.core.database import get_database_manager
-from app.ui.cache_manager import get_cache, get_historical_cache
+from app.core.database import get_database_manager, TRADE_COLUMNS
+from app.core.cache import get_cache, get_historical_cache
+from app.core.retention import storage_report, get_storage_maintenance
 from app.trading.indicator_optimizer import get_indicator_optimizer
+from app.trading.execution_telemetry import get_execution_telemetry
 from app.core.config import get_config
 
 router = APIRouter(prefix="/api/optimized", tags=["optimized"])
@@ -16,206 +20,287 @@ router = APIRouter(prefix="/api/optimized", tags=["optimized"])
 # HISTORICAL DATA ENDPOINTS
 # ============================================================================
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated column list -> validated list (None selects all)"""
+    if not fields:
+        return None
+    columns = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [c for c in columns if c not in TRADE_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return columns
+
+
 @router.get("/trades/history")
-async def get_trades_history(
+def get_trades_history(
     days: int = Query(7, ge=1, le=90),
     symbol: Optional[str] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Get historical trades with efficient caching.
+    Get historical trades, newest first, one keyset page at a time.
     
     Query Parameters:
     - days: Number of days to retrieve (1-90)
     - symbol: Optional symbol filter
-    - skip: Pagination skip
-    - limit: Pagination limit
+    - status: Optional status filter
+    - cursor: `next_cursor` from the previous page (omit for the first page)
+    - limit: Page size (1-1000)
+    - fields: Optional comma-separated columns to return (e.g. "ticket,symbol,profit")
     
-    Returns trades with metadata including win rate, P&L statistics
+    Returns the page, the cursor for the next one, and page P&L statistics
+    when `profit` is selected
     """
-    # Check cache first
-    cache_key = f"trades_history_{days}_{symbol}_{skip}_{limit}"
-    cached = get_historical_cache().get(cache_key, max_age_seconds=300)
-    if cached is not None:
-        return cached
-    
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    
-    trades = db.get_trades(
-        since=cutoff,
-        symbol=symbol,
-        offset=skip,
-        limit=limit
-    )
+    columns = _parse_fields(fields)
+
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        cutoff = datetime.now() - timedelta(days=days)
+    
+        try:
+            page = db.get_trades_page(
+                since=cutoff,
+                symbol=symbol,
+                status=status,
+                columns=columns,
+                cursor=cursor,
+                limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+        trades = page["trades"]
+        total = len(trades)
+        response = {
+            "trades": trades,
+            "total": total,
+            "next_cursor": page["next_cursor"],
+            "has_more": page["next_cursor"] is not None,
+        }
     
-    if not trades:
-        return {"trades": [], "total": 0, "win_rate": 0}
-    
-    # Calculate statistics
-    df = pd.DataFrame(trades)
-    total = len(trades)
-    wins = sum(1 for t in trades if t.get("profit", 0) > 0)
-    
-    response = {
-        "trades": trades,
-        "total": total,
-        "win_rate": wins / total if total > 0 else 0,
-        "total_pnl": sum(t.get("profit", 0) for t in trades),
-        "avg_trade": sum(t.get("profit", 0) for t in trades) / total if total > 0 else 0,
-        "cached": False
-    }
+        # Calculate statistics for the page
+        if total and "profit" in trades[0]:
+            profits = [t.get("profit") or 0 for t in trades]
+            wins = sum(1 for p in profits if p > 0)
+            response.update({
+                "win_rate": wins / total,
+                "total_pnl": sum(profits),
+                "avg_trade": sum(profits) / total,
+            })
+        return response
     
-    # Cache result
-    get_historical_cache().set(cache_key, response, ttl=300)
+    key = f"trades_history_{days}_{symbol}_{status}_{cursor}_{limit}_{fields}"
+    return get_historical_cache().get_or_load(key, _load, ttl=300)
+
+
+@router.get("/trades/export")
+def export_trades(
+    days: Optional[int] = Query(None, ge=1),
+    symbol: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Stream trades as NDJSON (one JSON object per line), newest first.
     
-    return response
+    Rows are read in keyset batches and written as they are produced, so
+    exports of any size run in constant memory. Omit `days` for the full
+    history.
+    """
+    columns = _parse_fields(fields)
+    since = datetime.now() - timedelta(days=days) if days else None
+    db = get_database_manager()
+
+    def _lines():
+        for trade in db.iter_trades(since=since, symbol=symbol, status=status, columns=columns):
+            yield json.dumps(trade, default=str) + "\n"
+
+    filename = f"trades_{datetime.now():%Y%m%d_%H%M%S}.ndjson"
+    return StreamingResponse(
+        _lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/performance/daily")
-async def get_daily_performance(
+def get_daily_performance(
     days: int = Query(30, ge=1, le=365)
 ) -> Dict[str, Any]:
     """
     Get daily performance summary.
     
-    Returns daily P&L, win rate, and trade count
+    Returns daily P&L, win rate and trade count, read from the
+    incrementally maintained daily rollups (realized P&L by close date).
     """
-    cache_key = f"daily_perf_{days}"
-    cached = get_cache().get(cache_key)
-    if cached:
-        return cached
-    
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    trades = db.get_trades(since=cutoff)
-    
-    if not trades:
-        return {"daily": [], "total_pnl": 0, "avg_daily_pnl": 0}
-    
-    df = pd.DataFrame(trades)
-    df['date'] = pd.to_datetime(df['open_timestamp']).dt.date
-    
-    daily_stats = []
-    for date, group in df.groupby('date'):
-        trades_count = len(group)
-        wins = sum(1 for _, t in group.iterrows() if t['profit'] > 0)
-        pnl = group['profit'].sum()
-        
-        daily_stats.append({
-            "date": str(date),
-            "trades": trades_count,
-            "wins": wins,
-            "win_rate": wins / trades_count if trades_count > 0 else 0,
-            "pnl": pnl
-        })
-    
-    response = {
-        "daily": sorted(daily_stats, key=lambda x: x['date']),
-        "total_pnl": df['profit'].sum(),
-        "avg_daily_pnl": df.groupby('date')['profit'].sum().mean(),
-        "best_day": max(daily_stats, key=lambda x: x['pnl']) if daily_stats else None,
-        "worst_day": min(daily_stats, key=lambda x: x['pnl']) if daily_stats else None
-    }
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        cutoff = datetime.now() - timedelta(days=days)
+        buckets = db.get_performance_rollups("daily", cutoff)
+    
+        if not buckets:
+            return {"daily": [], "total_pnl": 0, "avg_daily_pnl": 0}
+    
+        daily_stats = [
+            {
+                "date": b["bucket"],
+                "trades": b["total_trades"],
+                "wins": b["winning_trades"],
+                "win_rate": b["winning_trades"] / b["total_trades"] if b["total_trades"] > 0 else 0,
+                "pnl": b["net_profit"],
+            }
+            for b in buckets
+            if b["total_trades"] > 0
+        ]
+        total_pnl = sum(d["pnl"] for d in daily_stats)
+    
+        response = {
+            "daily": daily_stats,
+            "total_pnl": total_pnl,
+            "avg_daily_pnl": total_pnl / len(daily_stats) if daily_stats else 0,
+            "best_day": max(daily_stats, key=lambda x: x['pnl']) if daily_stats else None,
+            "worst_day": min(daily_stats, key=lambda x: x['pnl']) if daily_stats else None
+        }
+        return response
     
-    get_cache().set(cache_key, response, ttl=3600)
-    return response
+    return get_cache().get_or_load(f"daily_perf_{days}", _load, ttl=3600)
 
 
 @router.get("/performance/symbol")
-async def get_symbol_performance(
+def get_symbol_performance(
     days: int = Query(30, ge=1, le=365)
 ) -> Dict[str, Any]:
     """
     Get performance statistics by symbol.
     
-    Returns win rate, P&L, and trade count per symbol
+    Returns win rate, P&L, and trade count per symbol (folded from the
+    per-symbol daily rollups)
     """
-    cache_key = f"symbol_perf_{days}"
-    cached = get_cache().get(cache_key)
-    if cached:
-        return cached
-    
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    trades = db.get_trades(since=cutoff)
-    
-    if not trades:
-        return {"by_symbol": {}}
-    
-    df = pd.DataFrame(trades)
-    
-    by_symbol = {}
-    for symbol, group in df.groupby('symbol'):
-        trades_count = len(group)
-        wins = sum(1 for _, t in group.iterrows() if t['profit'] > 0)
-        pnl = group['profit'].sum()
-        
-        by_symbol[symbol] = {
-            "trades": trades_count,
-            "wins": wins,
-            "losses": trades_count - wins,
-            "win_rate": wins / trades_count if trades_count > 0 else 0,
-            "pnl": pnl,
-            "avg_trade": pnl / trades_count if trades_count > 0 else 0
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        cutoff = datetime.now() - timedelta(days=days)
+        buckets = db.get_performance_rollups("symbol_daily", cutoff)
+    
+        if not buckets:
+            return {"by_symbol": {}}
+    
+        totals: Dict[str, Dict[str, float]] = {}
+        for b in buckets:
+            agg = totals.setdefault(b["symbol"], {"trades": 0, "wins": 0, "pnl": 0.0})
+            agg["trades"] += b["total_trades"]
+            agg["wins"] += b["winning_trades"]
+            agg["pnl"] += b["net_profit"]
+    
+        by_symbol = {}
+        for symbol, agg in totals.items():
+            trades_count = agg["trades"]
+            if trades_count <= 0:
+                continue
+            by_symbol[symbol] = {
+                "trades": trades_count,
+                "wins": agg["wins"],
+                "losses": trades_count - agg["wins"],
+                "win_rate": agg["wins"] / trades_count,
+                "pnl": agg["pnl"],
+                "avg_trade": agg["pnl"] / trades_count
+            }
+    
+        response = {
+            "by_symbol": by_symbol,
+            "best_symbol": max(by_symbol.items(), key=lambda x: x[1]['win_rate']) if by_symbol else None,
+            "worst_symbol": min(by_symbol.items(), key=lambda x: x[1]['win_rate']) if by_symbol else None
         }
+        return response
     
-    response = {
-        "by_symbol": by_symbol,
-        "best_symbol": max(by_symbol.items(), key=lambda x: x[1]['win_rate']) if by_symbol else None,
-        "worst_symbol": min(by_symbol.items(), key=lambda x: x[1]['win_rate']) if by_symbol else None
-    }
-    
-    get_cache().set(cache_key, response, ttl=3600)
-    return response
+    return get_cache().get_or_load(f"symbol_perf_{days}", _load, ttl=3600)
 
 
 @router.get("/performance/hourly")
-async def get_hourly_performance(
+def get_hourly_performance(
     days: int = Query(7, ge=1, le=30)
 ) -> Dict[str, Any]:
     """
     Get hourly performance analysis.
     
-    Returns win rate and trade count by hour of day
+    Returns win rate and trade count by hour of day (folded from the
+    calendar-hour rollups)
     """
-    cache_key = f"hourly_perf_{days}"
-    cached = get_cache().get(cache_key)
-    if cached:
-        return cached
-    
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    trades = db.get_trades(since=cutoff)
-    
-    if not trades:
-        return {"by_hour": {}}
-    
-    df = pd.DataFrame(trades)
-    df['hour'] = pd.to_datetime(df['open_timestamp']).dt.hour
-    
-    by_hour = {}
-    for hour, group in df.groupby('hour'):
-        trades_count = len(group)
-        wins = sum(1 for _, t in group.iterrows() if t['profit'] > 0)
-        pnl = group['profit'].sum()
-        
-        by_hour[str(hour)] = {
-            "trades": trades_count,
-            "wins": wins,
-            "win_rate": wins / trades_count if trades_count > 0 else 0,
-            "pnl": pnl,
-            "avg_trade": pnl / trades_count if trades_count > 0 else 0
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        cutoff = datetime.now() - timedelta(days=days)
+        buckets = db.get_performance_rollups("hourly", cutoff)
+    
+        if not buckets:
+            return {"by_hour": {}}
+    
+        totals: Dict[int, Dict[str, float]] = {}
+        for b in buckets:
+            hour = int(b["bucket"][11:13])
+            agg = totals.setdefault(hour, {"trades": 0, "wins": 0, "pnl": 0.0})
+            agg["trades"] += b["total_trades"]
+            agg["wins"] += b["winning_trades"]
+            agg["pnl"] += b["net_profit"]
+    
+        by_hour = {}
+        for hour in sorted(totals):
+            agg = totals[hour]
+            trades_count = agg["trades"]
+            if trades_count <= 0:
+                continue
+            by_hour[str(hour)] = {
+                "trades": trades_count,
+                "wins": agg["wins"],
+                "win_rate": agg["wins"] / trades_count,
+                "pnl": agg["pnl"],
+                "avg_trade": agg["pnl"] / trades_count
+            }
+    
+        response = {
+            "by_hour": by_hour,
+            "best_hour": max(by_hour.items(), key=lambda x: x[1]['win_rate']) if by_hour else None,
         }
+        return response
     
-    response = {
-        "by_hour": by_hour,
-        "best_hour": max(by_hour.items(), key=lambda x: x[1]['win_rate']) if by_hour else None,
-    }
+    return get_cache().get_or_load(f"hourly_perf_{days}", _load, ttl=3600)
+
+
+@router.get("/execution/latency")
+def get_execution_latency(
+    days: int = Query(1, ge=1, le=30),
+    symbol: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Order latency and fill quality.
+    
+    Returns latency percentiles, slippage / drift against the decision delay,
+    per-symbol totals and the symbol/hour buckets
+    """
+    def _load() -> Dict[str, Any]:
+        telemetry = get_execution_telemetry()
+        cutoff = datetime.now() - timedelta(days=days)
+        buckets = telemetry.rollups(cutoff, symbol)
+    
+        by_symbol: Dict[str, Dict[str, float]] = {}
+        for b in buckets:
+            agg = by_symbol.setdefault(b["symbol"], {"orders": 0, "fills": 0, "requotes": 0,
+                                                     "sum_send_ms": 0.0, "slipped": 0, "sum_slippage": 0.0})
+            for key in agg:
+                agg[key] += b[key]
+        for agg in by_symbol.values():
+            agg["avg_send_ms"] = agg.pop("sum_send_ms") / agg["orders"] if agg["orders"] else 0.0
+            slipped, total = agg.pop("slipped"), agg.pop("sum_slippage")
+            agg["avg_slippage_points"] = total / slipped if slipped else 0.0
+    
+        return {
+            "summary": telemetry.latency_cost(cutoff, symbol),
+            "by_symbol": by_symbol,
+            "hourly": buckets,
+        }
     
-    get_cache().set(cache_key, response, ttl=3600)
-    return response
+    return get_cache().get_or_load(f"execution_latency_{days}_{symbol}", _load, ttl=60)
 
 
 # ============================================================================
@@ -280,7 +365,7 @@ async def apply_optimization(params: Dict[str, Any]) -> Dict[str, Any]:
 # ============================================================================
 
 @router.get("/analysis/winning-trades")
-async def get_winning_trades(
+def get_winning_trades(
     days: int = Query(7, ge=1, le=90),
     limit: int = Query(10, ge=1, le=100)
 ) -> Dict[str, Any]:
@@ -289,34 +374,29 @@ async def get_winning_trades(
     
     Returns top N winning trades sorted by profit
     """
-    cache_key = f"winning_{days}_{limit}"
-    cached = get_cache().get(cache_key)
-    if cached:
-        return cached
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        trades = db.get_trades(days=days)
     
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    trades = db.get_trades(since=cutoff)
-    
-    if not trades:
-        return {"trades": [], "total": 0}
+        if not trades:
+            return {"trades": [], "total": 0}
     
-    df = pd.DataFrame(trades)
-    winning = df[df['profit'] > 0].nlargest(limit, 'profit')
+        df = pd.DataFrame(trades)
+        winning = df[df['profit'] > 0].nlargest(limit, 'profit')
     
-    response = {
-        "trades": winning.to_dict('records'),
-        "total": len(df[df['profit'] > 0]),
-        "avg_winning_trade": winning['profit'].mean(),
-        "total_winning_pnl": winning['profit'].sum()
-    }
+        response = {
+            "trades": winning.to_dict('records'),
+            "total": len(df[df['profit'] > 0]),
+            "avg_winning_trade": winning['profit'].mean(),
+            "total_winning_pnl": winning['profit'].sum()
+        }
+        return response
     
-    get_cache().set(cache_key, response, ttl=3600)
-    return response
+    return get_cache().get_or_load(f"winning_{days}_{limit}", _load, ttl=3600)
 
 
 @router.get("/analysis/losing-trades")
-async def get_losing_trades(
+def get_losing_trades(
     days: int = Query(7, ge=1, le=90),
     limit: int = Query(10, ge=1, le=100)
 ) -> Dict[str, Any]:
@@ -325,34 +405,29 @@ async def get_losing_trades(
     
     Returns bottom N losing trades sorted by loss
     """
-    cache_key = f"losing_{days}_{limit}"
-    cached = get_cache().get(cache_key)
-    if cached:
-        return cached
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        trades = db.get_trades(days=days)
     
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    trades = db.get_trades(since=cutoff)
-    
-    if not trades:
-        return {"trades": [], "total": 0}
+        if not trades:
+            return {"trades": [], "total": 0}
     
-    df = pd.DataFrame(trades)
-    losing = df[df['profit'] <= 0].nsmallest(limit, 'profit')
+        df = pd.DataFrame(trades)
+        losing = df[df['profit'] <= 0].nsmallest(limit, 'profit')
     
-    response = {
-        "trades": losing.to_dict('records'),
-        "total": len(df[df['profit'] <= 0]),
-        "avg_losing_trade": losing['profit'].mean(),
-        "total_losing_pnl": losing['profit'].sum()
-    }
+        response = {
+            "trades": losing.to_dict('records'),
+            "total": len(df[df['profit'] <= 0]),
+            "avg_losing_trade": losing['profit'].mean(),
+            "total_losing_pnl": losing['profit'].sum()
+        }
+        return response
     
-    get_cache().set(cache_key, response, ttl=3600)
-    return response
+    return get_cache().get_or_load(f"losing_{days}_{limit}", _load, ttl=3600)
 
 
 @router.get("/analysis/correlation")
-async def get_symbol_correlation(
+def get_symbol_correlation(
     days: int = Query(30, ge=1, le=365)
 ) -> Dict[str, Any]:
     """
@@ -360,39 +435,49 @@ async def get_symbol_correlation(
     
     Returns correlation matrix and insights
     """
-    cache_key = f"correlation_{days}"
-    cached = get_cache().get(cache_key)
-    if cached:
-        return cached
-    
-    db = get_database_manager()
-    cutoff = datetime.now() - timedelta(days=days)
-    trades = db.get_trades(since=cutoff)
-    
-    if not trades:
-        return {"correlation": {}}
-    
-    df = pd.DataFrame(trades)
-    df['date'] = pd.to_datetime(df['open_timestamp']).dt.date
-    
-    # Pivot trades by date and symbol
-    pivot = df.pivot_table(
-        values='profit',
-        index='date',
-        columns='symbol',
-        aggfunc='sum'
-    )
-    
-    # Calculate correlation
-    correlation = pivot.corr().round(3)
+    def _load() -> Dict[str, Any]:
+        db = get_database_manager()
+        cutoff = datetime.now() - timedelta(days=days)
+        buckets = db.get_performance_rollups("symbol_daily", cutoff)
+    
+        if not buckets:
+            return {"correlation": {}}
+    
+        # Daily P&L per symbol straight from the rollups
+        df = pd.DataFrame(buckets)
+        pivot = df.pivot_table(
+            values='net_profit',
+            index='bucket',
+            columns='symbol',
+            aggfunc='sum'
+        )
+    
+        # Calculate correlation
+        correlation = pivot.corr().round(3)
+    
+        response = {
+            "correlation": correlation.to_dict(),
+            "summary": "Analyze which symbols move together"
+        }
+        return response
     
-    response = {
-        "correlation": correlation.to_dict(),
-        "summary": "Analyze which symbols move together"
+    return get_cache().get_or_load(f"correlation_{days}", _load, ttl=3600)
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+@router.get("/storage/report")
+def get_storage_report() -> Dict[str, Any]:
+    """
+    Database size and analysis query latency, plus the before/after report
+    of the last retention run (if any)
+    """
+    return {
+        "current": storage_report(get_database_manager()),
+        "last_run": get_storage_maintenance().last_result,
     }
-    
-    get_cache().set(cache_key, response, ttl=3600)
-    return response
 
 
 # ============================================================================
@@ -409,14 +494,10 @@ async def clear_cache() -> Dict[str, str]:
 
 @router.get("/cache/stats")
 async def get_cache_stats() -> Dict[str, Any]:
-    """Get cache statistics"""
-    cache = get_cache()
-    hist_cache = get_historical_cache()
-    
+    """Get cache statistics (entries, bytes, hit ratio, evictions, coalesced loads)"""
     return {
-        "cache_items": len(cache.cache),
-        "historical_cache_items": len(hist_cache.cache),
-        "cache_memory_usage_mb": sum(len(str(v)) for v in cache.cache.values()) / 1024 / 1024,
+        "cache": get_cache().stats(),
+        "historical_cache": get_historical_cache().stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -1,11 +1,15 @@
 """FastAPI server for remote UI access to trading bot"""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 import uvicorn
 import threading
+import asyncio
+import json
+import time
 from app.core.config import get_config
 from app.core.state import get_state_manager
 from app.core.scheduler import TradingScheduler
@@ -13,7 +17,11 @@ from app.trading.mt5_client import get_mt5_client
 from app.trading.portfolio import get_portfolio_manager
 from app.core.logger import setup_logger
 from app.core.analysis_logger import get_analysis_logger
+from app.core.change_feed import get_change_feed, TOPICS
+from app.core.retention import get_storage_maintenance
 from app.trading.trading_loop import main_trading_loop
+from app.trading.warm_start import get_warm_start
+from app.api.optimized_endpoints import router as optimized_router
 
 logger = setup_logger("api_server")
 
@@ -28,6 +36,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Historical/performance endpoints backed by rollups and caches
+app.include_router(optimized_router)
+
 # Auto-connect to MT5 on startup
 @app.on_event("startup")
 def startup_event():
@@ -51,13 +62,55 @@ def startup_event():
     mt5_thread = threading.Thread(target=connect_mt5_background, daemon=True)
     mt5_thread.start()
     
+    # Publish broker deltas to the change feed for live dashboards
+    feed_thread = threading.Thread(target=publish_broker_changes, daemon=True)
+    feed_thread.start()
+    
+    # analysis_history retention, WAL checkpoint and incremental VACUUM
+    get_storage_maintenance().start()
+    
+    # Cachés del arranque anterior (barras, sentimiento, IA) antes del primer ciclo
+    get_warm_start().restore()
+    
     # Start trading scheduler automatically
     logger.info("🔄 Iniciando scheduler de trading...")
     start_trading_scheduler()
 
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the scheduler and snapshot the caches for the next start"""
+    if _scheduler and _scheduler.is_running():
+        _scheduler.stop()
+    get_warm_start().save()
+
 # Global scheduler instance
 _scheduler: Optional[TradingScheduler] = None
 
+# Broker polling interval for the change feed (seconds)
+CHANGE_FEED_POLL_SECONDS = 2.0
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+def publish_broker_changes(interval: float = CHANGE_FEED_POLL_SECONDS):
+    """
+    Poll MT5 positions/account and push only the deltas to the change feed.
+    
+    Runs in a daemon thread; the feed drops snapshots that did not change,
+    so idle accounts produce no events.
+    """
+    feed = get_change_feed()
+    while True:
+        try:
+            mt5 = get_mt5_client()
+            feed.publish_snapshot("positions", mt5.get_positions(), key="ticket")
+            account_info = mt5.get_account_info()
+            if account_info:
+                feed.publish_state("account", account_info)
+        except Exception as e:
+            logger.debug(f"Change feed poll failed: {e}")
+        time.sleep(interval)
+
 # CORS middleware for Streamlit Cloud
 app.add_middleware(
     CORSMiddleware,
@@ -165,11 +218,66 @@ async def get_decisions(limit: int = 100):
 
 
 @app.get("/trades")
-async def get_trades(limit: int = 100):
-    """Get recent trades"""
+async def get_trades(limit: int = Query(100, ge=1, le=1000), before_id: Optional[int] = None):
+    """Get recent trades; pass `next_cursor` back as `before_id` for the next page"""
     state = get_state_manager()
-    trades = state.get_recent_trades(limit=limit)
-    return {"trades": trades}
+    trades = state.get_recent_trades(limit=limit + 1, before_id=before_id)
+    next_cursor = trades[limit - 1]["id"] if len(trades) > limit else None
+    return {"trades": trades[:limit], "next_cursor": next_cursor}
+
+
+@app.get("/changes")
+async def get_changes(since: int = 0, topics: Optional[str] = None):
+    """Poll change feed events newer than the `since` cursor"""
+    wanted = topics.split(",") if topics else None
+    return get_change_feed().events_since(since, wanted)
+
+
+@app.get("/stream/changes")
+async def stream_changes(request: Request, since: Optional[int] = None, topics: Optional[str] = None):
+    """
+    Server-Sent Events stream of position/account/trade deltas.
+    
+    Clients may resume with `since` (or the Last-Event-ID header); a
+    comment line is sent every SSE_HEARTBEAT_SECONDS to keep proxies open.
+    """
+    feed = get_change_feed()
+    wanted = set(topics.split(",")) if topics else set(TOPICS)
+    last_event_id = request.headers.get("last-event-id")
+    cursor = since if since is not None else int(last_event_id) if last_event_id else feed.seq
+    
+    def format_event(event: Dict[str, Any]) -> str:
+        return f"id: {event['seq']}\nevent: {event['topic']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    async def event_source():
+        queue = feed.subscribe()
+        try:
+            # Replay anything the client missed before subscribing
+            backlog = feed.events_since(cursor, wanted)
+            if backlog["reset"]:
+                yield f"event: reset\ndata: {json.dumps({'versions': backlog['versions']})}\n\n"
+            for event in backlog["events"]:
+                yield format_event(event)
+            last_seq = backlog["cursor"]
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["seq"] <= last_seq or event["topic"] not in wanted:
+                    continue
+                last_seq = event["seq"]
+                yield format_event(event)
+        finally:
+            feed.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/control/kill-switch/activate")
@@ -6,6 +6,7 @@ from app.backtest.historical_engine import (
     BacktestResults
 )
 from app.backtest.data_loader import HistoricalDataLoader
+from app.backtest.monte_carlo import MonteCarloResult, run_monte_carlo
 from app.backtest.visualizer import BacktestVisualizer, get_visualizer
 
 __all__ = [
@@ -13,6 +14,8 @@ __all__ = [
     'BacktestTrade',
     'BacktestResults',
     'HistoricalDataLoader',
+    'MonteCarloResult',
+    'run_monte_carlo',
     'BacktestVisualizer',
     'get_visualizer'
 ]
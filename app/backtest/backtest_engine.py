@@ -7,8 +7,8 @@ Provides detailed performance analysis
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple, Optional
-from pathlib import Path
 import json
+from app.core.config import state_file
 from app.core.logger import setup_logger
 from app.core.database import get_database_manager
 from app.ai.ticker_indicator_optimizer import get_ticker_indicator_optimizer
@@ -22,7 +22,7 @@ class BacktestEngine:
     def __init__(self):
         self.db = get_database_manager()
         self.indicator_optimizer = get_ticker_indicator_optimizer()
-        self.results_file = Path(__file__).parent.parent.parent / "data" / "backtest_results.json"
+        self.results_file = state_file("backtest_results.json")
         self.results_file.parent.mkdir(parents=True, exist_ok=True)
         
     def backtest_symbol(
@@ -1,11 +1,11 @@
 """Data loader for historical backtesting - Downloads data from MT5"""
 
 import pandas as pd
-import MetaTrader5 as mt5
 from datetime import datetime, timedelta
 from typing import Optional, List
 from app.core.logger import setup_logger
 from app.trading.mt5_client import get_mt5_client
+from app.trading.data import TIMEFRAME_MAP, get_timeframe_constant
 
 logger = setup_logger("backtest_data")
 
@@ -16,16 +16,8 @@ class HistoricalDataLoader:
     def __init__(self):
         self.mt5_client = get_mt5_client()
         
-        # Timeframe mapping
-        self.timeframe_map = {
-            'M1': mt5.TIMEFRAME_M1,
-            'M5': mt5.TIMEFRAME_M5,
-            'M15': mt5.TIMEFRAME_M15,
-            'M30': mt5.TIMEFRAME_M30,
-            'H1': mt5.TIMEFRAME_H1,
-            'H4': mt5.TIMEFRAME_H4,
-            'D1': mt5.TIMEFRAME_D1,
-        }
+        # Timeframe mapping (MT5 constants, or demo-mode stand-ins)
+        self.timeframe_map = dict(TIMEFRAME_MAP)
     
     def load_data(
         self,
@@ -52,7 +44,7 @@ class HistoricalDataLoader:
                 self.mt5_client.connect()
             
             # Get timeframe constant
-            tf = self.timeframe_map.get(timeframe, mt5.TIMEFRAME_M15)
+            tf = get_timeframe_constant(timeframe)
             
             logger.info(f"Loading {symbol} {timeframe} data from {start_date} to {end_date}")
             
@@ -114,7 +106,7 @@ class HistoricalDataLoader:
             if not self.mt5_client.is_connected():
                 self.mt5_client.connect()
             
-            tf = self.timeframe_map.get(timeframe, mt5.TIMEFRAME_M15)
+            tf = get_timeframe_constant(timeframe)
             
             # Get last 10 bars to find latest date (using centralized method)
             latest_bars = self.mt5_client.get_rates(symbol, tf, count=10)
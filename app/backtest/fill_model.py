@@ -0,0 +1,99 @@
+"""
+Intrabar fill model for the historical backtest.
+
+With only signal-timeframe bars, a bar whose range spans both the stop loss
+and the take profit is ambiguous. Given finer data (M1 bars or ticks)
+covering the same period, `IntrabarFills` replays the sub-bars inside each
+signal bar and reports which level was touched first.
+
+The finer data is converted once into contiguous NumPy arrays; each lookup
+is a binary search for the bar's sub-range plus a vectorized first-touch
+scan over that slice, done in fixed-size chunks so long holding periods over
+months of M1 data do not materialize large temporaries.
+
+Prices are bid prices (as MT5 rates are). Long positions exit on the bid;
+short positions exit on the ask, modeled as bid + spread.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.trading.symbol_specs import SymbolSpec
+
+
+@dataclass
+class IntrabarExit:
+    """First SL/TP touch inside a window of sub-bars"""
+    reason: str  # SL or TP
+    price: float
+    time: pd.Timestamp
+    ambiguous: bool = False  # Both levels inside the same sub-bar (SL assumed)
+
+
+class IntrabarFills:
+    """First-touch resolution of SL/TP on M1 bars or ticks"""
+
+    def __init__(self, data: pd.DataFrame, spec: SymbolSpec, chunk_size: int = 4096):
+        """
+        Args:
+            data: Sub-bars with columns time, high, low (M1 rates) or time, bid (ticks)
+            spec: Symbol spec (spread is applied to short exits)
+            chunk_size: Sub-bars scanned per vectorized step
+        """
+        data = data.sort_values('time')
+        self.times = pd.to_datetime(data['time']).to_numpy(dtype='datetime64[ns]')
+        if 'bid' in data.columns and 'high' not in data.columns:
+            prices = data['bid'].to_numpy(dtype=np.float64)
+            self.highs = self.lows = prices
+        else:
+            self.highs = data['high'].to_numpy(dtype=np.float64)
+            self.lows = data['low'].to_numpy(dtype=np.float64)
+        self.spec = spec
+        self.chunk_size = max(1, chunk_size)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def covers(self, start, end) -> bool:
+        """True if at least one sub-bar falls in [start, end)"""
+        lo, hi = self._range(start, end)
+        return hi > lo
+
+    def _range(self, start, end):
+        start = np.datetime64(pd.Timestamp(start), 'ns')
+        end = np.datetime64(pd.Timestamp(end), 'ns')
+        return (int(np.searchsorted(self.times, start, side='left')),
+                int(np.searchsorted(self.times, end, side='left')))
+
+    def first_touch(self, direction: str, sl_price: float, tp_price: float,
+                    start, end) -> Optional[IntrabarExit]:
+        """
+        First SL or TP touch for a position during [start, end)
+
+        Returns None if neither level is reached (or no sub-bars cover the window).
+        """
+        lo, hi = self._range(start, end)
+        spread = self.spec.spread
+        for chunk_start in range(lo, hi, self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, hi)
+            highs = self.highs[chunk_start:chunk_end]
+            lows = self.lows[chunk_start:chunk_end]
+            if direction == "BUY":
+                sl_hit = lows <= sl_price
+                tp_hit = highs >= tp_price
+            else:
+                sl_hit = highs + spread >= sl_price
+                tp_hit = lows + spread <= tp_price
+
+            touched = sl_hit | tp_hit
+            if not touched.any():
+                continue
+            k = int(np.argmax(touched))
+            when = pd.Timestamp(self.times[chunk_start + k])
+            if sl_hit[k]:
+                return IntrabarExit("SL", sl_price, when, ambiguous=bool(tp_hit[k]))
+            return IntrabarExit("TP", tp_price, when)
+        return None
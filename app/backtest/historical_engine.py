@@ -6,6 +6,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from app.core.logger import setup_logger
+from app.backtest.monte_carlo import MonteCarloResult, run_monte_carlo
+from app.backtest.fill_model import IntrabarFills
+from app.trading.symbol_specs import SymbolSpec, SymbolSpecCache, get_symbol_specs
 from app.trading.strategy import TradingStrategy, calculate_rsi, calculate_atr
 from app.trading.risk import RiskManager
 from app.ai.gemini_client import get_gemini_client
@@ -77,13 +80,25 @@ class BacktestResults:
     
     # Strategy parameters used
     parameters: Dict = field(default_factory=dict)
+    
+    def monte_carlo(self, n_paths: int = 10000, method: str = "bootstrap", **kwargs) -> MonteCarloResult:
+        """Resample this run's trades into `n_paths` equity paths (see app.backtest.monte_carlo)"""
+        return run_monte_carlo(
+            [t.profit for t in self.trades],
+            initial_balance=self.parameters.get('initial_balance', 10000.0),
+            n_paths=n_paths,
+            method=method,
+            **kwargs,
+        )
 
 
 class HistoricalBacktestEngine:
     """Engine for backtesting strategies on historical data"""
     
-    def __init__(self, initial_balance: float = 10000.0):
+    def __init__(self, initial_balance: float = 10000.0, symbol_specs: Optional[SymbolSpecCache] = None):
         self.initial_balance = initial_balance
+        self.symbol_specs = symbol_specs
+        self._specs: Dict[str, SymbolSpec] = {}
         self.strategy = TradingStrategy()
         self.risk = RiskManager()
         self.gemini = get_gemini_client()
@@ -114,7 +129,8 @@ class HistoricalBacktestEngine:
         max_positions: int = 1,
         risk_per_trade: float = 2.0,
         max_holding_bars: int = 100,
-        use_ai_prompt_adjustments: bool = True
+        use_ai_prompt_adjustments: bool = True,
+        intrabar_data: Optional[pd.DataFrame] = None
     ) -> BacktestResults:
         """
         Run backtest on historical data
@@ -128,6 +144,8 @@ class HistoricalBacktestEngine:
             max_positions: Maximum concurrent positions
             risk_per_trade: Risk per trade as % of equity
             max_holding_bars: Maximum bars to hold a position
+            intrabar_data: Optional M1 bars (time, high, low) or ticks (time, bid)
+                covering the period; SL/TP hits are then resolved in sub-bar order
             
         Returns:
             BacktestResults object
@@ -155,9 +173,16 @@ class HistoricalBacktestEngine:
             'initial_balance': self.initial_balance,
             'max_positions': max_positions,
             'risk_per_trade': risk_per_trade,
-            'max_holding_bars': max_holding_bars
+            'max_holding_bars': max_holding_bars,
+            'intrabar': intrabar_data is not None
         }
         
+        # Contract size, spread and commission for this symbol
+        spec = self._spec(symbol)
+        fills = IntrabarFills(intrabar_data, spec) if intrabar_data is not None else None
+        bar_times = data['time'].reset_index(drop=True)
+        bar_delta = bar_times.diff().median()
+        
         equity = self.initial_balance
         peak_equity = self.initial_balance
         open_trades: List[BacktestTrade] = []
@@ -251,35 +276,17 @@ class HistoricalBacktestEngine:
                         logger.warning(f"AI risk adjustment failed: {e}")
             
             # Update open positions
+            bar_end = bar_times.iloc[i + 1] if i + 1 < len(bar_times) else current_time + bar_delta
             for trade in open_trades[:]:
-                # Check stop loss
-                if trade.direction == "BUY":
-                    if current_bar['low'] <= trade.sl_price:
-                        self._close_trade(trade, trade.sl_price, current_time, i - trade.duration_bars, "SL")
-                        results.trades.append(trade)
-                        open_trades.remove(trade)
-                        equity += trade.profit
-                        continue
-                    # Check take profit
-                    if current_bar['high'] >= trade.tp_price:
-                        self._close_trade(trade, trade.tp_price, current_time, i - trade.duration_bars, "TP")
-                        results.trades.append(trade)
-                        open_trades.remove(trade)
-                        equity += trade.profit
-                        continue
-                else:  # SELL
-                    if current_bar['high'] >= trade.sl_price:
-                        self._close_trade(trade, trade.sl_price, current_time, i - trade.duration_bars, "SL")
-                        results.trades.append(trade)
-                        open_trades.remove(trade)
-                        equity += trade.profit
-                        continue
-                    if current_bar['low'] <= trade.tp_price:
-                        self._close_trade(trade, trade.tp_price, current_time, i - trade.duration_bars, "TP")
-                        results.trades.append(trade)
-                        open_trades.remove(trade)
-                        equity += trade.profit
-                        continue
+                # Check stop loss / take profit
+                hit = self._find_exit(trade, current_bar, current_time, bar_end, fills, spec)
+                if hit is not None:
+                    reason, exit_price, exit_time = hit
+                    self._close_trade(trade, exit_price, exit_time, i - trade.duration_bars, reason)
+                    results.trades.append(trade)
+                    open_trades.remove(trade)
+                    equity += trade.profit
+                    continue
                 
                 # Update MAE/MFE
                 if trade.direction == "BUY":
@@ -295,7 +302,8 @@ class HistoricalBacktestEngine:
                 
                 # Close if holding too long
                 if trade.duration_bars >= max_holding_bars:
-                    self._close_trade(trade, current_price, current_time, trade.duration_bars, "TIMEOUT")
+                    exit_price = current_price + (spec.spread if trade.direction == "SELL" else 0.0)
+                    self._close_trade(trade, exit_price, current_time, trade.duration_bars, "TIMEOUT")
                     results.trades.append(trade)
                     open_trades.remove(trade)
                     equity += trade.profit
@@ -338,7 +346,8 @@ class HistoricalBacktestEngine:
                     # 🔥 CLAMP TO MINIMUM LOT SIZE (avoid 0.01 trap)
                     volume = self.risk.clamp_volume_to_minimum(symbol, volume)
                     
-                    # Create trade
+                    # Create trade (longs are filled at the ask)
+                    entry_price = current_price + spec.spread if signal == "BUY" else current_price
                     if signal == "BUY":
                         sl_price = current_price - (atr * ticker_params['atr_multiplier_sl'])
                         tp_price = current_price + (atr * ticker_params['atr_multiplier_tp'])
@@ -350,7 +359,7 @@ class HistoricalBacktestEngine:
                         entry_time=current_time,
                         symbol=symbol,
                         direction=signal,
-                        entry_price=current_price,
+                        entry_price=entry_price,
                         volume=volume,
                         sl_price=sl_price,
                         tp_price=tp_price,
@@ -376,7 +385,8 @@ class HistoricalBacktestEngine:
         final_price = data.iloc[-1]['close']
         final_time = data.iloc[-1]['time']
         for trade in open_trades:
-            self._close_trade(trade, final_price, final_time, trade.duration_bars, "END")
+            exit_price = final_price + (spec.spread if trade.direction == "SELL" else 0.0)
+            self._close_trade(trade, exit_price, final_time, trade.duration_bars, "END")
             results.trades.append(trade)
             equity += trade.profit
         
@@ -387,6 +397,32 @@ class HistoricalBacktestEngine:
         
         return results
     
+    def _spec(self, symbol: str) -> SymbolSpec:
+        """Cached per-symbol contract metadata"""
+        if symbol not in self._specs:
+            self._specs[symbol] = (self.symbol_specs or get_symbol_specs()).get(symbol)
+        return self._specs[symbol]
+    
+    def _find_exit(self, trade: BacktestTrade, bar: pd.Series, bar_time: datetime, bar_end: datetime,
+                   fills: Optional[IntrabarFills], spec: SymbolSpec) -> Optional[Tuple[str, float, datetime]]:
+        """SL/TP hit during this bar as (reason, price, time), or None"""
+        if fills is not None and fills.covers(bar_time, bar_end):
+            hit = fills.first_touch(trade.direction, trade.sl_price, trade.tp_price, bar_time, bar_end)
+            return (hit.reason, hit.price, hit.time) if hit else None
+        
+        # Bar-level fallback: SL is assumed to come first when both are in range
+        if trade.direction == "BUY":
+            if bar['low'] <= trade.sl_price:
+                return "SL", trade.sl_price, bar_time
+            if bar['high'] >= trade.tp_price:
+                return "TP", trade.tp_price, bar_time
+        else:  # SELL (exits on the ask)
+            if bar['high'] + spec.spread >= trade.sl_price:
+                return "SL", trade.sl_price, bar_time
+            if bar['low'] + spec.spread <= trade.tp_price:
+                return "TP", trade.tp_price, bar_time
+        return None
+    
     def _close_trade(self, trade: BacktestTrade, exit_price: float, exit_time: datetime, duration: int, reason: str):
         """Close a trade and calculate profit"""
         trade.exit_time = exit_time
@@ -394,19 +430,17 @@ class HistoricalBacktestEngine:
         trade.exit_reason = reason
         trade.duration_bars = duration
         
-        if trade.direction == "BUY":
-            trade.profit = (exit_price - trade.entry_price) * trade.volume * 100000  # Assuming forex pip value
-        else:
-            trade.profit = (trade.entry_price - exit_price) * trade.volume * 100000
-        
-        trade.profit_pct = (trade.profit / (trade.entry_price * trade.volume * 100000)) * 100
+        spec = self._spec(trade.symbol)
+        trade.profit = spec.profit(trade.direction, trade.entry_price, exit_price, trade.volume)
+        trade.profit_pct = (trade.profit / (trade.entry_price * trade.volume * spec.contract_size)) * 100
     
     def _calculate_unrealized_pnl(self, trade: BacktestTrade, current_price: float) -> float:
         """Calculate unrealized P&L for open trade"""
+        contract_size = self._spec(trade.symbol).contract_size
         if trade.direction == "BUY":
-            return (current_price - trade.entry_price) * trade.volume * 100000
+            return (current_price - trade.entry_price) * trade.volume * contract_size
         else:
-            return (trade.entry_price - current_price) * trade.volume * 100000
+            return (trade.entry_price - current_price) * trade.volume * contract_size
     
     def _calculate_metrics(self, results: BacktestResults, final_equity: float):
         """Calculate all performance metrics"""
@@ -3,6 +3,7 @@
 from typing import List, Dict, Any
 import pandas as pd
 import numpy as np
+from app.backtest.monte_carlo import run_monte_carlo
 
 
 def calculate_metrics(trades: List[Dict[str, Any]]) -> Dict[str, float]:
@@ -79,3 +80,28 @@ def calculate_metrics(trades: List[Dict[str, Any]]) -> Dict[str, float]:
         "max_drawdown": max_drawdown,
         "sharpe_ratio": sharpe_ratio,
     }
+
+
+def calculate_monte_carlo_metrics(
+    trades: List[Dict[str, Any]],
+    n_paths: int = 10000,
+    method: str = "bootstrap",
+    initial_balance: float = 10000.0,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Distributions behind the point estimates of `calculate_metrics`
+    
+    Args:
+        trades: List of trade dicts with key pnl, in trade order
+        n_paths: Number of resampled paths
+        method: "bootstrap" or "permutation"
+        initial_balance: Starting equity
+    
+    Returns:
+        Dict with drawdown/final equity distributions, ruin probability and
+        profit factor / Sharpe confidence intervals
+    """
+    pnls = [t.get("pnl", 0.0) for t in trades]
+    return run_monte_carlo(pnls, initial_balance=initial_balance, n_paths=n_paths,
+                           method=method, **kwargs).to_dict()
@@ -0,0 +1,373 @@
+"""
+Fast parameter search over historical bars.
+
+Candidates are evaluated with a vectorized backtest of the per-ticker
+indicator strategy (EMA trend filter + RSI pullback entries, ATR stop and
+target). Indicator columns are computed once per distinct period and shared
+by every candidate through `IndicatorCache`, and candidates are evaluated in
+parallel. Search is grid, random, or Bayesian (a Tree-structured Parzen
+Estimator over the discrete ranges, so no extra dependency is needed).
+"""
+
+import itertools
+import math
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.logger import setup_logger
+from app.trading.strategy import calculate_atr, calculate_ema, calculate_rsi
+
+logger = setup_logger("param_search")
+
+Params = Dict[str, Any]
+
+SEARCH_METHODS = ("grid", "random", "bayesian")
+
+# Take-profit distance as a multiple of the stop distance
+# (RiskManager.ATR_MULTIPLIER_TP / ATR_MULTIPLIER_SL)
+REWARD_RATIO = 2.0 / 1.5
+
+# Parameters used when a ticker has no optimized set
+DEFAULT_INDICATOR_PARAMS: Params = {
+    "rsi_buy": 35,
+    "rsi_sell": 65,
+    "ema_fast_period": 12,
+    "ema_slow_period": 26,
+    "atr_multiplier": 2.0,
+}
+
+
+class IndicatorCache:
+    """
+    Indicator columns for one bar series, computed once per (name, period).
+
+    Candidates that share a period (e.g. the same slow EMA) reuse the same
+    array instead of recomputing it.
+    """
+
+    def __init__(self, bars: pd.DataFrame, rsi_period: int = 14, atr_period: int = 14):
+        self.close = bars["close"].to_numpy(dtype=float)
+        self.high = bars["high"].to_numpy(dtype=float)
+        self.low = bars["low"].to_numpy(dtype=float)
+        self._bars = bars
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self._columns: Dict[Tuple[str, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def _get(self, name: str, period: int, compute: Callable[[], pd.Series]) -> np.ndarray:
+        key = (name, period)
+        column = self._columns.get(key)
+        if column is None:
+            with self._lock:
+                column = self._columns.get(key)
+                if column is None:
+                    column = compute().to_numpy(dtype=float)
+                    self._columns[key] = column
+                    self.computed += 1
+        return column
+
+    def ema(self, period: int) -> np.ndarray:
+        return self._get("ema", period, lambda: calculate_ema(self._bars["close"], period))
+
+    def rsi(self, period: Optional[int] = None) -> np.ndarray:
+        period = period or self.rsi_period
+        return self._get("rsi", period, lambda: calculate_rsi(self._bars["close"], period))
+
+    def atr(self, period: Optional[int] = None) -> np.ndarray:
+        period = period or self.atr_period
+        return self._get("atr", period, lambda: calculate_atr(
+            self._bars["high"], self._bars["low"], self._bars["close"], period))
+
+    def warm(self, space: Dict[str, Sequence[Any]]):
+        """Compute every column `space` can touch, so parallel readers never compute"""
+        for period in set(space.get("ema_fast_period", [])) | set(space.get("ema_slow_period", [])):
+            self.ema(int(period))
+        self.rsi()
+        self.atr()
+
+
+def _first_hit(mask: np.ndarray) -> np.ndarray:
+    """Index of the first True per row, or the row length when none"""
+    any_hit = mask.any(axis=1)
+    return np.where(any_hit, mask.argmax(axis=1), mask.shape[1])
+
+
+def entry_signals(cache: IndicatorCache, params: Params,
+                  start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """
+    Entry direction per bar of bars[start:stop]: +1 long, -1 short, 0 none
+
+    A long setup is fast EMA above slow with RSI <= rsi_buy, a short setup
+    fast below slow with RSI >= rsi_sell; the entry is the first bar of a
+    setup.
+    """
+    window = slice(start, stop)
+    ema_fast = cache.ema(int(params["ema_fast_period"]))[window]
+    ema_slow = cache.ema(int(params["ema_slow_period"]))[window]
+    rsi = cache.rsi()[window]
+    atr = cache.atr()[window]
+
+    valid = ~(np.isnan(rsi) | np.isnan(atr)) & (atr > 0)
+    long_setup = valid & (ema_fast > ema_slow) & (rsi <= params["rsi_buy"])
+    short_setup = valid & (ema_fast < ema_slow) & (rsi >= params["rsi_sell"])
+    long_entry = long_setup & ~np.concatenate(([False], long_setup[:-1]))
+    short_entry = short_setup & ~np.concatenate(([False], short_setup[:-1]))
+    return long_entry.astype(np.int8) - short_entry.astype(np.int8)
+
+
+def backtest_params(cache: IndicatorCache, params: Params, max_holding_bars: int = 100,
+                    cost_pct: float = 0.0, min_trades: int = 5,
+                    start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Vectorized backtest of one parameter set.
+
+    Entries are taken on the bar where the setup first appears (long: fast
+    EMA above slow and RSI <= rsi_buy; short: fast below slow and RSI >=
+    rsi_sell) and filled at that bar's close. The stop sits
+    `atr_multiplier` ATRs away and the target REWARD_RATIO times further;
+    if both are touched in the same bar the stop is assumed first. One
+    position is open at a time. Returns per-trade returns (fraction of
+    entry price, net of `cost_pct`) and summary metrics with a `score`.
+
+    `start`/`stop` restrict trading to bars[start:stop]; indicators are
+    still computed on the full series (they are causal), so windows do not
+    pay a warm-up period.
+    """
+    window = slice(start, stop)
+    atr = cache.atr()[window]
+    close, high, low = cache.close[window], cache.high[window], cache.low[window]
+    n = len(close)
+    if n < 2:
+        return summarize_returns(np.empty(0), min_trades)
+
+    signals = entry_signals(cache, params, start, stop)
+
+    # Entries need at least one following bar to be resolved
+    entries = np.flatnonzero(signals[:-1])
+    if entries.size == 0:
+        return summarize_returns(np.empty(0), min_trades)
+
+    horizon = min(max_holding_bars, n - 1)
+    # Forward windows of high/low after each entry, padded at the end
+    pad = horizon
+    highs = np.concatenate((high[1:], np.full(pad, np.nan)))
+    lows = np.concatenate((low[1:], np.full(pad, np.nan)))
+    window_high = np.lib.stride_tricks.sliding_window_view(highs, horizon)[entries]
+    window_low = np.lib.stride_tricks.sliding_window_view(lows, horizon)[entries]
+
+    direction = signals[entries].astype(float)
+    entry_price = close[entries]
+    stop_dist = atr[entries] * float(params.get("atr_multiplier", 2.0))
+    stop_price = entry_price - direction * stop_dist
+    target_price = entry_price + direction * stop_dist * REWARD_RATIO
+
+    is_long = (direction > 0)[:, None]
+    stop_hit = np.where(is_long, window_low <= stop_price[:, None], window_high >= stop_price[:, None])
+    target_hit = np.where(is_long, window_high >= target_price[:, None], window_low <= target_price[:, None])
+    first_stop = _first_hit(stop_hit)
+    first_target = _first_hit(target_hit)
+
+    # Bars remaining before the data ends (timeouts exit at that close)
+    available = np.minimum(horizon, n - 1 - entries)
+    exit_offset = np.minimum(np.minimum(first_stop, first_target), available - 1)
+    exit_bar = entries + 1 + exit_offset
+    exit_price = np.where(
+        first_stop <= exit_offset, stop_price,
+        np.where(first_target <= exit_offset, target_price, close[exit_bar]),
+    )
+    returns = direction * (exit_price - entry_price) / entry_price - cost_pct
+
+    # One position at a time: drop entries taken while a trade is open
+    keep = np.zeros(entries.size, dtype=bool)
+    free_from = -1
+    for i in range(entries.size):
+        if entries[i] > free_from:
+            keep[i] = True
+            free_from = exit_bar[i]
+    return summarize_returns(returns[keep], min_trades)
+
+
+def summarize_returns(returns: np.ndarray, min_trades: int = 5) -> Dict[str, Any]:
+    """Metrics for a sequence of per-trade returns (score is 0 below `min_trades`)"""
+    trades = int(returns.size)
+    if trades == 0:
+        return {"trades": 0, "win_rate": 0.0, "profit_factor": 0.0, "total_return": 0.0,
+                "max_drawdown": 0.0, "sharpe": 0.0, "score": 0.0, "returns": returns}
+    wins = returns[returns > 0]
+    losses = returns[returns < 0]
+    gross_loss = -losses.sum()
+    equity = np.cumsum(returns)
+    drawdown = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity
+    std = returns.std(ddof=1) if trades > 1 else 0.0
+    sharpe = float(returns.mean() / std) if std > 0 else 0.0
+    # t-statistic of the mean trade: rewards edge and sample size together
+    score = sharpe * math.sqrt(trades) if trades >= min_trades else 0.0
+    return {
+        "trades": trades,
+        "win_rate": float(wins.size / trades),
+        "profit_factor": float(wins.sum() / gross_loss) if gross_loss > 0 else float(wins.size > 0),
+        "total_return": float(equity[-1]),
+        "max_drawdown": float(drawdown.max()),
+        "sharpe": sharpe,
+        "score": float(score),
+        "returns": returns,
+    }
+
+
+def valid_indicator_params(params: Params) -> bool:
+    """Reject inconsistent combinations (fast EMA must be faster, RSI bands ordered)"""
+    return (params["ema_fast_period"] < params["ema_slow_period"]
+            and params["rsi_buy"] < params["rsi_sell"])
+
+
+class ParameterSearch:
+    """
+    Search a discrete parameter space for the highest `score`.
+
+    `space` maps parameter names to candidate values (e.g.
+    TickerIndicatorOptimizer.test_ranges). Bayesian search evaluates
+    `n_startup` random candidates, then repeatedly splits the results into
+    the best `gamma` fraction and the rest and proposes the candidate that
+    maximizes l(x)/g(x) under per-parameter categorical densities (TPE).
+    Each round proposes `max_workers` candidates, evaluated in parallel.
+    """
+
+    def __init__(self, space: Dict[str, Sequence[Any]], evaluate: Callable[[Params], Dict[str, Any]],
+                 method: str = "bayesian", n_iter: int = 60, n_startup: int = 15,
+                 gamma: float = 0.25, max_workers: int = 4, seed: Optional[int] = None,
+                 constraint: Callable[[Params], bool] = lambda p: True):
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method {method!r} (expected one of {SEARCH_METHODS})")
+        self.space = {k: list(v) for k, v in space.items()}
+        self.evaluate = evaluate
+        self.method = method
+        self.n_iter = n_iter
+        self.n_startup = n_startup
+        self.gamma = gamma
+        self.max_workers = max(1, max_workers)
+        self.constraint = constraint
+        self._rng = random.Random(seed)
+        self.history: List[Tuple[Params, Dict[str, Any]]] = []
+
+    def _key(self, params: Params) -> tuple:
+        return tuple(params[k] for k in self.space)
+
+    def _random_candidate(self) -> Params:
+        return {k: self._rng.choice(v) for k, v in self.space.items()}
+
+    def _grid(self) -> List[Params]:
+        names = list(self.space)
+        combos = (dict(zip(names, values)) for values in itertools.product(*self.space.values()))
+        return [p for p in combos if self.constraint(p)]
+
+    def _sample_unique(self, count: int, seen: set, propose: Callable[[], Params]) -> List[Params]:
+        batch: List[Params] = []
+        for _ in range(count * 50):
+            if len(batch) >= count:
+                break
+            candidate = propose()
+            key = self._key(candidate)
+            if key in seen or not self.constraint(candidate):
+                continue
+            seen.add(key)
+            batch.append(candidate)
+        return batch
+
+    def _tpe_candidate(self, seen: set) -> Params:
+        ranked = sorted(self.history, key=lambda h: h[1]["score"], reverse=True)
+        n_good = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good, bad = ranked[:n_good], ranked[n_good:]
+
+        def density(observations, name):
+            values = self.space[name]
+            counts = {v: 1.0 for v in values}  # Laplace prior
+            for params, _ in observations:
+                counts[params[name]] += 1.0
+            total = sum(counts.values())
+            return {v: c / total for v, c in counts.items()}
+
+        best, best_ratio = None, -1.0
+        l_dens = {name: density(good, name) for name in self.space}
+        g_dens = {name: density(bad, name) for name in self.space}
+        for _ in range(24):
+            candidate = {}
+            ratio = 1.0
+            for name, values in self.space.items():
+                weights = [l_dens[name][v] for v in values]
+                value = self._rng.choices(values, weights=weights)[0]
+                candidate[name] = value
+                ratio *= l_dens[name][value] / g_dens[name][value]
+            if ratio > best_ratio and self._key(candidate) not in seen and self.constraint(candidate):
+                best, best_ratio = candidate, ratio
+        # Densities concentrated on explored points: fall back to exploration
+        return best or self._random_candidate()
+
+    def _evaluate_batch(self, batch: List[Params], pool: ThreadPoolExecutor):
+        for params, result in zip(batch, pool.map(self.evaluate, batch)):
+            self.history.append((params, result))
+
+    def run(self) -> Tuple[Optional[Params], Dict[str, Any]]:
+        """Run the search; returns (best params, best result)"""
+        seen: set = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            if self.method == "grid":
+                self._evaluate_batch(self._grid(), pool)
+            elif self.method == "random":
+                self._evaluate_batch(self._sample_unique(self.n_iter, seen, self._random_candidate), pool)
+            else:
+                startup = min(self.n_startup, self.n_iter)
+                self._evaluate_batch(self._sample_unique(startup, seen, self._random_candidate), pool)
+                while len(self.history) < self.n_iter:
+                    count = min(self.max_workers, self.n_iter - len(self.history))
+                    batch = self._sample_unique(count, seen, lambda: self._tpe_candidate(seen))
+                    if not batch:
+                        break  # space exhausted
+                    self._evaluate_batch(batch, pool)
+
+        if not self.history:
+            return None, {}
+        return max(self.history, key=lambda h: h[1]["score"])
+
+
+def optimize_indicators(bars: Optional[pd.DataFrame], space: Dict[str, Sequence[Any]],
+                        method: str = "bayesian", n_iter: int = 60, max_workers: int = 4,
+                        seed: Optional[int] = None, max_holding_bars: int = 100,
+                        cost_pct: float = 0.0,
+                        cache: Optional[IndicatorCache] = None,
+                        start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Find the best indicator parameters for one bar series.
+
+    Pass `cache` to reuse indicator columns (then `bars` may be None).
+    Only bars[start:stop] are traded (see `backtest_params`). Returns
+    {"params", "metrics", "evaluated", "indicator_columns"}; params is None
+    when no candidate produced a trade.
+    """
+    cache = cache or IndicatorCache(bars)
+    cache.warm(space)
+
+    search = ParameterSearch(
+        space,
+        lambda p: backtest_params(cache, p, max_holding_bars=max_holding_bars, cost_pct=cost_pct,
+                                  start=start, stop=stop),
+        method=method, n_iter=n_iter, max_workers=max_workers, seed=seed,
+        constraint=valid_indicator_params,
+    )
+    best_params, best = search.run()
+    metrics = {k: v for k, v in best.items() if k != "returns"}
+    return {
+        "params": best_params if best.get("trades") else None,
+        "metrics": metrics,
+        "evaluated": len(search.history),
+        "indicator_columns": cache.computed,
+    }
@@ -0,0 +1,277 @@
+"""
+Portfolio backtest: many symbols, one account.
+
+Every symbol's bars are pre-loaded into NumPy arrays and its entry signals
+(the per-ticker EMA/RSI strategy of app.backtest.param_search) are computed
+up front. Candidate entries of all symbols are then merged in time order
+with a heap, and each one goes through the cross-symbol limits of the
+RiskManager (check_exposure_limits, the index form of
+check_portfolio_limits: total exposure, open trade cap, trades per
+currency, the same limits as the live PortfolioLimitsGate) against an
+exposure index of the positions open at that moment. Total exposure is
+computed in the live units (per-trade risk fraction, 0.02 for a major,
+times open positions), so with the default max_total_exposure_pct the
+position caps bind first, as they do live.
+
+A position's exit (SL, TP or timeout) only depends on its own symbol's
+future bars, so it is found with a vectorized forward scan at entry and
+scheduled on a second heap; exits due before a candidate are settled first.
+The loop therefore touches only candidate and exit events, not every bar of
+every symbol. Sizing uses realized equity (open P&L is not marked to
+market).
+"""
+
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.historical_engine import BacktestTrade
+from app.backtest.monte_carlo import MonteCarloResult, run_monte_carlo
+from app.backtest.param_search import (
+    DEFAULT_INDICATOR_PARAMS, REWARD_RATIO, IndicatorCache, Params, entry_signals,
+)
+from app.core.logger import setup_logger
+from app.trading.risk import RiskManager, get_risk_manager
+from app.trading.symbol_specs import SymbolSpec, SymbolSpecCache, get_symbol_specs
+
+logger = setup_logger("portfolio_backtest")
+
+# Same cap as the live trading loop
+MAX_OPEN_TRADES = 12
+
+
+@dataclass
+class SymbolStream:
+    """Pre-loaded arrays for one symbol"""
+    symbol: str
+    times: np.ndarray  # datetime64[ns]
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    atr: np.ndarray
+    signals: np.ndarray  # +1 long, -1 short, 0 none
+    atr_multiplier: float
+    spec: SymbolSpec
+
+    @classmethod
+    def from_bars(cls, symbol: str, bars: pd.DataFrame, params: Params, spec: SymbolSpec) -> "SymbolStream":
+        bars = bars.sort_values('time').reset_index(drop=True)
+        cache = IndicatorCache(bars)
+        return cls(
+            symbol=symbol,
+            times=pd.to_datetime(bars['time']).to_numpy(dtype='datetime64[ns]'),
+            close=cache.close,
+            high=cache.high,
+            low=cache.low,
+            atr=cache.atr(),
+            signals=entry_signals(cache, params),
+            atr_multiplier=float(params.get('atr_multiplier', 2.0)),
+            spec=spec,
+        )
+
+
+@dataclass
+class PortfolioBacktestResult:
+    """Trades, realized equity curve and gate statistics of a portfolio run"""
+    initial_balance: float
+    trades: List[BacktestTrade] = field(default_factory=list)
+    equity_times: List[pd.Timestamp] = field(default_factory=list)
+    equity_curve: List[float] = field(default_factory=list)
+    candidates: int = 0
+    rejections: Dict[str, int] = field(default_factory=dict)
+    max_concurrent_positions: int = 0
+
+    @property
+    def net_profit(self) -> float:
+        return float(sum(t.profit for t in self.trades))
+
+    @property
+    def max_drawdown_pct(self) -> float:
+        if not self.equity_curve:
+            return 0.0
+        equity = np.asarray(self.equity_curve)
+        peak = np.maximum.accumulate(np.maximum(equity, self.initial_balance))
+        return float(((peak - equity) / peak).max() * 100)
+
+    def summary(self) -> Dict[str, Any]:
+        profits = np.array([t.profit for t in self.trades])
+        wins, losses = profits[profits > 0], profits[profits < 0]
+        per_symbol = Counter(t.symbol for t in self.trades)
+        return {
+            "total_trades": len(self.trades),
+            "win_rate": float(wins.size / profits.size * 100) if profits.size else 0.0,
+            "net_profit": self.net_profit,
+            "profit_factor": float(wins.sum() / -losses.sum()) if losses.size else 0.0,
+            "max_drawdown_pct": self.max_drawdown_pct,
+            "final_equity": self.equity_curve[-1] if self.equity_curve else self.initial_balance,
+            "candidates": self.candidates,
+            "rejections": dict(self.rejections),
+            "max_concurrent_positions": self.max_concurrent_positions,
+            "trades_by_symbol": dict(per_symbol),
+        }
+
+    def monte_carlo(self, n_paths: int = 10000, method: str = "bootstrap", **kwargs) -> MonteCarloResult:
+        """Resample the portfolio's trades in exit order (see app.backtest.monte_carlo)"""
+        return run_monte_carlo([t.profit for t in self.trades], initial_balance=self.initial_balance,
+                               n_paths=n_paths, method=method, **kwargs)
+
+
+class PortfolioBacktester:
+    """Event-driven multi-symbol backtest with shared equity and live risk gates"""
+
+    def __init__(
+        self,
+        initial_balance: float = 10000.0,
+        max_open_trades: int = MAX_OPEN_TRADES,
+        max_holding_bars: int = 100,
+        params: Optional[Dict[str, Params]] = None,
+        risk: Optional[RiskManager] = None,
+        symbol_specs: Optional[SymbolSpecCache] = None,
+    ):
+        """
+        Args:
+            initial_balance: Starting equity shared by all symbols
+            max_open_trades: Open position cap (the live loop's MAX_OPEN_TRADES)
+            max_holding_bars: Timeout in bars of the position's symbol
+            params: Indicator parameters per symbol (DEFAULT_INDICATOR_PARAMS otherwise)
+            risk: Risk manager providing the gates and per-symbol risk %
+            symbol_specs: Contract size / spread / commission source
+        """
+        self.initial_balance = initial_balance
+        self.max_open_trades = max_open_trades
+        self.max_holding_bars = max_holding_bars
+        self.params = params or {}
+        self.risk = risk or get_risk_manager()
+        self.symbol_specs = symbol_specs or get_symbol_specs()
+
+    def _volume(self, stream: SymbolStream, equity: float, stop_distance: float) -> float:
+        """Lots risking the symbol's risk % of equity at the stop"""
+        risk_amount = equity * self.risk.get_risk_pct_for_symbol(stream.symbol)
+        volume = risk_amount / (stop_distance * stream.spec.contract_size)
+        is_crypto = any(c in stream.symbol.upper() for c in self.risk.CRYPTO_SYMBOLS)
+        cap = self.risk.crypto_max_volume_lots if is_crypto else self.risk.hard_max_volume_lots
+        return max(round(min(volume, cap), 2), 0.01)
+
+    def _open(self, stream: SymbolStream, k: int, equity: float) -> Tuple[BacktestTrade, int]:
+        """Open at bar k's close; returns the trade (already closed) and its exit bar"""
+        direction = "BUY" if stream.signals[k] > 0 else "SELL"
+        spread = stream.spec.spread
+        entry = stream.close[k] + (spread if direction == "BUY" else 0.0)
+        stop_distance = stream.atr[k] * stream.atr_multiplier
+        sign = 1.0 if direction == "BUY" else -1.0
+        sl_price = entry - sign * stop_distance
+        tp_price = entry + sign * stop_distance * REWARD_RATIO
+
+        # Forward scan over the holding window (SL first when both touch a bar)
+        last = min(k + self.max_holding_bars, len(stream.close) - 1)
+        highs, lows = stream.high[k + 1:last + 1], stream.low[k + 1:last + 1]
+        if direction == "BUY":
+            sl_hit, tp_hit = lows <= sl_price, highs >= tp_price
+        else:
+            sl_hit, tp_hit = highs + spread >= sl_price, lows + spread <= tp_price
+        touched = sl_hit | tp_hit
+        if touched.any():
+            offset = int(np.argmax(touched))
+            exit_bar = k + 1 + offset
+            reason, exit_price = ("SL", sl_price) if sl_hit[offset] else ("TP", tp_price)
+        else:
+            exit_bar = last
+            reason = "TIMEOUT" if last == k + self.max_holding_bars else "END"
+            exit_price = stream.close[last] + (spread if direction == "SELL" else 0.0)
+
+        volume = self._volume(stream, equity, stop_distance)
+        profit = stream.spec.profit(direction, entry, exit_price, volume)
+        trade = BacktestTrade(
+            entry_time=pd.Timestamp(stream.times[k]),
+            exit_time=pd.Timestamp(stream.times[exit_bar]),
+            symbol=stream.symbol,
+            direction=direction,
+            entry_price=float(entry),
+            exit_price=float(exit_price),
+            volume=volume,
+            sl_price=float(sl_price),
+            tp_price=float(tp_price),
+            profit=float(profit),
+            profit_pct=float(profit / (entry * volume * stream.spec.contract_size) * 100),
+            duration_bars=exit_bar - k,
+            exit_reason=reason,
+        )
+        return trade, exit_bar
+
+    def run(self, bars_by_symbol: Dict[str, pd.DataFrame]) -> PortfolioBacktestResult:
+        """
+        Backtest all symbols on one account
+
+        Args:
+            bars_by_symbol: symbol -> OHLC bars (time, high, low, close)
+        """
+        streams = [
+            SymbolStream.from_bars(symbol, bars, self.params.get(symbol, DEFAULT_INDICATOR_PARAMS),
+                                   self.symbol_specs.get(symbol))
+            for symbol, bars in bars_by_symbol.items()
+            if len(bars) > 1
+        ]
+        result = PortfolioBacktestResult(initial_balance=self.initial_balance)
+        result.equity_curve.append(self.initial_balance)
+        result.equity_times.append(min((pd.Timestamp(s.times[0]) for s in streams), default=None))
+
+        # Candidate entries of every symbol, merged by (time, symbol index)
+        candidates = heapq.merge(*(
+            zip(stream.times[idx].view('i8').tolist(), [i] * idx.size, idx.tolist())
+            for i, stream in enumerate(streams)
+            for idx in [np.flatnonzero(stream.signals[:-1])]
+        ))
+
+        equity = self.initial_balance
+        open_positions: Dict[str, BacktestTrade] = {}
+        exposure = self.risk.exposure_index([])
+        exits: List[Tuple[int, int, str]] = []  # (exit time ns, sequence, symbol)
+        rejections: Counter = Counter()
+
+        def settle(until: Optional[int]):
+            nonlocal equity
+            while exits and (until is None or exits[0][0] <= until):
+                _, _, symbol = heapq.heappop(exits)
+                trade = open_positions.pop(symbol)
+                exposure.remove(symbol)
+                equity += trade.profit
+                result.trades.append(trade)
+                result.equity_curve.append(equity)
+                result.equity_times.append(trade.exit_time)
+
+        for seq, (t, i, k) in enumerate(candidates):
+            result.candidates += 1
+            settle(t)
+            stream = streams[i]
+            if equity <= 0:
+                rejections["account_depleted"] += 1
+                continue
+            if stream.symbol in open_positions:
+                rejections["symbol_already_open"] += 1
+                continue
+
+            can_trade, reason = self.risk.check_exposure_limits(
+                stream.symbol, exposure, max_positions=self.max_open_trades)
+            if not can_trade:
+                rejections[reason.split(':')[0]] += 1
+                continue
+
+            trade, exit_bar = self._open(stream, k, equity)
+            open_positions[stream.symbol] = trade
+            exposure.add(stream.symbol)
+            heapq.heappush(exits, (int(stream.times[exit_bar].view('i8')), seq, stream.symbol))
+            result.max_concurrent_positions = max(result.max_concurrent_positions, len(open_positions))
+
+        settle(None)
+        result.rejections = dict(rejections)
+
+        logger.info(
+            f"Portfolio backtest: {len(streams)} symbols, {result.candidates} candidates, "
+            f"{len(result.trades)} trades, net={result.net_profit:.2f}, "
+            f"max DD={result.max_drawdown_pct:.1f}%, rejections={result.rejections}"
+        )
+        return result
@@ -1,12 +1,14 @@
 """Backtest visualizer - Generate charts and reports"""
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pandas as pd
-from typing import List
+from typing import TYPE_CHECKING, List
 from app.backtest.historical_engine import BacktestResults
 from app.core.logger import setup_logger
 
+# plotly is imported inside the plot methods: app.backtest is also loaded by the bot and the API
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
 logger = setup_logger("backtest_viz")
 
 
@@ -14,8 +16,10 @@ class BacktestVisualizer:
     """Generate visualizations for backtest results"""
     
     @staticmethod
-    def plot_equity_curve(results: BacktestResults) -> go.Figure:
+    def plot_equity_curve(results: BacktestResults) -> "go.Figure":
         """Plot equity curve with drawdown"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         fig = make_subplots(
             rows=2, cols=1,
             shared_xaxes=True,
@@ -71,8 +75,9 @@ class BacktestVisualizer:
         return fig
     
     @staticmethod
-    def plot_trade_distribution(results: BacktestResults) -> go.Figure:
+    def plot_trade_distribution(results: BacktestResults) -> "go.Figure":
         """Plot profit/loss distribution of trades"""
+        import plotly.graph_objects as go
         profits = [t.profit for t in results.trades]
         
         fig = go.Figure()
@@ -96,8 +101,9 @@ class BacktestVisualizer:
         return fig
     
     @staticmethod
-    def plot_monthly_returns(results: BacktestResults) -> go.Figure:
+    def plot_monthly_returns(results: BacktestResults) -> "go.Figure":
         """Plot monthly returns heatmap"""
+        import plotly.graph_objects as go
         if not results.trades:
             return go.Figure()
         
@@ -136,8 +142,9 @@ class BacktestVisualizer:
         return fig
     
     @staticmethod
-    def plot_mae_mfe(results: BacktestResults) -> go.Figure:
+    def plot_mae_mfe(results: BacktestResults) -> "go.Figure":
         """Plot MAE/MFE scatter"""
+        import plotly.graph_objects as go
         winning_trades = [t for t in results.trades if t.profit > 0]
         losing_trades = [t for t in results.trades if t.profit <= 0]
         
@@ -0,0 +1,256 @@
+"""
+Walk-forward optimization and validation.
+
+The bar history is cut into consecutive folds: parameters are optimized on
+an in-sample window and then traded, unchanged, on the following
+out-of-sample window. Folds (and symbols) are independent and run in
+parallel on a shared indicator cache per symbol. The pooled out-of-sample
+trades, per-parameter stability across folds and the walk-forward
+efficiency feed a `PromotionGate`; only parameters that pass it should
+replace the live ones.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from statistics import mean, pstdev
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.param_search import (
+    IndicatorCache, Params, backtest_params, optimize_indicators, summarize_returns,
+)
+from app.core.logger import setup_logger
+
+logger = setup_logger("walk_forward")
+
+
+@dataclass
+class Fold:
+    """Bar index ranges of one walk-forward step ([start, end) each)"""
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+@dataclass
+class FoldResult:
+    """Best in-sample parameters of a fold and how they did out of sample"""
+    fold: Fold
+    params: Optional[Params]
+    in_sample: Dict[str, Any]
+    out_of_sample: Dict[str, Any]
+
+
+@dataclass
+class PromotionGate:
+    """Out-of-sample requirements a parameter set must meet to go live"""
+    min_oos_trades: int = 20
+    min_oos_profit_factor: float = 1.05
+    min_positive_fold_ratio: float = 0.5
+    min_efficiency: float = 0.25
+    max_instability: float = 0.35
+
+    def check(self, result: "WalkForwardResult") -> Tuple[bool, List[str]]:
+        """Return (passed, reasons for rejection)"""
+        reasons = []
+        oos = result.out_of_sample
+        if oos.get("trades", 0) < self.min_oos_trades:
+            reasons.append(f"oos trades {oos.get('trades', 0)} < {self.min_oos_trades}")
+        if oos.get("profit_factor", 0.0) < self.min_oos_profit_factor:
+            reasons.append(f"oos profit factor {oos.get('profit_factor', 0.0):.2f} < {self.min_oos_profit_factor}")
+        if result.positive_fold_ratio < self.min_positive_fold_ratio:
+            reasons.append(f"positive folds {result.positive_fold_ratio:.0%} < {self.min_positive_fold_ratio:.0%}")
+        if result.efficiency < self.min_efficiency:
+            reasons.append(f"walk-forward efficiency {result.efficiency:.2f} < {self.min_efficiency}")
+        if result.instability > self.max_instability:
+            reasons.append(f"parameter instability {result.instability:.2f} > {self.max_instability}")
+        return not reasons, reasons
+
+
+@dataclass
+class WalkForwardResult:
+    """Walk-forward summary for one symbol"""
+    symbol: str
+    folds: List[FoldResult] = field(default_factory=list)
+    out_of_sample: Dict[str, Any] = field(default_factory=dict)
+    stability: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    instability: float = 0.0
+    efficiency: float = 0.0
+    positive_fold_ratio: float = 0.0
+    recommended: Optional[Params] = None
+    recommended_in_sample: Dict[str, Any] = field(default_factory=dict)
+    promoted: bool = False
+    rejection_reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for fold in data["folds"]:
+            fold["in_sample"].pop("returns", None)
+            fold["out_of_sample"].pop("returns", None)
+        data["out_of_sample"].pop("returns", None)
+        data["recommended_in_sample"].pop("returns", None)
+        return data
+
+
+def make_folds(n_bars: int, train_bars: int, test_bars: int,
+               step: Optional[int] = None, anchored: bool = False) -> List[Fold]:
+    """
+    Consecutive train/test windows over `n_bars`.
+
+    Rolling by default (fixed-length training window); `anchored` keeps the
+    training window starting at bar 0. `step` defaults to `test_bars`, so
+    test windows tile the history without overlap.
+    """
+    step = step or test_bars
+    folds = []
+    train_start, train_end = 0, train_bars
+    while train_end + test_bars <= n_bars:
+        folds.append(Fold(len(folds), train_start, train_end, train_end, train_end + test_bars))
+        train_end += step
+        if not anchored:
+            train_start += step
+    return folds
+
+
+def parameter_stability(fold_params: Sequence[Params],
+                        space: Dict[str, Sequence[Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-parameter dispersion of the fold winners.
+
+    `normalized_std` is the std across folds divided by the width of the
+    search range (0 = always the same value); `mode_share` is the fraction
+    of folds that picked the most common value.
+    """
+    stability = {}
+    for name, values in space.items():
+        chosen = [p[name] for p in fold_params if p is not None]
+        if not chosen:
+            continue
+        width = (max(values) - min(values)) or 1
+        mode = max(set(chosen), key=chosen.count)
+        stability[name] = {
+            "values": chosen,
+            "mean": mean(chosen),
+            "std": pstdev(chosen),
+            "normalized_std": pstdev(chosen) / width,
+            "mode": mode,
+            "mode_share": chosen.count(mode) / len(chosen),
+        }
+    return stability
+
+
+class WalkForwardOptimizer:
+    """Runs walk-forward optimization for one or many symbols in parallel"""
+
+    def __init__(self, space: Dict[str, Sequence[Any]], train_bars: int = 1000,
+                 test_bars: int = 250, step: Optional[int] = None, anchored: bool = False,
+                 method: str = "bayesian", n_iter: int = 60, max_workers: int = 4,
+                 seed: Optional[int] = None, max_holding_bars: int = 100,
+                 cost_pct: float = 0.0, gate: Optional[PromotionGate] = None):
+        self.space = space
+        self.train_bars = train_bars
+        self.test_bars = test_bars
+        self.step = step
+        self.anchored = anchored
+        self.method = method
+        self.n_iter = n_iter
+        self.max_workers = max(1, max_workers)
+        self.seed = seed
+        self.max_holding_bars = max_holding_bars
+        self.cost_pct = cost_pct
+        self.gate = gate or PromotionGate()
+
+    def _optimize(self, cache: IndicatorCache, start: int, stop: int) -> Dict[str, Any]:
+        # Parallelism is across folds/symbols, so each search runs serially
+        return optimize_indicators(
+            None, self.space, method=self.method, n_iter=self.n_iter, max_workers=1,
+            seed=self.seed, max_holding_bars=self.max_holding_bars, cost_pct=self.cost_pct,
+            cache=cache, start=start, stop=stop,
+        )
+
+    def _run_fold(self, cache: IndicatorCache, fold: Fold) -> FoldResult:
+        search = self._optimize(cache, fold.train_start, fold.train_end)
+        params = search["params"]
+        if params is None:
+            empty = summarize_returns(np.empty(0))
+            return FoldResult(fold, None, search["metrics"], empty)
+        in_sample = backtest_params(cache, params, self.max_holding_bars, self.cost_pct,
+                                    start=fold.train_start, stop=fold.train_end)
+        out_of_sample = backtest_params(cache, params, self.max_holding_bars, self.cost_pct,
+                                        start=fold.test_start, stop=fold.test_end)
+        return FoldResult(fold, params, in_sample, out_of_sample)
+
+    def run(self, bars: pd.DataFrame, symbol: str = "") -> WalkForwardResult:
+        return self.run_many({symbol: bars})[symbol]
+
+    def run_many(self, bars_by_symbol: Dict[str, pd.DataFrame]) -> Dict[str, WalkForwardResult]:
+        """Walk-forward every symbol; all (symbol, fold) searches share one pool"""
+        caches: Dict[str, IndicatorCache] = {}
+        folds: Dict[str, List[Fold]] = {}
+        for symbol, bars in bars_by_symbol.items():
+            cache = IndicatorCache(bars)
+            cache.warm(self.space)
+            caches[symbol] = cache
+            folds[symbol] = make_folds(len(bars), self.train_bars, self.test_bars, self.step, self.anchored)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            fold_futures = {
+                symbol: [pool.submit(self._run_fold, caches[symbol], fold) for fold in folds[symbol]]
+                for symbol in bars_by_symbol
+            }
+            # Candidate for promotion: optimized on the most recent training window
+            final_futures = {
+                symbol: pool.submit(self._optimize, caches[symbol],
+                                    max(0, len(caches[symbol]) - self.train_bars), len(caches[symbol]))
+                for symbol in bars_by_symbol
+            }
+            results = {}
+            for symbol in bars_by_symbol:
+                fold_results = [f.result() for f in fold_futures[symbol]]
+                final = final_futures[symbol].result()
+                results[symbol] = self._summarize(symbol, fold_results, final)
+        return results
+
+    def _summarize(self, symbol: str, fold_results: List[FoldResult],
+                   final: Dict[str, Any]) -> WalkForwardResult:
+        result = WalkForwardResult(symbol=symbol, folds=fold_results)
+        result.recommended = final["params"]
+        result.recommended_in_sample = final["metrics"]
+
+        traded = [f for f in fold_results if f.params is not None]
+        if traded:
+            pooled = np.concatenate([f.out_of_sample["returns"] for f in traded])
+            result.out_of_sample = summarize_returns(pooled)
+            result.positive_fold_ratio = sum(
+                1 for f in traded if f.out_of_sample["total_return"] > 0) / len(fold_results)
+            # Out-of-sample return per bar relative to in-sample return per bar
+            oos_rate = sum(f.out_of_sample["total_return"] for f in traded) / sum(
+                f.fold.test_end - f.fold.test_start for f in traded)
+            is_rate = sum(f.in_sample["total_return"] for f in traded) / sum(
+                f.fold.train_end - f.fold.train_start for f in traded)
+            result.efficiency = oos_rate / is_rate if is_rate > 0 else 0.0
+            result.stability = parameter_stability([f.params for f in traded], self.space)
+            result.instability = mean(
+                s["normalized_std"] for s in result.stability.values()) if result.stability else 0.0
+        else:
+            result.out_of_sample = summarize_returns(np.empty(0))
+
+        if result.recommended is None:
+            result.rejection_reasons = ["no parameter set traded on the latest window"]
+        elif not fold_results:
+            result.rejection_reasons = ["not enough bars for a walk-forward fold"]
+        else:
+            result.promoted, result.rejection_reasons = self.gate.check(result)
+
+        logger.info(
+            f"Walk-forward {symbol}: {len(fold_results)} folds, "
+            f"OOS trades={result.out_of_sample.get('trades', 0)} "
+            f"PF={result.out_of_sample.get('profit_factor', 0.0):.2f} "
+            f"WFE={result.efficiency:.2f} instability={result.instability:.2f} -> "
+            f"{'PROMOTE' if result.promoted else 'REJECT: ' + '; '.join(result.rejection_reasons)}"
+        )
+        return result
@@ -0,0 +1,306 @@
+"""
+Thread-safe bounded LRU cache with per-entry TTL.
+
+Shared by the API endpoints and the Streamlit UI. Eviction is O(1)
+(OrderedDict), entries are bounded by both count and estimated bytes, and
+`get_or_load` collapses concurrent misses for the same key into a single
+loader call so an expiring hot key does not stampede the database. Empty
+loader results (None, empty list/dict/DataFrame) are kept only for
+`empty_ttl` seconds, so a failed fetch is retried soon instead of staying
+blank for the full TTL.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from app.core.logger import setup_logger
+
+logger = setup_logger("cache")
+
+_MISSING = object()
+
+
+def is_empty(value: Any) -> bool:
+    """None or a zero-length container (a failed or empty fetch)"""
+    if value is None:
+        return True
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate retained size in bytes (cheap, not exact)"""
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        try:
+            return int(value.memory_usage(index=True, deep=False).sum())
+        except Exception:
+            pass
+    if hasattr(value, "nbytes"):
+        try:
+            return int(value.nbytes)
+        except Exception:
+            pass
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "created_at", "expires_at", "size")
+
+    def __init__(self, value: Any, ttl: Optional[float], size: int):
+        now = time.monotonic()
+        self.value = value
+        self.created_at = now
+        self.expires_at = now + ttl if ttl is not None else None
+        self.size = size
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class LRUCache:
+    """Bounded LRU + TTL cache with size accounting and single-flight loads"""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: Optional[float] = 300,
+        name: str = "cache",
+        sizeof: Callable[[Any], int] = estimate_size,
+        empty_ttl: float = 5.0,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.empty_ttl = empty_ttl
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._loads = 0
+        self._coalesced = 0
+
+    # ------------------------------------------------------------------
+    # Core operations
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None, max_age: Optional[float] = None) -> Any:
+        """
+        Return the cached value, or `default` if missing/expired.
+
+        `max_age` additionally rejects entries older than that many seconds,
+        regardless of the TTL they were stored with.
+        """
+        with self._lock:
+            value = self._get_locked(key, max_age)
+        return default if value is _MISSING else value
+
+    def _get_locked(self, key: Hashable, max_age: Optional[float] = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return _MISSING
+        now = time.monotonic()
+        if (entry.expires_at is not None and now >= entry.expires_at) or \
+                (max_age is not None and now - entry.created_at > max_age):
+            self._remove_locked(key)
+            self._expirations += 1
+            self._misses += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = _MISSING):  # type: ignore[assignment]
+        """Store a value; `ttl=None` never expires, omitted uses default_ttl"""
+        ttl = self.default_ttl if ttl is _MISSING else ttl
+        size = self._sizeof(value)
+        with self._lock:
+            self._set_locked(key, value, ttl, size)
+
+    def _set_locked(self, key: Hashable, value: Any, ttl: Optional[float], size: int):
+        if key in self._entries:
+            self._remove_locked(key)
+        if size > self.max_bytes:
+            logger.debug(f"{self.name}: value for {key!r} ({size} bytes) exceeds cache size, not stored")
+            return
+        self._entries[key] = _Entry(value, ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove_locked(oldest_key)
+            self._evictions += 1
+
+    def _remove_locked(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    ttl: Optional[float] = _MISSING) -> Any:  # type: ignore[assignment]
+        """
+        Return the cached value or compute it with `loader`.
+
+        Concurrent callers missing the same key wait for the first caller's
+        load instead of running the loader themselves. Loader exceptions
+        are propagated to every waiter and nothing is cached; empty results
+        are cached for at most `empty_ttl` seconds (not at all if 0).
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not _MISSING:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._loads += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            ttl = self.default_ttl if ttl is _MISSING else ttl
+            if is_empty(flight.value):
+                ttl = self.empty_ttl if ttl is None else min(ttl, self.empty_ttl)
+            if ttl is None or ttl > 0:
+                self.set(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            present = key in self._entries
+            self._remove_locked(key)
+            return present
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove all entries whose key matches `predicate`"""
+        with self._lock:
+            doomed = [k for k in self._entries if predicate(k)]
+            for k in doomed:
+                self._remove_locked(k)
+            return len(doomed)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries eagerly (they are otherwise dropped on access)"""
+        now = time.monotonic()
+        with self._lock:
+            doomed = [k for k, e in self._entries.items() if e.expires_at is not None and now >= e.expires_at]
+            for k in doomed:
+                self._remove_locked(k)
+            self._expirations += len(doomed)
+            return len(doomed)
+
+    # Name used by the old CacheManager
+    clear_expired = purge_expired
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """Seconds since `key` was stored, or None if absent"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return time.monotonic() - entry.created_at if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry.expires_at is None or time.monotonic() < entry.expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "loads": self._loads,
+                "coalesced_loads": self._coalesced,
+            }
+
+
+# Global instances shared by the API and the UI
+_cache: Optional[LRUCache] = None
+_historical_cache: Optional[LRUCache] = None
+_instances_lock = threading.Lock()
+
+
+def get_cache() -> LRUCache:
+    """General-purpose cache for computed responses"""
+    global _cache
+    if _cache is None:
+        with _instances_lock:
+            if _cache is None:
+                _cache = LRUCache(max_entries=2000, max_bytes=64 * 1024 * 1024,
+                                  default_ttl=300, name="cache")
+    return _cache
+
+
+def get_historical_cache() -> LRUCache:
+    """Cache for historical trade/rate payloads"""
+    global _historical_cache
+    if _historical_cache is None:
+        with _instances_lock:
+            if _historical_cache is None:
+                _historical_cache = LRUCache(max_entries=100, max_bytes=128 * 1024 * 1024,
+                                             default_ttl=3600, name="historical")
+    return _historical_cache
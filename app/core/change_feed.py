@@ -0,0 +1,172 @@
+"""
+In-process change feed for positions, account and trades.
+
+Publishers (trading loop, broker poller, database) push full snapshots or
+single records; the feed diffs them against the last known state and only
+emits an event when something actually changed. Consumers either poll with
+a cursor (`events_since`) or subscribe with an asyncio queue (SSE endpoint).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.core.logger import setup_logger
+
+logger = setup_logger("change_feed")
+
+TOPICS = ("positions", "account", "trades")
+
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+    """Deliver an event to a subscriber, dropping it if the consumer is too slow"""
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning("Change feed subscriber queue full, dropping event")
+
+
+class ChangeFeed:
+    """Versioned, diff-based change feed with bounded event history"""
+
+    def __init__(self, history_size: int = 1000):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._versions: Dict[str, int] = {topic: 0 for topic in TOPICS}
+        self._snapshots: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def publish_snapshot(self, topic: str, items: Iterable[Dict[str, Any]],
+                         key: str = "ticket") -> Optional[Dict[str, Any]]:
+        """
+        Publish the full current set of records for a topic.
+
+        Records are matched on `key`; the emitted event only carries the
+        added/updated records and the keys that disappeared.
+        """
+        current = {item.get(key): dict(item) for item in items if item.get(key) is not None}
+        with self._lock:
+            previous = self._snapshots.get(topic, {})
+            added = [rec for k, rec in current.items() if k not in previous]
+            updated = [rec for k, rec in current.items() if k in previous and previous[k] != rec]
+            removed = [k for k in previous if k not in current]
+            self._snapshots[topic] = current
+            if not (added or updated or removed):
+                return None
+            return self._append_event(topic, {"added": added, "updated": updated, "removed": removed})
+
+    def publish_record(self, topic: str, record: Dict[str, Any],
+                       key: str = "ticket") -> Optional[Dict[str, Any]]:
+        """
+        Publish a single inserted/updated record (e.g. a trade write).
+
+        Callers only invoke this on real writes, so no diffing is done and
+        nothing is retained beyond the bounded event history.
+        """
+        if record.get(key) is None:
+            return None
+        with self._lock:
+            return self._append_event(topic, {"upserted": [dict(record)]})
+
+    def publish_state(self, topic: str, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Publish a single-object state (e.g. account info); emits changed fields only"""
+        state = dict(state)
+        with self._lock:
+            previous = self._states.get(topic, {})
+            changed = {k: v for k, v in state.items() if previous.get(k) != v}
+            self._states[topic] = state
+            if not changed:
+                return None
+            return self._append_event(topic, {"changed": changed})
+
+    def _append_event(self, topic: str, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Record an event and fan it out to subscribers (lock must be held)"""
+        self._seq += 1
+        self._versions[topic] = self._versions.get(topic, 0) + 1
+        event = {
+            "seq": self._seq,
+            "topic": topic,
+            "version": self._versions[topic],
+            "timestamp": time.time(),
+            **delta,
+        }
+        self._events.append(event)
+        for loop, queue in list(self._subscribers):
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Loop closed without unsubscribing
+                self._subscribers.remove((loop, queue))
+        return event
+
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def versions(self) -> Dict[str, int]:
+        """Current per-topic version counters"""
+        with self._lock:
+            return dict(self._versions)
+
+    def events_since(self, seq: int, topics: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Get events newer than `seq`.
+
+        `reset` is True when the cursor is older than the retained history,
+        in which case the caller should reload full state instead of
+        applying deltas.
+        """
+        wanted = set(topics) if topics else None
+        with self._lock:
+            oldest = self._events[0]["seq"] if self._events else self._seq + 1
+            reset = seq < oldest - 1
+            events = [
+                e for e in self._events
+                if e["seq"] > seq and (wanted is None or e["topic"] in wanted)
+            ]
+            return {
+                "cursor": self._seq,
+                "versions": dict(self._versions),
+                "reset": reset,
+                "events": events,
+            }
+
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        """Register an asyncio queue on the running loop for push delivery"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+# Global instance
+_change_feed: Optional[ChangeFeed] = None
+
+
+def get_change_feed() -> ChangeFeed:
+    """Get global change feed instance"""
+    global _change_feed
+    if _change_feed is None:
+        _change_feed = ChangeFeed()
+    return _change_feed
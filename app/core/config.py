@@ -1,5 +1,6 @@
 """Configuration management using Pydantic Settings"""
 
+from pathlib import Path
 from typing import Optional, List
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,6 +14,10 @@ class MT5Config(BaseSettings):
     password: Optional[str] = Field(None, alias="MT5_PASSWORD")
     server: Optional[str] = Field(None, alias="MT5_SERVER")
     path: Optional[str] = Field(None, alias="MT5_PATH")
+    # Directory for session journals of broker responses (recording off when unset)
+    record_dir: Optional[str] = Field(None, alias="MT5_RECORD_DIR")
+    # Seed of the synthetic market used when MetaTrader5 is not installed
+    sim_seed: int = Field(0, alias="MT5_SIM_SEED")
     
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -75,6 +80,10 @@ class TradingConfig(BaseSettings):
     default_max_daily_loss: float = Field(10.0, alias="DEFAULT_MAX_DAILY_LOSS")  # 10% max daily loss (more aggressive)
     default_max_drawdown: float = Field(10.0, alias="DEFAULT_MAX_DRAWDOWN")  # 10% max drawdown
     default_max_positions: int = Field(200, alias="DEFAULT_MAX_POSITIONS")  # MAX 200 open trades
+    execution_concurrency: int = Field(4, alias="EXECUTION_CONCURRENCY")  # Orders in flight in batch closes/modifies
+    max_portfolio_var_pct: float = Field(5.0, alias="MAX_PORTFOLIO_VAR_PCT")  # One-bar portfolio VaR cap (% of equity)
+    var_confidence: float = Field(0.95, alias="VAR_CONFIDENCE")  # 0.90 / 0.95 / 0.99
+    var_min_history_bars: int = Field(30, alias="VAR_MIN_HISTORY_BARS")  # Returns needed before a symbol is priced
     
     # 🔧 SYMBOL FILTERING - Dynamic validation
     # Invalid symbols will be automatically removed during startup
@@ -158,6 +167,10 @@ class AIConfig(BaseSettings):
     min_confidence_threshold: float = 0.25  # Optimized: lower threshold for more execution
     max_retries: int = 3
     timeout_seconds: int = 30
+    optimization_concurrency: int = Field(8, alias="AI_OPTIMIZATION_CONCURRENCY")  # Parallel symbols in the hourly cycle
+    requests_per_minute: int = Field(60, alias="AI_REQUESTS_PER_MINUTE")  # Gemini calls from the hourly cycle
+    response_cache_minutes: int = Field(60, alias="AI_RESPONSE_CACHE_MINUTES")  # Cached answer per prompt
+    response_cache_max_entries: int = Field(500, alias="AI_RESPONSE_CACHE_MAX_ENTRIES")
     
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -166,8 +179,10 @@ class NewsConfig(BaseSettings):
     """News provider configuration"""
     
     news_api_key: Optional[str] = Field(None, alias="NEWS_API_KEY")
-    cache_minutes: int = Field(15, alias="NEWS_CACHE_MINUTES")
+    cache_minutes: int = Field(240, alias="NEWS_CACHE_MINUTES")  # Per-currency refetch interval
     provider: str = "stub"  # stub, newsapi
+    api_base_url: str = Field("https://newsapi.org/v2", alias="NEWS_API_BASE_URL")
+    max_concurrency: int = Field(4, alias="NEWS_MAX_CONCURRENCY")  # Currency queries in flight
     
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -181,6 +196,23 @@ class LoggingConfig(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 
+class StorageConfig(BaseSettings):
+    """Database retention and maintenance configuration"""
+    
+    analysis_raw_retention_days: int = Field(7, alias="ANALYSIS_RAW_RETENTION_DAYS")  # Raw rows kept in analysis_history
+    analysis_summary_retention_days: int = Field(365, alias="ANALYSIS_SUMMARY_RETENTION_DAYS")  # Per-bar summaries kept
+    archive_enabled: bool = Field(True, alias="ANALYSIS_ARCHIVE_ENABLED")
+    archive_dir: str = Field("data/archive", alias="ANALYSIS_ARCHIVE_DIR")
+    maintenance_interval_hours: float = Field(6.0, alias="DB_MAINTENANCE_INTERVAL_HOURS")
+    incremental_vacuum_pages: int = Field(2000, alias="DB_INCREMENTAL_VACUUM_PAGES")
+    warm_start_path: str = Field("data/warm_start.pkl", alias="WARM_START_PATH")  # Cache snapshot for fast restarts ("" disables)
+    warm_start_max_age_minutes: float = Field(240.0, alias="WARM_START_MAX_AGE_MINUTES")  # Older snapshots are ignored
+    warm_start_interval_seconds: int = Field(300, alias="WARM_START_INTERVAL_SECONDS")  # Periodic save from the trading loop
+    state_dir: str = Field("", alias="BOT_STATE_DIR")  # JSON state files (ticker/risk/adaptive params); "" = repo data/
+    
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
 class AppConfig:
     """Main application configuration aggregator"""
     
@@ -190,6 +222,7 @@ class AppConfig:
         self.ai = AIConfig()
         self.news = NewsConfig()
         self.logging = LoggingConfig()
+        self.storage = StorageConfig()
         
         # Ensure logs directory exists
         log_dir = os.path.dirname(self.logging.log_file)
@@ -222,3 +255,12 @@ def reload_config() -> AppConfig:
     global _config
     _config = AppConfig()
     return _config
+
+
+REPO_DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+def state_file(name: str) -> Path:
+    """Path of a JSON state file: under BOT_STATE_DIR if set, else the repository's data/"""
+    state_dir = get_config().storage.state_dir
+    return (Path(state_dir) if state_dir else REPO_DATA_DIR) / name
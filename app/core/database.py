@@ -2,14 +2,55 @@
 
 import sqlite3
 import json
-from typing import Optional, List, Dict, Any
+import base64
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 import threading
+from contextlib import contextmanager
 from app.core.logger import setup_logger
+from app.core.change_feed import get_change_feed
+from app.core.performance_aggregates import (
+    ensure_rollup_schema, apply_trade_change, rebuild_rollups, merge_buckets, ALL_SYMBOLS
+)
+from app.core.retention import ensure_retention_schema
 
 logger = setup_logger("database")
 
+# Columns of the trades table that callers may select (column selection whitelist)
+TRADE_COLUMNS = (
+    "id", "ticket", "symbol", "type", "volume",
+    "open_price", "open_timestamp", "close_price", "close_timestamp",
+    "stop_loss", "take_profit", "profit", "commission", "swap",
+    "status", "ai_decision_id", "analysis_id", "comment",
+)
+
+
+def encode_trade_cursor(open_timestamp: str, trade_id: int) -> str:
+    """Opaque keyset cursor for the (open_timestamp, id) sort key"""
+    raw = f"{open_timestamp}|{trade_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_trade_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_trade_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        open_timestamp, trade_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return open_timestamp, int(trade_id)
+    except Exception as e:
+        raise ValueError(f"Invalid trade cursor: {cursor!r}") from e
+
+
+def _trade_select_list(columns: Optional[Sequence[str]], required: Sequence[str] = ()) -> str:
+    if not columns:
+        return "*"
+    unknown = [c for c in columns if c not in TRADE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown trade columns: {', '.join(unknown)}")
+    selected = list(dict.fromkeys([*columns, *required]))
+    return ", ".join(selected)
+
 
 class DatabaseManager:
     """Manages SQLite database for historical data storage"""
@@ -48,6 +89,18 @@ class DatabaseManager:
             self._conn = self._connect()
         return self._conn
     
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive use of the shared connection; commits on success, rolls back on error"""
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
     def _ensure_db_directory(self):
         """Ensure data directory exists"""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
@@ -95,6 +148,9 @@ class DatabaseManager:
         cursor.execute("""CREATE INDEX IF NOT EXISTS idx_analysis_timestamp 
                          ON analysis_history(timestamp)""")
         
+        # Per-bar summaries of analysis rows past the raw retention window
+        ensure_retention_schema(cursor)
+        
         # Table: ai_decisions - Store all AI decisions (enhanced/simple)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS ai_decisions (
@@ -176,6 +232,10 @@ class DatabaseManager:
                          ON trades(status)""")
         cursor.execute("""CREATE INDEX IF NOT EXISTS idx_trades_open_timestamp 
                          ON trades(open_timestamp)""")
+        cursor.execute("""CREATE INDEX IF NOT EXISTS idx_trades_symbol_open_timestamp 
+                         ON trades(symbol, open_timestamp)""")
+        cursor.execute("""CREATE INDEX IF NOT EXISTS idx_trades_close_timestamp 
+                         ON trades(close_timestamp)""")
         
         # Table: performance_metrics - Daily/hourly performance summaries
         cursor.execute("""
@@ -213,6 +273,9 @@ class DatabaseManager:
         cursor.execute("""CREATE INDEX IF NOT EXISTS idx_metrics_period 
                          ON performance_metrics(period)""")
         
+        # Rollup buckets (daily/hourly/symbol) maintained incrementally on trade close
+        ensure_rollup_schema(cursor)
+        
         # Table: web_search_cache - Cache web search results
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS web_search_cache (
@@ -367,8 +430,10 @@ class DatabaseManager:
             ))
             
             trade_id = cursor.lastrowid
+            apply_trade_change(cursor, None, trade_info)
             conn.commit()
             logger.info(f"Saved trade {trade_info.get('ticket')} (id={trade_id})")
+            self._publish_trade_change(trade_info.get('ticket'), trade_info.get('symbol'), trade_info)
             return trade_id
             
         except sqlite3.IntegrityError:
@@ -427,8 +492,20 @@ class DatabaseManager:
                     ticket
                 ))
                 
+                updated_trade = dict(current_trade)
+                updated_trade.update({
+                    'close_price': trade_info.get('close_price'),
+                    'close_timestamp': trade_info.get('close_timestamp'),
+                    'profit': trade_info.get('profit'),
+                    'commission': trade_info.get('commission'),
+                    'swap': trade_info.get('swap'),
+                    'status': trade_info.get('status', 'closed'),
+                })
+                apply_trade_change(cursor, dict(current_trade), updated_trade)
+                
                 conn.commit()
                 logger.debug(f"Updated trade {ticket}")
+                self._publish_trade_change(ticket, current_trade['symbol'], trade_info)
                 return True
                 
             except Exception as e:
@@ -436,6 +513,20 @@ class DatabaseManager:
                 conn.rollback()
                 return False
     
+    def _publish_trade_change(self, ticket: int, symbol: str, trade_info: Dict[str, Any]):
+        """Notify the change feed that a trade row was written"""
+        try:
+            get_change_feed().publish_record("trades", {
+                'ticket': ticket,
+                'symbol': symbol,
+                'status': trade_info.get('status'),
+                'profit': trade_info.get('profit'),
+                'close_price': trade_info.get('close_price'),
+                'close_timestamp': trade_info.get('close_timestamp'),
+            })
+        except Exception as e:
+            logger.debug(f"Change feed publish failed for trade {ticket}: {e}")
+    
     def get_analysis_history(self, symbol: str = None, days: int = 7) -> List[Dict]:
         """Get analysis history"""
         with self._lock:
@@ -464,6 +555,29 @@ class DatabaseManager:
         finally:
             conn.commit()
     
+    def get_analysis_summaries(self, symbol: str = None, days: int = 30) -> List[Dict]:
+        """Get downsampled per-bar analysis summaries (rows older than raw retention)"""
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        query = """
+            SELECT symbol, timeframe, bar_time, samples,
+                   buy_signals, sell_signals, hold_signals,
+                   combined_score_sum / NULLIF(combined_score_count, 0) AS avg_combined_score,
+                   confidence_sum / NULLIF(confidence_count, 0) AS avg_confidence,
+                   rsi_sum / NULLIF(rsi_count, 0) AS avg_rsi, rsi_min, rsi_max,
+                   sentiment_sum / NULLIF(sentiment_count, 0) AS avg_sentiment,
+                   last_close, last_signal
+            FROM analysis_summary
+            WHERE bar_time >= ?
+        """
+        params: List[Any] = [since]
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        query += " ORDER BY bar_time DESC"
+
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+    
     def get_ai_decisions(self, symbol: str = None, days: int = 7, 
                         executed_only: bool = False) -> List[Dict]:
         """Get AI decisions"""
@@ -493,8 +607,10 @@ class DatabaseManager:
         finally:
             conn.commit()
     
-    def get_trades(self, symbol: str = None, status: str = None, days: int = 30) -> List[Dict]:
-        """Get trades"""
+    def get_trades(self, symbol: str = None, status: str = None, days: int = 30,
+                   columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Get trades (optionally only the given TRADE_COLUMNS)"""
+        select_list = _trade_select_list(columns)
         with self._lock:
             conn = self._get_conn()
             cursor = conn.cursor()
@@ -502,7 +618,7 @@ class DatabaseManager:
         try:
             since = (datetime.now() - timedelta(days=days)).isoformat()
             
-            query = "SELECT * FROM trades WHERE open_timestamp >= ?"
+            query = f"SELECT {select_list} FROM trades WHERE open_timestamp >= ?"
             params = [since]
             
             if symbol:
@@ -522,6 +638,84 @@ class DatabaseManager:
         finally:
             conn.commit()
 
+    def get_trades_page(
+        self,
+        since: Optional[datetime] = None,
+        symbol: Optional[str] = None,
+        status: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of trades, newest first, using keyset pagination.
+
+        Pages are anchored on (open_timestamp, id) instead of an OFFSET, so
+        every page costs one index range scan regardless of depth. Pass the
+        returned `next_cursor` back to fetch the following page; it is None
+        on the last page.
+        """
+        select_list = _trade_select_list(columns, required=("id", "open_timestamp"))
+        query = f"SELECT {select_list} FROM trades WHERE 1 = 1"
+        params: List[Any] = []
+
+        if since is not None:
+            query += " AND open_timestamp >= ?"
+            params.append(since.isoformat())
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        if cursor:
+            query += " AND (open_timestamp, id) < (?, ?)"
+            params.extend(decode_trade_cursor(cursor))
+
+        query += " ORDER BY open_timestamp DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            conn = self._get_conn()
+            db_cursor = conn.cursor()
+            try:
+                db_cursor.execute(query, params)
+                rows = [dict(row) for row in db_cursor.fetchall()]
+            finally:
+                conn.commit()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = (
+            encode_trade_cursor(rows[-1]["open_timestamp"], rows[-1]["id"]) if has_more else None
+        )
+        if columns:
+            rows = [{c: row[c] for c in columns} for row in rows]
+        return {"trades": rows, "next_cursor": next_cursor}
+
+    def iter_trades(
+        self,
+        since: Optional[datetime] = None,
+        symbol: Optional[str] = None,
+        status: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching trades newest first, one keyset page at a time.
+
+        The lock is only held while a page is read, so long exports do not
+        block writers and memory stays bounded by `batch_size`.
+        """
+        cursor = None
+        while True:
+            page = self.get_trades_page(since=since, symbol=symbol, status=status,
+                                        columns=columns, cursor=cursor, limit=batch_size)
+            yield from page["trades"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
     def get_closed_trades(
         self,
         start_date: datetime,
@@ -555,16 +749,68 @@ class DatabaseManager:
         finally:
             conn.commit()
     
+    def get_symbol_trade_stats(self, since: datetime,
+                               symbols: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-symbol aggregates of trades closed since `since`, in one grouped query
+        
+        Returns {symbol: {total_trades, winning_trades, losing_trades,
+        gross_profit, gross_loss, net_profit, sum_sq_profit}}; symbols
+        without closed trades are absent.
+        """
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.cursor()
+        
+        try:
+            query = """
+                SELECT 
+                    symbol,
+                    COUNT(*) as total_trades,
+                    SUM(CASE WHEN profit > 0 THEN 1 ELSE 0 END) as winning_trades,
+                    SUM(CASE WHEN profit < 0 THEN 1 ELSE 0 END) as losing_trades,
+                    SUM(CASE WHEN profit > 0 THEN profit ELSE 0 END) as gross_profit,
+                    SUM(CASE WHEN profit < 0 THEN ABS(profit) ELSE 0 END) as gross_loss,
+                    SUM(profit) as net_profit,
+                    SUM(profit * profit) as sum_sq_profit
+                FROM trades
+                WHERE close_timestamp >= ?
+                  AND profit IS NOT NULL
+                  AND LOWER(status) = 'closed'
+            """
+            params: List[Any] = [since.isoformat()]
+            if symbols:
+                query += f" AND symbol IN ({','.join('?' * len(symbols))})"
+                params.extend(symbols)
+            query += " GROUP BY symbol"
+            
+            cursor.execute(query, params)
+            return {row["symbol"]: dict(row) for row in cursor.fetchall()}
+        finally:
+            conn.commit()
+    
     def get_performance_summary(self, days: int = 30) -> Dict[str, Any]:
-        """Get performance summary"""
+        """
+        Get performance summary.
+        
+        Whole days come from the daily rollups; only the partial first day
+        is read from raw trades so the window stays exact.
+        """
         with self._lock:
             conn = self._get_conn()
             cursor = conn.cursor()
         
         try:
-            since = (datetime.now() - timedelta(days=days)).isoformat()
+            since = datetime.now() - timedelta(days=days)
+            since_day = since.date().isoformat()
             
-            # Get trade statistics
+            cursor.execute("""
+                SELECT * FROM performance_metrics
+                WHERE period = 'daily' AND symbol = ? AND timestamp > ?
+            """, (ALL_SYMBOLS, since_day))
+            buckets = [dict(row) for row in cursor.fetchall()]
+            
+            # Partial boundary day straight from trades
             cursor.execute("""
                 SELECT 
                     COUNT(*) as total_trades,
@@ -572,40 +818,54 @@ class DatabaseManager:
                     SUM(CASE WHEN profit < 0 THEN 1 ELSE 0 END) as losing_trades,
                     SUM(profit) as net_profit,
                     SUM(CASE WHEN profit > 0 THEN profit ELSE 0 END) as gross_profit,
-                    SUM(CASE WHEN profit < 0 THEN ABS(profit) ELSE 0 END) as gross_loss,
-                    AVG(profit) as avg_profit
+                    SUM(CASE WHEN profit < 0 THEN ABS(profit) ELSE 0 END) as gross_loss
                 FROM trades
-                WHERE close_timestamp >= ? AND status = 'closed'
-            """, (since,))
-            
-            row = cursor.fetchone()
+                WHERE close_timestamp >= ? AND close_timestamp < ?
+                  AND LOWER(status) = 'closed'
+            """, (since.isoformat(), (since.date() + timedelta(days=1)).isoformat()))
+            buckets.append(dict(cursor.fetchone()))
             
-            total_trades = row[0] or 0
-            winning_trades = row[1] or 0
-            losing_trades = row[2] or 0
-            net_profit = row[3] or 0
-            gross_profit = row[4] or 0
-            gross_loss = row[5] or 0
-            avg_profit = row[6] or 0
+            return merge_buckets(buckets)
             
-            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else 0
-            
-            return {
-                'total_trades': total_trades,
-                'winning_trades': winning_trades,
-                'losing_trades': losing_trades,
-                'win_rate': win_rate,
-                'net_profit': net_profit,
-                'gross_profit': gross_profit,
-                'gross_loss': gross_loss,
-                'avg_profit': avg_profit,
-                'profit_factor': profit_factor
-            }
+        finally:
+            conn.commit()
+    
+    def get_performance_rollups(self, period: str, since: datetime,
+                                symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Get rollup buckets for a period ('daily', 'hourly', 'symbol_daily')
+        whose bucket starts on or after `since`, oldest first.
+        """
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.cursor()
+        
+        try:
+            since_key = since.strftime("%Y-%m-%dT%H") if period == 'hourly' else since.date().isoformat()
+            query = """
+                SELECT timestamp AS bucket, symbol, total_trades, winning_trades, losing_trades,
+                       gross_profit, gross_loss, net_profit, sum_sq_profit, win_rate, profit_factor
+                FROM performance_metrics
+                WHERE period = ? AND timestamp >= ?
+            """
+            params: List[Any] = [period, since_key]
+            if symbol:
+                query += " AND symbol = ?"
+                params.append(symbol)
+            query += " ORDER BY timestamp ASC"
             
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
         finally:
             conn.commit()
     
+    def rebuild_performance_rollups(self) -> int:
+        """Backfill rollups from the trades table; returns bucket count"""
+        with self._lock:
+            count = rebuild_rollups(self._get_conn())
+        logger.info(f"Rebuilt {count} performance rollup buckets")
+        return count
+    
     def mark_decision_executed(self, decision_id: int):
         """Mark AI decision as executed"""
         with self._lock:
@@ -0,0 +1,222 @@
+"""
+Incremental performance rollups stored in the performance_metrics table.
+
+Closed trades are folded into per-bucket counters as they are written
+(`DatabaseManager.save_trade` / `update_trade`), so reporting endpoints read
+O(buckets) rows instead of regrouping raw trades. Buckets are keyed on the
+close timestamp (realized P&L):
+
+    period='daily'         timestamp='YYYY-MM-DD'     symbol='*'
+    period='hourly'        timestamp='YYYY-MM-DDTHH'  symbol='*'
+    period='symbol_daily'  timestamp='YYYY-MM-DD'     symbol=<symbol>
+
+Databases created before the rollups are backfilled automatically the first
+time they are opened (closed trades but no rollup rows). Run
+`python -m app.core.performance_aggregates --backfill` to rebuild the
+rollups from the trades table by hand.
+"""
+
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.logger import setup_logger
+
+logger = setup_logger("performance_aggregates")
+
+ALL_SYMBOLS = "*"
+PERIODS = ("daily", "hourly", "symbol_daily")
+
+# Columns added to the original performance_metrics schema
+_ROLLUP_COLUMNS = {
+    "symbol": "VARCHAR(20) NOT NULL DEFAULT '*'",
+    "sum_sq_profit": "REAL DEFAULT 0",
+}
+
+
+def ensure_rollup_schema(cursor: sqlite3.Cursor):
+    """Migrate performance_metrics so it can hold keyed rollup buckets, backfilling them if missing"""
+    _migrate(cursor)
+    if _needs_backfill(cursor):
+        count = rebuild_rollups(cursor.connection)
+        logger.info(f"Backfilled {count} performance rollup buckets from existing trades")
+
+
+def _needs_backfill(cursor: sqlite3.Cursor) -> bool:
+    """Closed trades exist but no rollup bucket does (pre-rollup database)"""
+    cursor.execute(f"SELECT 1 FROM performance_metrics WHERE period IN ({','.join('?' * len(PERIODS))}) LIMIT 1",
+                   PERIODS)
+    if cursor.fetchone() is not None:
+        return False
+    cursor.execute("SELECT 1 FROM trades WHERE LOWER(status) = 'closed' AND close_timestamp IS NOT NULL LIMIT 1")
+    return cursor.fetchone() is not None
+
+
+def _migrate(cursor: sqlite3.Cursor):
+    cursor.execute("PRAGMA table_info(performance_metrics)")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column, ddl in _ROLLUP_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE performance_metrics ADD COLUMN {column} {ddl}")
+    cursor.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_metrics_bucket
+                     ON performance_metrics(period, timestamp, symbol)""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_trades_close_timestamp
+                     ON trades(close_timestamp)""")
+
+
+def _is_closed(trade: Optional[Dict[str, Any]]) -> bool:
+    return bool(
+        trade
+        and str(trade.get("status") or "").lower() == "closed"
+        and trade.get("close_timestamp")
+    )
+
+
+def _bucket_keys(trade: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """(period, timestamp, symbol) buckets a closed trade contributes to"""
+    ts = str(trade["close_timestamp"]).replace(" ", "T")
+    day, hour = ts[:10], ts[:13]
+    return [
+        ("daily", day, ALL_SYMBOLS),
+        ("hourly", hour, ALL_SYMBOLS),
+        ("symbol_daily", day, trade.get("symbol") or "UNKNOWN"),
+    ]
+
+
+def _upsert(cursor: sqlite3.Cursor, bucket: Tuple[str, str, str], profit: float, sign: int):
+    period, timestamp, symbol = bucket
+    cursor.execute("""
+        INSERT INTO performance_metrics (
+            period, timestamp, symbol,
+            total_trades, winning_trades, losing_trades,
+            gross_profit, gross_loss, net_profit, sum_sq_profit
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(period, timestamp, symbol) DO UPDATE SET
+            total_trades = total_trades + excluded.total_trades,
+            winning_trades = winning_trades + excluded.winning_trades,
+            losing_trades = losing_trades + excluded.losing_trades,
+            gross_profit = gross_profit + excluded.gross_profit,
+            gross_loss = gross_loss + excluded.gross_loss,
+            net_profit = net_profit + excluded.net_profit,
+            sum_sq_profit = sum_sq_profit + excluded.sum_sq_profit
+    """, (
+        period, timestamp, symbol,
+        sign,
+        sign if profit > 0 else 0,
+        sign if profit < 0 else 0,
+        sign * max(profit, 0.0),
+        sign * max(-profit, 0.0),
+        sign * profit,
+        sign * profit * profit,
+    ))
+    # Keep the derived columns of the original schema meaningful
+    cursor.execute("""
+        UPDATE performance_metrics SET
+            win_rate = CASE WHEN total_trades > 0
+                            THEN winning_trades * 100.0 / total_trades ELSE 0 END,
+            profit_factor = CASE WHEN gross_loss > 0
+                                 THEN gross_profit / gross_loss ELSE 0 END
+        WHERE period = ? AND timestamp = ? AND symbol = ?
+    """, bucket)
+
+
+def apply_trade_change(cursor: sqlite3.Cursor,
+                       old: Optional[Dict[str, Any]],
+                       new: Optional[Dict[str, Any]]):
+    """
+    Fold a trade write into the rollups.
+
+    The previous contribution (if the trade was already closed) is removed
+    and the new one added, so re-closing or correcting profit stays exact.
+    """
+    if _is_closed(old):
+        profit = float(old.get("profit") or 0.0)
+        for bucket in _bucket_keys(old):
+            _upsert(cursor, bucket, profit, -1)
+    if _is_closed(new):
+        profit = float(new.get("profit") or 0.0)
+        for bucket in _bucket_keys(new):
+            _upsert(cursor, bucket, profit, +1)
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> int:
+    """Recompute every bucket from the trades table; returns bucket count"""
+    cursor = conn.cursor()
+    _migrate(cursor)
+    cursor.execute(f"DELETE FROM performance_metrics WHERE period IN ({','.join('?' * len(PERIODS))})", PERIODS)
+
+    bucket_exprs = {
+        "daily": ("substr(close_timestamp, 1, 10)", f"'{ALL_SYMBOLS}'"),
+        "hourly": ("replace(substr(close_timestamp, 1, 13), ' ', 'T')", f"'{ALL_SYMBOLS}'"),
+        "symbol_daily": ("substr(close_timestamp, 1, 10)", "COALESCE(symbol, 'UNKNOWN')"),
+    }
+    for period, (ts_expr, symbol_expr) in bucket_exprs.items():
+        cursor.execute(f"""
+            INSERT INTO performance_metrics (
+                period, timestamp, symbol,
+                total_trades, winning_trades, losing_trades,
+                gross_profit, gross_loss, net_profit, sum_sq_profit,
+                win_rate, profit_factor
+            )
+            SELECT
+                '{period}', bucket, sym,
+                COUNT(*),
+                SUM(CASE WHEN p > 0 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN p < 0 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN p > 0 THEN p ELSE 0 END),
+                SUM(CASE WHEN p < 0 THEN -p ELSE 0 END),
+                SUM(p),
+                SUM(p * p),
+                SUM(CASE WHEN p > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*),
+                CASE WHEN SUM(CASE WHEN p < 0 THEN -p ELSE 0 END) > 0
+                     THEN SUM(CASE WHEN p > 0 THEN p ELSE 0 END)
+                          / SUM(CASE WHEN p < 0 THEN -p ELSE 0 END)
+                     ELSE 0 END
+            FROM (
+                SELECT {ts_expr} AS bucket, {symbol_expr} AS sym, COALESCE(profit, 0) AS p
+                FROM trades
+                WHERE LOWER(status) = 'closed' AND close_timestamp IS NOT NULL
+            )
+            GROUP BY bucket, sym
+        """)
+    conn.commit()
+    cursor.execute(f"SELECT COUNT(*) FROM performance_metrics WHERE period IN ({','.join('?' * len(PERIODS))})", PERIODS)
+    return cursor.fetchone()[0]
+
+
+def merge_buckets(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine rollup rows into one stats dict (same keys as get_performance_summary)"""
+    total = wins = losses = 0
+    gross_profit = gross_loss = net = 0.0
+    for row in rows:
+        total += row.get("total_trades") or 0
+        wins += row.get("winning_trades") or 0
+        losses += row.get("losing_trades") or 0
+        gross_profit += row.get("gross_profit") or 0.0
+        gross_loss += row.get("gross_loss") or 0.0
+        net += row.get("net_profit") or 0.0
+    return {
+        "total_trades": total,
+        "winning_trades": wins,
+        "losing_trades": losses,
+        "win_rate": (wins / total * 100) if total > 0 else 0,
+        "net_profit": net,
+        "gross_profit": gross_profit,
+        "gross_loss": gross_loss,
+        "avg_profit": (net / total) if total > 0 else 0,
+        "profit_factor": (gross_profit / gross_loss) if gross_loss > 0 else 0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.core.database import get_database_manager
+
+    parser = argparse.ArgumentParser(description="Maintain performance rollups")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild all rollups from the trades table")
+    args = parser.parse_args()
+
+    if args.backfill:
+        count = get_database_manager().rebuild_performance_rollups()
+        print(f"Rebuilt {count} performance buckets")
+    else:
+        parser.print_help()
@@ -0,0 +1,464 @@
+"""
+Retention, downsampling and archival for analysis_history.
+
+Every symbol analysis is inserted into analysis_history, so the table (and
+the WAL) grows without bound. Rows older than the raw retention window are,
+one day partition per transaction:
+
+1. appended to a gzip NDJSON archive
+   (<archive_dir>/analysis_history/YYYY/YYYY-MM-DD.ndjson.gz),
+2. folded into per-symbol, per-bar summaries in analysis_summary,
+3. deleted from analysis_history.
+
+Afterwards the WAL is checkpointed and freed pages are returned to the OS
+with an incremental VACUUM. Each run reports DB size and the latency of the
+typical dashboard reads before and after.
+
+Run `python -m app.core.retention --run` (or `--report`) by hand; the API
+server runs it every `DB_MAINTENANCE_INTERVAL_HOURS`. Databases created
+without incremental auto_vacuum need one full VACUUM, which rewrites the
+whole file and would stall every writer, so it is only done by the manual
+`--run` (preferably with the bot stopped); the background job just reuses
+free pages until then.
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.core.config import StorageConfig, get_config
+from app.core.logger import setup_logger
+
+if TYPE_CHECKING:
+    from app.core.database import DatabaseManager
+
+logger = setup_logger("retention")
+
+# Bar length used to downsample each analysis timeframe
+TIMEFRAME_SECONDS = {
+    "M1": 60, "M5": 300, "M15": 900, "M30": 1800,
+    "H1": 3600, "H4": 14400, "D1": 86400,
+}
+DEFAULT_BAR_SECONDS = 900
+
+_FETCH_BATCH = 5000
+
+
+def ensure_retention_schema(cursor: sqlite3.Cursor):
+    """Create the per-bar summary table for downsampled analysis rows"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_summary (
+            symbol VARCHAR(20) NOT NULL,
+            timeframe VARCHAR(10) NOT NULL,
+            bar_time DATETIME NOT NULL,
+            samples INTEGER NOT NULL DEFAULT 0,
+            buy_signals INTEGER DEFAULT 0,
+            sell_signals INTEGER DEFAULT 0,
+            hold_signals INTEGER DEFAULT 0,
+            combined_score_sum REAL DEFAULT 0,
+            combined_score_count INTEGER DEFAULT 0,
+            confidence_sum REAL DEFAULT 0,
+            confidence_count INTEGER DEFAULT 0,
+            rsi_sum REAL DEFAULT 0,
+            rsi_count INTEGER DEFAULT 0,
+            rsi_min REAL,
+            rsi_max REAL,
+            sentiment_sum REAL DEFAULT 0,
+            sentiment_count INTEGER DEFAULT 0,
+            first_timestamp DATETIME,
+            last_timestamp DATETIME,
+            last_close REAL,
+            last_signal VARCHAR(10),
+            PRIMARY KEY (symbol, timeframe, bar_time)
+        )
+    """)
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_analysis_summary_bar_time
+                     ON analysis_summary(bar_time)""")
+
+
+def _bar_start(timestamp: str, timeframe: str) -> str:
+    """Floor an ISO timestamp to the start of its bar (day-aligned)"""
+    step = TIMEFRAME_SECONDS.get((timeframe or "").upper(), DEFAULT_BAR_SECONDS)
+    try:
+        ts = datetime.fromisoformat(str(timestamp)).replace(tzinfo=None)
+    except ValueError:
+        return str(timestamp)[:10] + "T00:00:00"
+    seconds = ts.hour * 3600 + ts.minute * 60 + ts.second
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return (day + timedelta(seconds=seconds - seconds % step)).isoformat(timespec="seconds")
+
+
+class _BarSummary:
+    """Mergeable accumulator for one (symbol, timeframe, bar)"""
+
+    __slots__ = (
+        "samples", "buy", "sell", "hold",
+        "score_sum", "score_n", "conf_sum", "conf_n",
+        "rsi_sum", "rsi_n", "rsi_min", "rsi_max", "sent_sum", "sent_n",
+        "first_ts", "last_ts", "last_close", "last_signal",
+    )
+
+    def __init__(self):
+        self.samples = self.buy = self.sell = self.hold = 0
+        self.score_sum = self.conf_sum = self.rsi_sum = self.sent_sum = 0.0
+        self.score_n = self.conf_n = self.rsi_n = self.sent_n = 0
+        self.rsi_min: Optional[float] = None
+        self.rsi_max: Optional[float] = None
+        self.first_ts: Optional[str] = None
+        self.last_ts: Optional[str] = None
+        self.last_close: Optional[float] = None
+        self.last_signal: Optional[str] = None
+
+    def add(self, row: sqlite3.Row):
+        self.samples += 1
+        signal = str(row["final_signal"] or "HOLD").upper()
+        if signal == "BUY":
+            self.buy += 1
+        elif signal == "SELL":
+            self.sell += 1
+        else:
+            self.hold += 1
+        if row["combined_score"] is not None:
+            self.score_sum += row["combined_score"]
+            self.score_n += 1
+        if row["confidence"] is not None:
+            self.conf_sum += row["confidence"]
+            self.conf_n += 1
+        rsi = row["tech_rsi"]
+        if rsi is not None:
+            self.rsi_sum += rsi
+            self.rsi_n += 1
+            self.rsi_min = rsi if self.rsi_min is None else min(self.rsi_min, rsi)
+            self.rsi_max = rsi if self.rsi_max is None else max(self.rsi_max, rsi)
+        if row["sentiment_score"] is not None:
+            self.sent_sum += row["sentiment_score"]
+            self.sent_n += 1
+        ts = row["timestamp"]
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        if self.last_ts is None or ts >= self.last_ts:
+            self.last_ts = ts
+            self.last_close = row["tech_close"]
+            self.last_signal = signal
+
+    def params(self, key: Tuple[str, str, str]) -> tuple:
+        return (
+            *key, self.samples, self.buy, self.sell, self.hold,
+            self.score_sum, self.score_n, self.conf_sum, self.conf_n,
+            self.rsi_sum, self.rsi_n, self.rsi_min, self.rsi_max,
+            self.sent_sum, self.sent_n,
+            self.first_ts, self.last_ts, self.last_close, self.last_signal,
+        )
+
+
+_UPSERT_SUMMARY = """
+    INSERT INTO analysis_summary (
+        symbol, timeframe, bar_time, samples, buy_signals, sell_signals, hold_signals,
+        combined_score_sum, combined_score_count, confidence_sum, confidence_count,
+        rsi_sum, rsi_count, rsi_min, rsi_max, sentiment_sum, sentiment_count,
+        first_timestamp, last_timestamp, last_close, last_signal
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(symbol, timeframe, bar_time) DO UPDATE SET
+        samples = samples + excluded.samples,
+        buy_signals = buy_signals + excluded.buy_signals,
+        sell_signals = sell_signals + excluded.sell_signals,
+        hold_signals = hold_signals + excluded.hold_signals,
+        combined_score_sum = combined_score_sum + excluded.combined_score_sum,
+        combined_score_count = combined_score_count + excluded.combined_score_count,
+        confidence_sum = confidence_sum + excluded.confidence_sum,
+        confidence_count = confidence_count + excluded.confidence_count,
+        rsi_sum = rsi_sum + excluded.rsi_sum,
+        rsi_count = rsi_count + excluded.rsi_count,
+        rsi_min = COALESCE(MIN(rsi_min, excluded.rsi_min), rsi_min, excluded.rsi_min),
+        rsi_max = COALESCE(MAX(rsi_max, excluded.rsi_max), rsi_max, excluded.rsi_max),
+        sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+        sentiment_count = sentiment_count + excluded.sentiment_count,
+        first_timestamp = MIN(first_timestamp, excluded.first_timestamp),
+        last_close = CASE WHEN excluded.last_timestamp >= last_timestamp
+                          THEN excluded.last_close ELSE last_close END,
+        last_signal = CASE WHEN excluded.last_timestamp >= last_timestamp
+                           THEN excluded.last_signal ELSE last_signal END,
+        last_timestamp = MAX(last_timestamp, excluded.last_timestamp)
+"""
+
+
+def _archive_path(archive_dir: str, day: str) -> Path:
+    return Path(archive_dir) / "analysis_history" / day[:4] / f"{day}.ndjson.gz"
+
+
+def downsample_partition(db: "DatabaseManager", day: str, cutoff: str,
+                         archive_dir: Optional[str]) -> Dict[str, int]:
+    """
+    Archive, summarize and delete the raw rows of one day older than `cutoff`.
+
+    The archive is appended and closed before the delete commits, so a
+    failure leaves the rows in place (a rerun may then archive them twice).
+    """
+    next_day = (datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()
+    upper = min(next_day, cutoff)
+    bars: Dict[Tuple[str, str, str], _BarSummary] = {}
+    archived = 0
+
+    with db.connection() as conn:
+        rows = conn.cursor()
+        rows.execute("""
+            SELECT * FROM analysis_history
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+        """, (day, upper))
+
+        if archive_dir:
+            path = _archive_path(archive_dir, day)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            archive_ctx = gzip.open(path, "at", encoding="utf-8")
+        else:
+            archive_ctx = nullcontext()
+
+        with archive_ctx as archive:
+            while True:
+                batch = rows.fetchmany(_FETCH_BATCH)
+                if not batch:
+                    break
+                for row in batch:
+                    key = (row["symbol"], row["timeframe"], _bar_start(row["timestamp"], row["timeframe"]))
+                    bar = bars.get(key)
+                    if bar is None:
+                        bar = bars[key] = _BarSummary()
+                    bar.add(row)
+                    if archive is not None:
+                        archive.write(json.dumps(dict(row), default=str) + "\n")
+                        archived += 1
+
+        conn.executemany(_UPSERT_SUMMARY, [bar.params(key) for key, bar in bars.items()])
+        deleted = conn.execute(
+            "DELETE FROM analysis_history WHERE timestamp >= ? AND timestamp < ?",
+            (day, upper),
+        ).rowcount
+
+    return {"archived_rows": archived, "deleted_rows": deleted, "summary_bars": len(bars)}
+
+
+def convert_to_incremental_vacuum(db_path: str) -> bool:
+    """
+    One-time full VACUUM switching the file to incremental auto_vacuum.
+
+    Uses its own connection so the shared DatabaseManager lock is not held
+    while the file is rewritten; returns True if a conversion was needed.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        logger.info("Converting database to incremental auto_vacuum (one-time VACUUM)")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+
+def checkpoint_and_vacuum(db: "DatabaseManager", pages: int, convert: bool = False) -> Dict[str, Any]:
+    """
+    Checkpoint the WAL and release up to `pages` free pages.
+
+    With `convert`, a database created without auto_vacuum is first
+    converted by convert_to_incremental_vacuum (offline use only); otherwise
+    the incremental step is a no-op on such a file.
+    """
+    converted = convert_to_incremental_vacuum(db.db_path) if convert else False
+    with db.connection() as conn:
+        incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        if not incremental and not convert:
+            logger.info("Database is not in incremental auto_vacuum mode; "
+                        "run `python -m app.core.retention --run` once to convert it")
+        freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        freelist_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.commit()
+        busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return {
+        "converted_to_incremental": converted,
+        "incremental_auto_vacuum": incremental,
+        "pages_released": freelist_before - freelist_after,
+        "wal_busy": bool(busy),
+        "wal_frames": wal_frames,
+        "wal_checkpointed": checkpointed,
+    }
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _median_ms(conn: sqlite3.Connection, query: str, params: tuple, runs: int = 5) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def storage_report(db: "DatabaseManager") -> Dict[str, Any]:
+    """DB/WAL size, row counts and median latency of typical analysis reads"""
+    with db.connection() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        raw_rows = conn.execute("SELECT COUNT(*) FROM analysis_history").fetchone()[0]
+        summary_rows = conn.execute("SELECT COUNT(*) FROM analysis_summary").fetchone()[0]
+        latest = conn.execute(
+            "SELECT symbol FROM analysis_history ORDER BY timestamp DESC LIMIT 1"
+        ).fetchone()
+        symbol = latest[0] if latest else "EURUSD"
+        now = datetime.now()
+        latency = {
+            "symbol_last_24h": _median_ms(conn, """
+                SELECT * FROM analysis_history
+                WHERE symbol = ? AND timestamp >= ?
+                ORDER BY timestamp DESC
+            """, (symbol, (now - timedelta(days=1)).isoformat())),
+            "all_symbols_last_hour": _median_ms(conn, """
+                SELECT symbol, final_signal, confidence, timestamp FROM analysis_history
+                WHERE timestamp >= ?
+                ORDER BY timestamp DESC
+                LIMIT 50
+            """, ((now - timedelta(hours=1)).isoformat(),)),
+            "count_all": _median_ms(conn, "SELECT COUNT(*) FROM analysis_history", ()),
+        }
+    return {
+        "timestamp": now.isoformat(),
+        "db_bytes": _file_size(db.db_path),
+        "wal_bytes": _file_size(f"{db.db_path}-wal"),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_pages": freelist,
+        "analysis_rows": raw_rows,
+        "summary_rows": summary_rows,
+        "latency_ms": latency,
+    }
+
+
+def run_retention(db: Optional["DatabaseManager"] = None,
+                  storage: Optional[StorageConfig] = None,
+                  now: Optional[datetime] = None, convert: bool = False) -> Dict[str, Any]:
+    """Apply retention to analysis_history and run DB maintenance (`convert`: see checkpoint_and_vacuum)"""
+    if db is None:
+        from app.core.database import get_database_manager
+        db = get_database_manager()
+    storage = storage or get_config().storage
+    now = now or datetime.now()
+
+    before = storage_report(db)
+    cutoff = (now - timedelta(days=storage.analysis_raw_retention_days)).date().isoformat()
+    archive_dir = storage.archive_dir if storage.archive_enabled else None
+
+    with db.connection() as conn:
+        partitions = [
+            row[0] for row in conn.execute("""
+                SELECT DISTINCT substr(timestamp, 1, 10) FROM analysis_history
+                WHERE timestamp < ?
+                ORDER BY 1
+            """, (cutoff,))
+        ]
+
+    totals = {"archived_rows": 0, "deleted_rows": 0, "summary_bars": 0}
+    for day in partitions:
+        result = downsample_partition(db, day, cutoff, archive_dir)
+        for key, value in result.items():
+            totals[key] += value
+
+    summary_cutoff = (now - timedelta(days=storage.analysis_summary_retention_days)).date().isoformat()
+    with db.connection() as conn:
+        pruned = conn.execute("DELETE FROM analysis_summary WHERE bar_time < ?", (summary_cutoff,)).rowcount
+
+    maintenance = checkpoint_and_vacuum(db, storage.incremental_vacuum_pages, convert=convert)
+    after = storage_report(db)
+
+    logger.info(
+        f"Retention: {len(partitions)} partitions, {totals['deleted_rows']} rows downsampled "
+        f"into {totals['summary_bars']} bars, {pruned} old summaries pruned; "
+        f"DB {before['db_bytes'] + before['wal_bytes']} -> {after['db_bytes'] + after['wal_bytes']} bytes"
+    )
+    return {
+        "cutoff": cutoff,
+        "partitions": partitions,
+        **totals,
+        "pruned_summaries": pruned,
+        "maintenance": maintenance,
+        "before": before,
+        "after": after,
+    }
+
+
+class StorageMaintenance:
+    """Background thread running `run_retention` on a fixed interval"""
+
+    def __init__(self, interval_hours: Optional[float] = None):
+        self.interval_seconds = (interval_hours or get_config().storage.maintenance_interval_hours) * 3600
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"Storage maintenance every {self.interval_seconds / 3600:.1f}h")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+
+    def _run_loop(self):
+        # First pass shortly after startup, then on the interval
+        wait = 60.0
+        while not self._stop_event.wait(wait):
+            try:
+                self.last_result = run_retention()
+            except Exception as e:
+                logger.error(f"Storage maintenance failed: {e}", exc_info=True)
+            wait = self.interval_seconds
+
+
+_maintenance: Optional[StorageMaintenance] = None
+
+
+def get_storage_maintenance() -> StorageMaintenance:
+    """Get global storage maintenance instance"""
+    global _maintenance
+    if _maintenance is None:
+        _maintenance = StorageMaintenance()
+    return _maintenance
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="analysis_history retention and DB maintenance")
+    parser.add_argument("--run", action="store_true",
+                        help="Downsample/archive old rows and vacuum (converts the DB to incremental auto_vacuum once)")
+    parser.add_argument("--report", action="store_true", help="Print DB size and query latency")
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_retention(convert=True), indent=2, default=str))
+    elif args.report:
+        from app.core.database import get_database_manager
+        print(json.dumps(storage_report(get_database_manager()), indent=2))
+    else:
+        parser.print_help()
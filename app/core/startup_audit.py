@@ -0,0 +1,141 @@
+"""
+Cold-start audit: import time of the bot and API entry points.
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`,
+so nothing is already in sys.modules. The report has the wall time of the
+import, the slowest modules by cumulative time, and whether any of the heavy
+optional dependencies was pulled in. Those (Gemini SDK, onnxruntime,
+Streamlit, plotly) are only imported where they are used, so they must not
+show up when the bot or the API server start. Runs are repeated and the
+median is kept, since the first run also pays for cold .pyc / disk caches.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+ENTRY_POINTS = {
+    "bot": "run_bot",
+    "api": "app.api.server",
+}
+
+# Wall seconds including interpreter start-up; measured ~0.95s (bot) and ~1.5s (api) on a dev box
+STARTUP_BUDGETS = {
+    "bot": 1.5,
+    "api": 2.0,
+}
+
+HEAVY_OPTIONAL_MODULES = ("google.generativeai", "onnxruntime", "streamlit", "plotly")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Records of a `-X importtime` stderr dump (the header and other lines are skipped)"""
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+@dataclass
+class StartupAudit:
+    name: str
+    target: str
+    seconds: List[float] = field(default_factory=list)
+    records: List[ImportRecord] = field(default_factory=list)
+    budget: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def median_s(self) -> float:
+        return statistics.median(self.seconds) if self.seconds else 0.0
+
+    @property
+    def heavy_modules(self) -> List[str]:
+        """Heavy optional dependencies that were imported (top-level package names)"""
+        loaded = {r.module for r in self.records}
+        return [m for m in HEAVY_OPTIONAL_MODULES if m in loaded]
+
+    @property
+    def within_budget(self) -> bool:
+        return self.budget is None or self.median_s <= self.budget
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and self.within_budget and not self.heavy_modules
+
+    def top(self, n: int = 15) -> List[Dict]:
+        """Slowest modules by cumulative import time"""
+        ranked = sorted(self.records, key=lambda r: r.cumulative_us, reverse=True)[:n]
+        return [{"module": r.module, "cumulative_ms": round(r.cumulative_us / 1000, 1),
+                 "self_ms": round(r.self_us / 1000, 1)} for r in ranked]
+
+    def summary(self, top: int = 15) -> Dict:
+        return {
+            "name": self.name,
+            "target": self.target,
+            "median_s": round(self.median_s, 3),
+            "runs_s": [round(s, 3) for s in self.seconds],
+            "budget_s": self.budget,
+            "within_budget": self.within_budget,
+            "heavy_modules": self.heavy_modules,
+            "modules": len(self.records),
+            "slowest": self.top(top),
+            "error": self.error,
+            "passed": self.passed,
+        }
+
+
+def _import_once(target: str, python: str, cwd: Path):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    start = time.perf_counter()
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {target}"],
+                          cwd=str(cwd), env=env, capture_output=True, text=True)
+    return time.perf_counter() - start, proc
+
+
+def audit_startup(name: str, target: str, repeat: int = 3, budget: Optional[float] = None,
+                  python: Optional[str] = None, cwd: Optional[Path] = None) -> StartupAudit:
+    """
+    Import `target` in `repeat` fresh interpreters
+
+    The wall time includes interpreter start-up, which is what a cold start
+    pays; the module breakdown is kept from the last run.
+    """
+    audit = StartupAudit(name, target, budget=budget)
+    for _ in range(max(1, repeat)):
+        seconds, proc = _import_once(target, python or sys.executable, cwd or REPO_ROOT)
+        if proc.returncode != 0:
+            audit.error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+            return audit
+        audit.seconds.append(seconds)
+        audit.records = parse_importtime(proc.stderr)
+    return audit
+
+
+def run_startup_audit(names: Sequence[str] = tuple(ENTRY_POINTS), repeat: int = 3,
+                      budgets: Optional[Dict[str, float]] = None) -> List[StartupAudit]:
+    """Audit the named entry points (keys of ENTRY_POINTS, or module names)"""
+    budgets = {**STARTUP_BUDGETS, **(budgets or {})}
+    return [audit_startup(name, ENTRY_POINTS.get(name, name), repeat, budgets.get(name))
+            for name in names]
@@ -205,16 +205,29 @@ class StateManager:
             """, (limit,))
             return [dict(row) for row in cursor.fetchall()]
     
-    def get_recent_trades(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent trade records"""
+    def get_recent_trades(self, limit: int = 100, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent trade records, newest first.
+
+        Pass the smallest `id` already seen as `before_id` to fetch the next
+        page (keyset pagination on the primary key).
+        """
         with sqlite3.connect(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM trades
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (limit,))
+            if before_id is None:
+                cursor.execute("""
+                    SELECT * FROM trades
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (limit,))
+            else:
+                cursor.execute("""
+                    SELECT * FROM trades
+                    WHERE id < ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (before_id, limit))
             return [dict(row) for row in cursor.fetchall()]
     
     def activate_kill_switch(self):
@@ -5,7 +5,7 @@ from datetime import datetime
 import threading
 
 from app.core.logger import setup_logger
-from app.ui.cache_manager import get_cache, get_historical_cache
+from app.core.cache import get_cache, get_historical_cache
 from app.trading.indicator_optimizer import get_indicator_optimizer
 from app.core.database import get_database_manager
 from app.trading.mt5_client import get_mt5_client
@@ -81,15 +81,11 @@ class PerformanceOptimizationController:
     
     def _clear_analysis_cache(self):
         """Clear cache entries related to analysis"""
-        cache_keys_to_clear = [
-            k for k in self.cache.cache.keys()
-            if any(x in k for x in ['daily_perf', 'hourly_perf', 'symbol_perf', 'trades_history'])
-        ]
+        prefixes = ('daily_perf', 'hourly_perf', 'symbol_perf', 'trades_history')
+        cleared = self.cache.invalidate(lambda k: str(k).startswith(prefixes))
+        cleared += self.hist_cache.invalidate(lambda k: str(k).startswith(prefixes))
         
-        for key in cache_keys_to_clear:
-            self.cache.cache.pop(key, None)
-        
-        logger.debug(f"Cleared {len(cache_keys_to_clear)} cache entries")
+        logger.debug(f"Cleared {cleared} cache entries")
     
     def get_optimization_status(self) -> Dict[str, Any]:
         """Get current optimization status"""
@@ -98,8 +94,8 @@ class PerformanceOptimizationController:
             "last_optimization": self.last_optimization,
             "current_params": self.optimizer.current_params,
             "cache_stats": {
-                "cache_items": len(self.cache.cache),
-                "historical_cache_items": len(self.hist_cache.cache)
+                "cache_items": len(self.cache),
+                "historical_cache_items": len(self.hist_cache)
             }
         }
     
@@ -160,21 +156,21 @@ class UIPerformanceMonitor:
             "performance_stats": stats,
             "cache_effectiveness": {
                 "cache_hit_ratio": self._calculate_cache_ratio(),
-                "total_cache_items": len(self.cache.cache) + len(self.hist_cache.cache),
+                "total_cache_items": len(self.cache) + len(self.hist_cache),
                 "memory_usage_mb": self._estimate_memory_usage()
             }
         }
     
     def _calculate_cache_ratio(self) -> float:
-        """Estimate cache hit ratio"""
-        # This is simplified; in production, track actual hits
-        return 0.75  # Assume 75% cache hit ratio
+        """Combined hit ratio across both caches"""
+        stats = [self.cache.stats(), self.hist_cache.stats()]
+        hits = sum(s["hits"] for s in stats)
+        lookups = hits + sum(s["misses"] for s in stats)
+        return hits / lookups if lookups else 0.0
     
     def _estimate_memory_usage(self) -> float:
-        """Estimate memory usage by caches"""
-        cache_size = sum(len(str(v)) for v in self.cache.cache.values())
-        hist_size = sum(len(str(v)) for v in self.hist_cache.cache.values())
-        return (cache_size + hist_size) / 1024 / 1024
+        """Memory accounted by the caches (MB)"""
+        return (self.cache.stats()["bytes"] + self.hist_cache.stats()["bytes"]) / 1024 / 1024
 
 
 class DataRefreshManager:
@@ -196,12 +192,10 @@ class DataRefreshManager:
         recommendations = []
         
         for cache_type, rules in self.refresh_rules.items():
-            cache_key = f"{cache_type}_*"
-            entries = [k for k in self.cache.cache.keys() if cache_type in k]
+            entries = [k for k in self.cache.keys() if cache_type in str(k)]
             
             if entries:
-                entry = self.cache.cache.get(entries[0], {})
-                age_seconds = (datetime.now() - entry.get("timestamp", datetime.now())).total_seconds()
+                age_seconds = self.cache.age(entries[0]) or 0.0
                 
                 if age_seconds > rules["ttl"]:
                     recommendations.append({
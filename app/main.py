@@ -26,6 +26,7 @@ from app.ui.modern_dashboard import (
     render_logs_tab,
     render_statement_tab,
 )
+from app.ui.live_updates import render_live_tab, render_timings_panel
 
 logger = setup_logger("modern_ui_main")
 
@@ -77,26 +78,24 @@ def main():
         "📈 Statement",
     ])
     
-    with tab1:
-        render_dashboard_tab()
+    # Each tab refreshes itself from the change feed instead of rerunning the app
+    live = st.session_state.get("auto_refresh", True)
+    interval = st.session_state.get("refresh_rate", 15)
+    tabs = [
+        (tab1, "dashboard", render_dashboard_tab),
+        (tab2, "positions", render_positions_tab),
+        (tab3, "analysis", render_analysis_tab),
+        (tab4, "account", render_account_tab),
+        (tab5, "settings", render_settings_tab),
+        (tab6, "activity", render_logs_tab),
+        (tab7, "statement", render_statement_tab),
+    ]
+    for container, name, render_fn in tabs:
+        with container:
+            render_live_tab(name, render_fn, live=live, interval_seconds=interval)
     
-    with tab2:
-        render_positions_tab()
-    
-    with tab3:
-        render_analysis_tab()
-    
-    with tab4:
-        render_account_tab()
-    
-    with tab5:
-        render_settings_tab()
-    
-    with tab6:
-        render_logs_tab()
-    
-    with tab7:
-        render_statement_tab()
+    with st.sidebar.expander("⏱️ Render timings"):
+        render_timings_panel()
     
     # Footer
     st.markdown("---")
@@ -110,8 +109,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-    
-    # Auto-refresh using Streamlit's built-in mechanism
-    import time
-    time.sleep(5)
-    st.rerun()
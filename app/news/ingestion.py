@@ -0,0 +1,312 @@
+"""
+News ingestion by currency / asset, shared by every pair that trades it.
+
+Symbols share currencies (EURUSD, EURJPY and USDJPY need three topics, not
+three pair queries), so news is fetched per topic: the base and quote
+currency of a forex pair, the asset of a crypto symbol. `NewsIngestor.refresh`
+collects the topics of the cycle's symbols, keeps those older than
+`NEWS_CACHE_MINUTES`, and fetches them concurrently with one
+`httpx.AsyncClient` (at most `NEWS_MAX_CONCURRENCY` requests in flight).
+
+Articles are scored with a small headline lexicon and stored in the local
+`news_articles` table, deduplicated by normalized title (the same wire story
+comes back for several currencies and from several outlets) and linked to
+each topic that returned it in `news_article_topics`. A topic's score is the
+mean article score over the lookback, and a pair's sentiment is derived from
+its two topics:
+
+    score(BASE/QUOTE) = clip(score(BASE) - score(QUOTE), -1, 1)
+
+(good news for the base currency lifts the pair, for the quote currency
+drags it down). Fetch times live in `news_topics`, so a restart does not
+refetch what is still fresh. Articles published before the lookback are
+deleted after each refresh, so the tables hold about one lookback of news.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import get_config
+from app.core.database import DatabaseManager, get_database_manager
+from app.core.logger import setup_logger
+from app.news.provider_base import NewsProvider
+from app.trading.exposure_index import asset_class
+
+logger = setup_logger("news_ingestion")
+
+# Headline words by direction for the currency / asset they are about
+POSITIVE_TERMS = (
+    'hawkish', 'rate hike', 'hikes rates', 'raises rates', 'surge', 'surges', 'rally', 'rallies',
+    'strengthens', 'gains', 'jumps', 'soars', 'beats expectations', 'upgrade', 'record high',
+    'inflows', 'adoption', 'approval', 'approves', 'bullish',
+)
+NEGATIVE_TERMS = (
+    'dovish', 'rate cut', 'cuts rates', 'lowers rates', 'plunge', 'plunges', 'slump', 'slumps',
+    'weakens', 'falls', 'tumbles', 'crash', 'misses expectations', 'downgrade', 'recession',
+    'outflows', 'hack', 'ban', 'lawsuit', 'bearish',
+)
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def score_text(text: str) -> float:
+    """Lexicon score in [-1, 1] (0 when no term matches)"""
+    words = " ".join(_WORDS.findall((text or "").lower()))
+    padded = f" {words} "
+    positive = sum(padded.count(f" {term} ") for term in POSITIVE_TERMS)
+    negative = sum(padded.count(f" {term} ") for term in NEGATIVE_TERMS)
+    total = positive + negative
+    return (positive - negative) / total if total else 0.0
+
+
+def article_id(article: Dict[str, Any]) -> str:
+    """Dedup key: normalized title, or the URL when there is no title"""
+    title = " ".join(_WORDS.findall((article.get("title") or "").lower()))
+    return hashlib.sha1((title or article.get("url") or "").encode()).hexdigest()
+
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()  # Naive datetimes are local time
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return time.time()
+
+
+def symbol_topics(symbol: str) -> Tuple[str, ...]:
+    """News topics of a symbol: (asset, quote) for crypto, (base, quote) for forex"""
+    upper = symbol.upper().split('.')[0]
+    if asset_class(upper) == "CRYPTO" and upper.endswith("USD"):
+        return upper[:-3], "USD"
+    if len(upper) >= 6 and upper[:6].isalpha():
+        return upper[:3], upper[3:6]
+    return (upper,)
+
+
+class NewsStore:
+    """Deduplicated articles per topic in SQLite"""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or get_database_manager()
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_articles (
+                    id CHAR(40) PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    url TEXT,
+                    source VARCHAR(100),
+                    published_ts REAL NOT NULL,
+                    score REAL NOT NULL,
+                    fetched_ts REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_articles_published ON news_articles(published_ts)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_article_topics (
+                    topic VARCHAR(10) NOT NULL,
+                    article_id CHAR(40) NOT NULL,
+                    PRIMARY KEY (topic, article_id)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_topics (
+                    topic VARCHAR(10) PRIMARY KEY,
+                    fetched_ts REAL NOT NULL,
+                    articles INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def save(self, topic: str, articles: List[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """Store a topic's articles (duplicates only get the topic link); returns new articles"""
+        now = time.time() if now is None else now
+        rows = {}
+        for article in articles:
+            key = article_id(article)
+            if key not in rows:
+                text = f"{article.get('title') or ''}. {article.get('description') or ''}"
+                rows[key] = (key, article.get("title") or "", article.get("description"), article.get("url"),
+                             article.get("source"), _epoch(article.get("published_at")), score_text(text), now)
+        with self.db.connection() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO news_articles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows.values())
+            added = conn.total_changes - before
+            conn.executemany("INSERT OR IGNORE INTO news_article_topics (topic, article_id) VALUES (?, ?)",
+                             [(topic, key) for key in rows])
+            conn.execute("""
+                INSERT INTO news_topics (topic, fetched_ts, articles) VALUES (?, ?, ?)
+                ON CONFLICT(topic) DO UPDATE SET fetched_ts = excluded.fetched_ts, articles = excluded.articles
+            """, (topic, now, len(rows)))
+        return added
+
+    def prune(self, before: float) -> int:
+        """Delete articles published before `before` (and their topic links); returns articles deleted"""
+        with self.db.connection() as conn:
+            conn.execute("""
+                DELETE FROM news_article_topics WHERE article_id IN
+                    (SELECT id FROM news_articles WHERE published_ts < ?)
+            """, (before,))
+            return conn.execute("DELETE FROM news_articles WHERE published_ts < ?", (before,)).rowcount
+
+    def fetched_at(self, topics: Iterable[str]) -> Dict[str, float]:
+        topics = list(topics)
+        if not topics:
+            return {}
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"SELECT topic, fetched_ts FROM news_topics WHERE topic IN ({','.join('?' * len(topics))})",
+                topics,
+            ).fetchall()
+        return {row["topic"]: row["fetched_ts"] for row in rows}
+
+    def topic_sentiment(self, topic: str, since: float, headlines: int = 5) -> Dict[str, Any]:
+        """Mean score and latest headlines of a topic's articles published after `since`"""
+        with self.db.connection() as conn:
+            row = conn.execute("""
+                SELECT AVG(a.score) AS score, COUNT(*) AS articles
+                FROM news_article_topics t JOIN news_articles a ON a.id = t.article_id
+                WHERE t.topic = ? AND a.published_ts >= ?
+            """, (topic, since)).fetchone()
+            titles = conn.execute("""
+                SELECT a.title FROM news_article_topics t JOIN news_articles a ON a.id = t.article_id
+                WHERE t.topic = ? AND a.published_ts >= ?
+                ORDER BY a.published_ts DESC LIMIT ?
+            """, (topic, since, headlines)).fetchall()
+        return {
+            "score": row["score"] if row["articles"] else None,
+            "articles": row["articles"],
+            "headlines": [r["title"] for r in titles],
+        }
+
+
+def _run(coro):
+    """Run a coroutine from sync code, also when called inside a running event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def default_provider() -> NewsProvider:
+    """NewsAPI when configured, the stub otherwise"""
+    from app.news.provider_newsapi import NewsAPIProvider
+    from app.news.provider_stub import StubNewsProvider
+
+    config = get_config()
+    if config.news.provider == "newsapi" and config.news.news_api_key:
+        return NewsAPIProvider()
+    return StubNewsProvider()
+
+
+class NewsIngestor:
+    """Concurrent per-topic news fetches into a NewsStore, and pair sentiment from it"""
+
+    def __init__(self, provider: Optional[NewsProvider] = None, store: Optional[NewsStore] = None,
+                 ttl_minutes: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 hours_back: int = 24, max_results: int = 20, timeout: float = 10.0):
+        config = get_config()
+        self.provider = provider or default_provider()
+        self.store = store or NewsStore()
+        self.ttl_seconds = 60 * (config.news.cache_minutes if ttl_minutes is None else ttl_minutes)
+        self.max_concurrency = max_concurrency or config.news.max_concurrency
+        self.hours_back = hours_back
+        self.max_results = max_results
+        self.timeout = timeout
+        self._lock = threading.Lock()  # One refresh at a time (loop thread vs API calls)
+
+    def stale_topics(self, topics: Iterable[str], now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        topics = list(dict.fromkeys(topics))
+        fetched = self.store.fetched_at(topics)
+        return [t for t in topics if now - fetched.get(t, 0.0) >= self.ttl_seconds]
+
+    async def _fetch_all(self, topics: List[str]) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def fetch(client, topic):
+            async with semaphore:
+                try:
+                    return topic, await self.provider.fetch_topic(client, topic, self.hours_back, self.max_results)
+                except Exception as e:
+                    logger.warning(f"News fetch failed for {topic}: {e}")
+                    return topic, None
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            return dict(await asyncio.gather(*(fetch(client, t) for t in topics)))
+
+    def refresh(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """
+        Fetch the stale topics of `symbols` concurrently
+
+        Returns:
+            New (not previously stored) articles per fetched topic; topics whose
+            fetch failed are left stale and retried on the next call
+        """
+        if not self.provider.is_available():
+            return {}
+        topics = [t for s in symbols if s for t in symbol_topics(s)]
+        with self._lock:
+            stale = self.stale_topics(topics)
+            if not stale:
+                return {}
+            start = time.perf_counter()
+            results = _run(self._fetch_all(stale))
+            added = {topic: self.store.save(topic, articles)
+                     for topic, articles in results.items() if articles is not None}
+            # Nothing reads further back than the lookback (pair_sentiment default, 24h)
+            self.store.prune(time.time() - 3600 * self.hours_back)
+        logger.info(f"News: {len(stale)} topics fetched in {time.perf_counter() - start:.2f}s, new articles {added}")
+        return added
+
+    def pair_sentiment(self, symbol: str, hours_back: Optional[int] = None) -> Dict[str, Any]:
+        """Sentiment of `symbol` from the stored per-topic scores (same keys as SentimentAnalyzer)"""
+        since = time.time() - 3600 * (hours_back or self.hours_back)
+        topics = symbol_topics(symbol)
+        parts = {t: self.store.topic_sentiment(t, since) for t in topics}
+        articles = sum(p["articles"] for p in parts.values())
+        if not articles:
+            return {
+                "score": None,  # Unknown
+                "summary": f"No news available for {symbol}",
+                "headlines": [],
+                "status": "no_news",
+                "currencies": parts,
+            }
+        scores = [parts[t]["score"] or 0.0 for t in topics]
+        score = scores[0] - scores[1] if len(scores) == 2 else scores[0]
+        headlines = list(dict.fromkeys(h for p in parts.values() for h in p["headlines"]))[:5]
+        return {
+            "score": max(-1.0, min(1.0, score)),
+            "summary": ", ".join(f"{t} {parts[t]['score'] or 0.0:+.2f} ({parts[t]['articles']})" for t in topics),
+            "headlines": headlines,
+            "confidence": min(1.0, articles / 10),
+            "status": "derived",
+            "currencies": parts,
+        }
+
+
+# Global instance
+_news_ingestor: Optional[NewsIngestor] = None
+
+
+def get_news_ingestor() -> NewsIngestor:
+    """Get global news ingestor"""
+    global _news_ingestor
+    if _news_ingestor is None:
+        _news_ingestor = NewsIngestor()
+    return _news_ingestor
@@ -1,9 +1,35 @@
 """Base class for news providers"""
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
+# Search terms per news topic (a currency or a crypto asset), see app.news.ingestion
+TOPIC_TERMS = {
+    'USD': ['USD', 'dollar', 'Federal Reserve'],
+    'EUR': ['EUR', 'euro', 'ECB'],
+    'GBP': ['GBP', 'sterling', 'Bank of England'],
+    'JPY': ['JPY', 'yen', 'Bank of Japan'],
+    'CHF': ['CHF', 'Swiss franc', 'SNB'],
+    'AUD': ['AUD', 'Australian dollar', 'RBA'],
+    'NZD': ['NZD', 'New Zealand dollar', 'RBNZ'],
+    'CAD': ['CAD', 'Canadian dollar', 'Bank of Canada'],
+    'BTC': ['BTC', 'Bitcoin'],
+    'ETH': ['ETH', 'Ethereum'],
+    'BNB': ['BNB', 'Binance'],
+    'XRP': ['XRP', 'Ripple'],
+    'ADA': ['ADA', 'Cardano'],
+    'DOGE': ['DOGE', 'Dogecoin'],
+    'SOL': ['SOL', 'Solana'],
+    'DOT': ['DOT', 'Polkadot'],
+    'LTC': ['LTC', 'Litecoin'],
+    'AVAX': ['AVAX', 'Avalanche'],
+    'MATIC': ['MATIC', 'Polygon'],
+    'LINK': ['LINK', 'Chainlink'],
+    'UNI': ['UNI', 'Uniswap'],
+}
+
 
 class NewsProvider(ABC):
     """Base class for news providers"""
@@ -33,6 +59,29 @@ class NewsProvider(ABC):
         """Check if provider is available"""
         pass
     
+    def topic_query(self, topic: str) -> str:
+        """Search query for a topic (currency or asset code)"""
+        terms = TOPIC_TERMS.get(topic, [topic])
+        return " OR ".join(f'"{t}"' if ' ' in t else t for t in terms)
+    
+    async def fetch_topic(
+        self,
+        client,
+        topic: str,
+        hours_back: int = 24,
+        max_results: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch news for one topic (currency or asset), concurrently with others
+        
+        Args:
+            client: Shared httpx.AsyncClient
+            topic: Currency / asset code (e.g., 'EUR', 'BTC')
+        
+        Providers without an async API fall back to fetch_news() in a thread.
+        """
+        return await asyncio.to_thread(self.fetch_news, topic, hours_back, max_results)
+    
     def extract_currency_from_symbol(self, symbol: str) -> tuple:
         """
         Extract base and quote currencies from symbol
@@ -13,12 +13,47 @@ logger = setup_logger("news_newsapi")
 class NewsAPIProvider(NewsProvider):
     """NewsAPI.org provider"""
     
-    def __init__(self):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.config = get_config()
-        self.api_key = self.config.news.news_api_key
-        self.base_url = "https://newsapi.org/v2"
+        self.api_key = api_key or self.config.news.news_api_key
+        self.base_url = (base_url or self.config.news.api_base_url).rstrip("/")
         self._available = self.api_key is not None and len(self.api_key) > 0
     
+    def _params(self, query: str, hours_back: int, max_results: int) -> Dict[str, Any]:
+        to_time = datetime.now()
+        from_time = to_time - timedelta(hours=hours_back)
+        return {
+            "q": query,
+            "apiKey": self.api_key,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": max_results,
+            "from": from_time.isoformat(),
+            "to": to_time.isoformat(),
+        }
+    
+    @staticmethod
+    def _parse_articles(data: Dict[str, Any], max_results: int) -> List[Dict[str, Any]]:
+        news_list = []
+        for article in data.get("articles", [])[:max_results]:
+            try:
+                published_str = article.get("publishedAt", "")
+                published_at = datetime.fromisoformat(
+                    published_str.replace("Z", "+00:00")
+                ) if published_str else datetime.now()
+                
+                news_list.append({
+                    "title": article.get("title", ""),
+                    "description": article.get("description", ""),
+                    "url": article.get("url", ""),
+                    "published_at": published_at,
+                    "source": (article.get("source") or {}).get("name", "Unknown"),
+                })
+            except Exception as e:
+                logger.warning(f"Error parsing article: {e}")
+                continue
+        return news_list
+    
     def fetch_news(
         self,
         symbol: str,
@@ -40,49 +75,13 @@ class NewsAPIProvider(NewsProvider):
             # Build query (search for both currencies)
             query = f"{base_currency} {quote_currency} forex"
             
-            # Calculate time range
-            to_time = datetime.now()
-            from_time = to_time - timedelta(hours=hours_back)
-            
-            # Make API request
-            url = f"{self.base_url}/everything"
-            params = {
-                "q": query,
-                "apiKey": self.api_key,
-                "language": "en",
-                "sortBy": "publishedAt",
-                "pageSize": max_results,
-                "from": from_time.isoformat(),
-                "to": to_time.isoformat(),
-            }
-            
             with httpx.Client(timeout=10.0) as client:
-                response = client.get(url, params=params)
+                response = client.get(f"{self.base_url}/everything",
+                                      params=self._params(query, hours_back, max_results))
                 response.raise_for_status()
                 data = response.json()
             
-            # Parse articles
-            articles = data.get("articles", [])
-            news_list = []
-            
-            for article in articles[:max_results]:
-                try:
-                    published_str = article.get("publishedAt", "")
-                    published_at = datetime.fromisoformat(
-                        published_str.replace("Z", "+00:00")
-                    ) if published_str else datetime.now()
-                    
-                    news_list.append({
-                        "title": article.get("title", ""),
-                        "description": article.get("description", ""),
-                        "url": article.get("url", ""),
-                        "published_at": published_at,
-                        "source": article.get("source", {}).get("name", "Unknown"),
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing article: {e}")
-                    continue
-            
+            news_list = self._parse_articles(data, max_results)
             logger.info(f"Fetched {len(news_list)} news articles for {symbol}")
             return news_list
             
@@ -90,6 +89,23 @@ class NewsAPIProvider(NewsProvider):
             logger.error(f"Error fetching news from NewsAPI: {e}", exc_info=True)
             return []
     
+    async def fetch_topic(
+        self,
+        client: httpx.AsyncClient,
+        topic: str,
+        hours_back: int = 24,
+        max_results: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Fetch news for one currency / asset (errors propagate to the ingestor)"""
+        if not self.is_available():
+            return []
+        response = await client.get(f"{self.base_url}/everything",
+                                    params=self._params(self.topic_query(topic), hours_back, max_results))
+        response.raise_for_status()
+        news_list = self._parse_articles(response.json(), max_results)
+        logger.debug(f"Fetched {len(news_list)} news articles for {topic}")
+        return news_list
+    
     def is_available(self) -> bool:
         """Check if NewsAPI is available"""
         return self._available
@@ -1,16 +1,19 @@
 """Adaptive Risk Optimizer - Hourly parameter adjustment using AI and backtest analysis"""
 
 import json
+import threading
 import time
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 from app.core.logger import setup_logger
-from app.core.config import get_config
+from app.core.config import get_config, state_file
 from app.trading.mt5_client import get_mt5_client
 from app.trading.portfolio import get_portfolio_manager
 from app.core.database import get_database_manager
+from app.core.rate_limit import RateLimiter
 from app.ai.gemini_client import GeminiClient
+from app.ai.ticker_indicator_optimizer import get_ticker_indicator_optimizer
 
 logger = setup_logger("adaptive_optimizer")
 
@@ -24,12 +27,19 @@ class AdaptiveRiskOptimizer:
         self.portfolio = get_portfolio_manager()
         self.db = get_database_manager()
         self.gemini = GeminiClient()
-        self.params_file = Path(__file__).parent.parent.parent / "data" / "adaptive_params.json"
+        self.params_file = state_file("adaptive_params.json")
         self.params_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Load or initialize adaptive parameters
+        # Load or initialize adaptive parameters. The dict is never mutated
+        # in place: updates build a new one and swap the reference, so
+        # readers always see a complete parameter set.
         self.ticker_params = self._load_params()
         self.last_optimization = {}
+        self._publish_lock = threading.Lock()
+        
+        # Concurrency for the hourly cycle
+        self.ai_concurrency = max(1, self.config.ai.optimization_concurrency)
+        self.ai_limiter = RateLimiter.per_minute(self.config.ai.requests_per_minute, burst=self.ai_concurrency)
         
     def _load_params(self) -> Dict:
         """Load saved adaptive parameters or create defaults"""
@@ -44,17 +54,28 @@ class AdaptiveRiskOptimizer:
         return {}
     
     def _save_params(self):
-        """Save adaptive parameters to disk"""
+        """Save adaptive parameters to disk (atomic replace)"""
         try:
-            with open(self.params_file, 'w') as f:
-                json.dump(self.ticker_params, f, indent=2)
-            logger.info(f"✅ Saved adaptive parameters for {len(self.ticker_params)} tickers")
+            params = self.ticker_params
+            tmp_file = self.params_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(params, f, indent=2)
+            tmp_file.replace(self.params_file)
+            logger.info(f"✅ Saved adaptive parameters for {len(params)} tickers")
         except Exception as e:
             logger.error(f"Failed to save adaptive params: {e}")
     
+    def _publish(self, updates: Dict[str, Dict]):
+        """Swap in a new parameter table containing `updates`"""
+        with self._publish_lock:
+            staged = dict(self.ticker_params)
+            staged.update(updates)
+            self.ticker_params = staged
+    
     def get_ticker_params(self, symbol: str) -> Dict:
         """Get optimized parameters for a specific ticker"""
-        if symbol not in self.ticker_params:
+        params = self.ticker_params.get(symbol)
+        if params is None:
             # Return defaults
             return {
                 "max_positions_per_ticker": 2,
@@ -67,68 +88,58 @@ class AdaptiveRiskOptimizer:
                 "profit_factor": 1.0,
             }
         
-        return self.ticker_params[symbol]
+        return params
     
     def analyze_ticker_performance(self, symbol: str) -> Dict:
         """Analyze performance metrics for a ticker from the last hour"""
+        return self.analyze_all_performance([symbol])[symbol]
+    
+    def analyze_all_performance(self, symbols: List[str], hours: int = 1) -> Dict[str, Dict]:
+        """Analyze the last `hours` of closed trades for all symbols with one grouped query"""
         try:
-            # Get trades from last hour
-            one_hour_ago = datetime.now() - timedelta(hours=1)
-            trades = self.db.query_trades(symbol, since=one_hour_ago)
-            
-            if not trades:
-                return {
-                    "symbol": symbol,
-                    "trades_count": 0,
-                    "win_rate": 0.0,
-                    "profit_factor": 1.0,
-                    "avg_win": 0.0,
-                    "avg_loss": 0.0,
-                    "total_pnl": 0.0,
-                    "status": "insufficient_data"
-                }
-            
-            # Calculate metrics
-            closed_trades = [t for t in trades if t.get('pnl') is not None]
-            if not closed_trades:
-                return {
-                    "symbol": symbol,
-                    "trades_count": len(trades),
-                    "win_rate": 0.0,
-                    "profit_factor": 1.0,
-                    "status": "no_closed_trades"
-                }
-            
-            wins = [t for t in closed_trades if t.get('pnl', 0) > 0]
-            losses = [t for t in closed_trades if t.get('pnl', 0) < 0]
-            
-            win_rate = (len(wins) / len(closed_trades)) * 100 if closed_trades else 0
-            total_profit = sum(t.get('pnl', 0) for t in wins) if wins else 0
-            total_loss = abs(sum(t.get('pnl', 0) for t in losses)) if losses else 0
-            profit_factor = total_profit / total_loss if total_loss > 0 else (total_profit / 0.01 if total_profit > 0 else 1.0)
-            
-            avg_win = total_profit / len(wins) if wins else 0
-            avg_loss = total_loss / len(losses) if losses else 0
-            
-            return {
-                "symbol": symbol,
-                "trades_count": len(closed_trades),
-                "win_rate": win_rate,
-                "profit_factor": profit_factor,
-                "avg_win": avg_win,
-                "avg_loss": avg_loss,
-                "total_pnl": sum(t.get('pnl', 0) for t in closed_trades),
-                "wins": len(wins),
-                "losses": len(losses),
-                "status": "analyzed"
-            }
+            since = datetime.now() - timedelta(hours=hours)
+            stats = self.db.get_symbol_trade_stats(since, symbols)
         except Exception as e:
-            logger.error(f"Error analyzing {symbol} performance: {e}")
+            logger.error(f"Error loading trade stats: {e}")
+            return {symbol: {"symbol": symbol, "status": "error", "error": str(e)} for symbol in symbols}
+        
+        return {symbol: self._performance_from_stats(symbol, stats.get(symbol)) for symbol in symbols}
+    
+    @staticmethod
+    def _performance_from_stats(symbol: str, row: Optional[Dict]) -> Dict:
+        """Turn one grouped-query row into the metrics used by the AI prompt"""
+        if not row or not row.get("total_trades"):
             return {
                 "symbol": symbol,
-                "status": "error",
-                "error": str(e)
+                "trades_count": 0,
+                "win_rate": 0.0,
+                "profit_factor": 1.0,
+                "avg_win": 0.0,
+                "avg_loss": 0.0,
+                "total_pnl": 0.0,
+                "status": "insufficient_data"
             }
+        
+        wins = row["winning_trades"] or 0
+        losses = row["losing_trades"] or 0
+        total_profit = row["gross_profit"] or 0.0
+        total_loss = row["gross_loss"] or 0.0
+        
+        win_rate = (wins / row["total_trades"]) * 100
+        profit_factor = total_profit / total_loss if total_loss > 0 else (total_profit / 0.01 if total_profit > 0 else 1.0)
+        
+        return {
+            "symbol": symbol,
+            "trades_count": row["total_trades"],
+            "win_rate": win_rate,
+            "profit_factor": profit_factor,
+            "avg_win": total_profit / wins if wins else 0,
+            "avg_loss": total_loss / losses if losses else 0,
+            "total_pnl": row["net_profit"] or 0.0,
+            "wins": wins,
+            "losses": losses,
+            "status": "analyzed"
+        }
     
     def optimize_with_ai(self, symbol: str, performance: Dict) -> Dict:
         """Use AI to recommend parameter adjustments based on performance"""
@@ -169,26 +180,22 @@ Devuelve SOLO JSON sin explicación:
 }}
 """
             
-            # Get AI recommendation
-            response = self.gemini.chat(prompt, model="gemini-2.5-flash-lite", temperature=0.3)
+            # Get AI recommendation (shared rate limit across worker threads)
+            if not self.ai_limiter.acquire(timeout=self.config.ai.timeout_seconds):
+                logger.warning(f"AI rate limit wait timed out for {symbol}")
+                return {"recommendation": "maintain"}
+            recommendation = self.gemini.generate_content(
+                "Eres un optimizador de parámetros de riesgo. Responde con el JSON pedido por el usuario.",
+                prompt,
+                use_cache=False,
+            )
             
-            # Parse response
-            try:
-                # Extract JSON from response
-                json_start = response.find('{')
-                json_end = response.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = response[json_start:json_end]
-                    recommendation = json.loads(json_str)
-                    
-                    logger.info(f"✅ AI Optimization for {symbol}: {recommendation.get('recommendation')} - {recommendation.get('reasoning')}")
-                    return recommendation
-                else:
-                    logger.warning(f"Could not parse AI response for {symbol}: {response[:100]}")
-                    return {"recommendation": "maintain"}
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON parse error for {symbol}: {e}")
+            if not recommendation or "recommendation" not in recommendation:
+                logger.warning(f"Could not parse AI response for {symbol}")
                 return {"recommendation": "maintain"}
+            
+            logger.info(f"✅ AI Optimization for {symbol}: {recommendation.get('recommendation')} - {recommendation.get('reasoning')}")
+            return recommendation
         
         except Exception as e:
             logger.error(f"Error optimizing {symbol} with AI: {e}")
@@ -196,6 +203,12 @@ Devuelve SOLO JSON sin explicación:
     
     def apply_optimization(self, symbol: str, recommendation: Dict):
         """Apply AI recommendations to update parameters"""
+        new_params = self._next_params(symbol, recommendation)
+        if new_params is not None:
+            self._publish({symbol: new_params})
+    
+    def _next_params(self, symbol: str, recommendation: Dict) -> Optional[Dict]:
+        """Parameters for `symbol` after applying a recommendation (not yet published)"""
         try:
             current = self.get_ticker_params(symbol)
             
@@ -208,8 +221,13 @@ Devuelve SOLO JSON sin explicación:
                 "last_updated": datetime.now().isoformat(),
             }
             
-            # Store in memory
-            self.ticker_params[symbol] = new_params
+            # Risk increases require a strategy that passed walk-forward validation
+            if new_params["max_risk_pct"] > current["max_risk_pct"] and not self._oos_validated(symbol):
+                logger.info(f"⏸️  {symbol}: risk increase held back (no out-of-sample validation)")
+                new_params["max_risk_pct"] = current["max_risk_pct"]
+                new_params["max_positions_per_ticker"] = min(
+                    new_params["max_positions_per_ticker"], current["max_positions_per_ticker"]
+                )
             
             # Log changes
             if new_params != current:
@@ -221,44 +239,75 @@ Devuelve SOLO JSON sin explicación:
                 "recommendation": recommendation,
                 "new_params": new_params
             }
+            return new_params
         
         except Exception as e:
             logger.error(f"Error applying optimization for {symbol}: {e}")
+            return None
+    
+    def _oos_validated(self, symbol: str) -> bool:
+        """Whether the symbol's indicator set survived its latest walk-forward run"""
+        try:
+            return get_ticker_indicator_optimizer().is_validated(symbol)
+        except Exception as e:
+            logger.debug(f"Walk-forward status unavailable for {symbol}: {e}")
+            return False
     
     def hourly_optimization_cycle(self):
-        """Execute hourly optimization for all trading symbols"""
+        """
+        Execute hourly optimization for all trading symbols
+        
+        Trade stats for every symbol come from one grouped query; AI
+        recommendations run concurrently (bounded pool + shared rate limit)
+        and each symbol fails in isolation. The new parameters are published
+        in a single swap once all symbols are done.
+        """
         logger.info("="*80)
         logger.info("🔄 HOURLY ADAPTIVE OPTIMIZATION CYCLE STARTED")
         logger.info("="*80)
         
-        symbols = self.config.trading.default_symbols
-        optimization_results = []
+        symbols = list(self.config.trading.default_symbols)
+        performances = self.analyze_all_performance(symbols)
+        
+        ready = {}
+        for symbol, performance in performances.items():
+            if performance.get('status') == "analyzed":
+                ready[symbol] = performance
+            else:
+                logger.debug(f"⏭️  {symbol}: {performance.get('status')}")
         
+        recommendations = {}
+        if ready:
+            with ThreadPoolExecutor(max_workers=min(self.ai_concurrency, len(ready)),
+                                    thread_name_prefix="adaptive-ai") as pool:
+                futures = {
+                    pool.submit(self.optimize_with_ai, symbol, performance): symbol
+                    for symbol, performance in ready.items()
+                }
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        recommendations[symbol] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error in optimization cycle for {symbol}: {e}")
+        
+        updates = {}
+        optimization_results = []
         for symbol in symbols:
-            try:
-                # Analyze performance
-                performance = self.analyze_ticker_performance(symbol)
-                
-                if performance.get('status') != "analyzed":
-                    logger.debug(f"⏭️  {symbol}: {performance.get('status')}")
-                    continue
-                
-                # Get AI recommendation
-                recommendation = self.optimize_with_ai(symbol, performance)
-                
-                # Apply optimization
-                self.apply_optimization(symbol, recommendation)
-                
-                optimization_results.append({
-                    "symbol": symbol,
-                    "performance": performance,
-                    "recommendation": recommendation
-                })
-            
-            except Exception as e:
-                logger.error(f"Error in optimization cycle for {symbol}: {e}")
+            if symbol not in recommendations:
+                continue
+            new_params = self._next_params(symbol, recommendations[symbol])
+            if new_params is None:
+                continue
+            updates[symbol] = new_params
+            optimization_results.append({
+                "symbol": symbol,
+                "performance": ready[symbol],
+                "recommendation": recommendations[symbol]
+            })
         
-        # Save optimized parameters
+        # Publish all symbols at once and persist
+        self._publish(updates)
         self._save_params()
         
         # Log summary
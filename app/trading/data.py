@@ -1,9 +1,10 @@
 """Data fetching and caching for market data"""
 
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List, Set
 from functools import lru_cache
 
 # Try to import MetaTrader5 - optional dependency
@@ -41,6 +42,9 @@ TIMEFRAME_MAP = {
 }
 
 
+TIMEFRAME_MINUTES = {"M1": 1, "M5": 5, "M15": 15, "M30": 30, "H1": 60, "H4": 240, "D1": 1440}
+
+
 def get_timeframe_constant(timeframe_str: str) -> int:
     """Convert timeframe string to MT5 constant"""
     return TIMEFRAME_MAP.get(timeframe_str.upper(), mt5.TIMEFRAME_M15)
@@ -49,10 +53,12 @@ def get_timeframe_constant(timeframe_str: str) -> int:
 class DataProvider:
     """Provides market data with caching"""
     
-    def __init__(self):
-        self.mt5 = get_mt5_client()
+    def __init__(self, client=None, clock: Callable[[], float] = time.time):
+        self.mt5 = client or get_mt5_client()
+        self.clock = clock
         self._cache: Dict[str, tuple] = {}  # key -> (data, timestamp)
         self.cache_ttl_seconds = 30  # Cache for 30 seconds
+        self._restored: Set[str] = set()  # Keys loaded from a warm-start snapshot, topped up on first use
     
     def get_ohlc_data(
         self, 
@@ -74,7 +80,7 @@ class DataProvider:
             DataFrame with columns: time, open, high, low, close, tick_volume, spread
         """
         cache_key = f"{symbol}_{timeframe}_{count}"
-        now = datetime.now()
+        now = datetime.fromtimestamp(self.clock())
         
         # Check cache
         if cache_key in self._cache:
@@ -87,6 +93,22 @@ class DataProvider:
             logger.warning(f"MT5 not connected, cannot fetch data for {symbol}")
             return None
         
+        df = None
+        if cache_key in self._restored:
+            # Bars from before a restart: fetch only what is new since then
+            self._restored.discard(cache_key)
+            df = self._top_up(symbol, timeframe, count, *self._cache[cache_key])
+        if df is None:
+            df = self._fetch(symbol, timeframe, count)
+        if df is None:
+            return None
+        
+        # Cache result
+        self._cache[cache_key] = (df.copy(), now)
+        return df
+    
+    def _fetch(self, symbol: str, timeframe: str, count: int) -> Optional[pd.DataFrame]:
+        """Fetch `count` bars from MT5 as a DataFrame indexed by bar time"""
         try:
             # 🔧 FIXED: get_rates() now internally calls ensure_symbol() 
             # (no need to call symbol_select here - causes AttributeError)
@@ -140,9 +162,6 @@ class DataProvider:
             
             df = df[expected_cols]
             
-            # Cache result
-            self._cache[cache_key] = (df.copy(), now)
-            
             logger.debug(f"✓ Fetched {len(df)} candles for {symbol} {timeframe}")
             return df
             
@@ -150,6 +169,31 @@ class DataProvider:
             logger.error(f"Error fetching OHLC data for {symbol}: {e}", exc_info=True)
             return None
     
+    def _top_up(self, symbol: str, timeframe: str, count: int, cached: pd.DataFrame,
+                fetched_at: datetime) -> Optional[pd.DataFrame]:
+        """
+        Extend cached bars with the ones formed since, or None to fetch all `count`
+
+        The number of missing bars is estimated from the time elapsed since the
+        cached bars were fetched (local clock, not bar times: those are broker
+        time, off by the server's UTC offset); the merge only happens when the
+        new bars overlap the cached ones, otherwise a gap would be hidden and
+        the caller falls back to a full fetch.
+        """
+        minutes = TIMEFRAME_MINUTES.get(timeframe.upper())
+        if not minutes or cached is None or cached.empty:
+            return None
+        elapsed = self.clock() - fetched_at.timestamp()
+        missing = max(0, int(elapsed // (minutes * 60))) + 2  # New bars, plus the last cached one (forming then) re-read
+        if missing >= count:
+            return None
+        fresh = self._fetch(symbol, timeframe, missing)
+        if fresh is None or fresh.empty or fresh.index[0] > cached.index[-1]:
+            return None
+        merged = pd.concat([cached[cached.index < fresh.index[0]], fresh]).tail(count)
+        logger.debug(f"✓ Topped up {symbol} {timeframe} with {len(fresh)} candles")
+        return merged
+    
     def get_current_tick(self, symbol: str) -> Optional[Dict]:
         """Get current tick (bid/ask) for symbol"""
         return self.mt5.get_tick(symbol)
@@ -182,6 +226,18 @@ class DataProvider:
         """Clear data cache"""
         self._cache.clear()
         logger.debug("Data cache cleared")
+    
+    def snapshot_state(self) -> Dict:
+        """Cached bars for a warm-start snapshot"""
+        return {key: (df, cache_time) for key, (df, cache_time) in self._cache.items()}
+    
+    def restore_state(self, state: Dict) -> int:
+        """Load bars from a snapshot; they are topped up instead of refetched on first use"""
+        for key, (df, cache_time) in state.items():
+            if key not in self._cache:
+                self._cache[key] = (df, cache_time)
+                self._restored.add(key)
+        return len(self._restored)
 
 
 # Global data provider instance
@@ -1,7 +1,11 @@
 """Order execution and management"""
 
-from typing import Optional, Dict, Tuple
-from datetime import datetime
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Sequence, Tuple
+from datetime import datetime, timedelta
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.core.config import get_config
 from app.core.logger import setup_logger
@@ -9,6 +13,8 @@ from app.trading.mt5_client import get_mt5_client
 from app.trading.risk import get_risk_manager
 from app.trading.market_status import get_market_status
 from app.trading.data import get_data_provider
+from app.trading.execution_telemetry import OrderTimer, get_execution_telemetry
+from app.trading.pretrade_gates import GateContext, check_free_margin
 
 # Try to import MetaTrader5 - optional dependency
 try:
@@ -21,7 +27,7 @@ except ImportError:
         ORDER_TYPE_BUY = 0
         ORDER_TYPE_SELL = 1
         TRADE_ACTION_DEAL = 1
-        TRADE_ACTION_SLTP = 2
+        TRADE_ACTION_SLTP = 6
         ORDER_TIME_GTC = 0
         ORDER_FILLING_IOC = 1
         TRADE_RETCODE_DONE = 10009
@@ -31,6 +37,9 @@ except ImportError:
 
 logger = setup_logger("execution")
 
+# Retcodes answered with a fresh price: REQUOTE, PRICE_CHANGED, PRICE_OFF
+REQUOTE_RETCODES = {10004, 10020, 10021}
+
 
 # ✅ HELPER FUNCTIONS (pragmatic validation)
 
@@ -113,6 +122,46 @@ def norm(symbol: str, price: float) -> float:
     return round(price, digits)
 
 
+@dataclass
+class OrderAction:
+    """One close or SL/TP change for ExecutionManager.execute_batch"""
+    ticket: int
+    kind: str = "CLOSE"             # "CLOSE" or "MODIFY"
+    volume: Optional[float] = None  # CLOSE: lots to close (None = whole position)
+    sl: Optional[float] = None      # MODIFY: new SL / TP (None = keep)
+    tp: Optional[float] = None
+    comment: str = "AI Bot Close"
+    decision_time: Optional[float] = None  # Epoch time the exit was decided (telemetry)
+
+
+@dataclass
+class OrderResult:
+    """Outcome of one OrderAction"""
+    ticket: int
+    kind: str
+    success: bool
+    error: Optional[str] = None
+    retcode: Optional[int] = None
+    price: Optional[float] = None
+    volume: Optional[float] = None
+    attempts: int = 0
+    latency_ms: float = 0.0
+
+
+@dataclass
+class BatchResult:
+    """Per-ticket results of a batch and its wall time"""
+    results: List[OrderResult]
+    total_latency_ms: float
+
+    def by_ticket(self) -> Dict[int, OrderResult]:
+        return {r.ticket: r for r in self.results}
+
+    @property
+    def failed(self) -> List[OrderResult]:
+        return [r for r in self.results if not r.success]
+
+
 class ExecutionManager:
     """Manages order execution"""
     
@@ -121,6 +170,7 @@ class ExecutionManager:
         self.mt5 = get_mt5_client()
         self.risk = get_risk_manager()
         self.market_status = get_market_status()
+        self.telemetry = get_execution_telemetry()
     
     def place_market_order(
         self,
@@ -131,6 +181,9 @@ class ExecutionManager:
         tp_price: Optional[float] = None,
         comment: str = "AI Trading Bot",
         atr: Optional[float] = None,
+        decision_time: Optional[float] = None,
+        decision_price: Optional[float] = None,
+        context: Optional[GateContext] = None,
     ) -> Tuple[bool, Optional[Dict], Optional[str]]:
         """
         Place a market order
@@ -142,48 +195,26 @@ class ExecutionManager:
             sl_price: Stop loss price (optional)
             tp_price: Take profit price (optional)
             comment: Order comment
+            decision_time: Epoch time the signal was decided (telemetry; default now)
+            decision_price: Price the signal was decided on (telemetry)
+            context: Pre-trade gate context of the cycle (reuses its account / symbol info)
         
         Returns:
             Tuple of (success, order_result_dict, error_message)
         """
+        timer = OrderTimer(symbol, "OPEN", order_type.upper(), decision_time)
         # 🔴 CRITICAL: Log symbol info at entry
         logger.info(f"🔴 place_market_order ENTRY: symbol={symbol} type={order_type} volume={volume} paper_mode={self.config.is_paper_mode()}")
         
         try:
             # ✅ 1️⃣ VALIDAR FREE MARGIN (CRÍTICO)
-            account = self.mt5.get_account_info()
-            if account:
-                free_margin = account.get('margin_free', 0)
-                balance = account.get('balance', 0)
-                used_margin = account.get('margin', 0)
-                
-                # Definir pares exóticos que consumen mucho margen
-                EXOTICS = ['USDTRY', 'USDHKD', 'EURPLN', 'EURNOK', 'USDKZT', 'USDRUB', 'USDCNY']
-                is_exotic = any(symbol.upper().startswith(e) or symbol.upper().endswith(e) for e in EXOTICS)
-                
-                # Requisito mínimo: 1.3x del margen necesario
-                min_free_margin_multiplier = 1.3
-                required_margin = volume * 1000  # Estimación conservadora
-                required_free_margin = required_margin * min_free_margin_multiplier
-                
-                # Si es exótico, ser más conservador
-                if is_exotic:
-                    required_free_margin *= 1.5
-                
-                if free_margin < required_free_margin:
-                    msg = (f"❌ NOT ENOUGH FREE MARGIN for {symbol}: "
-                           f"free=${free_margin:.0f}, need ${required_free_margin:.0f}, "
-                           f"balance=${balance:.0f}, used=${used_margin:.0f}")
-                    logger.warning(msg)
-                    return False, None, msg
-                
-                # Si es exótico y margen libre < 2000, no operar
-                if is_exotic and free_margin < 2000:
-                    msg = f"❌ {symbol} is EXOTIC and free_margin=${free_margin:.0f} < $2000. Skipping."
-                    logger.warning(msg)
-                    return False, None, msg
+            account = context.account if context else self.mt5.get_account_info()
+            margin_error = check_free_margin(symbol, volume, account)
+            if margin_error:
+                logger.warning(margin_error)
+                return False, None, margin_error
             
-            symbol_info = self.mt5.get_symbol_info(symbol)
+            symbol_info = context.symbol_info(symbol) if context else self.mt5.get_symbol_info(symbol)
             if symbol_info:
                 info_dict = symbol_info._asdict() if hasattr(symbol_info, '_asdict') else symbol_info
                 logger.info(
@@ -215,19 +246,21 @@ class ExecutionManager:
             return False, None, "MT5 not connected"
         
         if not MT5_AVAILABLE:
-            tick = self.mt5.get_tick(symbol)
-            price = tick.get('ask', 0) if order_type.upper() == "BUY" else tick.get('bid', 0) if tick else 0
-            return True, {
-                "order": 12345,
-                "retcode": mt5.TRADE_RETCODE_DONE,
-                "volume": volume,
-                "price": price,
-                "comment": comment,
-                "request_id": 0,
-            }, None
+            # Demo mode: fill against the simulated market
+            simulator = self.mt5.simulator
+            tick = simulator.tick(symbol)
+            timer.built()
+            timer.sending()
+            result = simulator.open_position(symbol, order_type, volume, sl_price, tp_price, comment)
+            self._record_telemetry(timer, result, volume,
+                                   tick['ask'] if order_type.upper() == "BUY" else tick['bid'],
+                                   simulator.spec(symbol).point, decision_price)
+            if result["retcode"] != mt5.TRADE_RETCODE_DONE:
+                return False, None, f"Order rejected: {result['retcode']} - {result['comment']}"
+            return True, result, None
         
         try:
-            symbol_info = self.mt5.get_symbol_info(symbol)
+            symbol_info = context.symbol_info(symbol) if context else self.mt5.get_symbol_info(symbol)
             if not symbol_info:
                 return False, None, f"Cannot get symbol info for {symbol}"
             
@@ -452,6 +485,7 @@ class ExecutionManager:
                 request["sl"] = sl_price
             if tp_price:
                 request["tp"] = tp_price
+            timer.built()
             
             # ✅ 3️⃣ order_check() + LOGGING OBLIGATORIO
             logger.info(f"\n🔍 order_check() {symbol}:")
@@ -480,14 +514,18 @@ class ExecutionManager:
             logger.info(
                 f"✅ order_check passed (retcode={check.retcode}, comment={check.comment}), sending order"
             )
+            timer.sending()
             result = mt5.order_send(request)
+            point = symbol_info.get('point') or 0.0
             
             if result is None:
+                self._record_telemetry(timer, None, volume, price, point, decision_price)
                 error = mt5.last_error()
                 logger.error(f"❌ order_send() failed: {error}")
                 return False, None, f"Order send failed: {error}"
             
             result_dict = result._asdict()
+            self._record_telemetry(timer, result_dict, volume, price, point, decision_price)
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 error_msg = f"Order rejected by MT5: retcode={result.retcode}, comment='{result.comment}'"
@@ -576,8 +614,15 @@ class ExecutionManager:
         Returns:
             Tuple of (success, error_message)
         """
-        if self.config.is_paper_mode() or not MT5_AVAILABLE:
-            logger.info(f"[PAPER/DEMO] Would close position ticket={ticket}, volume={volume}")
+        if self.config.is_paper_mode():
+            logger.info(f"[PAPER] Would close position ticket={ticket}, volume={volume}")
+            return True, None
+        
+        if not MT5_AVAILABLE:
+            profit = self.mt5.simulator.close_position(ticket, volume)
+            if profit is None:
+                return False, f"Position {ticket} not found"
+            logger.info(f"[DEMO] Position {ticket} closed: profit=${profit:.2f}")
             return True, None
         
         if not self.mt5.is_connected():
@@ -689,8 +734,10 @@ class ExecutionManager:
         try:
             # Get position para validar volumen
             if not MT5_AVAILABLE:
-                logger.info(f"[PAPER/DEMO] Would partial close: ticket={ticket}, volume={volume}")
-                return True
+                success, error = self.close_position(ticket, volume=volume)
+                if not success:
+                    logger.error(f"❌ Partial close failed: ticket={ticket}, error={error}")
+                return success
             
             positions = mt5.positions_get(ticket=ticket)
             if not positions:
@@ -740,13 +787,18 @@ class ExecutionManager:
         Returns:
             Tuple of (success, error_message)
         """
-        if self.config.is_paper_mode() or not MT5_AVAILABLE:
+        if self.config.is_paper_mode():
             logger.info(
-                f"[PAPER/DEMO] Would modify position ticket={ticket}, "
+                f"[PAPER] Would modify position ticket={ticket}, "
                 f"sl={sl_price}, tp={tp_price}"
             )
             return True, None
         
+        if not MT5_AVAILABLE:
+            if not self.mt5.simulator.modify_position(ticket, sl_price, tp_price):
+                return False, f"Position {ticket} not found"
+            return True, None
+        
         if not self.mt5.is_connected():
             return False, "MT5 not connected"
         
@@ -784,6 +836,206 @@ class ExecutionManager:
             logger.error(f"Error modifying position: {e}", exc_info=True)
             return False, str(e)
     
+    def execute_batch(
+        self,
+        actions: Sequence[OrderAction],
+        positions: Optional[List[Dict]] = None,
+        max_workers: Optional[int] = None,
+        max_retries: int = 2
+    ) -> BatchResult:
+        """
+        Close / modify several positions at once
+        
+        Requests are prepared from one broker snapshot (positions, one tick and
+        symbol info per symbol) instead of per-ticket lookups, then sent
+        concurrently; a requoted close is resent at the fresh price.
+        
+        Args:
+            actions: One action per ticket
+            positions: Open positions already fetched this cycle (fetched if None)
+            max_workers: Orders in flight (EXECUTION_CONCURRENCY by default)
+            max_retries: Resends per order after a requote
+        
+        Returns:
+            BatchResult with one OrderResult per action, in order
+        """
+        started = time.perf_counter()
+        if not actions:
+            return BatchResult([], 0.0)
+        
+        if self.config.is_paper_mode():
+            for action in actions:
+                logger.info(f"[PAPER] Would {action.kind.lower()} position ticket={action.ticket}, "
+                            f"volume={action.volume}, sl={action.sl}, tp={action.tp}")
+            return BatchResult([OrderResult(a.ticket, a.kind, True) for a in actions],
+                               (time.perf_counter() - started) * 1000)
+        
+        if MT5_AVAILABLE and not self.mt5.is_connected():
+            return BatchResult([OrderResult(a.ticket, a.kind, False, "MT5 not connected") for a in actions],
+                               (time.perf_counter() - started) * 1000)
+        
+        # One snapshot for the whole batch
+        started_at = time.time()
+        if positions is None:
+            positions = self.mt5.get_positions()
+        by_ticket = {p.get('ticket'): p for p in positions}
+        symbols = {by_ticket[a.ticket]['symbol'] for a in actions if a.ticket in by_ticket}
+        ticks = {symbol: self.mt5.symbol_info_tick(symbol) or {} for symbol in symbols}
+        infos = {symbol: self.mt5.get_symbol_info(symbol) or {} for symbol in symbols}
+        
+        results: List[Optional[OrderResult]] = [None] * len(actions)
+        prepared = []
+        for i, action in enumerate(actions):
+            position = by_ticket.get(action.ticket)
+            if position is None:
+                results[i] = OrderResult(action.ticket, action.kind, False, f"Position {action.ticket} not found")
+                continue
+            is_buy = position.get('type', 0) == mt5.POSITION_TYPE_BUY
+            timer = OrderTimer(position['symbol'], action.kind, "SELL" if is_buy else "BUY",
+                               action.decision_time or started_at)
+            request = self._batch_request(action, position, ticks, infos)
+            if request is None:
+                results[i] = OrderResult(action.ticket, action.kind, False,
+                                         f"Partial close of {action.volume} lots is below the broker minimum")
+                continue
+            timer.built()
+            prepared.append((i, action, request, timer, position))
+        
+        if prepared:
+            workers = max(1, min(max_workers or self.config.trading.execution_concurrency, len(prepared)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order") as pool:
+                futures = [(i, pool.submit(self._send_with_requote, action, request, max_retries, timer))
+                           for i, action, request, timer, _ in prepared]
+                for i, future in futures:
+                    results[i] = future.result()
+            for i, action, request, timer, position in prepared:
+                if action.kind == "CLOSE":
+                    point = infos.get(position['symbol'], {}).get('point') or 0.0
+                    self._record_telemetry(timer, results[i], request.get('volume'), request.get('price'),
+                                           point, position.get('price_current'))
+                else:
+                    self._record_telemetry(timer, results[i])
+        
+        closed = [r.ticket for r in results if r.success and r.kind == "CLOSE"]
+        if closed and MT5_AVAILABLE:
+            self._record_closed_trades(closed)
+        
+        batch = BatchResult(results, (time.perf_counter() - started) * 1000)
+        logger.info(f"Batch of {len(actions)} orders: {len(actions) - len(batch.failed)} ok, "
+                    f"{len(batch.failed)} failed in {batch.total_latency_ms:.0f}ms")
+        return batch
+    
+    def _batch_request(self, action: OrderAction, position: Dict, ticks: Dict[str, Dict],
+                       infos: Dict[str, Dict]) -> Optional[Dict]:
+        """order_send request for an action against the snapshot's position (None: volume too small)"""
+        symbol = position['symbol']
+        if action.kind == "MODIFY":
+            request = {"action": mt5.TRADE_ACTION_SLTP, "symbol": symbol, "position": action.ticket}
+            if action.sl:
+                request["sl"] = action.sl
+            if action.tp:
+                request["tp"] = action.tp
+            return request
+        
+        pos_volume = position.get('volume', 0.0)
+        volume = min(action.volume or pos_volume, pos_volume)
+        info = infos.get(symbol)
+        if action.volume and info:
+            # Partial close: never more than 95%, rounded down to the volume step
+            min_volume = info.get('volume_min') or 0.01
+            step = info.get('volume_step') or min_volume
+            volume = min(volume, pos_volume * 0.95)
+            volume = round(math.floor(volume / step + 1e-9) * step, 8)
+            if volume < min_volume:
+                return None
+        
+        is_buy = position.get('type', 0) == mt5.POSITION_TYPE_BUY
+        tick = ticks.get(symbol) or {}
+        return {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "volume": volume,
+            "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+            "position": action.ticket,
+            "price": tick.get('bid') if is_buy else tick.get('ask'),
+            "deviation": 20,
+            "magic": 234000,
+            "comment": action.comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+    
+    def _send_with_requote(self, action: OrderAction, request: Dict, max_retries: int,
+                           timer: Optional[OrderTimer] = None) -> OrderResult:
+        """Send one request, resending at the fresh price after a requote"""
+        started = time.perf_counter()
+        result = OrderResult(action.ticket, action.kind, False, volume=request.get('volume'))
+        while True:
+            result.attempts += 1
+            if timer is not None:
+                timer.sending()
+            response = self.mt5.order_send(request)
+            if response is None:
+                result.error = f"{action.kind.capitalize()} order failed: no response"
+                break
+            result.retcode = response.get('retcode')
+            if result.retcode == mt5.TRADE_RETCODE_DONE:
+                result.success, result.error = True, None
+                result.price = response.get('price') or request.get('price')
+                break
+            result.error = (f"{action.kind.capitalize()} rejected: "
+                            f"{result.retcode} - {response.get('comment', '')}")
+            if result.retcode not in REQUOTE_RETCODES or result.attempts > max_retries \
+                    or request['action'] != mt5.TRADE_ACTION_DEAL:
+                break
+            if timer is not None:
+                timer.requotes += 1
+            tick = self.mt5.symbol_info_tick(request['symbol']) or {}
+            request = {**request, "price": tick.get('ask') if request['type'] == mt5.ORDER_TYPE_BUY
+                       else tick.get('bid')}
+            logger.info(f"Requote on ticket {action.ticket} ({result.retcode}), resending at {request['price']}")
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        if not result.success:
+            logger.error(f"❌ Ticket {action.ticket}: {result.error}")
+        return result
+    
+    def _record_telemetry(self, timer: OrderTimer, result, volume: Optional[float] = None,
+                          requested_price: Optional[float] = None, point: float = 0.0,
+                          decision_price: Optional[float] = None):
+        """Store the timing / fill quality of a sent order (result: order_send dict or OrderResult)"""
+        if isinstance(result, OrderResult):
+            success, retcode, ticket, price = result.success, result.retcode, result.ticket, result.price
+        elif result:
+            retcode = result.get('retcode')
+            success, ticket, price = retcode == mt5.TRADE_RETCODE_DONE, result.get('order'), result.get('price')
+        else:
+            success, retcode, ticket, price = False, None, 0, None
+        self.telemetry.record(timer.finish(success, retcode, ticket, volume or 0.0, requested_price,
+                                           price if success else None, point, decision_price))
+    
+    def _record_closed_trades(self, tickets: List[int]):
+        """Update the trades table from one history fetch for every closed ticket"""
+        try:
+            from app.core.database import get_database
+            db = get_database()
+            now = datetime.now()
+            deals = self.mt5.get_history_deals(now - timedelta(days=7), now)
+            closing = {d.get('position_id'): d for d in deals if d.get('entry') == 1}
+            for ticket in tickets:
+                deal = closing.get(ticket)
+                if deal is None:
+                    continue
+                db.update_trade(ticket, {
+                    'close_price': deal['price'],
+                    'close_timestamp': datetime.fromtimestamp(deal['time']).isoformat(),
+                    'profit': deal['profit'],
+                    'commission': deal.get('commission', 0.0),
+                    'swap': deal.get('swap', 0.0),
+                    'status': 'closed'
+                })
+        except Exception as e:
+            logger.warning(f"Could not update closed trades from MT5: {e}")
+    
     def _get_simulated_price(self, symbol: str, order_type: str) -> float:
         """Get simulated price for PAPER mode"""
         tick = self.mt5.get_tick(symbol)
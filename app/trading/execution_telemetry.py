@@ -0,0 +1,304 @@
+"""
+Order execution telemetry: latency and fill quality of every order sent.
+
+Each order (market entry, close, SL/TP change) records four timestamps:
+
+    decision  - the loop decided to act (signal / exit rule evaluated)
+    request   - the MT5 request was built (after validation and sizing)
+    send      - order_send was called (first attempt)
+    fill      - the broker answered the final attempt
+
+plus requested vs filled price, slippage in points (positive = adverse:
+paid more on a buy, received less on a sell), attempts and requotes. The
+price the decision was taken on (bar close for entries, the position's
+current price for exits) gives the drift: how far the market moved against
+us between deciding and filling, spread included for entries.
+Rows go to the compact `order_telemetry` table (epoch seconds, no JSON) and
+are folded as they are written into `order_telemetry_hourly` buckets per
+symbol and hour, which the API reads.
+
+`latency_cost()` relates the decision-to-send delay to drift and slippage,
+i.e. what cycle latency costs in points.
+"""
+
+import time
+from dataclasses import astuple, dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.database import DatabaseManager, get_database_manager
+from app.core.logger import setup_logger
+
+logger = setup_logger("execution_telemetry")
+
+# Decision-to-send delay buckets (seconds) for latency_cost
+DELAY_BUCKETS = (0.0, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+@dataclass
+class OrderTelemetry:
+    """Timing and fill quality of one order"""
+    symbol: str
+    kind: str                      # OPEN / CLOSE / MODIFY
+    side: str                      # BUY / SELL (direction of the deal)
+    decision_ts: float
+    request_ts: float
+    send_ts: float
+    fill_ts: float
+    ticket: int = 0
+    volume: float = 0.0
+    decision_price: Optional[float] = None
+    requested_price: Optional[float] = None
+    filled_price: Optional[float] = None
+    slippage_points: Optional[float] = None
+    drift_points: Optional[float] = None
+    attempts: int = 1
+    requotes: int = 0
+    retcode: Optional[int] = None
+    success: bool = False
+
+    @property
+    def send_latency_ms(self) -> float:
+        """order_send round trip(s)"""
+        return (self.fill_ts - self.send_ts) * 1000
+
+    @property
+    def total_latency_ms(self) -> float:
+        """Decision to fill"""
+        return (self.fill_ts - self.decision_ts) * 1000
+
+    @staticmethod
+    def slippage(side: str, requested: Optional[float], filled: Optional[float], point: float) -> Optional[float]:
+        """Adverse slippage in points (negative = price improvement)"""
+        if not requested or not filled or not point:
+            return None
+        move = filled - requested if side == "BUY" else requested - filled
+        return round(move / point, 2)
+
+
+_COLUMNS = tuple(f.name for f in fields(OrderTelemetry))
+
+
+class ExecutionTelemetry:
+    """Writes order telemetry rows and their hourly rollups"""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or get_database_manager()
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS order_telemetry (
+                    id INTEGER PRIMARY KEY,
+                    symbol VARCHAR(20) NOT NULL,
+                    kind VARCHAR(6) NOT NULL,
+                    side VARCHAR(4) NOT NULL,
+                    decision_ts REAL NOT NULL,
+                    request_ts REAL NOT NULL,
+                    send_ts REAL NOT NULL,
+                    fill_ts REAL NOT NULL,
+                    ticket INTEGER,
+                    volume REAL,
+                    decision_price REAL,
+                    requested_price REAL,
+                    filled_price REAL,
+                    slippage_points REAL,
+                    drift_points REAL,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    requotes INTEGER NOT NULL DEFAULT 0,
+                    retcode INTEGER,
+                    success INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_order_telemetry_ts ON order_telemetry(send_ts)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS order_telemetry_hourly (
+                    hour VARCHAR(13) NOT NULL,
+                    symbol VARCHAR(20) NOT NULL,
+                    orders INTEGER NOT NULL DEFAULT 0,
+                    fills INTEGER NOT NULL DEFAULT 0,
+                    requotes INTEGER NOT NULL DEFAULT 0,
+                    sum_send_ms REAL NOT NULL DEFAULT 0,
+                    max_send_ms REAL NOT NULL DEFAULT 0,
+                    sum_total_ms REAL NOT NULL DEFAULT 0,
+                    slipped INTEGER NOT NULL DEFAULT 0,
+                    sum_slippage REAL NOT NULL DEFAULT 0,
+                    sum_abs_slippage REAL NOT NULL DEFAULT 0,
+                    drifted INTEGER NOT NULL DEFAULT 0,
+                    sum_drift REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (hour, symbol)
+                )
+            """)
+
+    def record(self, telemetry: OrderTelemetry):
+        """Persist one order and fold it into its symbol/hour bucket"""
+        hour = datetime.fromtimestamp(telemetry.send_ts).strftime("%Y-%m-%dT%H")
+        slip = telemetry.slippage_points
+        filled = telemetry.success and slip is not None
+        drift = telemetry.drift_points if telemetry.success else None
+        try:
+            with self.db.connection() as conn:
+                conn.execute(
+                    f"INSERT INTO order_telemetry ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    astuple(telemetry),
+                )
+                conn.execute("""
+                    INSERT INTO order_telemetry_hourly
+                        (hour, symbol, orders, fills, requotes, sum_send_ms, max_send_ms,
+                         sum_total_ms, slipped, sum_slippage, sum_abs_slippage, drifted, sum_drift)
+                    VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(hour, symbol) DO UPDATE SET
+                        orders = orders + 1,
+                        fills = fills + excluded.fills,
+                        requotes = requotes + excluded.requotes,
+                        sum_send_ms = sum_send_ms + excluded.sum_send_ms,
+                        max_send_ms = MAX(max_send_ms, excluded.max_send_ms),
+                        sum_total_ms = sum_total_ms + excluded.sum_total_ms,
+                        slipped = slipped + excluded.slipped,
+                        sum_slippage = sum_slippage + excluded.sum_slippage,
+                        sum_abs_slippage = sum_abs_slippage + excluded.sum_abs_slippage,
+                        drifted = drifted + excluded.drifted,
+                        sum_drift = sum_drift + excluded.sum_drift
+                """, (
+                    hour, telemetry.symbol, int(telemetry.success), telemetry.requotes,
+                    telemetry.send_latency_ms, telemetry.send_latency_ms, telemetry.total_latency_ms,
+                    int(filled), slip if filled else 0.0, abs(slip) if filled else 0.0,
+                    int(drift is not None), drift or 0.0,
+                ))
+        except Exception as e:
+            # Telemetry must never fail an order
+            logger.warning(f"Could not record order telemetry for {telemetry.symbol}: {e}")
+
+    def rollups(self, since: datetime, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Hourly buckets since `since` with their averages"""
+        query = "SELECT * FROM order_telemetry_hourly WHERE hour >= ?"
+        params: List[Any] = [since.strftime("%Y-%m-%dT%H")]
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        with self.db.connection() as conn:
+            rows = [dict(r) for r in conn.execute(query + " ORDER BY hour, symbol", params)]
+        for row in rows:
+            orders, slipped, drifted = row["orders"], row["slipped"], row["drifted"]
+            row["avg_send_ms"] = row["sum_send_ms"] / orders if orders else 0.0
+            row["avg_total_ms"] = row["sum_total_ms"] / orders if orders else 0.0
+            row["avg_slippage_points"] = row["sum_slippage"] / slipped if slipped else 0.0
+            row["avg_drift_points"] = row["sum_drift"] / drifted if drifted else 0.0
+            row["requote_rate"] = row["requotes"] / orders if orders else 0.0
+        return rows
+
+    def _raw(self, since: datetime, symbol: Optional[str]) -> Dict[str, np.ndarray]:
+        query = ("SELECT decision_ts, send_ts, fill_ts, slippage_points, drift_points FROM order_telemetry "
+                 "WHERE send_ts >= ? AND success = 1")
+        params: List[Any] = [since.timestamp()]
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        with self.db.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        data = np.array([tuple(r) for r in rows], dtype=float).reshape(-1, 5)
+        return {
+            "delay": data[:, 1] - data[:, 0],
+            "send_ms": (data[:, 2] - data[:, 1]) * 1000,
+            "total_ms": (data[:, 2] - data[:, 0]) * 1000,
+            "slippage": data[:, 3],
+            "drift": data[:, 4],
+        }
+
+    def latency_cost(self, since: datetime, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Latency percentiles and adverse price movement as a function of the
+        decision-to-send delay (mean per delay bucket and a linear fit)
+        """
+        raw = self._raw(since, symbol)
+        n = len(raw["delay"])
+        if n == 0:
+            return {"orders": 0}
+        delay = raw["delay"]
+        edges = list(DELAY_BUCKETS) + [np.inf]
+        buckets = []
+        for lo, hi in zip(edges, edges[1:]):
+            mask = (delay >= lo) & (delay < hi)
+            if mask.any():
+                buckets.append({
+                    "delay_s": [lo, None if np.isinf(hi) else hi],
+                    "orders": int(mask.sum()),
+                    "avg_slippage_points": _mean(raw["slippage"][mask]),
+                    "avg_drift_points": _mean(raw["drift"][mask]),
+                })
+        return {
+            "orders": n,
+            "send_ms_p50": float(np.percentile(raw["send_ms"], 50)),
+            "send_ms_p95": float(np.percentile(raw["send_ms"], 95)),
+            "total_ms_p50": float(np.percentile(raw["total_ms"], 50)),
+            "total_ms_p95": float(np.percentile(raw["total_ms"], 95)),
+            "avg_slippage_points": _mean(raw["slippage"]),
+            "avg_drift_points": _mean(raw["drift"]),
+            "by_delay": buckets,
+            # Points lost per extra second between decision and send
+            "slippage_points_per_second": _slope(delay, raw["slippage"]),
+            "drift_points_per_second": _slope(delay, raw["drift"]),
+        }
+
+
+def _mean(values: np.ndarray) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else None
+
+
+def _slope(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    known = ~np.isnan(y)
+    x, y = x[known], y[known]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    return float(np.polyfit(x, y, 1)[0])
+
+
+class OrderTimer:
+    """Collects the timestamps of one order as it moves through execution"""
+
+    def __init__(self, symbol: str, kind: str, side: str, decision_ts: Optional[float] = None):
+        now = time.time()
+        self.symbol, self.kind, self.side = symbol, kind, side
+        self.decision_ts = decision_ts or now
+        self.request_ts = self.send_ts = now
+        self.attempts = self.requotes = 0
+
+    def built(self):
+        self.request_ts = time.time()
+
+    def sending(self):
+        if self.attempts == 0:
+            self.send_ts = time.time()
+        self.attempts += 1
+
+    def finish(self, success: bool, retcode: Optional[int] = None, ticket: int = 0, volume: float = 0.0,
+               requested_price: Optional[float] = None, filled_price: Optional[float] = None,
+               point: float = 0.0, decision_price: Optional[float] = None) -> OrderTelemetry:
+        return OrderTelemetry(
+            symbol=self.symbol, kind=self.kind, side=self.side,
+            decision_ts=self.decision_ts, request_ts=self.request_ts,
+            send_ts=self.send_ts, fill_ts=time.time(),
+            ticket=ticket or 0, volume=volume or 0.0,
+            decision_price=decision_price, requested_price=requested_price, filled_price=filled_price,
+            slippage_points=OrderTelemetry.slippage(self.side, requested_price, filled_price, point),
+            drift_points=OrderTelemetry.slippage(self.side, decision_price, filled_price, point),
+            attempts=max(self.attempts, 1), requotes=self.requotes,
+            retcode=retcode, success=success,
+        )
+
+
+# Global instance
+_execution_telemetry: Optional[ExecutionTelemetry] = None
+
+
+def get_execution_telemetry() -> ExecutionTelemetry:
+    """Get global execution telemetry"""
+    global _execution_telemetry
+    if _execution_telemetry is None:
+        _execution_telemetry = ExecutionTelemetry()
+    return _execution_telemetry
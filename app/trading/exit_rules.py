@@ -0,0 +1,220 @@
+"""
+Vectorized exit rules: every open position reviewed in one NumPy pass.
+
+`PositionManager.review_position_full` walks six rules per position with a
+log line per rule. This module evaluates the same rules, with the same
+thresholds and priority, on a columnar `PositionTable` (one array per field,
+one row per position) and returns the same result dicts, reasons included:
+
+1. Profit target: loss <= -1R (full), >= 1.5R (full), >= 1.0R (50%, once)
+2. Profit retrace: >= 35% of the best floating profit given back
+3. RSI extreme: BUY with RSI > 80, SELL with RSI < 20
+4. Opposite signal with confidence >= 0.7
+5. Time limit: held more than 60 minutes
+6. Trailing stop at 1 ATR, only if in profit and tighter than the current SL
+
+Indicators (rsi, atr, signal) come from one analysis per symbol, so several
+tickets on the same symbol share it.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+RETRACE_THRESHOLD = 0.35
+MIN_CONFIDENCE_TO_REVERSE = 0.7
+MAX_HOLD_MINUTES = 60
+RSI_OVERBOUGHT = 80.0
+RSI_OVERSOLD = 20.0
+TRAIL_ATR_MULTIPLE = 1.0
+
+# Rule that fired, per row (first match in priority order)
+HOLD, LOSS_LIMIT, TARGET_FULL, TARGET_PARTIAL, RETRACE, RSI_EXTREME, OPPOSITE_SIGNAL, TIME_LIMIT = range(8)
+RULE_NAMES = ("HOLD", "LOSS_LIMIT", "TARGET_FULL", "TARGET_PARTIAL", "RETRACE",
+              "RSI_EXTREME", "OPPOSITE_SIGNAL", "TIME_LIMIT")
+
+_SIGNAL_CODES = {"BUY": 1, "SELL": -1}
+
+
+def open_timestamp(position: Dict[str, Any]) -> float:
+    """Open time in epoch seconds as read by the time-limit rule (NaN if unknown)"""
+    time_msc = position.get('time_msc')
+    if time_msc:
+        return time_msc / 1000.0
+    value = position.get('time')
+    try:
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).timestamp()
+    except (ValueError, OverflowError, OSError):
+        pass
+    return float('nan')
+
+
+@dataclass
+class PositionTable:
+    """Open positions as columns"""
+    tickets: np.ndarray
+    symbols: List[str]
+    is_buy: np.ndarray
+    entry: np.ndarray
+    current: np.ndarray
+    sl: np.ndarray
+    profit: np.ndarray
+    max_profit: np.ndarray
+    open_time: np.ndarray
+    atr: np.ndarray
+    rsi: np.ndarray
+    signal: np.ndarray        # 1 BUY, -1 SELL, 0 other
+    confidence: np.ndarray
+    partial_enabled: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+    @classmethod
+    def build(cls, positions: Sequence[Dict[str, Any]], analyses: Mapping[str, Dict[str, Any]],
+              max_profit: Optional[Sequence[float]] = None,
+              signal_confidence: Union[float, Mapping[str, float]] = 0.7,
+              partial_enabled: Optional[Sequence[bool]] = None) -> "PositionTable":
+        """
+        Args:
+            positions: MT5 position dicts
+            analyses: Analysis per symbol (keys 'rsi', 'atr', 'signal'; missing = 50 / 0 / HOLD)
+            max_profit: Best profit seen per position (default: the current profit)
+            signal_confidence: Confidence of the current signal, global or per symbol
+            partial_enabled: Whether the 1R partial close is still available per position
+        """
+        n = len(positions)
+        symbols = [p.get('symbol', '') for p in positions]
+
+        def column(key, default=0.0):
+            return np.fromiter((p.get(key, default) or 0.0 for p in positions), dtype=float, count=n)
+
+        by_symbol = {s: analyses.get(s) or {} for s in set(symbols)}
+        indicators = [by_symbol[s] for s in symbols]
+        profit = column('profit')
+        if isinstance(signal_confidence, Mapping):
+            confidence = [signal_confidence.get(s, 0.0) for s in symbols]
+        else:
+            confidence = [signal_confidence] * n
+        return cls(
+            tickets=np.fromiter((p.get('ticket', 0) for p in positions), dtype=np.int64, count=n),
+            symbols=symbols,
+            is_buy=np.fromiter((p.get('type', 0) == 0 for p in positions), dtype=bool, count=n),
+            entry=column('price_open'),
+            current=column('price_current'),
+            sl=column('sl'),
+            profit=profit,
+            max_profit=profit.copy() if max_profit is None else np.asarray(max_profit, dtype=float),
+            open_time=np.fromiter((open_timestamp(p) for p in positions), dtype=float, count=n),
+            atr=np.array([a.get('atr', 0) or 0.0 for a in indicators], dtype=float),
+            rsi=np.array([50.0 if a.get('rsi') is None else a['rsi'] for a in indicators], dtype=float),
+            signal=np.array([_SIGNAL_CODES.get(a.get('signal'), 0) for a in indicators], dtype=np.int8),
+            confidence=np.asarray(confidence, dtype=float),
+            partial_enabled=(np.ones(n, dtype=bool) if partial_enabled is None
+                             else np.asarray(partial_enabled, dtype=bool)),
+        )
+
+
+@dataclass
+class ExitDecisions:
+    """Per-row outcome of evaluate_exits"""
+    rule: np.ndarray            # HOLD ... TIME_LIMIT
+    close_percent: np.ndarray   # NaN = full close (when rule != HOLD)
+    update_sl: np.ndarray       # NaN = no trailing update
+    profit_r: np.ndarray
+    retrace_pct: np.ndarray
+    hold_minutes: np.ndarray
+
+    def to_results(self, table: PositionTable) -> List[Dict[str, Any]]:
+        """review_position_full-style dicts, one per row"""
+        results = []
+        for i in range(len(table)):
+            rule = int(self.rule[i])
+            sl = self.update_sl[i]
+            results.append({
+                'should_close': rule != HOLD,
+                'close_percent': 0.5 if rule == TARGET_PARTIAL else None,
+                'reason': _reason(rule, table, self, i) if rule != HOLD else None,
+                'update_sl': None if np.isnan(sl) else float(sl),
+            })
+        return results
+
+
+def evaluate_exits(table: PositionTable, now: Optional[float] = None) -> ExitDecisions:
+    """Apply the exit rules to every row at once"""
+    now = datetime.now().timestamp() if now is None else now
+    buy, sell = table.is_buy, ~table.is_buy
+    entry, current, sl, profit = table.entry, table.current, table.sl, table.profit
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 1. Profit target in R (R = |entry - SL|)
+        risk = np.abs(entry - sl)
+        has_r = (entry != 0) & (sl != 0) & (risk > 0)
+        profit_r = np.where(has_r, np.where(buy, current - entry, entry - current) / risk, 0.0)
+        loss_limit = has_r & (profit_r <= -1.0) & (profit < 0)
+        target_full = has_r & (profit_r >= 1.5)
+        target_partial = has_r & (profit_r >= 1.0) & table.partial_enabled
+
+        # 2. Retrace from the best profit seen
+        peak = table.max_profit
+        retrace_pct = np.where(peak > 0, (peak - profit) / peak, 0.0)
+        retrace = (peak > 0) & (retrace_pct >= RETRACE_THRESHOLD)
+
+        # 3-4. RSI extreme, opposite signal
+        rsi_extreme = (buy & (table.rsi > RSI_OVERBOUGHT)) | (sell & (table.rsi < RSI_OVERSOLD))
+        confident = table.confidence >= MIN_CONFIDENCE_TO_REVERSE
+        opposite = confident & ((buy & (table.signal == -1)) | (sell & (table.signal == 1)))
+
+        # 5. Time limit (a negative hold means the broker clock is ahead: keep)
+        hold_minutes = (now - table.open_time) / 60
+        time_limit = np.isfinite(hold_minutes) & (hold_minutes >= 0) & (hold_minutes > MAX_HOLD_MINUTES)
+
+    rule = np.select(
+        [loss_limit, target_full, target_partial, retrace, rsi_extreme, opposite, time_limit],
+        [LOSS_LIMIT, TARGET_FULL, TARGET_PARTIAL, RETRACE, RSI_EXTREME, OPPOSITE_SIGNAL, TIME_LIMIT],
+        HOLD,
+    ).astype(np.int8)
+
+    # 6. Trailing stop for positions that stay open and are in profit
+    atr = table.atr
+    trail_buy = current - atr * TRAIL_ATR_MULTIPLE
+    trail_sell = current + atr * TRAIL_ATR_MULTIPLE
+    trails = (rule == HOLD) & (profit > 0) & (atr > 0) & np.where(
+        buy, (current - entry > 0) & (trail_buy > sl), (entry - current > 0) & (trail_sell < sl)
+    )
+    update_sl = np.where(trails, np.where(buy, trail_buy, trail_sell), np.nan)
+    close_percent = np.where(rule == TARGET_PARTIAL, 0.5, np.nan)
+
+    return ExitDecisions(rule, close_percent, update_sl, profit_r, retrace_pct, hold_minutes)
+
+
+def _reason(rule: int, table: PositionTable, d: ExitDecisions, i: int) -> str:
+    profit = float(table.profit[i])
+    profit_r = float(d.profit_r[i])
+    if rule == LOSS_LIMIT:
+        return f"🚨 LOSS LIMIT: {profit_r:.2f}R <= -1R (${profit:.2f}) - STOP LOSS"
+    if rule == TARGET_FULL:
+        return f"💰 PROFIT TARGET: {profit_r:.2f}R >= 1.5R (${profit:.2f}) - FULL CLOSE"
+    if rule == TARGET_PARTIAL:
+        return f"💵 PROFIT TARGET: {profit_r:.2f}R >= 1.0R (${profit:.2f}) - PARTIAL CLOSE 50%"
+    if rule == RETRACE:
+        peak = float(table.max_profit[i])
+        return (f"⚠️ PROFIT RETRACE: Lost {float(d.retrace_pct[i]) * 100:.1f}% "
+                f"(${peak - profit:.2f}) from peak ${peak:.2f}")
+    if rule == RSI_EXTREME:
+        rsi = float(table.rsi[i])
+        if table.is_buy[i]:
+            return f"🔴 HARD CLOSE: RSI {rsi:.1f} > 80 (overbought) - BUY position closed immediately"
+        return f"🔴 HARD CLOSE: RSI {rsi:.1f} < 20 (oversold) - SELL position closed immediately"
+    if rule == OPPOSITE_SIGNAL:
+        signal = "SELL" if table.is_buy[i] else "BUY"
+        return f"Opposite signal: {signal} (confidence={float(table.confidence[i]):.2f})"
+    if rule == TIME_LIMIT:
+        return (f"⏱️ TIME LIMIT: {float(d.hold_minutes[i]):.0f}min > {MAX_HOLD_MINUTES}min "
+                f"(profit=${profit:.2f})")
+    return ""
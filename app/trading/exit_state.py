@@ -0,0 +1,249 @@
+"""
+Per-ticket exit state (high-water mark, trailing SL, scale-out).
+
+Exit rules need memory across cycles: the best profit a position has shown,
+the last trailing stop sent, how many scale-out levels have been taken. That
+state is kept here, one compact `ExitState` record per MT5 ticket, instead
+of in a loop-held dict that was lost on every restart.
+
+Each cycle the loop calls `reconcile()` with the broker's open positions:
+records are created for new tickets, updated with the current price and
+profit, and dropped for tickets that are gone (closed by SL/TP, manually or
+by the bot). Records are persisted in the `exit_state` SQLite table, so a
+restart picks up trailing and scale-out state where it left off; only rows
+that changed since the last flush are written.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.database import DatabaseManager, get_database_manager
+from app.core.logger import setup_logger
+
+logger = setup_logger("exit_state")
+
+# Persisted fields, in table column order
+FIELDS = (
+    "ticket", "symbol", "direction", "entry_price", "initial_volume",
+    "max_profit", "best_price", "trail_sl",
+    "scale_out_stage", "closed_percent",
+    "updated_at",
+)
+
+
+class ExitState:
+    """Exit bookkeeping of one open position"""
+
+    __slots__ = FIELDS + ("misses",)
+
+    def __init__(self, ticket: int, symbol: str = "", direction: str = "BUY",
+                 entry_price: float = 0.0, initial_volume: float = 0.0):
+        self.ticket = ticket
+        self.symbol = symbol
+        self.direction = direction
+        self.entry_price = entry_price
+        self.initial_volume = initial_volume
+        self.max_profit: Optional[float] = None   # Best floating P&L seen (account currency)
+        self.best_price: Optional[float] = None   # Highest bid (BUY) / lowest ask (SELL) seen
+        self.trail_sl: Optional[float] = None      # Last trailing SL sent to the broker
+        self.scale_out_stage = 0                   # Scale-out levels already taken
+        self.closed_percent = 0.0                  # Fraction of the initial volume closed
+        self.updated_at = time.time()
+        self.misses = 0                            # Consecutive reconciles without the ticket
+
+    @classmethod
+    def from_position(cls, position: Dict[str, Any]) -> "ExitState":
+        """New record for an MT5 position dict"""
+        return cls(
+            ticket=int(position.get('ticket', 0)),
+            symbol=position.get('symbol', ''),
+            direction='BUY' if position.get('type', 0) == 0 else 'SELL',
+            entry_price=float(position.get('price_open', 0.0)),
+            initial_volume=float(position.get('volume', 0.0)),
+        )
+
+    @property
+    def is_buy(self) -> bool:
+        return self.direction == 'BUY'
+
+    def observe(self, price: float, profit: float) -> float:
+        """Fold the current price and floating profit into the high-water marks; returns max_profit"""
+        if self.max_profit is None or profit > self.max_profit:
+            self.max_profit = profit
+        if price:
+            if self.best_price is None or (price > self.best_price if self.is_buy else price < self.best_price):
+                self.best_price = price
+        return self.max_profit
+
+    def as_row(self) -> tuple:
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    @classmethod
+    def from_row(cls, row) -> "ExitState":
+        state = cls(row['ticket'])
+        for name in FIELDS:
+            setattr(state, name, row[name])
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def __repr__(self) -> str:
+        return (f"ExitState(ticket={self.ticket}, {self.symbol} {self.direction}, "
+                f"max_profit={self.max_profit}, trail_sl={self.trail_sl}, stage={self.scale_out_stage})")
+
+
+class ExitStateStore:
+    """Memory + SQLite store of ExitState records keyed by ticket"""
+
+    def __init__(self, db: Optional[DatabaseManager] = None, evict_after: int = 2):
+        """
+        Args:
+            db: Database (the global one by default)
+            evict_after: Consecutive reconciles a ticket may be missing before its
+                record is dropped (an empty position list can also be a broker error)
+        """
+        self.db = db or get_database_manager()
+        self.evict_after = max(1, evict_after)
+        self._states: Dict[int, ExitState] = {}
+        self._persisted: Dict[int, tuple] = {}
+        self._lock = threading.RLock()
+        self._ensure_schema()
+        self._load()
+
+    def _ensure_schema(self):
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS exit_state (
+                    ticket INTEGER PRIMARY KEY,
+                    symbol VARCHAR(20) NOT NULL,
+                    direction VARCHAR(4) NOT NULL,
+                    entry_price REAL NOT NULL DEFAULT 0,
+                    initial_volume REAL NOT NULL DEFAULT 0,
+                    max_profit REAL,
+                    best_price REAL,
+                    trail_sl REAL,
+                    scale_out_stage INTEGER NOT NULL DEFAULT 0,
+                    closed_percent REAL NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def _load(self):
+        with self.db.connection() as conn:
+            rows = conn.execute(f"SELECT {', '.join(FIELDS)} FROM exit_state").fetchall()
+        for row in rows:
+            state = ExitState.from_row(row)
+            self._states[state.ticket] = state
+            self._persisted[state.ticket] = state.as_row()
+        if rows:
+            logger.info(f"Restored exit state for {len(rows)} tickets")
+
+    def get(self, ticket: int) -> Optional[ExitState]:
+        return self._states.get(ticket)
+
+    def get_or_create(self, ticket: int, symbol: str = "", direction: str = "BUY",
+                      entry_price: float = 0.0, volume: float = 0.0) -> ExitState:
+        """Record for `ticket`, created with the given entry if not tracked yet"""
+        with self._lock:
+            state = self._states.get(ticket)
+            if state is None:
+                state = ExitState(ticket, symbol, direction, entry_price, volume)
+                self._states[ticket] = state
+            return state
+
+    def track(self, position: Dict[str, Any]) -> ExitState:
+        """Record for an open position (created on first sight), updated with its price and profit"""
+        ticket = int(position.get('ticket', 0))
+        with self._lock:
+            state = self._states.get(ticket)
+            if state is None:
+                state = ExitState.from_position(position)
+                self._states[ticket] = state
+            state.misses = 0
+        state.observe(float(position.get('price_current', 0.0)), float(position.get('profit', 0.0)))
+        return state
+
+    def reconcile(self, positions: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        Sync with the broker's open positions and persist the changes
+
+        Returns:
+            Tickets whose records were evicted
+        """
+        live = {int(self.track(position).ticket) for position in positions}
+        with self._lock:
+            gone = []
+            for ticket, state in self._states.items():
+                if ticket in live:
+                    continue
+                state.misses += 1
+                if state.misses >= self.evict_after:
+                    gone.append(ticket)
+            for ticket in gone:
+                del self._states[ticket]
+        self._delete(gone)
+        self.flush()
+        return gone
+
+    def evict(self, ticket: int) -> bool:
+        """Drop a ticket's record (e.g. right after the bot fully closed it)"""
+        with self._lock:
+            found = self._states.pop(ticket, None) is not None
+        self._delete([ticket])
+        return found
+
+    def _delete(self, tickets: List[int]):
+        tickets = [t for t in tickets if self._persisted.pop(t, None) is not None]
+        if tickets:
+            with self.db.connection() as conn:
+                conn.executemany("DELETE FROM exit_state WHERE ticket = ?", [(t,) for t in tickets])
+
+    def flush(self) -> int:
+        """Write the records that changed since the last flush; returns how many"""
+        with self._lock:
+            changed = []
+            for ticket, state in self._states.items():
+                row = state.as_row()
+                if self._persisted.get(ticket) != row:
+                    state.updated_at = time.time()
+                    changed.append(state.as_row())
+        if changed:
+            columns = ", ".join(FIELDS)
+            updates = ", ".join(f"{name} = excluded.{name}" for name in FIELDS[1:])
+            with self.db.connection() as conn:
+                conn.executemany(f"""
+                    INSERT INTO exit_state ({columns}) VALUES ({', '.join('?' * len(FIELDS))})
+                    ON CONFLICT(ticket) DO UPDATE SET {updates}
+                """, changed)
+            with self._lock:
+                for row in changed:
+                    self._persisted[row[0]] = row
+        return len(changed)
+
+    def for_symbol(self, symbol: str) -> List[ExitState]:
+        with self._lock:
+            return [s for s in self._states.values() if s.symbol == symbol]
+
+    def all(self) -> List[ExitState]:
+        with self._lock:
+            return list(self._states.values())
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, ticket: int) -> bool:
+        return ticket in self._states
+
+
+# Global instance
+_exit_state_store: Optional[ExitStateStore] = None
+
+
+def get_exit_state_store() -> ExitStateStore:
+    """Get global exit-state store"""
+    global _exit_state_store
+    if _exit_state_store is None:
+        _exit_state_store = ExitStateStore()
+    return _exit_state_store
@@ -0,0 +1,131 @@
+"""
+Currency-exposure index of the open positions.
+
+Counts open positions by symbol, base currency, quote currency, (base, quote)
+pair, currency cluster and asset class, plus the risk % in use, so the
+exposure checks of a candidate symbol are a few dictionary lookups instead
+of a scan of every open position. Built once per cycle from the broker
+snapshot and updated with add()/remove() as positions are opened or closed,
+so checks later in the same cycle see what was just executed.
+
+Currencies are read by slicing like the rest of the risk code:
+symbol[:3] is the base, symbol[3:6] the quote.
+"""
+
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.trading.decision_constants import CURRENCY_CLUSTERS
+
+CRYPTO_SYMBOLS = [
+    'BTCUSD', 'ETHUSD', 'BNBUSD', 'SOLUSD', 'XRPUSD',
+    'DOGEUSD', 'ADAUSD', 'DOTUSD', 'LTCUSD', 'AVAXUSD'
+]
+MAJOR_PAIRS = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"]
+
+_CLUSTERS_BY_SYMBOL: Dict[str, Tuple[str, ...]] = {}
+for _name, _symbols in CURRENCY_CLUSTERS.items():
+    for _symbol in _symbols:
+        _CLUSTERS_BY_SYMBOL[_symbol] = _CLUSTERS_BY_SYMBOL.get(_symbol, ()) + (_name,)
+
+
+@lru_cache(maxsize=1024)
+def asset_class(symbol: str) -> str:
+    """CRYPTO, FOREX_MAJOR or FOREX_CROSS (the keys of RiskManager.RISK_CONFIG)"""
+    upper = symbol.upper()
+    if any(crypto in upper for crypto in CRYPTO_SYMBOLS):
+        return "CRYPTO"
+    if any(pair in upper for pair in MAJOR_PAIRS):
+        return "FOREX_MAJOR"
+    return "FOREX_CROSS"
+
+
+def split_symbol(symbol: str) -> Tuple[str, str]:
+    """(base, quote)"""
+    return symbol[:3], symbol[3:6]
+
+
+def clusters_of(symbol: str) -> Tuple[str, ...]:
+    """CURRENCY_CLUSTERS the symbol belongs to"""
+    return _CLUSTERS_BY_SYMBOL.get(symbol, ())
+
+
+class ExposureIndex:
+    """Open-position counters for O(1) exposure checks"""
+
+    def __init__(self, risk_pct: Optional[Callable[[str], float]] = None):
+        """
+        Args:
+            risk_pct: Risk fraction of a position by symbol (for risk_in_use)
+        """
+        self.risk_pct = risk_pct
+        self.total = 0
+        self.risk_in_use = 0.0
+        self.by_symbol: Counter = Counter()
+        self.by_base: Counter = Counter()
+        self.by_quote: Counter = Counter()
+        self.by_pair: Counter = Counter()
+        self.by_cluster: Counter = Counter()
+        self.by_class: Counter = Counter()
+
+    @classmethod
+    def from_symbols(cls, symbols: Iterable[str],
+                     risk_pct: Optional[Callable[[str], float]] = None) -> "ExposureIndex":
+        index = cls(risk_pct)
+        for symbol in symbols:
+            index.add(symbol)
+        return index
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[Dict],
+                       risk_pct: Optional[Callable[[str], float]] = None) -> "ExposureIndex":
+        return cls.from_symbols((p.get('symbol', '') for p in positions), risk_pct)
+
+    def _apply(self, symbol: str, sign: int):
+        base, quote = split_symbol(symbol)
+        self.total += sign
+        self.by_symbol[symbol] += sign
+        self.by_base[base] += sign
+        self.by_quote[quote] += sign
+        self.by_pair[(base, quote)] += sign
+        for cluster in clusters_of(symbol):
+            self.by_cluster[cluster] += sign
+        self.by_class[asset_class(symbol)] += sign
+        if self.risk_pct is not None:
+            self.risk_in_use += sign * self.risk_pct(symbol)
+
+    def add(self, symbol: str):
+        """A position was opened"""
+        self._apply(symbol, 1)
+
+    def remove(self, symbol: str):
+        """A position was closed"""
+        if self.by_symbol[symbol] > 0:
+            self._apply(symbol, -1)
+
+    def same_currency_count(self, symbol: str) -> int:
+        """Open positions sharing the base or the quote currency of `symbol` (same slot)"""
+        base, quote = split_symbol(symbol)
+        return self.by_base[base] + self.by_quote[quote] - self.by_pair[(base, quote)]
+
+    def currency_count(self, currency: str) -> int:
+        """Open positions with `currency` on either side"""
+        return self.by_base[currency] + self.by_quote[currency] - self.by_pair[(currency, currency)]
+
+    def cluster_count(self, symbol: str) -> int:
+        """Open positions in the busiest cluster of `symbol`"""
+        return max((self.by_cluster[c] for c in clusters_of(symbol)), default=0)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Non-zero counters, for logs and the UI"""
+        def nonzero(counter: Counter) -> Dict:
+            return {k if isinstance(k, str) else "".join(k): v for k, v in counter.items() if v}
+        currencies: List[str] = sorted(set(nonzero(self.by_base)) | set(nonzero(self.by_quote)))
+        return {
+            "total": self.total,
+            "risk_in_use_pct": round(self.risk_in_use * 100, 2),
+            "by_currency": {c: self.currency_count(c) for c in currencies},
+            "by_cluster": nonzero(self.by_cluster),
+            "by_class": nonzero(self.by_class),
+        }
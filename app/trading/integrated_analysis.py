@@ -14,46 +14,6 @@ from app.ai.enhanced_decision import get_enhanced_decision_engine
 logger = setup_logger("integrated_analysis")
 
 
-class NewsCache:
-    """Simple news sentiment cache with 1-hour TTL"""
-    
-    def __init__(self, ttl_minutes: int = 60):
-        self.ttl_minutes = ttl_minutes
-        self._cache: Dict[str, tuple] = {}  # symbol -> (sentiment_data, timestamp)
-    
-    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Get cached sentiment or None if expired"""
-        if symbol not in self._cache:
-            return None
-        
-        data, timestamp = self._cache[symbol]
-        age_minutes = (datetime.now() - timestamp).total_seconds() / 60
-        
-        if age_minutes > self.ttl_minutes:
-            del self._cache[symbol]
-            return None
-        
-        return data
-    
-    def set(self, symbol: str, data: Dict[str, Any]):
-        """Cache sentiment data"""
-        self._cache[symbol] = (data, datetime.now())
-        logger.info(f"Cached news sentiment for {symbol}")
-    
-    def clear_expired(self):
-        """Remove expired cache entries"""
-        now = datetime.now()
-        expired = []
-        for symbol, (_, timestamp) in self._cache.items():
-            age_minutes = (now - timestamp).total_seconds() / 60
-            if age_minutes > self.ttl_minutes:
-                expired.append(symbol)
-        
-        for symbol in expired:
-            del self._cache[symbol]
-            logger.debug(f"Cleared expired cache for {symbol}")
-
-
 class IntegratedAnalyzer:
     """Combines technical, sentiment, and risk analysis"""
     
@@ -61,7 +21,6 @@ class IntegratedAnalyzer:
         self.config = get_config()
         self.strategy = get_strategy()
         self.sentiment_analyzer = get_sentiment_analyzer()
-        self.news_cache = NewsCache(ttl_minutes=240)  # Increased from 60m to 4 hours for better perf
         self.market_status = get_market_status()
         self.db = get_database_manager()  # Database manager
     
@@ -126,25 +85,15 @@ class IntegratedAnalyzer:
         except Exception as e:
             logger.warning(f"Technical analysis failed for {symbol}: {e}")
         
-        # 2. Get sentiment analysis (with cache)
+        # 2. Get sentiment analysis (per-currency news stored by app.news.ingestion)
         try:
-            sentiment = self.news_cache.get(symbol)
-            
-            if sentiment is None:
-                # Not in cache, fetch new data
-                sentiment = self.sentiment_analyzer.get_sentiment(symbol, hours_back=24)
-                
-                if sentiment and sentiment.get("score") is not None:
-                    self.news_cache.set(symbol, sentiment)
-                    result["available_sources"].append("SENTIMENT")
-                    logger.info(
-                        f"{symbol} - Sentiment: {sentiment['score']:.2f} "
-                        f"({sentiment.get('summary', 'N/A')})"
-                    )
-            else:
+            sentiment = self.sentiment_analyzer.get_sentiment(symbol, hours_back=24)
+            if sentiment and sentiment.get("score") is not None:
                 result["available_sources"].append("SENTIMENT")
-                logger.info(f"{symbol} - Sentiment (cached): {sentiment.get('score', 0):.2f}")
-            
+                logger.info(
+                    f"{symbol} - Sentiment: {sentiment['score']:.2f} "
+                    f"({sentiment.get('summary', 'N/A')})"
+                )
             result["sentiment"] = sentiment
         except Exception as e:
             logger.warning(f"Sentiment analysis failed for {symbol}: {e}")
@@ -0,0 +1,244 @@
+"""
+Load-test harness: the trading loop at many symbols and many accounts.
+
+The bot's singletons (MT5 client, risk manager, database) assume one account
+per process, so every simulated account runs in its own process, in its own
+working directory: relative paths (data/*.db, logs/) are then per account,
+and without a .env there the MT5 client runs against the synthetic market
+(app.trading.market_simulator), seeded per account. The symbol universe is
+the configured list extended with generated currency pairs (and broker-style
+suffixes beyond that), so any size from 50 to 1000+ can be driven.
+
+Each account runs `cycles` loop calls back to back and samples, per cycle:
+wall time, CPU time, resident memory and the size of its SQLite files.
+The JSON state files the loop writes (ticker_performance.json,
+dynamic_risk_params.json, adaptive_params.json, ...) normally live in the
+repository's data/ directory; BOT_STATE_DIR points them at the account's
+own data/ too, so accounts never race on them or overwrite the live bot's.
+"""
+
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from itertools import permutations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_LOOP = "app.trading.trading_loop:main_trading_loop"
+MARKET_DATA_LOOP = "app.trading.load_harness:market_data_cycle"
+
+CURRENCIES = (
+    "EUR", "GBP", "AUD", "NZD", "USD", "CAD", "CHF", "JPY", "SGD", "HKD",
+    "NOK", "SEK", "DKK", "PLN", "MXN", "ZAR", "TRY", "CNH", "HUF", "CZK",
+)
+BROKER_SUFFIXES = (".a", ".b", ".c", ".d", ".e")
+
+
+def make_universe(count: int, base: Optional[Sequence[str]] = None) -> List[str]:
+    """`count` distinct symbols: `base` first, then generated pairs, then suffixed copies"""
+    if base is None:
+        from app.core.config import get_config
+        base = get_config().trading.default_symbols
+    symbols = list(dict.fromkeys(base))
+    seen = set(symbols)
+    generated = [a + b for a, b in permutations(CURRENCIES, 2)]
+    for symbol in generated:
+        if len(symbols) >= count:
+            break
+        if symbol not in seen:
+            symbols.append(symbol)
+            seen.add(symbol)
+    pool = symbols[:]
+    for suffix in BROKER_SUFFIXES:
+        for symbol in pool:
+            if len(symbols) >= count:
+                break
+            symbols.append(symbol + suffix)
+    return symbols[:count]
+
+
+def market_data_cycle():
+    """Lightweight cycle: the loop's broker and data-provider traffic without decisions"""
+    from app.core.config import get_config
+    from app.trading.data import get_data_provider
+    from app.trading.mt5_client import get_mt5_client
+
+    config = get_config()
+    mt5 = get_mt5_client()
+    data = get_data_provider()
+    mt5.mark_cycle()
+    mt5.get_account_info()
+    mt5.get_positions()
+    for symbol in config.trading.default_symbols:
+        data.get_ohlc_data(symbol, config.trading.default_timeframe, 200)
+        data.get_current_tick(symbol)
+
+
+def _load(loop: str) -> Callable[[], Any]:
+    module, _, name = loop.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size (peak RSS where only that is available)"""
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+
+def _db_bytes(directory: Path) -> int:
+    """SQLite files (with WAL / SHM) under `directory`"""
+    return sum(p.stat().st_size for p in directory.glob("*.db*") if p.is_file())
+
+
+@dataclass
+class CycleSample:
+    seconds: float
+    cpu_seconds: float
+    rss_bytes: Optional[int]
+    db_bytes: int
+
+
+@dataclass
+class AccountRun:
+    """Samples of one simulated account"""
+    account: int
+    symbols: int
+    db_bytes_start: int
+    samples: List[CycleSample] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def run_account(account: int, symbols: Sequence[str], cycles: int, workdir: str,
+                loop: str = DEFAULT_LOOP, interval: float = 0.0, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run one account's loop for `cycles` cycles (call in a fresh process)
+
+    Returns:
+        AccountRun as a dict
+    """
+    account_dir = Path(workdir) / f"account_{account}"
+    (account_dir / "data").mkdir(parents=True, exist_ok=True)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    os.chdir(account_dir)
+    # Simulated broker: no terminal credentials, one market per account
+    for var in ("MT5_LOGIN", "MT5_PASSWORD", "MT5_SERVER", "MT5_RECORD_DIR"):
+        os.environ.pop(var, None)
+    os.environ["MT5_SIM_SEED"] = str(account if seed is None else seed)
+    os.environ["BOT_STATE_DIR"] = str(account_dir / "data")
+
+    from app.core.config import get_config
+    config = get_config()
+    config.trading.default_symbols = list(symbols)
+
+    from app.trading import execution, mt5_client
+    mt5_client.MT5_AVAILABLE = False
+    execution.MT5_AVAILABLE = False
+    mt5_client.get_mt5_client().connect()
+
+    data_dir = account_dir / "data"
+    run = AccountRun(account=account, symbols=len(symbols), db_bytes_start=_db_bytes(data_dir))
+    try:
+        cycle = _load(loop)
+        for _ in range(cycles):
+            wall, cpu = time.perf_counter(), time.process_time()
+            cycle()
+            run.samples.append(CycleSample(
+                seconds=time.perf_counter() - wall,
+                cpu_seconds=time.process_time() - cpu,
+                rss_bytes=_rss_bytes(),
+                db_bytes=_db_bytes(data_dir),
+            ))
+            if interval:
+                time.sleep(interval)
+    except Exception as e:
+        run.error = f"{type(e).__name__}: {e}"
+    return asdict(run)
+
+
+@dataclass
+class LoadTestResult:
+    """One scenario: `symbols` symbols on each of `accounts` accounts"""
+    symbols: int
+    accounts: int
+    cycles: int
+    runs: List[Dict[str, Any]]
+    elapsed_seconds: float
+
+    def summary(self) -> Dict[str, Any]:
+        samples = [s for run in self.runs for s in run["samples"]]
+        seconds = np.array([s["seconds"] for s in samples]) if samples else np.zeros(1)
+        cpu = np.array([s["cpu_seconds"] for s in samples]) if samples else np.zeros(1)
+        rss = [s["rss_bytes"] for s in samples if s["rss_bytes"] is not None]
+        growth = [
+            (run["samples"][-1]["db_bytes"] - run["db_bytes_start"]) / len(run["samples"])
+            for run in self.runs if run["samples"]
+        ]
+        return {
+            "symbols": self.symbols,
+            "accounts": self.accounts,
+            "cycles": len(samples),
+            "errors": [run["error"] for run in self.runs if run["error"]],
+            "latency_p50_s": float(np.percentile(seconds, 50)),
+            "latency_p95_s": float(np.percentile(seconds, 95)),
+            "latency_max_s": float(seconds.max()),
+            "ms_per_symbol": float(np.median(seconds) / max(self.symbols, 1) * 1000),
+            "cpu_utilization": float(cpu.sum() / seconds.sum()) if seconds.sum() else 0.0,
+            "peak_rss_mb": max(rss) / 2 ** 20 if rss else None,
+            "db_growth_kb_per_cycle": float(np.mean(growth)) / 1024 if growth else 0.0,
+            "elapsed_seconds": self.elapsed_seconds,
+        }
+
+
+def run_load_test(symbol_counts: Sequence[int] = (50, 200, 1000), accounts: int = 1, cycles: int = 3,
+                  workdir: Optional[str] = None, loop: str = DEFAULT_LOOP,
+                  interval: float = 0.0) -> List[LoadTestResult]:
+    """
+    Run every symbol count with `accounts` concurrent account processes
+
+    Args:
+        symbol_counts: Universe sizes to test
+        accounts: Simulated accounts (processes) per scenario
+        cycles: Loop cycles per account
+        workdir: Parent of the per-account directories (a temporary one by default)
+        loop: "module:function" run once per cycle
+        interval: Pause between cycles in seconds
+    """
+    import tempfile
+    from app.core.config import get_config
+
+    base = list(get_config().trading.default_symbols)
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for count in symbol_counts:
+        symbols = make_universe(count, base=base)
+        scenario_dir = workdir or tempfile.mkdtemp(prefix="load_test_")
+        scenario_dir = str(Path(scenario_dir) / f"symbols_{count}_accounts_{accounts}")
+        started = time.perf_counter()
+        with ctx.Pool(processes=accounts) as pool:
+            runs = pool.starmap(run_account, [
+                (account, symbols, cycles, scenario_dir, loop, interval) for account in range(accounts)
+            ])
+        results.append(LoadTestResult(count, accounts, cycles, runs, time.perf_counter() - started))
+    return results
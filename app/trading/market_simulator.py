@@ -0,0 +1,609 @@
+"""
+Synthetic market for demo mode (no MetaTrader5 package).
+
+Each symbol follows a regime-switching geometric Brownian motion sampled on
+a one-minute grid: a Markov chain of regimes (calm, trending up/down,
+volatile), each with its own drift and volatility multiplier over an
+asset-class base volatility. The path is anchored to the wall clock (at
+the start of the current UTC day, so a restart on the same day sees the
+same market), and successive calls agree with each other: bars of any
+timeframe are aggregated from the same minutes, the forming bar's close is
+the current tick, and a bar does not change once it has closed.
+
+Minutes are generated lazily in fixed blocks (forward as time passes,
+backward when more history is requested), each block drawn from its own
+seed, so the path only depends on the seed and the anchor minute, not on
+the order of requests. Memory is about 12 bytes per simulated minute per
+symbol: only the last `max_history_minutes` are served, and minutes older
+than that are dropped (in whole blocks) as the path grows forward, so a
+long soak run keeps a bounded window per symbol.
+
+The simulator also keeps an account: market orders fill at the current
+bid/ask, positions are marked to market, and SL/TP are triggered on the
+minute highs/lows crossed since the last check, recording deals like the
+terminal's history.
+"""
+
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.logger import setup_logger
+from app.trading.symbol_specs import SymbolSpec, default_spec
+
+logger = setup_logger("market_simulator")
+
+BLOCK_MINUTES = 1440
+MINUTES_PER_YEAR = 365 * 1440
+
+# MetaTrader5 timeframe constants above M30 encode hours / weeks / months in flag bits
+TIMEFRAME_HOUR_FLAG = 0x4000
+TIMEFRAME_WEEK_FLAG = 0x8000
+TIMEFRAME_MONTH_FLAG = 0xC000
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_SLTP = 6
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+
+@dataclass(frozen=True)
+class Regime:
+    """One state of the price process"""
+    name: str
+    drift: float  # Annualized log drift
+    vol_multiplier: float  # Times the asset-class base volatility
+    mean_minutes: float  # Expected time spent in the regime
+
+
+DEFAULT_REGIMES: Tuple[Regime, ...] = (
+    Regime("calm", 0.0, 0.6, 480),
+    Regime("trend_up", 1.5, 1.0, 240),
+    Regime("trend_down", -1.5, 1.0, 240),
+    Regime("volatile", 0.0, 2.5, 90),
+)
+
+# Reference prices; other symbols get a price from their asset class
+BASE_PRICES = {
+    "EURUSD": 1.08, "GBPUSD": 1.27, "USDJPY": 150.0, "USDCHF": 0.88, "AUDUSD": 0.66,
+    "USDCAD": 1.36, "NZDUSD": 0.61, "EURGBP": 0.85, "EURJPY": 162.0, "GBPJPY": 190.0,
+    "XAUUSD": 2000.0, "XAGUSD": 24.0, "BTCUSD": 60000.0, "ETHUSD": 3000.0,
+}
+
+# Annualized base volatility and spread (in points) by asset class
+ASSET_CLASSES = {
+    "forex": (0.08, 15),
+    "jpy": (0.09, 20),
+    "metal": (0.15, 30),
+    "crypto": (0.60, 2000),
+}
+
+
+def timeframe_minutes(timeframe: int) -> int:
+    """Bar length in minutes of a demo (minutes) or MetaTrader5 timeframe constant"""
+    flags, value = timeframe & 0xC000, timeframe & 0x3FFF
+    if flags == TIMEFRAME_MONTH_FLAG:
+        return value * 30 * 1440
+    if flags == TIMEFRAME_WEEK_FLAG:
+        return value * 7 * 1440
+    if flags == TIMEFRAME_HOUR_FLAG:
+        return value * 60
+    return max(1, int(timeframe))
+
+
+def asset_class(spec: SymbolSpec) -> str:
+    upper = spec.symbol.upper()
+    if upper.startswith(("XAU", "XAG")):
+        return "metal"
+    if spec.contract_size == 1.0:
+        return "crypto"
+    return "jpy" if "JPY" in upper else "forex"
+
+
+class _SymbolPath:
+    """Minute closes and wicks of one symbol over [first_minute, first_minute + len)"""
+
+    def __init__(self, spec: SymbolSpec, seed: int, anchor_minute: int, regimes: Sequence[Regime]):
+        self.spec = spec
+        self.klass = asset_class(spec)
+        self.base_vol = ASSET_CLASSES[self.klass][0]
+        self.regimes = regimes
+        self.seed = (seed, zlib.crc32(spec.symbol.encode()))
+
+        start = BASE_PRICES.get(spec.symbol.upper())
+        if start is None:
+            rng = np.random.default_rng(self.seed)
+            reference = {"forex": 1.0, "jpy": 110.0, "metal": 100.0, "crypto": 100.0}[self.klass]
+            start = reference * float(np.exp(rng.normal(0.0, 0.3)))
+        self.first_minute = anchor_minute
+        self.closes = np.array([start], dtype=np.float64)
+        self.wicks = np.zeros(1, dtype=np.float32)
+        self.regime_forward = 0
+        self.regime_backward = 0
+        self.blocks_forward = 0
+        self.blocks_backward = 0
+
+    @property
+    def last_minute(self) -> int:
+        return self.first_minute + len(self.closes) - 1
+
+    def _block(self, stream: int, index: int, regime: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Log returns and wicks of one block (stream 1 forward, 0 backward), plus the regime it ends in"""
+        rng = np.random.default_rng((*self.seed, stream, index))
+        n = BLOCK_MINUTES
+
+        # Regime runs: geometric durations, next regime uniform among the others
+        states = np.empty(n, dtype=np.int64)
+        pos = 0
+        while pos < n:
+            duration = int(rng.geometric(1.0 / self.regimes[regime].mean_minutes))
+            states[pos:pos + duration] = regime
+            pos += duration
+            if pos < n:
+                regime = (regime + 1 + int(rng.integers(len(self.regimes) - 1))) % len(self.regimes)
+
+        dt = 1.0 / MINUTES_PER_YEAR
+        drift = np.array([r.drift for r in self.regimes])[states]
+        sigma = self.base_vol * np.array([r.vol_multiplier for r in self.regimes])[states]
+        returns = (drift - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n)
+        wicks = (np.abs(rng.standard_normal(n)) * sigma * np.sqrt(dt) * 0.5).astype(np.float32)
+        return returns, wicks, regime
+
+    def extend_to(self, minute: int):
+        """Generate minutes forward up to `minute`"""
+        if minute <= self.last_minute:
+            return
+        blocks = -(-(minute - self.last_minute) // BLOCK_MINUTES)
+        closes, wicks = [self.closes], [self.wicks]
+        price = self.closes[-1]
+        for _ in range(blocks):
+            returns, block_wicks, self.regime_forward = self._block(1, self.blocks_forward, self.regime_forward)
+            self.blocks_forward += 1
+            path = price * np.exp(np.cumsum(returns))
+            price = path[-1]
+            closes.append(path)
+            wicks.append(block_wicks * path.astype(np.float32))
+        self.closes = np.concatenate(closes)
+        self.wicks = np.concatenate(wicks)
+
+    def trim_before(self, minute: int):
+        """Drop minutes older than `minute`, once at least a block of them has accumulated"""
+        drop = minute - self.first_minute
+        if drop < BLOCK_MINUTES:
+            return
+        # Copies, so the dropped head is actually released
+        self.closes = self.closes[drop:].copy()
+        self.wicks = self.wicks[drop:].copy()
+        self.first_minute = minute
+
+    def extend_back_to(self, minute: int, floor_minute: int):
+        """Generate history backward down to `minute` (not before `floor_minute`)"""
+        minute = max(minute, floor_minute)
+        if minute >= self.first_minute:
+            return
+        blocks = -(-(self.first_minute - minute) // BLOCK_MINUTES)
+        closes, wicks = [self.closes], [self.wicks]
+        price = self.closes[0]
+        for _ in range(blocks):
+            returns, block_wicks, self.regime_backward = self._block(0, self.blocks_backward, self.regime_backward)
+            self.blocks_backward += 1
+            # Walk back in time: the price one minute earlier undoes that minute's return
+            path = (price * np.exp(-np.cumsum(returns)))[::-1]
+            price = path[0]
+            closes.insert(0, path)
+            wicks.insert(0, block_wicks[::-1] * path.astype(np.float32))
+        self.closes = np.concatenate(closes)
+        self.wicks = np.concatenate(wicks)
+        self.first_minute -= blocks * BLOCK_MINUTES
+
+    def window(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Closes and wicks of minutes [start, end]"""
+        lo, hi = start - self.first_minute, end - self.first_minute + 1
+        return self.closes[lo:hi], self.wicks[lo:hi]
+
+
+class MarketSimulator:
+    """Consistent synthetic bars, ticks, fills and positions for any number of symbols"""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        clock: Callable[[], float] = time.time,
+        regimes: Sequence[Regime] = DEFAULT_REGIMES,
+        spreads: Optional[Dict[str, float]] = None,
+        initial_balance: float = 10000.0,
+        leverage: int = 100,
+        max_history_minutes: int = 90 * 1440,
+    ):
+        """
+        Args:
+            seed: Seed of every symbol's path (same seed, same market)
+            clock: Epoch seconds source (inject a fake clock in tests)
+            regimes: States of the regime-switching process
+            spreads: Spread in points per symbol (asset-class defaults otherwise)
+            initial_balance: Starting balance of the simulated account
+            leverage: Account leverage used for margin
+            max_history_minutes: History served, counted back from now (and never
+                before the anchor minus this much)
+        """
+        self.seed = seed
+        self.clock = clock
+        self.regimes = tuple(regimes)
+        self.spreads = dict(spreads or {})
+        self.leverage = leverage
+        self.max_history_minutes = max_history_minutes
+        self.anchor_minute = int(clock() // 86400) * 1440  # Start of the UTC day
+
+        self.balance = initial_balance
+        self._paths: Dict[str, _SymbolPath] = {}
+        self._positions: Dict[int, Dict] = {}
+        self._checked_minute: Dict[int, int] = {}
+        self._deals: List[Dict] = []
+        self._next_ticket = 1
+        self._lock = threading.RLock()
+
+    # ---------- prices ----------
+
+    def spec(self, symbol: str) -> SymbolSpec:
+        path = self._path(symbol)
+        spread = self.spreads.get(symbol, ASSET_CLASSES[path.klass][1])
+        return SymbolSpec(symbol, path.spec.contract_size, path.spec.point, path.spec.digits, spread)
+
+    def _path(self, symbol: str) -> _SymbolPath:
+        path = self._paths.get(symbol)
+        if path is None:
+            with self._lock:
+                path = self._paths.get(symbol)
+                if path is None:
+                    path = _SymbolPath(default_spec(symbol), self.seed, self.anchor_minute, self.regimes)
+                    self._paths[symbol] = path
+        return path
+
+    def _now(self) -> Tuple[int, float]:
+        now = self.clock()
+        minute = int(now // 60)
+        return minute, (now - minute * 60) / 60
+
+    def _floor_minute(self, now_minute: int) -> int:
+        """Oldest minute kept: a rolling window behind now (backward history only down to the anchor's)"""
+        return max(self.anchor_minute, now_minute) - self.max_history_minutes
+
+    def _extend(self, path: _SymbolPath, first_minute: int, end_minute: int, now_minute: int):
+        """Make minutes [first_minute, end_minute] available and drop those behind the window"""
+        floor_minute = self._floor_minute(now_minute)
+        path.extend_back_to(first_minute, floor_minute)
+        path.extend_to(end_minute)
+        path.trim_before(floor_minute)
+
+    def _price_at(self, path: _SymbolPath, minute: int, fraction: float) -> float:
+        """Bid inside `minute`: linear between the previous and this minute's close"""
+        self._extend(path, minute - 1, minute, minute)
+        previous, current = path.window(minute - 1, minute)[0]
+        return float(previous + (current - previous) * fraction)
+
+    def bid(self, symbol: str) -> float:
+        with self._lock:
+            path = self._path(symbol)
+            minute, fraction = self._now()
+            return round(self._price_at(path, minute, fraction), path.spec.digits)
+
+    def tick(self, symbol: str) -> Dict:
+        """Current tick (same fields as mt5.symbol_info_tick)"""
+        spec = self.spec(symbol)
+        bid = self.bid(symbol)
+        ask = round(bid + spec.spread, spec.digits)
+        return {
+            'time': int(self.clock()),
+            'bid': bid,
+            'ask': ask,
+            'last': bid,
+            'volume': 1,
+            'time_msc': int(self.clock() * 1000),
+        }
+
+    def rates(self, symbol: str, timeframe: int, count: int, end_time: Optional[float] = None) -> List[Dict]:
+        """
+        `count` bars of `timeframe` minutes ending with the bar containing
+        `end_time` (now by default); the current bar is still forming
+        """
+        timeframe = timeframe_minutes(int(timeframe))
+        with self._lock:
+            path = self._path(symbol)
+            spec = self.spec(symbol)
+            now_minute, fraction = self._now()
+            if end_time is not None and int(end_time // 60) < now_minute:
+                end_minute, fraction = int(end_time // 60), 1.0
+            else:
+                end_minute = now_minute
+
+            floor_minute = self._floor_minute(now_minute)
+            last_start = (end_minute // timeframe) * timeframe
+            first_start = last_start - (count - 1) * timeframe
+            first_start = max(first_start, -(-(floor_minute + 1) // timeframe) * timeframe)
+            if first_start > last_start:
+                return []
+            self._extend(path, first_start - 1, end_minute, now_minute)
+
+            closes, wicks = path.window(first_start - 1, end_minute)
+            closes = closes.copy()
+            wicks = wicks.astype(np.float64)
+            # Forming minute: price so far and a proportional wick
+            closes[-1] = closes[-2] + (closes[-1] - closes[-2]) * fraction
+            wicks[-1] *= fraction
+
+            opens = closes[:-1]
+            closes = closes[1:]
+            wicks = wicks[1:]
+            highs = np.maximum(opens, closes) + wicks
+            lows = np.minimum(opens, closes) - wicks
+
+        starts = np.arange(0, end_minute - first_start + 1, timeframe)
+        ends = np.append(starts[1:], len(closes)) - 1
+        bar_open = opens[starts]
+        bar_high = np.maximum.reduceat(highs, starts)
+        bar_low = np.minimum.reduceat(lows, starts)
+        bar_close = closes[ends]
+        # Tick count proxy: one per minute plus one per point of range
+        ticks = np.add.reduceat(np.ceil((highs - lows) / (spec.point or 1e-5)) + 1, starts).astype(np.int64)
+
+        digits = spec.digits
+        spread = int(spec.spread_points)
+        times = ((first_start + starts) * 60).tolist()
+        columns = [np.round(a, digits).tolist() for a in (bar_open, bar_high, bar_low, bar_close)]
+        return [
+            {
+                'time': t,
+                'open': o,
+                'high': h,
+                'low': l,
+                'close': c,
+                'tick_volume': v,
+                'spread': spread,
+                'real_volume': 0,
+            }
+            for t, o, h, l, c, v in zip(times, *columns, ticks.tolist())
+        ]
+
+    def symbol_info(self, symbol: str) -> Dict:
+        """Symbol info dict with the fields the bot reads"""
+        spec = self.spec(symbol)
+        tick = self.tick(symbol)
+        return {
+            'name': symbol,
+            'point': spec.point,
+            'digits': spec.digits,
+            'spread': int(spec.spread_points),
+            'bid': tick['bid'],
+            'ask': tick['ask'],
+            'trade_mode': 4,
+            'visible': True,
+            'volume_min': 0.01,
+            'volume_max': 100.0,
+            'volume_step': 0.01,
+            'trade_contract_size': spec.contract_size,
+            'trade_tick_value': 1.0,
+            'trade_stops_level': 0,
+            'trade_freeze_level': 0,
+        }
+
+    # ---------- account ----------
+
+    def _position_update(self, position: Dict, bid: float, ask: float):
+        spec = self.spec(position['symbol'])
+        direction = "BUY" if position['type'] == 0 else "SELL"
+        current = bid if direction == "BUY" else ask
+        position['price_current'] = current
+        position['profit'] = round(spec.profit(direction, position['price_open'], current, position['volume']), 2)
+
+    def _deal(self, position: Dict, entry: int, price: float, volume: float, profit: float, comment: str):
+        self._deals.append({
+            'ticket': len(self._deals) + 1,
+            'order': position['ticket'],
+            'position_id': position['ticket'],
+            'time': int(self.clock()),
+            'symbol': position['symbol'],
+            'type': position['type'] if entry == 0 else 1 - position['type'],
+            'entry': entry,
+            'volume': volume,
+            'price': price,
+            'profit': profit,
+            'commission': 0.0,
+            'swap': 0.0,
+            'magic': position['magic'],
+            'comment': comment,
+        })
+
+    def _close(self, ticket: int, price: float, volume: Optional[float], comment: str) -> float:
+        position = self._positions[ticket]
+        volume = min(volume or position['volume'], position['volume'])
+        spec = self.spec(position['symbol'])
+        direction = "BUY" if position['type'] == 0 else "SELL"
+        profit = round(spec.profit(direction, position['price_open'], price, volume), 2)
+        self.balance += profit
+        self._deal(position, 1, price, volume, profit, comment)
+        position['volume'] = round(position['volume'] - volume, 2)
+        if position['volume'] <= 0:
+            del self._positions[ticket]
+            self._checked_minute.pop(ticket, None)
+        return profit
+
+    def _trigger_stops(self):
+        """Close positions whose SL/TP was crossed since they were last checked"""
+        now_minute, fraction = self._now()
+        for ticket, position in list(self._positions.items()):
+            sl, tp = position['sl'], position['tp']
+            path = self._path(position['symbol'])
+            spec = self.spec(position['symbol'])
+            start = self._checked_minute.get(ticket, now_minute)
+            self._checked_minute[ticket] = now_minute
+            if not sl and not tp:
+                continue
+            self._extend(path, now_minute - 1, now_minute, now_minute)
+            start = max(start, path.first_minute + 1)  # Unchecked for longer than the window
+            closes, wicks = path.window(start - 1, now_minute)
+            closes = closes.astype(np.float64)
+            wicks = wicks.astype(np.float64)
+            closes[-1] = closes[-2] + (closes[-1] - closes[-2]) * fraction
+            wicks[-1] *= fraction
+            highs = np.maximum(closes[:-1], closes[1:]) + wicks[1:]
+            lows = np.minimum(closes[:-1], closes[1:]) - wicks[1:]
+            if position['type'] == 0:
+                sl_hit = lows <= sl if sl else np.zeros(len(lows), dtype=bool)
+                tp_hit = highs >= tp if tp else np.zeros(len(highs), dtype=bool)
+            else:
+                sl_hit = highs + spec.spread >= sl if sl else np.zeros(len(highs), dtype=bool)
+                tp_hit = lows + spec.spread <= tp if tp else np.zeros(len(lows), dtype=bool)
+            touched = sl_hit | tp_hit
+            if touched.any():
+                k = int(np.argmax(touched))
+                self._close(ticket, sl if sl_hit[k] else tp, None, "[sl]" if sl_hit[k] else "[tp]")
+
+    def positions(self, symbol: Optional[str] = None, ticket: Optional[int] = None) -> List[Dict]:
+        """Open positions marked to market (same fields as mt5.positions_get)"""
+        with self._lock:
+            self._trigger_stops()
+            result = []
+            for position in self._positions.values():
+                if symbol and position['symbol'] != symbol:
+                    continue
+                if ticket and position['ticket'] != ticket:
+                    continue
+                tick = self.tick(position['symbol'])
+                self._position_update(position, tick['bid'], tick['ask'])
+                result.append(dict(position))
+            return result
+
+    def account(self) -> Dict:
+        """Account info (same fields as mt5.account_info)"""
+        with self._lock:
+            positions = self.positions()
+            floating = sum(p['profit'] for p in positions)
+            margin = sum(
+                p['volume'] * self.spec(p['symbol']).contract_size * p['price_current'] / self.leverage
+                for p in positions
+            )
+            equity = self.balance + floating
+            return {
+                'login': 0,
+                'server': 'Simulator',
+                'currency': 'USD',
+                'leverage': self.leverage,
+                'balance': round(self.balance, 2),
+                'equity': round(equity, 2),
+                'profit': round(floating, 2),
+                'margin': round(margin, 2),
+                'margin_free': round(equity - margin, 2),
+                'margin_level': round(equity / margin * 100, 2) if margin else 0.0,
+            }
+
+    def deals(self, from_time: Optional[datetime] = None, to_time: Optional[datetime] = None) -> List[Dict]:
+        """Closed and opening deals in [from_time, to_time] (same fields as mt5.history_deals_get)"""
+        lo = from_time.timestamp() if from_time else float('-inf')
+        hi = to_time.timestamp() if to_time else float('inf')
+        with self._lock:
+            return [dict(d) for d in self._deals if lo <= d['time'] <= hi]
+
+    def open_position(self, symbol: str, order_type: str, volume: float,
+                      sl: Optional[float] = None, tp: Optional[float] = None,
+                      comment: str = "", magic: int = 234000) -> Dict:
+        """Market order at the current bid/ask; returns an order_send-like result"""
+        if volume <= 0:
+            return {'retcode': TRADE_RETCODE_INVALID_VOLUME, 'order': 0, 'volume': volume,
+                    'price': 0.0, 'comment': 'Invalid volume', 'request_id': 0}
+        with self._lock:
+            tick = self.tick(symbol)
+            side = 0 if order_type.upper() == "BUY" else 1
+            price = tick['ask'] if side == 0 else tick['bid']
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            now = int(self.clock())
+            position = {
+                'ticket': ticket,
+                'symbol': symbol,
+                'type': side,
+                'volume': round(volume, 2),
+                'price_open': price,
+                'price_current': price,
+                'sl': sl or 0.0,
+                'tp': tp or 0.0,
+                'profit': 0.0,
+                'swap': 0.0,
+                'time': now,
+                'time_update': now,
+                'magic': magic,
+                'comment': comment,
+            }
+            self._positions[ticket] = position
+            self._checked_minute[ticket] = self._now()[0]
+            self._deal(position, 0, price, position['volume'], 0.0, comment)
+            return {'retcode': TRADE_RETCODE_DONE, 'order': ticket, 'volume': position['volume'],
+                    'price': price, 'comment': comment, 'request_id': ticket}
+
+    def close_position(self, ticket: int, volume: Optional[float] = None) -> Optional[float]:
+        """Close (part of) a position at the current bid/ask; returns the realized profit"""
+        with self._lock:
+            self._trigger_stops()
+            position = self._positions.get(ticket)
+            if position is None:
+                return None
+            tick = self.tick(position['symbol'])
+            price = tick['bid'] if position['type'] == 0 else tick['ask']
+            return self._close(ticket, price, volume, "AI Bot Close")
+
+    def order_send(self, request: Dict) -> Dict:
+        """
+        mt5.order_send for market deals (open, or close when `position` is set)
+        and SL/TP changes. A close whose price is more than `deviation` points
+        away from the market is requoted with the current bid/ask.
+        """
+        action = request.get('action')
+        ticket = request.get('position')
+        if action == TRADE_ACTION_SLTP:
+            ok = self.modify_position(ticket, request.get('sl'), request.get('tp'))
+            return {'retcode': TRADE_RETCODE_DONE if ok else TRADE_RETCODE_POSITION_CLOSED,
+                    'order': 0, 'volume': 0.0, 'price': 0.0, 'comment': '' if ok else 'Position not found'}
+        if action != TRADE_ACTION_DEAL:
+            return {'retcode': TRADE_RETCODE_INVALID, 'order': 0, 'volume': 0.0, 'price': 0.0,
+                    'comment': 'Unsupported action'}
+        if not ticket:
+            return self.open_position(request['symbol'], "BUY" if request.get('type', 0) == 0 else "SELL",
+                                      request.get('volume', 0.0), request.get('sl'), request.get('tp'),
+                                      request.get('comment', ''), request.get('magic', 234000))
+        with self._lock:
+            self._trigger_stops()
+            position = self._positions.get(ticket)
+            if position is None:
+                return {'retcode': TRADE_RETCODE_POSITION_CLOSED, 'order': 0, 'volume': 0.0, 'price': 0.0,
+                        'comment': 'Position not found'}
+            tick = self.tick(position['symbol'])
+            price = tick['bid'] if position['type'] == 0 else tick['ask']
+            requested = request.get('price')
+            slippage = request.get('deviation', 0) * self.spec(position['symbol']).point
+            if requested and abs(requested - price) > slippage + 1e-12:
+                return {'retcode': TRADE_RETCODE_REQUOTE, 'order': 0, 'volume': 0.0, 'price': 0.0,
+                        'bid': tick['bid'], 'ask': tick['ask'], 'comment': 'Requote'}
+            volume = min(request.get('volume') or position['volume'], position['volume'])
+            profit = self._close(ticket, price, volume, request.get('comment') or "AI Bot Close")
+            return {'retcode': TRADE_RETCODE_DONE, 'order': ticket, 'volume': volume, 'price': price,
+                    'profit': profit, 'comment': request.get('comment', '')}
+
+    def modify_position(self, ticket: int, sl: Optional[float] = None, tp: Optional[float] = None) -> bool:
+        with self._lock:
+            position = self._positions.get(ticket)
+            if position is None:
+                return False
+            if sl:
+                position['sl'] = sl
+            if tp:
+                position['tp'] = tp
+            position['time_update'] = int(self.clock())
+            return True
@@ -5,10 +5,16 @@
 
 from typing import Optional, Dict, List, Tuple
 from datetime import datetime
+from pathlib import Path
+import functools
+import inspect
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.core.config import get_config
 from app.core.logger import setup_logger
+from app.trading.mt5_journal import JournalReplay, JournalWriter, journal_key
+
+logger = setup_logger("mt5_client")
 
 # Try to import MetaTrader5 - optional dependency
 # This MUST be wrapped in try/except to allow demo mode without MT5
@@ -16,20 +22,45 @@ MT5_AVAILABLE = False
 try:
     import MetaTrader5 as mt5  # type: ignore
     MT5_AVAILABLE = True
-    import sys
-    print(f"✅ MetaTrader5 imported successfully from {mt5.__file__}", file=sys.stderr)
+    logger.debug(f"MetaTrader5 imported from {mt5.__file__}")
 except (ImportError, ModuleNotFoundError, OSError) as e:
     # MetaTrader5 not available - create mock for demo mode
     MT5_AVAILABLE = False
-    import sys
-    print(f"⚠️ MetaTrader5 import failed: {e}", file=sys.stderr)
+    # Reported once by MT5Client.connect(); logged at debug here so importing stays silent
+    logger.debug(f"MetaTrader5 import failed: {e}")
     # Create a minimal mock mt5 module for demo mode
     class MockMT5:
         """Mock MT5 module for demo mode when MetaTrader5 is not installed"""
         pass
     mt5 = MockMT5()  # type: ignore
 
-logger = setup_logger("mt5_client")
+
+def _journaled(default=None):
+    """
+    Record the method's response while recording, serve it from the journal
+    while replaying (see app.trading.mt5_journal)
+
+    Args:
+        default: Factory for the value returned when a replayed call was never recorded
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.journal is None and self.replay is None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = journal_key(method.__name__, tuple(bound.arguments.values())[1:])
+            if self.replay is not None:
+                return self.replay.serve(key, default() if default else None)
+            result = method(self, *args, **kwargs)
+            if self.journal is not None:
+                self.journal.record(key, result)
+            return result
+        return wrapper
+    return decorator
 
 
 class MT5Client:
@@ -39,6 +70,61 @@ class MT5Client:
         self.config = get_config()
         self.connected = False
         self.account_info: Optional[Dict] = None
+        self.journal: Optional[JournalWriter] = None
+        self.replay: Optional[JournalReplay] = None
+        self._simulator = None
+    
+    @property
+    def simulator(self):
+        """Synthetic market serving demo mode (see app.trading.market_simulator)"""
+        if self._simulator is None:
+            from app.trading.market_simulator import MarketSimulator
+            self._simulator = MarketSimulator(seed=self.config.mt5.sim_seed)
+        return self._simulator
+    
+    def start_recording(self, path) -> JournalWriter:
+        """Append every broker response to a journal file until stop_recording()"""
+        self.stop_recording()
+        self.journal = JournalWriter(path)
+        logger.info(f"Recording MT5 responses to {path}")
+        return self.journal
+    
+    def stop_recording(self):
+        """Close the journal being recorded, if any"""
+        if self.journal is not None:
+            self.journal.close()
+            logger.info(f"MT5 journal closed: {self.journal.path} ({self.journal.frames} frames)")
+            self.journal = None
+    
+    def start_replay(self, path) -> JournalReplay:
+        """Serve broker responses from a recorded journal instead of the terminal"""
+        self.replay = JournalReplay(path)
+        self.connected = True
+        logger.info(f"Replaying MT5 journal {path}: {len(self.replay.cycles) - 1} cycles")
+        return self.replay
+    
+    def stop_replay(self):
+        """Go back to the terminal (or demo mode)"""
+        self.replay = None
+    
+    def feed_id(self) -> Optional[str]:
+        """
+        Identity of the price feed: cached bars are only reused (warm start)
+        with the same one. None while replaying a journal.
+        """
+        if self.replay is not None:
+            return None
+        if not MT5_AVAILABLE:
+            # The synthetic path depends on the seed and the day it is anchored to
+            return f"sim:{self.simulator.seed}:{self.simulator.anchor_minute}"
+        return f"mt5:{self.config.mt5.server}:{self.config.mt5.login}"
+    
+    def mark_cycle(self):
+        """Start of a trading loop cycle: new journal section / next replayed cycle"""
+        if self.journal is not None:
+            self.journal.mark_cycle()
+        if self.replay is not None:
+            self.replay.advance()
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def connect(self) -> bool:
@@ -48,6 +134,10 @@ class MT5Client:
         Returns:
             True if connection successful, False otherwise
         """
+        if self.replay is not None:
+            self.connected = True
+            return True
+        
         # Check if MT5 credentials are configured
         if not self.config.mt5.login or not self.config.mt5.password or not self.config.mt5.server:
             logger.warning("MT5 credentials not configured (cloud mode). Running in demo mode.")
@@ -158,7 +248,7 @@ class MT5Client:
     
     def is_connected(self) -> bool:
         """Check if connected to MT5"""
-        if not MT5_AVAILABLE:
+        if not MT5_AVAILABLE or self.replay is not None:
             return True  # Demo mode - always "connected"
         
         # Try to get account info to verify MT5 is running and logged in
@@ -180,13 +270,15 @@ class MT5Client:
             self.connected = False
             return False
     
+    @_journaled()
     def get_account_info(self) -> Optional[Dict]:
         """Get current account information"""
         if not self.is_connected():
             return None
         
         if not MT5_AVAILABLE:
-            # Return demo account info
+            # Simulated demo account
+            self.account_info = self.simulator.account()
             return self.account_info
         
         try:
@@ -241,6 +333,7 @@ class MT5Client:
             logger.error(f"Error ensuring symbol {symbol}: {e}")
             return False
     
+    @_journaled()
     def get_symbol_info(self, symbol: str) -> Optional[Dict]:
         """
         Get symbol information
@@ -255,18 +348,7 @@ class MT5Client:
             return None
         
         if not MT5_AVAILABLE:
-            # Return mock symbol info for demo
-            return {
-                'name': symbol,
-                'point': 0.0001,
-                'digits': 5,
-                'trade_mode': 4,  # Demo mode
-                'volume_min': 0.01,
-                'volume_max': 100.0,
-                'volume_step': 0.01,
-                'trade_contract_size': 100000,
-                'trade_tick_value': 1.0,
-            }
+            return self.simulator.symbol_info(symbol)
         
         try:
             symbol_info = mt5.symbol_info(symbol)
@@ -277,6 +359,7 @@ class MT5Client:
         
         return None
     
+    @_journaled(list)
     def get_symbols(self) -> List[str]:
         """Get list of available symbols"""
         if not self.is_connected():
@@ -295,6 +378,7 @@ class MT5Client:
         
         return []
     
+    @_journaled()
     def get_rates(
         self, 
         symbol: str, 
@@ -316,23 +400,9 @@ class MT5Client:
             return None
         
         if not MT5_AVAILABLE:
-            # Return mock data for demo
-            import random
-            base_price = 1.10000 if "USD" in symbol else 100.0
-            mock_rates = []
-            for i in range(count):
-                price = base_price + random.uniform(-0.01, 0.01)
-                mock_rates.append({
-                    'time': int((datetime.now().timestamp() - (count - i) * 900)),
-                    'open': price,
-                    'high': price + random.uniform(0, 0.001),
-                    'low': price - random.uniform(0, 0.001),
-                    'close': price + random.uniform(-0.0005, 0.0005),
-                    'tick_volume': random.randint(100, 1000),
-                    'spread': 2,
-                    'real_volume': 0
-                })
-            return mock_rates
+            # Demo timeframe constants are minutes (see app.trading.data)
+            end_time = start_time.timestamp() if start_time else None
+            return self.simulator.rates(symbol, timeframe, count, end_time) or None
         
         try:
             # 🔧 CRITICAL: Ensure symbol is visible/selected BEFORE fetching rates
@@ -354,6 +424,7 @@ class MT5Client:
             logger.error(f"Error getting rates for {symbol}: {e}")
             return None
     
+    @_journaled()
     def get_tick(self, symbol: str) -> Optional[Dict]:
         """
         Get last tick for symbol
@@ -368,17 +439,7 @@ class MT5Client:
             return None
         
         if not MT5_AVAILABLE:
-            # Return mock tick for demo
-            import random
-            base_price = 1.10000 if "USD" in symbol else 100.0
-            price = base_price + random.uniform(-0.01, 0.01)
-            return {
-                'time': int(datetime.now().timestamp()),
-                'bid': price - 0.0001,
-                'ask': price + 0.0001,
-                'last': price,
-                'volume': random.randint(100, 1000),
-            }
+            return self.simulator.tick(symbol)
         
         try:
             tick = mt5.symbol_info_tick(symbol)
@@ -389,6 +450,7 @@ class MT5Client:
         
         return None
 
+    @_journaled()
     def symbol_info_tick(self, symbol: str) -> Optional[Dict]:
         """Compatibility helper returning symbol_info_tick as dict (or None)."""
         if not self.is_connected():
@@ -403,6 +465,7 @@ class MT5Client:
             logger.error(f"Error getting symbol_info_tick for {symbol}: {e}")
         return None
     
+    @_journaled()
     def order_calc_margin(self, order_type: int, symbol: str, volume: float, price: float) -> Optional[float]:
         """Proxy for mt5.order_calc_margin; returns None in demo mode."""
         if not self.is_connected() or not MT5_AVAILABLE:
@@ -413,6 +476,7 @@ class MT5Client:
             logger.warning(f"order_calc_margin failed for {symbol}: {e}")
             return None
     
+    @_journaled(list)
     def get_positions(self, symbol: Optional[str] = None) -> List[Dict]:
         """
         Get open positions
@@ -427,8 +491,7 @@ class MT5Client:
             return []
         
         if not MT5_AVAILABLE:
-            # Return empty list in demo mode
-            return []
+            return self.simulator.positions(symbol)
         
         try:
             if symbol:
@@ -443,6 +506,7 @@ class MT5Client:
         
         return []
     
+    @_journaled(list)
     def get_orders(self, symbol: Optional[str] = None) -> List[Dict]:
         """
         Get pending orders
@@ -473,6 +537,28 @@ class MT5Client:
         
         return []
     
+    def order_send(self, request: Dict) -> Optional[Dict]:
+        """
+        Send a trade request (mt5.order_send; the synthetic market in demo mode)
+        
+        Returns:
+            The result as a dict (retcode, price, volume, comment, ...), None if not sent
+        """
+        if not MT5_AVAILABLE:
+            return self.simulator.order_send(request)
+        if not self.is_connected():
+            return None
+        try:
+            result = mt5.order_send(request)
+            if result is None:
+                logger.error(f"order_send returned None: {mt5.last_error()}")
+                return None
+            return result._asdict()
+        except Exception as e:
+            logger.error(f"Error sending order: {e}")
+            return None
+    
+    @_journaled(list)
     def get_history_deals(self, from_date: datetime, to_date: Optional[datetime] = None) -> List[Dict]:
         """
         Get historical deals (closed positions)
@@ -488,8 +574,7 @@ class MT5Client:
             return []
         
         if not MT5_AVAILABLE:
-            # Return empty list in demo mode
-            return []
+            return self.simulator.deals(from_date, to_date)
         
         try:
             if to_date is None:
@@ -504,6 +589,7 @@ class MT5Client:
         
         return []
     
+    @_journaled(list)
     def get_history_orders(self, from_date: datetime, to_date: Optional[datetime] = None) -> List[Dict]:
         """
         Get historical orders
@@ -545,4 +631,8 @@ def get_mt5_client() -> MT5Client:
     global _mt5_client
     if _mt5_client is None:
         _mt5_client = MT5Client()
+        record_dir = _mt5_client.config.mt5.record_dir
+        if record_dir:
+            session = datetime.now().strftime("%Y%m%d_%H%M%S")
+            _mt5_client.start_recording(Path(record_dir) / f"session_{session}.mt5j")
     return _mt5_client
@@ -0,0 +1,292 @@
+"""
+Record / replay of MT5 broker responses.
+
+Recording: with `MT5_RECORD_DIR=<dir>` (one session_<timestamp>.mt5j file per
+process) or `MT5Client.start_recording(path)`, every rates / tick /
+positions / orders / account / symbol response the client returns is
+appended to a binary journal, grouped by trading cycle (`MT5Client.mark_cycle()`
+is called at the top of main_trading_loop).
+
+Replay: `MT5Client.start_replay(path)` makes the client serve the journal
+instead of the terminal, so `main_trading_loop` sees exactly the recorded
+session, with no terminal and no waiting between cycles. `replay_session`
+runs one loop call per recorded cycle (in PAPER mode, so nothing is sent to
+a broker) and reports per-cycle timings and journal misses, which makes a
+slow or wrong live cycle reproducible under a profiler or in a test.
+
+Responses are served per cycle by call key (method + arguments, datetimes
+excluded because they are derived from the wall clock), in recorded order,
+so calls made from worker threads do not need to interleave the same way.
+Only broker responses are replayed; code that reads the wall clock directly
+(market hours, cooldowns) still sees the current time.
+
+File format: the MAGIC header, then frames of `<kind:u8><length:u32>` plus
+a zlib-compressed pickle. Consecutive rate arrays for the same key overlap
+almost entirely, so list responses are stored as a delta against the
+previous response for that key (shift, reused prefix, new tail).
+"""
+
+import pickle
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from app.core.logger import setup_logger
+
+logger = setup_logger("mt5_journal")
+
+MAGIC = b"MT5J\x01"
+FRAME_HEADER = struct.Struct("<BI")
+
+FRAME_CYCLE = 0
+FRAME_RESPONSE = 1
+FRAME_DELTA = 2
+
+# Largest bar shift tried when delta-encoding consecutive rate arrays
+MAX_DELTA_SHIFT = 16
+
+CallKey = Tuple[str, Tuple[Hashable, ...]]
+
+
+class ReplayError(Exception):
+    """Journal file cannot be read"""
+
+
+def journal_key(method: str, arguments: Tuple) -> CallKey:
+    """Call key of a client method from its bound arguments (datetimes are left out)"""
+    return method, tuple(None if isinstance(v, (datetime, date)) else v for v in arguments)
+
+
+def _delta(previous: List, current: List) -> Optional[Tuple[int, int, List]]:
+    """(shift, reused, tail) such that previous[shift:shift + reused] + tail == current"""
+    best = None
+    for shift in range(min(MAX_DELTA_SHIFT, len(previous)) + 1):
+        window = previous[shift:]
+        reused = 0
+        for old, new in zip(window, current):
+            if old != new:
+                break
+            reused += 1
+        if best is None or reused > best[1]:
+            best = (shift, reused)
+    if best is None or best[1] == 0:
+        return None
+    shift, reused = best
+    return shift, reused, current[reused:]
+
+
+class JournalWriter:
+    """Appends broker responses to a journal file (thread-safe)"""
+
+    def __init__(self, path, compression: int = 6):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC)
+        self._last: Dict[CallKey, List] = {}
+        self._lock = threading.Lock()
+        self.frames = 0
+
+    def _write(self, kind: int, payload: Any):
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), self.compression)
+        self._file.write(FRAME_HEADER.pack(kind, len(data)))
+        self._file.write(data)
+        self.frames += 1
+
+    def record(self, key: CallKey, result: Any):
+        """Append one response"""
+        with self._lock:
+            if self._file.closed:
+                return
+            previous = self._last.get(key)
+            if isinstance(result, list):
+                self._last[key] = result
+                delta = _delta(previous, result) if previous else None
+                if delta is not None:
+                    self._write(FRAME_DELTA, (key, *delta))
+                    return
+            self._write(FRAME_RESPONSE, (key, result))
+
+    def mark_cycle(self, timestamp: Optional[float] = None):
+        """Start a new trading cycle"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write(FRAME_CYCLE, time.time() if timestamp is None else timestamp)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+@dataclass
+class ReplayCycle:
+    """Responses of one recorded cycle, queued per call key"""
+    timestamp: Optional[float]
+    responses: Dict[CallKey, Deque[Any]] = field(default_factory=lambda: defaultdict(deque))
+
+    @property
+    def calls(self) -> int:
+        return sum(len(q) for q in self.responses.values())
+
+
+def read_journal(path) -> List[ReplayCycle]:
+    """Decode a journal; cycle 0 holds responses recorded before the first cycle marker"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if not raw.startswith(MAGIC):
+        raise ReplayError(f"{path} is not an MT5 journal")
+
+    cycles = [ReplayCycle(timestamp=None)]
+    last: Dict[CallKey, List] = {}
+    offset = len(MAGIC)
+    while offset < len(raw):
+        if offset + FRAME_HEADER.size > len(raw):
+            logger.warning(f"Truncated frame header at byte {offset} in {path}; ignoring the rest")
+            break
+        kind, length = FRAME_HEADER.unpack_from(raw, offset)
+        offset += FRAME_HEADER.size
+        if offset + length > len(raw):
+            logger.warning(f"Truncated frame at byte {offset} in {path}; ignoring the rest")
+            break
+        payload = pickle.loads(zlib.decompress(raw[offset:offset + length]))
+        offset += length
+
+        if kind == FRAME_CYCLE:
+            cycles.append(ReplayCycle(timestamp=payload))
+            continue
+        if kind == FRAME_DELTA:
+            key, shift, reused, tail = payload
+            result = last[key][shift:shift + reused] + tail
+        elif kind == FRAME_RESPONSE:
+            key, result = payload
+        else:
+            raise ReplayError(f"Unknown frame kind {kind} in {path}")
+        if isinstance(result, list):
+            last[key] = result
+        cycles[-1].responses[key].append(result)
+
+    return cycles
+
+
+class JournalReplay:
+    """Serves recorded responses cycle by cycle"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.cycles = read_journal(self.path)
+        self.index = 0
+        # Last response per key over the whole session, for calls a cycle did not record
+        self._latest: Dict[CallKey, Any] = {}
+        self._lock = threading.Lock()
+        self.served = 0
+        self.misses: Dict[CallKey, int] = defaultdict(int)
+
+    @property
+    def current(self) -> ReplayCycle:
+        return self.cycles[min(self.index, len(self.cycles) - 1)]
+
+    def advance(self) -> bool:
+        """Move to the next recorded cycle; False when the journal is exhausted"""
+        with self._lock:
+            if self.index + 1 >= len(self.cycles):
+                return False
+            self.index += 1
+            return True
+
+    def serve(self, key: CallKey, default: Any = None) -> Any:
+        """Next response for `key` in the current cycle (else the latest one seen)"""
+        with self._lock:
+            queue = self.current.responses.get(key)
+            if queue:
+                result = queue.popleft()
+                self._latest[key] = result
+                self.served += 1
+                return result
+            self.misses[key] += 1
+            return self._latest.get(key, default)
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of a replayed session"""
+    journal: str
+    cycles: int
+    cycle_seconds: List[float]
+    served: int
+    misses: Dict[str, int]
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.cycle_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "journal": self.journal,
+            "cycles": self.cycles,
+            "total_seconds": self.total_seconds,
+            "slowest_cycle_seconds": max(self.cycle_seconds, default=0.0),
+            "served": self.served,
+            "misses": self.misses,
+        }
+
+
+def replay_session(path, loop: Optional[Callable[[], Any]] = None,
+                   max_cycles: Optional[int] = None, client=None) -> ReplayReport:
+    """
+    Run the trading loop once per recorded cycle against a journal
+
+    Args:
+        path: Journal written in recording mode
+        loop: Cycle callback (defaults to main_trading_loop)
+        max_cycles: Stop after this many cycles
+        client: MT5Client to replay through (defaults to the global client the loop uses)
+
+    Returns:
+        ReplayReport with per-cycle wall time and calls the journal could not serve
+    """
+    from app.core.config import get_config
+    from app.trading.mt5_client import get_mt5_client
+
+    if loop is None:
+        from app.trading.trading_loop import main_trading_loop
+        loop = main_trading_loop
+
+    config = get_config()
+    client = client or get_mt5_client()
+    replay = client.start_replay(path)
+    previous_mode = config.trading.mode
+    config.trading.mode = "PAPER"  # Never send orders while replaying
+
+    timings: List[float] = []
+    try:
+        recorded = len(replay.cycles) - 1
+        for _ in range(recorded if max_cycles is None else min(recorded, max_cycles)):
+            started = time.perf_counter()
+            loop()  # Its mark_cycle() call moves the replay to the next cycle
+            timings.append(time.perf_counter() - started)
+    finally:
+        config.trading.mode = previous_mode
+        client.stop_replay()
+
+    report = ReplayReport(
+        journal=str(path),
+        cycles=len(timings),
+        cycle_seconds=timings,
+        served=replay.served,
+        misses={f"{method}{args}": n for (method, args), n in replay.misses.items()},
+    )
+    logger.info(
+        f"Replayed {report.cycles} cycles from {path} in {report.total_seconds:.2f}s "
+        f"({report.served} responses served, {sum(report.misses.values())} misses)"
+    )
+    return report
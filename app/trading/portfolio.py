@@ -2,6 +2,7 @@
 
 from typing import List, Dict, Optional
 from app.trading.mt5_client import get_mt5_client
+from app.trading.exposure_index import ExposureIndex
 from app.core.logger import setup_logger
 
 logger = setup_logger("portfolio")
@@ -77,16 +78,11 @@ class PortfolioManager:
         Returns:
             Count of positions with this currency as base
         """
-        positions = self.get_open_positions()
-        count = 0
-        
-        for pos in positions:
-            symbol = pos.get('symbol', '')
-            # Extract base currency from symbol (first 3 chars)
-            if symbol.startswith(currency):
-                count += 1
-        
-        return count
+        return self.get_exposure_index().by_base[currency]
+    
+    def get_exposure_index(self) -> ExposureIndex:
+        """Exposure index (currency, cluster, asset class counters) of the open positions"""
+        return ExposureIndex.from_positions(self.get_open_positions())
 
 
 # Global portfolio manager instance
@@ -0,0 +1,303 @@
+"""
+Correlation-aware portfolio risk: rolling covariance of bar returns and
+parametric VaR of the open positions.
+
+`RollingCovariance` keeps the last `window` log returns of every symbol in a
+ring buffer together with the running sums S1 = sum(r) and S2 = sum(r r^T),
+so a new bar costs one rank-k update of S2 (the returns entering minus the
+ones leaving) instead of recomputing the matrix. The sums are rebuilt from
+the buffer every `window` bars to bound floating-point drift.
+
+`PortfolioRiskEngine` reads closes from the DataProvider cache (the same
+`count` the strategy asks for, so no extra broker calls once the cycle's
+analysis ran), pushes only the bars newer than the last one seen, and turns
+open positions into a USD exposure vector w. When the traded symbols change,
+the return history of the symbols that stay is carried over; a symbol that
+joins has no history yet (zero rows, so zero variance), and `samples` counts
+the real returns of each symbol so callers can refuse to price it until it
+has `min_samples` of them. With sigma_p^2 = w' C w and
+g = C w cached per cycle, the VaR change of adding delta_i to one symbol is
+
+    sigma_new^2 = sigma_p^2 + 2 delta_i g_i + delta_i^2 C_ii
+
+i.e. O(1) per candidate.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import get_config
+from app.core.logger import setup_logger
+
+logger = setup_logger("portfolio_risk")
+
+# One-sided normal quantiles
+Z_SCORES = {0.90: 1.2816, 0.95: 1.6449, 0.99: 2.3263}
+
+
+class RollingCovariance:
+    """Covariance of the last `window` return rows, updated incrementally"""
+
+    def __init__(self, n: int, window: int = 100):
+        self.n, self.window = n, window
+        self.buffer = np.zeros((window, n))
+        self.count = 0        # Rows currently in the buffer
+        self.head = 0         # Next slot to write
+        self.s1 = np.zeros(n)
+        self.s2 = np.zeros((n, n))
+        self._since_rebuild = 0
+
+    def push(self, rows: np.ndarray):
+        """Add return rows (k x n, oldest first), evicting the oldest ones"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))[-self.window:]
+        k = len(rows)
+        if k == 0:
+            return
+        slots = (self.head + np.arange(k)) % self.window
+        leaving = self.buffer[slots]  # Empty slots are zero rows
+        self.s1 += rows.sum(axis=0) - leaving.sum(axis=0)
+        self.s2 += rows.T @ rows - leaving.T @ leaving
+        self.buffer[slots] = rows
+        self.head = (self.head + k) % self.window
+        self.count = min(self.window, self.count + k)
+        self._since_rebuild += k
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+    def _rebuild(self):
+        rows = self.buffer[: self.count] if self.count < self.window else self.buffer
+        self.s1 = rows.sum(axis=0)
+        self.s2 = rows.T @ rows
+        self._since_rebuild = 0
+
+    def covariance(self) -> np.ndarray:
+        if self.count < 2:
+            return np.zeros((self.n, self.n))
+        return (self.s2 - np.outer(self.s1, self.s1) / self.count) / (self.count - 1)
+
+
+class PortfolioRiskEngine:
+    """Rolling covariance of the traded symbols and VaR of positions / candidates"""
+
+    def __init__(self, symbols: Sequence[str] = (), window: int = 100, confidence: float = 0.95,
+                 min_samples: int = 30):
+        self.window = window
+        self.z = Z_SCORES.get(confidence, 1.6449)
+        self.min_samples = min(min_samples, window)
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cov = RollingCovariance(0, window)
+        self.samples = np.zeros(0, dtype=int)  # Real returns per symbol in the window
+        self.last_close = np.zeros(0)
+        self.last_time: Optional[pd.Timestamp] = None
+        self._matrix = np.zeros((0, 0))
+        self._w = np.zeros(0)
+        self._g = np.zeros(0)
+        self._variance = 0.0
+        if symbols:
+            self._reset(symbols)
+
+    def _reset(self, symbols: Sequence[str]):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.cov = RollingCovariance(len(self.symbols), self.window)
+        self.samples = np.zeros(len(self.symbols), dtype=int)
+        self.last_close = np.full(len(self.symbols), np.nan)
+        self.last_time = None
+        self._matrix = np.zeros((len(self.symbols),) * 2)
+        self.set_positions([])
+
+    def _resize(self, symbols: Sequence[str]):
+        """Switch to a new symbol set, keeping the return history of the symbols that stay"""
+        old_index, old_cov, old_close, old_samples = self.index, self.cov, self.last_close, self.samples
+        self.symbols = list(dict.fromkeys(symbols))
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.cov = RollingCovariance(len(self.symbols), self.window)
+        self.samples = np.zeros(len(self.symbols), dtype=int)
+        self.last_close = np.full(len(self.symbols), np.nan)
+        kept = [(i, old_index[s]) for i, s in enumerate(self.symbols) if s in old_index]
+        if kept:
+            new, old = (list(c) for c in zip(*kept))
+            self.cov.buffer[:, new] = old_cov.buffer[:, old]  # New symbols: zero returns until filled
+            self.cov.count, self.cov.head = old_cov.count, old_cov.head
+            self.cov._rebuild()
+            self.last_close[new] = old_close[old]
+            self.samples[new] = old_samples[old]
+        else:
+            self.last_time = None
+        self._matrix = self.cov.covariance()
+        self.set_positions([])
+
+    # ---- bars ----------------------------------------------------------------
+
+    def update(self, closes: pd.DataFrame):
+        """
+        Push the bars newer than the last one seen
+
+        Args:
+            closes: Close prices indexed by bar time, one column per symbol
+                    (missing bars are carried forward: zero return)
+        """
+        if set(closes.columns) != set(self.symbols):
+            self._resize(list(closes.columns))
+        closes = closes[self.symbols].sort_index()
+        if self.last_time is not None:
+            # Symbols just added start from their close at the last bar seen
+            seen = closes[closes.index <= self.last_time].ffill()
+            missing = np.isnan(self.last_close)
+            if len(seen) and missing.any():
+                self.last_close[missing] = seen.iloc[-1].to_numpy(dtype=float)[missing]
+            closes = closes[closes.index > self.last_time]
+        if closes.empty:
+            return
+        prices = closes.to_numpy(dtype=float)
+        # Carry the last known close forward into the new rows
+        prev = np.vstack([self.last_close, prices])
+        prev = pd.DataFrame(prev).ffill().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(prev[1:] / prev[:-1])
+        valid = np.isfinite(returns)
+        returns[~valid] = 0.0
+        if self.last_time is None:
+            returns, valid = returns[1:], valid[1:]  # First bar has no previous close
+        self.cov.push(returns)
+        self.samples = np.minimum(self.samples + valid[-self.window:].sum(axis=0), self.window)
+        self.last_close = prev[-1]
+        self.last_time = closes.index[-1]
+        self._matrix = self.cov.covariance()
+
+    def refresh(self, data_provider, symbols: Sequence[str], timeframe: str, count: int = 100):
+        """Read the bars of `symbols` (cached by the cycle's analysis) and push what is new"""
+        series = {}
+        for symbol in symbols:
+            df = data_provider.get_ohlc_data(symbol, timeframe, count)
+            if df is not None and len(df):
+                series[symbol] = df['close']
+        if not series:
+            return
+        # A symbol missing this cycle keeps its column (carried forward) instead of resetting the matrix
+        for symbol in self.symbols:
+            if symbol in symbols and symbol not in series:
+                series[symbol] = pd.Series(dtype=float)
+        self.update(pd.DataFrame(series))
+
+    @property
+    def covariance(self) -> np.ndarray:
+        return self._matrix
+
+    def history(self, symbol: str) -> Optional[int]:
+        """Real returns of `symbol` in the window (None if it is not tracked)"""
+        i = self.index.get(symbol)
+        return None if i is None else int(self.samples[i])
+
+    # ---- exposure ------------------------------------------------------------
+
+    def usd_per_unit(self, currency: str) -> Optional[float]:
+        """USD value of one unit of `currency` from the last closes (None if not traded)"""
+        if currency == "USD":
+            return 1.0
+        direct = self.index.get(f"{currency}USD")
+        if direct is not None and self.last_close[direct] > 0:
+            return float(self.last_close[direct])
+        inverse = self.index.get(f"USD{currency}")
+        if inverse is not None and self.last_close[inverse] > 0:
+            return 1.0 / float(self.last_close[inverse])
+        return None
+
+    def exposure(self, symbol: str, volume: float, direction: str, contract_size: float = 100000.0) -> float:
+        """Signed USD exposure of a position (a 1.0 log return moves it by this much)"""
+        i = self.index.get(symbol)
+        if i is None or not np.isfinite(self.last_close[i]):
+            return 0.0
+        quote_usd = self.usd_per_unit(symbol[3:6])
+        if quote_usd is None:
+            quote_usd = 1.0  # Unknown quote currency: treat as USD
+        sign = 1.0 if direction == "BUY" else -1.0
+        return sign * volume * contract_size * float(self.last_close[i]) * quote_usd
+
+    def set_positions(self, positions: Sequence[Dict], contract_sizes: Optional[Dict[str, float]] = None):
+        """Exposure vector of the open positions and the cached C w"""
+        w = np.zeros(len(self.symbols))
+        contract_sizes = contract_sizes or {}
+        for p in positions:
+            symbol = p.get('symbol', '')
+            if symbol in self.index:
+                direction = "BUY" if p.get('type', 0) == 0 else "SELL"
+                w[self.index[symbol]] += self.exposure(symbol, p.get('volume', 0.0), direction,
+                                                       contract_sizes.get(symbol, 100000.0))
+        self._w = w
+        self._g = self._matrix @ w if len(w) else w
+        self._variance = float(w @ self._g) if len(w) else 0.0
+
+    # ---- VaR -----------------------------------------------------------------
+
+    def portfolio_var(self) -> float:
+        """One-bar VaR of the open positions (USD)"""
+        return self.z * np.sqrt(max(self._variance, 0.0))
+
+    def candidate_var(self, symbol: str, volume: float, direction: str,
+                      contract_size: float = 100000.0) -> Tuple[float, float]:
+        """
+        VaR with the candidate added, and its marginal contribution (USD)
+
+        Returns:
+            Tuple of (var_after, marginal_var)
+        """
+        i = self.index.get(symbol)
+        before = self.portfolio_var()
+        if i is None:
+            return before, 0.0
+        delta = self.exposure(symbol, volume, direction, contract_size)
+        variance = self._variance + 2 * delta * self._g[i] + delta * delta * self._matrix[i, i]
+        after = self.z * np.sqrt(max(variance, 0.0))
+        return after, after - before
+
+    def correlation(self) -> np.ndarray:
+        sd = np.sqrt(np.diag(self._matrix))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self._matrix / np.outer(sd, sd)
+        return np.nan_to_num(corr)
+
+    # ---- warm start ----------------------------------------------------------
+
+    def snapshot_state(self) -> Dict:
+        """Return buffer and last bar, for a warm-start snapshot"""
+        cov = self.cov
+        return {
+            "symbols": list(self.symbols), "window": self.window,
+            "buffer": cov.buffer.copy(), "count": cov.count, "head": cov.head,
+            "samples": self.samples.copy(),
+            "last_close": self.last_close.copy(), "last_time": self.last_time,
+        }
+
+    def restore_state(self, state: Dict) -> int:
+        """Reload the return buffer; the next refresh() pushes only the bars formed since"""
+        if state["window"] != self.window or not state["symbols"]:
+            return 0
+        self._reset(state["symbols"])
+        cov = self.cov
+        cov.buffer[:] = state["buffer"]
+        cov.count, cov.head = state["count"], state["head"]
+        cov._rebuild()  # Running sums from the buffer
+        self.samples = np.asarray(state["samples"], dtype=int).copy()
+        self.last_close = np.asarray(state["last_close"], dtype=float)
+        self.last_time = state["last_time"]
+        self._matrix = cov.covariance()
+        self.set_positions([])
+        return len(self.symbols)
+
+
+# Global instance
+_portfolio_risk_engine: Optional[PortfolioRiskEngine] = None
+
+
+def get_portfolio_risk_engine() -> PortfolioRiskEngine:
+    """Get global portfolio risk engine"""
+    global _portfolio_risk_engine
+    if _portfolio_risk_engine is None:
+        config = get_config()
+        _portfolio_risk_engine = PortfolioRiskEngine(confidence=config.trading.var_confidence,
+                                                     min_samples=config.trading.var_min_history_bars)
+    return _portfolio_risk_engine
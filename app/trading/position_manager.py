@@ -1,7 +1,9 @@
 """Position management: entries, exits, trailing stops, breakeven management"""
 
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, Mapping, Sequence
 from datetime import datetime, timedelta
+from app.trading.exit_rules import PositionTable, evaluate_exits, RULE_NAMES, HOLD
+from app.trading.exit_state import ExitState, ExitStateStore
 from app.trading.mt5_client import get_mt5_client
 from app.trading.risk import get_risk_manager
 from app.trading.data import get_data_provider
@@ -400,7 +402,7 @@ class PositionManager:
                 open_time_dt = None
         else:
             # Fallback a 'time' en segundos
-            time_val = open_time
+            time_val = position.get('time', None)
             if isinstance(time_val, (int, float)):
                 try:
                     open_time_dt = datetime.fromtimestamp(time_val)
@@ -545,7 +547,8 @@ class PositionManager:
         current_signal: str,
         signal_confidence: float,
         analysis: Dict[str, Any],
-        max_profit_tracker: Dict[int, float]  # ticket -> max_profit_usd
+        max_profit_tracker: Optional[Dict[int, float]] = None,  # ticket -> max_profit_usd
+        exit_state: Optional[ExitState] = None
     ) -> Dict[str, Any]:
         """
         🔍 REVISIÓN COMPLETA DE POSICIÓN (TODAS LAS REGLAS DE SALIDA)
@@ -558,6 +561,10 @@ class PositionManager:
         5. Time limit
         6. Trailing stop
         
+        El máximo profit visto sale de `exit_state` (registro persistente del
+        ticket; además evita repetir el cierre parcial de 1R) o, si no se pasa,
+        de `max_profit_tracker`.
+        
         Returns:
             Dict con:
                 - should_close: bool
@@ -573,13 +580,20 @@ class PositionManager:
         current_sl = position.get('sl', 0)
         current_profit = position.get('profit', 0)
         
-        # Actualizar max profit tracker
-        if ticket not in max_profit_tracker:
-            max_profit_tracker[ticket] = current_profit
+        # Actualizar max profit (registro del ticket o tracker)
+        if exit_state is not None:
+            max_profit_seen = exit_state.observe(current_price, current_profit)
         else:
-            max_profit_tracker[ticket] = max(max_profit_tracker[ticket], current_profit)
+            if max_profit_tracker is None:
+                max_profit_tracker = {}
+            if ticket not in max_profit_tracker:
+                max_profit_tracker[ticket] = current_profit
+            else:
+                max_profit_tracker[ticket] = max(max_profit_tracker[ticket], current_profit)
+            max_profit_seen = max_profit_tracker[ticket]
         
-        max_profit_seen = max_profit_tracker[ticket]
+        # El parcial de 1R se toma una sola vez por ticket
+        partial_close_enabled = exit_state is None or exit_state.scale_out_stage == 0
         
         # Get ATR
         atr = analysis.get('atr', 0)
@@ -597,7 +611,7 @@ class PositionManager:
         
         # ✅ REGLA 1: PROFIT TARGET (R-multiple) - MÁXIMA PRIORIDAD
         close, reason, close_pct = self.should_close_on_profit_target(
-            symbol, position, atr, partial_close_enabled=True
+            symbol, position, atr, partial_close_enabled=partial_close_enabled
         )
         if close:
             logger.info(f"🟢 {symbol} T{ticket}: CLOSING - {reason}")
@@ -666,6 +680,62 @@ class PositionManager:
                 logger.info(f"📈 {symbol} trailing SL: {current_sl:.5f} → {new_sl:.5f}")
         
         return result
+    
+    def review_positions(
+        self,
+        positions: Sequence[Dict[str, Any]],
+        analyses: Mapping[str, Dict[str, Any]],
+        signal_confidence: float = 0.7,
+        exit_states: Optional[ExitStateStore] = None,
+        max_profit_tracker: Optional[Dict[int, float]] = None,
+        now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        🔍 REVISIÓN EN LOTE: las mismas reglas que review_position_full, todas
+        las posiciones en una pasada vectorizada (app.trading.exit_rules)
+        
+        Args:
+            positions: Posiciones abiertas (dicts MT5)
+            analyses: Análisis por símbolo (uno por símbolo, compartido entre tickets)
+            signal_confidence: Confianza de la señal actual
+            exit_states: Store de estado por ticket (max profit, scale-out)
+            max_profit_tracker: Alternativa a exit_states (ticket -> max_profit_usd)
+            now: Epoch de referencia para el límite de tiempo (por defecto, ahora)
+        
+        Returns:
+            Lista de dicts (should_close, close_percent, reason, update_sl), en el
+            orden de `positions`
+        """
+        if not positions:
+            return []
+        
+        # Actualizar max profit (registro del ticket o tracker), como review_position_full
+        max_profit, partial_enabled = [], []
+        for position in positions:
+            ticket = position.get('ticket', 0)
+            profit = position.get('profit', 0)
+            state = exit_states.get(ticket) if exit_states is not None else None
+            if state is not None:
+                max_profit.append(state.observe(position.get('price_current', 0), profit))
+                partial_enabled.append(state.scale_out_stage == 0)
+            else:
+                if max_profit_tracker is None:
+                    max_profit_tracker = {}
+                max_profit_tracker[ticket] = max(max_profit_tracker.get(ticket, profit), profit)
+                max_profit.append(max_profit_tracker[ticket])
+                partial_enabled.append(True)
+        
+        table = PositionTable.build(positions, analyses, max_profit=max_profit,
+                                    signal_confidence=signal_confidence, partial_enabled=partial_enabled)
+        decisions = evaluate_exits(table, now=now)
+        results = decisions.to_results(table)
+        
+        for symbol, ticket, rule, result in zip(table.symbols, table.tickets, decisions.rule, results):
+            if rule != HOLD:
+                logger.info(f"{symbol} T{ticket}: CLOSING ({RULE_NAMES[rule]}) - {result['reason']}")
+            elif result['update_sl'] is not None:
+                logger.info(f"📈 {symbol} T{ticket} trailing SL → {result['update_sl']:.5f}")
+        return results
 
 
 # Global instance
@@ -0,0 +1,384 @@
+"""
+Pre-trade gate pipeline.
+
+Every check a new trade has to pass is a gate: it declares the broker data
+it needs (`requires`), reads it from one `GateContext` shared by every
+symbol of the cycle, and returns a rejection reason or None. Positions and
+account are fetched once per cycle, ticks and symbol info once per symbol,
+and only when a gate that needs them actually runs.
+
+The pipeline runs gates cheapest-first (own cost plus the cost of the data
+they need) and stops at the first rejection, so a symbol rejected by the
+portfolio limits never costs a tick request. Three stages:
+
+    screen   - before analysis, only the symbol is known
+    signal   - after the decision, with direction and confidence
+    execute  - after sizing, with volume / SL / TP
+
+Each gate keeps call, rejection and timing counters (`stats()`).
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import get_config
+from app.core.logger import setup_logger
+from app.trading.decision_constants import MIN_EXECUTION_CONFIDENCE
+from app.trading.exposure_index import ExposureIndex
+from app.trading.portfolio_risk import PortfolioRiskEngine, get_portfolio_risk_engine
+from app.trading.risk import RiskManager, get_risk_manager
+
+logger = setup_logger("pretrade_gates")
+
+SCREEN = "screen"
+SIGNAL = "signal"
+EXECUTE = "execute"
+
+# Relative cost of the data a gate needs (cycle-wide data is fetched once)
+DATA_COSTS = {"exposure": 1, "positions": 1, "account": 1, "symbol_info": 2, "tick": 3}
+
+# Pares exóticos que consumen mucho margen
+EXOTICS = ['USDTRY', 'USDHKD', 'EURPLN', 'EURNOK', 'USDKZT', 'USDRUB', 'USDCNY']
+
+
+def check_free_margin(symbol: str, volume: float, account: Optional[Dict]) -> Optional[str]:
+    """
+    Free-margin requirement of place_market_order (1.3x an estimated margin,
+    1.5x more for exotics, exotics need $2000 free). None when OK or unknown.
+    """
+    if not account:
+        return None
+    free_margin = account.get('margin_free', 0)
+    balance = account.get('balance', 0)
+    used_margin = account.get('margin', 0)
+    is_exotic = any(symbol.upper().startswith(e) or symbol.upper().endswith(e) for e in EXOTICS)
+
+    required_free_margin = volume * 1000 * 1.3  # Estimación conservadora
+    if is_exotic:
+        required_free_margin *= 1.5
+
+    if free_margin < required_free_margin:
+        return (f"❌ NOT ENOUGH FREE MARGIN for {symbol}: "
+                f"free=${free_margin:.0f}, need ${required_free_margin:.0f}, "
+                f"balance=${balance:.0f}, used=${used_margin:.0f}")
+    if is_exotic and free_margin < 2000:
+        return f"❌ {symbol} is EXOTIC and free_margin=${free_margin:.0f} < $2000. Skipping."
+    return None
+
+
+@dataclass
+class TradeCandidate:
+    """The trade being validated, filled in as it moves through the stages"""
+    symbol: str
+    direction: Optional[str] = None
+    volume: float = 0.0
+    sl: Optional[float] = None
+    tp: Optional[float] = None
+    confidence: Optional[float] = None
+
+
+class GateContext:
+    """Broker data shared by every gate and symbol in one cycle, fetched on first use"""
+
+    def __init__(self, client, positions: Optional[List[Dict]] = None, account: Optional[Dict] = None,
+                 risk_pct: Optional[Callable[[str], float]] = None):
+        self.client = client
+        self._positions = list(positions) if positions is not None else None
+        self._account = account
+        self._exposure: Optional[ExposureIndex] = None
+        self.risk_pct = risk_pct
+        self.version = 0  # Bumped whenever the positions change
+        self._ticks: Dict[str, Optional[Dict]] = {}
+        self._infos: Dict[str, Optional[Dict]] = {}
+        self.fetches = 0
+
+    @property
+    def positions(self) -> List[Dict]:
+        if self._positions is None:
+            self.fetches += 1
+            self._positions = self.client.get_positions() or []
+        return self._positions
+
+    @property
+    def exposure(self) -> ExposureIndex:
+        """Exposure index of the positions, kept current by record_fill()"""
+        if self._exposure is None:
+            self._exposure = ExposureIndex.from_positions(self.positions, self.risk_pct)
+        return self._exposure
+
+    @property
+    def account(self) -> Optional[Dict]:
+        if self._account is None:
+            self.fetches += 1
+            self._account = self.client.get_account_info()
+        return self._account
+
+    def tick(self, symbol: str) -> Optional[Dict]:
+        if symbol not in self._ticks:
+            self.fetches += 1
+            self._ticks[symbol] = self.client.symbol_info_tick(symbol)
+        return self._ticks[symbol]
+
+    def symbol_info(self, symbol: str) -> Optional[Dict]:
+        if symbol not in self._infos:
+            self.fetches += 1
+            self._infos[symbol] = self.client.get_symbol_info(symbol)
+        return self._infos[symbol]
+
+    def load(self, requires: Iterable[str], symbol: str):
+        """Fetch what a gate declared it needs"""
+        for key in requires:
+            if key == "tick":
+                self.tick(symbol)
+            elif key == "symbol_info":
+                self.symbol_info(symbol)
+            else:
+                getattr(self, key)
+
+    def record_fill(self, symbol: str, position: Optional[Dict] = None):
+        """
+        A new position was opened this cycle: add it to the positions and the
+        exposure index, refetch the account (margin changed) and the tick
+        """
+        if self._positions is not None:
+            self._positions.append(position or {'symbol': symbol})
+        if self._exposure is not None:
+            self._exposure.add(symbol)
+        self._account = None
+        self._ticks.pop(symbol, None)
+        self.version += 1
+
+    def invalidate(self):
+        """Drop the cycle-wide data (refetched on next use)"""
+        self._positions = None
+        self._exposure = None
+        self._account = None
+        self.version += 1
+
+
+class PreTradeGate:
+    """One check; subclasses set name / stage / requires / cost and implement check()"""
+    name = "gate"
+    stage = SCREEN
+    requires: Tuple[str, ...] = ()
+    cost = 0
+
+    def __init__(self):
+        self.calls = 0
+        self.rejections = 0
+        self.total_ms = 0.0
+
+    @property
+    def order_key(self) -> int:
+        return self.cost + sum(DATA_COSTS[r] for r in self.requires)
+
+    def check(self, candidate: TradeCandidate, ctx: GateContext) -> Optional[str]:
+        raise NotImplementedError
+
+
+class OpenPositionGate(PreTradeGate):
+    """One position per symbol"""
+    name = "open_position"
+    requires = ("exposure",)
+
+    def check(self, candidate, ctx):
+        if ctx.exposure.by_symbol[candidate.symbol] > 0:
+            return "Already have open position"
+        return None
+
+
+class PortfolioLimitsGate(PreTradeGate):
+    """Total exposure, position count and trades per currency (RiskManager.check_exposure_limits)"""
+    name = "portfolio_limits"
+    requires = ("exposure", "account")
+
+    def __init__(self, risk: RiskManager):
+        super().__init__()
+        self.risk = risk
+
+    def check(self, candidate, ctx):
+        equity = (ctx.account or {}).get('equity', 0)
+        _, error = self.risk.check_exposure_limits(candidate.symbol, ctx.exposure, check_exposure=equity > 0)
+        return error
+
+
+class SpreadGate(PreTradeGate):
+    """Current spread within the forex / crypto limit of the RiskManager"""
+    name = "spread"
+    requires = ("tick", "symbol_info")
+
+    def check(self, candidate, ctx):
+        tick, info = ctx.tick(candidate.symbol), ctx.symbol_info(candidate.symbol)
+        if not tick or not info:
+            return None  # Unknown spread: leave it to execution
+        pip = (info.get('point') or 0.0001) * 10
+        spread_pips = (tick.get('ask', 0) - tick.get('bid', 0)) / pip
+        is_crypto = any(c in candidate.symbol.upper() for c in RiskManager.CRYPTO_SYMBOLS)
+        max_spread = RiskManager.CRYPTO_MAX_SPREAD_PIPS if is_crypto else RiskManager.FOREX_MAX_SPREAD_PIPS
+        if spread_pips > max_spread:
+            return f"SPREAD_TOO_HIGH ({spread_pips:.1f} > {max_spread:.1f} pips)"
+        return None
+
+
+class ConfidenceGate(PreTradeGate):
+    """Execution confidence hard floor"""
+    name = "confidence"
+    stage = SIGNAL
+
+    def __init__(self, min_confidence: float = MIN_EXECUTION_CONFIDENCE):
+        super().__init__()
+        self.min_confidence = min_confidence
+
+    def check(self, candidate, ctx):
+        if candidate.confidence is not None and candidate.confidence < self.min_confidence:
+            return f"CONFIDENCE_TOO_LOW ({candidate.confidence:.2f} < {self.min_confidence:.2f})"
+        return None
+
+
+class ProtectiveStopsGate(PreTradeGate):
+    """SL and TP present and on the right side of the live bid/ask (execution fixes the distance)"""
+    name = "protective_stops"
+    stage = EXECUTE
+    requires = ("tick",)
+
+    def check(self, candidate, ctx):
+        sl, tp = candidate.sl, candidate.tp
+        if not sl or not tp:
+            return "Missing SL/TP"
+        tick = ctx.tick(candidate.symbol)
+        if not tick:
+            return None
+        bid, ask = tick.get('bid', 0), tick.get('ask', 0)
+        if candidate.direction == "BUY" and not (sl < bid and tp > ask):
+            return f"INVALID_STOPS (BUY SL={sl:.5f} / TP={tp:.5f} vs bid={bid:.5f} ask={ask:.5f})"
+        if candidate.direction == "SELL" and not (sl > ask and tp < bid):
+            return f"INVALID_STOPS (SELL SL={sl:.5f} / TP={tp:.5f} vs bid={bid:.5f} ask={ask:.5f})"
+        return None
+
+
+class MarginGate(PreTradeGate):
+    """Free margin for the sized volume (same rule place_market_order enforces)"""
+    name = "free_margin"
+    stage = EXECUTE
+    requires = ("account",)
+
+    def check(self, candidate, ctx):
+        return check_free_margin(candidate.symbol, candidate.volume, ctx.account)
+
+
+class PortfolioVaRGate(PreTradeGate):
+    """Portfolio VaR with the candidate added, from the rolling covariance of returns"""
+    name = "portfolio_var"
+    stage = EXECUTE
+    requires = ("positions", "account", "symbol_info")
+    cost = 1
+
+    def __init__(self, engine: PortfolioRiskEngine, max_var_pct: float):
+        super().__init__()
+        self.engine = engine
+        self.max_var_pct = max_var_pct
+        self._loaded: Optional[Tuple[int, int]] = None
+
+    def _contract_size(self, ctx: GateContext, symbol: str) -> float:
+        info = ctx.symbol_info(symbol) or {}
+        return info.get('trade_contract_size') or 100000.0
+
+    def check(self, candidate, ctx):
+        equity = (ctx.account or {}).get('equity', 0)
+        if equity <= 0 or not candidate.volume:
+            return None
+        # Too little history: its variance would read as ~0 and the trade as risk-free
+        history = self.engine.history(candidate.symbol)
+        if history is not None and history < self.engine.min_samples:
+            return (f"PORTFOLIO_VAR (only {history} bars of return history for {candidate.symbol}, "
+                    f"need {self.engine.min_samples})")
+        # Exposure vector once per context state, not per candidate
+        if self._loaded != (id(ctx), ctx.version):
+            sizes = {p.get('symbol', ''): self._contract_size(ctx, p.get('symbol', '')) for p in ctx.positions}
+            self.engine.set_positions(ctx.positions, sizes)
+            self._loaded = (id(ctx), ctx.version)
+        var_after, marginal = self.engine.candidate_var(
+            candidate.symbol, candidate.volume, candidate.direction,
+            self._contract_size(ctx, candidate.symbol))
+        var_pct = var_after / equity * 100
+        if marginal > 0 and var_pct > self.max_var_pct:
+            return (f"PORTFOLIO_VAR ({var_pct:.2f}% > {self.max_var_pct:.2f}% of equity, "
+                    f"marginal ${marginal:,.0f})")
+        return None
+
+
+class PreTradePipeline:
+    """Ordered gates with early exit and per-gate counters"""
+
+    def __init__(self, gates: Sequence[PreTradeGate]):
+        self.gates = sorted(gates, key=lambda g: g.order_key)  # Stable: ties keep declaration order
+
+    def run(self, candidate: TradeCandidate, ctx: GateContext, stage: str = SCREEN) -> Tuple[bool, Optional[str]]:
+        """
+        Run the gates of a stage until one rejects
+
+        Returns:
+            Tuple of (passed, reason) - reason is prefixed with the gate name
+        """
+        for gate in self.gates:
+            if gate.stage != stage:
+                continue
+            started = time.perf_counter()
+            try:
+                ctx.load(gate.requires, candidate.symbol)
+                reason = gate.check(candidate, ctx)
+            except Exception as e:
+                reason = f"error: {e}"
+            gate.calls += 1
+            gate.total_ms += (time.perf_counter() - started) * 1000
+            if reason:
+                gate.rejections += 1
+                return False, f"{gate.name}: {reason}"
+        return True, None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Calls, rejections and timing per gate, in run order"""
+        return {
+            g.name: {
+                "stage": g.stage,
+                "calls": g.calls,
+                "rejections": g.rejections,
+                "total_ms": round(g.total_ms, 3),
+                "avg_ms": round(g.total_ms / g.calls, 3) if g.calls else 0.0,
+            }
+            for g in self.gates
+        }
+
+    def log_stats(self):
+        summary = ", ".join(f"{name} {s['rejections']}/{s['calls']} ({s['avg_ms']:.2f}ms)"
+                            for name, s in self.stats().items() if s["calls"])
+        if summary:
+            logger.info(f"Pre-trade gates (rejected/checked): {summary}")
+
+
+def default_gates(risk: Optional[RiskManager] = None) -> List[PreTradeGate]:
+    """The live loop's checks"""
+    risk = risk or get_risk_manager()
+    config = get_config()
+    return [
+        OpenPositionGate(),
+        PortfolioLimitsGate(risk),
+        SpreadGate(),
+        ConfidenceGate(),
+        ProtectiveStopsGate(),
+        MarginGate(),
+        PortfolioVaRGate(get_portfolio_risk_engine(), config.trading.max_portfolio_var_pct),
+    ]
+
+
+# Global instance
+_pretrade_pipeline: Optional[PreTradePipeline] = None
+
+
+def get_pretrade_pipeline() -> PreTradePipeline:
+    """Get global pre-trade pipeline"""
+    global _pretrade_pipeline
+    if _pretrade_pipeline is None:
+        _pretrade_pipeline = PreTradePipeline(default_gates())
+    return _pretrade_pipeline
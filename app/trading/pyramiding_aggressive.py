@@ -270,7 +270,7 @@ class PyramidingEngine:
         if symbol not in self.pyramided_positions:
             return False, 0.0, "Position not found"
         
-        position = self.pyramded_positions[symbol]
+        position = self.pyramided_positions[symbol]
         
         # Add the entry to pyramid
         position.add_entry(pyramid_entry, pyramid_lot, PyramidingLevel.PYRAMID_1)
@@ -302,10 +302,10 @@ class PyramidingEngine:
         - combined_sl: SL at BE
         - risk_increase_pct: % increase in capital at risk
         """
-        if symbol not in self.pyramded_positions:
+        if symbol not in self.pyramided_positions:
             return {}
         
-        position = self.pyramded_positions[symbol]
+        position = self.pyramided_positions[symbol]
         
         return {
             "initial_lot": position.initial_lot,
@@ -318,10 +318,10 @@ class PyramidingEngine:
     
     def get_position_status(self, symbol: str, current_price: float) -> Optional[Dict]:
         """Get current status of pyramided position"""
-        if symbol not in self.pyramded_positions:
+        if symbol not in self.pyramided_positions:
             return None
         
-        position = self.pyramded_positions[symbol]
+        position = self.pyramided_positions[symbol]
         profit_r = position.calculate_combined_profit_r(current_price, position.combined_sl)
         
         return {
@@ -337,13 +337,13 @@ class PyramidingEngine:
     
     def close_pyramid(self, symbol: str) -> bool:
         """Close/clean up a pyramided position"""
-        if symbol in self.pyramded_positions:
-            position = self.pyramded_positions[symbol]
+        if symbol in self.pyramided_positions:
+            position = self.pyramided_positions[symbol]
             logger.info(
                 f"🔺 PYRAMID CLOSED: {symbol} {position.direction} "
                 f"{position.total_lot:.2f} lots (had {len(position.entries)+1} entries)"
             )
-            del self.pyramded_positions[symbol]
+            del self.pyramided_positions[symbol]
             return True
         return False
 
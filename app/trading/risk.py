@@ -8,6 +8,7 @@ from app.trading.mt5_client import get_mt5_client
 from app.trading.data import get_data_provider
 from app.trading.portfolio import get_portfolio_manager
 from app.trading.dynamic_sizing import get_dynamic_sizer
+from app.trading.exposure_index import CRYPTO_SYMBOLS, ExposureIndex, asset_class
 
 logger = setup_logger("risk")
 
@@ -16,10 +17,7 @@ class RiskManager:
     """Manages risk checks and position sizing"""
     
     # Crypto symbols (24/7 trading with higher spreads tolerance)
-    CRYPTO_SYMBOLS = [
-        'BTCUSD', 'ETHUSD', 'BNBUSD', 'SOLUSD', 'XRPUSD',
-        'DOGEUSD', 'ADAUSD', 'DOTUSD', 'LTCUSD', 'AVAXUSD'
-    ]
+    CRYPTO_SYMBOLS = CRYPTO_SYMBOLS
     
     # 🔥 RISK CONFIG BY ASSET TYPE (dynamic risk per symbol)
     RISK_CONFIG = {
@@ -86,19 +84,8 @@ class RiskManager:
         Returns:
             Risk percentage for this symbol (2.0, 2.5, or 3.0)
         """
-        is_crypto = any(crypto in symbol.upper() for crypto in self.CRYPTO_SYMBOLS)
-        
-        if is_crypto:
-            return self.RISK_CONFIG["CRYPTO"]  # 3%
-        
-        # Determine forex type (MAJOR vs CROSS)
-        major_pairs = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"]
-        is_major = any(pair in symbol.upper() for pair in major_pairs)
-        
-        if is_major:
-            return self.RISK_CONFIG["FOREX_MAJOR"]  # 2%
-        else:
-            return self.RISK_CONFIG["FOREX_CROSS"]  # 2.5%
+        # CRYPTO 3%, FOREX_MAJOR 2%, FOREX_CROSS 2.5%
+        return self.RISK_CONFIG[asset_class(symbol)]
     
     def get_min_lot_for_symbol(self, symbol: str) -> float:
         """
@@ -841,36 +828,72 @@ class RiskManager:
             Tuple of (can_trade, error_message)
         """
         # 🔥 PALANCA 5: CONTROL DE EXPOSICIÓN TOTAL (FIXED)
-        # Calcular riesgo total real basado en risk_per_trade_pct configurado
+        # Exposure is only enforced when the account equity is known
         account_info = self.mt5.get_account_info()
-        if account_info:
-            equity = account_info.get('equity', 0)
-            if equity > 0:
-                open_positions = self.portfolio.get_open_positions()
-                
-                # ✅ FIX: Usar risk_per_trade_pct por posición, NO notional value
-                # Cada posición abierta arriesga ~2-3% dependiendo del tipo (FOREX_MAJOR=2%, CRYPTO=3%)
-                # Con max_positions=50, exposición máxima teórica = 50 * 2% = 100% (BUT capped at 15%)
-                risk_pct_symbol = self.get_risk_pct_for_symbol(symbol)
-                total_risk_pct = len(open_positions) * risk_pct_symbol
-                
-                if total_risk_pct >= self.max_total_exposure_pct:
-                    return False, f"Max total exposure reached: {total_risk_pct:.1f}% >= {self.max_total_exposure_pct}%"
-                
-                total_risk_usd = (total_risk_pct / 100) * equity
-                logger.info(f"💼 Total exposure: {total_risk_pct:.2f}% / {self.max_total_exposure_pct}% (${total_risk_usd:.0f}, {len(open_positions)} positions)")
+        equity = account_info.get('equity', 0) if account_info else 0
+        open_symbols = [pos.get('symbol', '') for pos in self.portfolio.get_open_positions()]
+        
+        if equity > 0:
+            total_risk_pct = len(open_symbols) * self.get_risk_pct_for_symbol(symbol)
+            total_risk_usd = (total_risk_pct / 100) * equity
+            logger.info(f"💼 Total exposure: {total_risk_pct:.2f}% / {self.max_total_exposure_pct}% (${total_risk_usd:.0f}, {len(open_symbols)} positions)")
+        
+        return self.check_portfolio_limits(symbol, open_symbols, check_exposure=equity > 0)
+    
+    def exposure_index(self, open_symbols: List[str]) -> ExposureIndex:
+        """Exposure index of the open positions (risk in use from RISK_CONFIG)"""
+        return ExposureIndex.from_symbols(open_symbols, self.get_risk_pct_for_symbol)
+    
+    def check_portfolio_limits(
+        self,
+        symbol: str,
+        open_symbols: List[str],
+        max_positions: Optional[int] = None,
+        check_exposure: bool = True
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Cross-symbol limits for a new trade, given the symbols of the open positions.
+        
+        Pure function of its inputs (no broker calls), shared by the live
+        check above and the portfolio backtester.
+        
+        Args:
+            symbol: Symbol to trade
+            open_symbols: Symbol of every open position
+            max_positions: Position cap (defaults to self.max_positions)
+            check_exposure: Enforce max_total_exposure_pct
+        
+        Returns:
+            Tuple of (can_trade, error_message)
+        """
+        return self.check_exposure_limits(symbol, self.exposure_index(open_symbols), max_positions, check_exposure)
+    
+    def check_exposure_limits(
+        self,
+        symbol: str,
+        index: ExposureIndex,
+        max_positions: Optional[int] = None,
+        check_exposure: bool = True
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        check_portfolio_limits against an ExposureIndex kept up to date by the
+        caller (O(1) per candidate)
+        """
+        # ✅ FIX: Usar risk_per_trade_pct por posición, NO notional value
+        # Cada posición abierta arriesga ~2-3% dependiendo del tipo (FOREX_MAJOR=2%, CRYPTO=3%)
+        # Con max_positions=50, exposición máxima teórica = 50 * 2% = 100% (BUT capped at 15%)
+        if check_exposure:
+            total_risk_pct = index.total * self.get_risk_pct_for_symbol(symbol)
+            if total_risk_pct >= self.max_total_exposure_pct:
+                return False, f"Max total exposure reached: {total_risk_pct:.1f}% >= {self.max_total_exposure_pct}%"
         
         # Check position count limits
-        open_positions = self.portfolio.get_open_positions_count()
-        if open_positions >= self.max_positions:
-            return False, f"Max positions limit reached: {open_positions}/{self.max_positions}"
+        max_positions = self.max_positions if max_positions is None else max_positions
+        if index.total >= max_positions:
+            return False, f"Max positions limit reached: {index.total}/{max_positions}"
         
         # Check currency conflict (max trades per currency pair)
-        open_positions = self.portfolio.get_open_positions()
-        same_currency_count = sum(
-            1 for pos in open_positions
-            if pos.get('symbol', '')[:3] == symbol[:3] or pos.get('symbol', '')[3:6] == symbol[3:6]
-        )
+        same_currency_count = index.same_currency_count(symbol)
         if same_currency_count >= self.max_trades_per_currency:
             return False, f"Max trades per currency exceeded: {same_currency_count}/{self.max_trades_per_currency}"
         
@@ -0,0 +1,180 @@
+"""
+Per-symbol contract metadata (contract size, point, spread, commission).
+
+Specs are resolved once per symbol and cached in memory and in the
+`symbol_metadata` SQLite table, so backtests and sizing code do not hit the
+broker for every trade. With MT5 connected the broker's symbol_info is the
+source; otherwise (demo mode) asset-class defaults are used. Rows in the
+table can be edited to set broker commissions, which symbol_info does not
+expose.
+"""
+
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from app.core.database import DatabaseManager, get_database_manager
+from app.core.logger import setup_logger
+from app.trading.mt5_client import MT5_AVAILABLE, get_mt5_client
+
+logger = setup_logger("symbol_specs")
+
+CRYPTO_PREFIXES = ('BTC', 'ETH', 'BNB', 'SOL', 'XRP', 'DOGE', 'ADA', 'DOT', 'LTC', 'AVAX')
+
+# Contract size by symbol prefix when the broker cannot be asked
+DEFAULT_CONTRACT_SIZES = {
+    'XAU': 100.0,
+    'XAG': 5000.0,
+    **{prefix: 1.0 for prefix in CRYPTO_PREFIXES},
+}
+DEFAULT_FOREX_CONTRACT_SIZE = 100000.0
+
+
+@dataclass(frozen=True)
+class SymbolSpec:
+    """Trading costs and sizing for one symbol (prices in quote currency)"""
+    symbol: str
+    contract_size: float = DEFAULT_FOREX_CONTRACT_SIZE
+    point: float = 0.0001
+    digits: int = 5
+    spread_points: float = 0.0
+    commission_per_lot: float = 0.0  # Round turn, account currency
+
+    @property
+    def spread(self) -> float:
+        """Spread in price units"""
+        return self.spread_points * self.point
+
+    def profit(self, direction: str, entry_price: float, exit_price: float, volume: float) -> float:
+        """Net P&L of a closed position, commission included"""
+        move = exit_price - entry_price if direction == "BUY" else entry_price - exit_price
+        return move * volume * self.contract_size - self.commission_per_lot * volume
+
+
+def default_spec(symbol: str) -> SymbolSpec:
+    """Asset-class defaults for when no broker metadata is available"""
+    upper = symbol.upper()
+    contract = next((size for prefix, size in DEFAULT_CONTRACT_SIZES.items() if upper.startswith(prefix)),
+                    DEFAULT_FOREX_CONTRACT_SIZE)
+    if 'JPY' in upper:
+        return SymbolSpec(symbol, contract, point=0.001, digits=3)
+    if contract != DEFAULT_FOREX_CONTRACT_SIZE:
+        return SymbolSpec(symbol, contract, point=0.01, digits=2)
+    return SymbolSpec(symbol, contract)
+
+
+def spec_from_symbol_info(symbol: str, info: Dict) -> SymbolSpec:
+    """Build a spec from an MT5 symbol_info dict"""
+    fallback = default_spec(symbol)
+    return SymbolSpec(
+        symbol=symbol,
+        contract_size=float(info.get('trade_contract_size') or fallback.contract_size),
+        point=float(info.get('point') or fallback.point),
+        digits=int(info.get('digits') or fallback.digits),
+        spread_points=float(info.get('spread') or 0.0),
+    )
+
+
+class SymbolSpecCache:
+    """Memory + SQLite cache of SymbolSpec, refreshed from the broker after `max_age`"""
+
+    def __init__(self, db: Optional[DatabaseManager] = None, max_age: timedelta = timedelta(days=1)):
+        self.db = db or get_database_manager()
+        self.max_age = max_age
+        self._specs: Dict[str, SymbolSpec] = {}
+        self._lock = threading.Lock()
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS symbol_metadata (
+                    symbol VARCHAR(20) PRIMARY KEY,
+                    contract_size REAL NOT NULL,
+                    point REAL NOT NULL,
+                    digits INTEGER NOT NULL,
+                    spread_points REAL NOT NULL DEFAULT 0,
+                    commission_per_lot REAL NOT NULL DEFAULT 0,
+                    updated_at DATETIME NOT NULL
+                )
+            """)
+
+    def _load_row(self, symbol: str) -> Optional[tuple]:
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM symbol_metadata WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        if row is None:
+            return None
+        data = dict(row)
+        updated_at = datetime.fromisoformat(data.pop('updated_at'))
+        return SymbolSpec(**data), updated_at
+
+    def _fetch_from_broker(self, symbol: str) -> Optional[SymbolSpec]:
+        if not MT5_AVAILABLE:
+            return None
+        try:
+            info = get_mt5_client().get_symbol_info(symbol)
+            return spec_from_symbol_info(symbol, info) if info else None
+        except Exception as e:
+            logger.warning(f"Could not fetch symbol info for {symbol}: {e}")
+            return None
+
+    def put(self, spec: SymbolSpec):
+        """Store a spec (e.g. with a broker commission) in memory and on disk"""
+        with self.db.connection() as conn:
+            conn.execute("""
+                INSERT INTO symbol_metadata
+                    (symbol, contract_size, point, digits, spread_points, commission_per_lot, updated_at)
+                VALUES (:symbol, :contract_size, :point, :digits, :spread_points, :commission_per_lot, :updated_at)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    contract_size = excluded.contract_size,
+                    point = excluded.point,
+                    digits = excluded.digits,
+                    spread_points = excluded.spread_points,
+                    commission_per_lot = excluded.commission_per_lot,
+                    updated_at = excluded.updated_at
+            """, {**asdict(spec), 'updated_at': datetime.now().isoformat()})
+        with self._lock:
+            self._specs[spec.symbol] = spec
+
+    def get(self, symbol: str) -> SymbolSpec:
+        """Spec for `symbol`: memory, then table (if fresh), then broker, then defaults"""
+        spec = self._specs.get(symbol)
+        if spec is not None:
+            return spec
+
+        stored = self._load_row(symbol)
+        if stored and datetime.now() - stored[1] < self.max_age:
+            spec = stored[0]
+        else:
+            spec = self._fetch_from_broker(symbol)
+            if spec is not None:
+                # Broker has no commission field; keep the one configured in the table
+                if stored:
+                    spec = SymbolSpec(**{**asdict(spec), 'commission_per_lot': stored[0].commission_per_lot})
+                self.put(spec)
+            else:
+                spec = stored[0] if stored else default_spec(symbol)
+
+        with self._lock:
+            self._specs[symbol] = spec
+        return spec
+
+    def all(self) -> Dict[str, SymbolSpec]:
+        """Specs resolved so far in this process"""
+        with self._lock:
+            return dict(self._specs)
+
+
+# Global instance
+_spec_cache: Optional[SymbolSpecCache] = None
+
+
+def get_symbol_specs() -> SymbolSpecCache:
+    """Get global symbol spec cache"""
+    global _spec_cache
+    if _spec_cache is None:
+        _spec_cache = SymbolSpecCache()
+    return _spec_cache
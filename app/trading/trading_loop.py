@@ -8,6 +8,49 @@ This allows main.py to focus on UI while trading logic is modular
 Status: Ready to use as replacement for inline function in main.py
 """
 
+import time
+from datetime import datetime
+
+from app.core.state import get_state_manager, DecisionAudit
+from app.core.config import get_config
+from app.core.logger import setup_logger
+from app.core.analysis_logger import get_analysis_logger
+from app.core.database import get_database_manager
+from app.trading.mt5_client import get_mt5_client
+from app.trading.data import get_data_provider
+from app.trading.strategy import get_strategy
+from app.trading.risk import get_risk_manager
+from app.trading.execution import get_execution_manager, OrderAction
+from app.trading.portfolio import get_portfolio_manager
+from app.trading.position_manager import get_position_manager
+from app.trading.exit_state import get_exit_state_store
+from app.trading.pretrade_gates import GateContext, TradeCandidate, get_pretrade_pipeline, SIGNAL, EXECUTE
+from app.trading.portfolio_risk import get_portfolio_risk_engine
+from app.trading.warm_start import get_warm_start
+from app.trading.parameter_injector import get_parameter_injector
+from app.trading.aggressive_scalping_integration import get_aggressive_scalping_engine
+from app.trading.pyramiding_aggressive import get_pyramiding_engine
+from app.trading.risk import get_trading_preset
+from app.ai.decision_engine import DecisionEngine
+from app.ai.dynamic_decision_engine import get_dynamic_decision_engine
+from app.ai.schemas import TradingDecision
+from app.core.shared_state import get_shared_state_manager
+from app.trading.integrated_analysis import get_integrated_analyzer
+from app.news.ingestion import get_news_ingestor
+
+# 🌟 10-POINT REFACTORING IMPORTS
+from app.trading.decision_constants import (
+    MIN_EXECUTION_CONFIDENCE, RSI_OVERBOUGHT, RSI_OVERSOLD, 
+    MAX_SPREAD_PIPS_FOREX, MAX_SPREAD_PIPS_CRYPTO, 
+    CURRENCY_CLUSTERS, SKIP_REASONS
+)
+from app.trading.signal_execution_split import split_decision, log_skip_reason
+from app.trading.trade_validation import run_validation_gates
+from app.trading.ai_optimization import should_call_ai
+
+logger = setup_logger("trading_loop")
+
+
 def main_trading_loop():
     """
     Main trading loop callback
@@ -21,44 +64,11 @@ def main_trading_loop():
     Called by TradingScheduler on interval (default: 60 seconds)
     """
     try:
-        from app.core.state import get_state_manager, DecisionAudit
-        from app.core.config import get_config
-        from app.core.logger import setup_logger
-        from app.core.analysis_logger import get_analysis_logger
-        from app.core.database import get_database_manager
-        from app.trading.mt5_client import get_mt5_client
-        from app.trading.data import get_data_provider
-        from app.trading.strategy import get_strategy
-        from app.trading.risk import get_risk_manager
-        from app.trading.execution import get_execution_manager
-        from app.trading.portfolio import get_portfolio_manager
-        from app.trading.position_manager import get_position_manager
-        from app.trading.parameter_injector import get_parameter_injector
-        from app.trading.aggressive_scalping_integration import get_aggressive_scalping_engine
-        from app.trading.pyramiding_aggressive import get_pyramiding_engine
-        from app.trading.risk import get_trading_preset
-        from app.ai.decision_engine import DecisionEngine
-        from app.ai.dynamic_decision_engine import get_dynamic_decision_engine
-        from app.ai.schemas import TradingDecision
-        from app.trading.integrated_analysis import get_integrated_analyzer
-        from datetime import datetime
-        
-        # 🌟 10-POINT REFACTORING IMPORTS
-        from app.trading.decision_constants import (
-            MIN_EXECUTION_CONFIDENCE, RSI_OVERBOUGHT, RSI_OVERSOLD, 
-            MAX_SPREAD_PIPS_FOREX, MAX_SPREAD_PIPS_CRYPTO, 
-            CURRENCY_CLUSTERS, SKIP_REASONS
-        )
-        from app.trading.signal_execution_split import split_decision, log_skip_reason
-        from app.trading.trade_validation import run_validation_gates
-        from app.trading.ai_optimization import should_call_ai
-        
-        logger = setup_logger("trading_loop")
-        
         # ============= INITIALIZATION =============
         state = get_state_manager()
         config = get_config()
         mt5 = get_mt5_client()
+        mt5.mark_cycle()  # Journal boundary when recording / next cycle when replaying
         data = get_data_provider()
         strategy = get_strategy()
         risk = get_risk_manager()
@@ -124,11 +134,36 @@ def main_trading_loop():
         open_positions = portfolio.get_open_positions()
         logger.info(f"Found {len(open_positions)} open positions")
         
-        # Tracker para max profit por ticket
-        if not hasattr(state, 'max_profit_tracker'):
-            state.max_profit_tracker = {}
+        # Noticias: una petición concurrente por divisa/activo caducado (no por par);
+        # el sentimiento de cada par se deriva después de las puntuaciones por divisa
+        try:
+            get_news_ingestor().refresh(list(symbols) + [p.get('symbol', '') for p in open_positions])
+        except Exception as e:
+            logger.warning(f"News refresh failed: {e}")
+        
+        # Estado de salida por ticket (max profit, trailing, scale-out), persistente
+        exit_states = get_exit_state_store()
+        exit_states.reconcile(open_positions)
         
-        for position in open_positions:
+        # Un análisis por símbolo (compartido entre tickets) y todas las reglas
+        # de salida evaluadas en una sola pasada vectorizada
+        position_analyses = {}
+        for pos_symbol in dict.fromkeys(p.get('symbol', '') for p in open_positions):
+            try:
+                position_analyses[pos_symbol] = integrated_analyzer.analyze_symbol(pos_symbol, timeframe)
+            except Exception as e:
+                logger.error(f"Error analyzing {pos_symbol}: {e}")
+        reviewable = [p for p in open_positions if p.get('symbol', '') in position_analyses]
+        review_results = position_manager.review_positions(
+            reviewable, position_analyses,
+            signal_confidence=0.7,  # Default confidence, should be calculated from analysis
+            exit_states=exit_states
+        )
+        exits_decided_at = time.time()
+        
+        # Acciones de salida: se envían juntas desde el mismo snapshot del broker
+        exit_actions = []
+        for position, review_result in zip(reviewable, review_results):
             try:
                 pos_symbol = position.get('symbol', '')
                 pos_ticket = position.get('ticket', 0)
@@ -145,65 +180,31 @@ def main_trading_loop():
                 if pos_sl == 0 or pos_tp == 0:
                     logger.warning(f"⚠️ {pos_symbol} ticket {pos_ticket}: Missing SL or TP! (SL={pos_sl}, TP={pos_tp})")
                 
-                # Get analysis for position symbol
-                pos_analysis = integrated_analyzer.analyze_symbol(pos_symbol, timeframe)
-                current_signal = pos_analysis["signal"]
-                signal_confidence = 0.7  # Default confidence, should be calculated from analysis
-                
-                # 🔍 REVISIÓN COMPLETA DE POSICIÓN (TODAS LAS REGLAS)
-                review_result = position_manager.review_position_full(
-                    position=position,
-                    current_signal=current_signal,
-                    signal_confidence=signal_confidence,
-                    analysis=pos_analysis,
-                    max_profit_tracker=state.max_profit_tracker
-                )
+                current_signal = position_analyses[pos_symbol]["signal"]
                 
-                # 🎯 EJECUTAR ACCIONES SEGÚN RESULTADO
+                # 🎯 ACCIONES SEGÚN RESULTADO
                 if review_result['should_close']:
                     close_percent = review_result.get('close_percent', None)
                     reason = review_result.get('reason', 'Unknown')
                     
                     if close_percent is None:  # CIERRE TOTAL
                         logger.info(f"🔴 CLOSING {pos_symbol} ticket {pos_ticket}: {reason}")
-                        try:
-                            success, error = execution.close_position(pos_ticket)
-                            if success:
-                                logger.info(f"✅ {pos_symbol} closed successfully")
-                                # Limpiar del tracker
-                                if pos_ticket in state.max_profit_tracker:
-                                    del state.max_profit_tracker[pos_ticket]
-                            else:
-                                logger.error(f"❌ Failed to close {pos_symbol}: {error}")
-                        except Exception as e:
-                            logger.error(f"Error closing {pos_symbol}: {e}")
+                        exit_actions.append((OrderAction(pos_ticket, "CLOSE", decision_time=exits_decided_at),
+                                             position, None))
                     
                     else:  # CIERRE PARCIAL
                         close_volume = pos_volume * close_percent
                         logger.info(f"🟡 PARTIAL CLOSE {pos_symbol} ticket {pos_ticket}: {close_percent*100:.0f}% ({close_volume} lots) - {reason}")
-                        try:
-                            # Para cierre parcial, necesitamos cerrar el % especificado
-                            success = execution.close_position_partial(pos_ticket, close_volume, comment=f"Partial: {reason[:30]}")
-                            if success:
-                                logger.info(f"✅ {pos_symbol} partial close successful")
-                            else:
-                                logger.error(f"❌ Failed partial close {pos_symbol}")
-                        except Exception as e:
-                            logger.error(f"Error partial closing {pos_symbol}: {e}")
+                        exit_actions.append((OrderAction(pos_ticket, "CLOSE", volume=close_volume,
+                                                         comment=f"Partial: {reason[:30]}",
+                                                         decision_time=exits_decided_at), position, close_percent))
                 
                 # 📈 ACTUALIZAR TRAILING STOP
                 elif review_result.get('update_sl') is not None:
                     new_sl = review_result['update_sl']
                     logger.info(f"📈 Updating trailing SL for {pos_symbol} ticket {pos_ticket}: {pos_sl:.5f} → {new_sl:.5f}")
-                    try:
-                        # Modificar SL de la posición
-                        success, error = execution.modify_position(pos_ticket, sl_price=new_sl, tp_price=pos_tp)
-                        if success:
-                            logger.info(f"✅ Trailing SL updated for {pos_symbol}")
-                        else:
-                            logger.error(f"❌ Failed to update SL for {pos_symbol}: {error}")
-                    except Exception as e:
-                        logger.error(f"Error updating SL for {pos_symbol}: {e}")
+                    exit_actions.append((OrderAction(pos_ticket, "MODIFY", sl=new_sl, tp=pos_tp,
+                                                     decision_time=exits_decided_at), position, None))
                 
                 else:
                     logger.info(f"  Current signal: {current_signal}, holding position")
@@ -211,6 +212,32 @@ def main_trading_loop():
             except Exception as e:
                 logger.error(f"Error reviewing {pos_symbol}: {e}")
         
+        if exit_actions:
+            try:
+                batch = execution.execute_batch([a for a, _, _ in exit_actions], positions=open_positions)
+                for (action, position, close_percent), result in zip(exit_actions, batch.results):
+                    pos_symbol = position.get('symbol', '')
+                    if not result.success:
+                        logger.error(f"❌ Failed {action.kind.lower()} {pos_symbol} ticket {action.ticket}: {result.error}")
+                        continue
+                    pos_state = exit_states.get(action.ticket)
+                    if action.kind == "MODIFY":
+                        logger.info(f"✅ Trailing SL updated for {pos_symbol}")
+                        if pos_state is not None:
+                            pos_state.trail_sl = action.sl
+                    elif close_percent is None:
+                        logger.info(f"✅ {pos_symbol} closed successfully")
+                        exit_states.evict(action.ticket)
+                    else:
+                        logger.info(f"✅ {pos_symbol} partial close successful")
+                        if pos_state is not None:
+                            pos_state.scale_out_stage += 1
+                            pos_state.closed_percent += (1.0 - pos_state.closed_percent) * close_percent
+            except Exception as e:
+                logger.error(f"Error executing exit orders: {e}")
+        
+        exit_states.flush()
+        
         # ============= STEP 2: EVALUATE NEW OPPORTUNITIES =============
         logger.info("=" * 60)
         logger.info("STEP 2: EVALUATING NEW TRADE OPPORTUNITIES")
@@ -223,21 +250,23 @@ def main_trading_loop():
             new_trades_count = 0
         else:
             new_trades_count = 0
+            # Posiciones / cuenta / ticks compartidos por todos los gates del ciclo
+            gates = get_pretrade_pipeline()
+            gate_ctx = GateContext(mt5, account=account_info, risk_pct=risk.get_risk_pct_for_symbol)
+            # Covarianza de retornos: se actualiza una vez por ciclo, tras el análisis del primer
+            # candidato que llega a ejecución (reutiliza las velas ya cacheadas por la estrategia)
+            risk_symbols = list(dict.fromkeys(list(symbols) + [p.get('symbol', '') for p in open_positions]))
+            risk_refreshed = False
             
             for symbol in symbols:
                 try:
-                    # Skip if already have position
-                    if portfolio.has_position(symbol):
-                        logger.info(f"⏭️  {symbol}: Already have open position")
-                        continue
-                    
                     # ✅ Verificar si aún hay espacio
                     if len(open_positions) + new_trades_count >= MAX_OPEN_TRADES:
                         logger.info(f"⏭️  {symbol}: Max trades reached ({MAX_OPEN_TRADES})")
                         break
                     
-                    # Check position limits
-                    can_trade, trade_error = risk.can_open_new_trade(symbol)
+                    # Open position, portfolio limits, spread
+                    can_trade, trade_error = gates.run(TradeCandidate(symbol), gate_ctx)
                     if not can_trade:
                         logger.info(f"⏭️  {symbol}: {trade_error}")
                         continue
@@ -307,13 +336,15 @@ def main_trading_loop():
                             sources=["technical"],
                         )
                         execution_confidence = tech_confidence
+                    decided_at = time.time()
                     
                     # ============================================================
                     # EXECUTION VALIDATION (same for both paths)
                     # ============================================================
-                    if execution_confidence < MIN_EXECUTION_CONFIDENCE:
-                        logger.info(f"⏭️  {symbol}: Confidence too low ({execution_confidence:.2f} < {MIN_EXECUTION_CONFIDENCE})")
-                        log_skip_reason(symbol, "CONFIDENCE_TOO_LOW")
+                    candidate = TradeCandidate(symbol, decision.action, confidence=execution_confidence)
+                    can_trade, trade_error = gates.run(candidate, gate_ctx, SIGNAL)
+                    if not can_trade:
+                        logger.info(f"⏭️  {symbol}: {trade_error}")
                         continue
                     
                     # Check if valid for execution
@@ -355,6 +386,18 @@ def main_trading_loop():
                             logger.info(f"📋 Preparing order request for {symbol}: {decision.action} {position_size:.2f} lots")
                             logger.info(f"   Entry: {current_price:.5f}, SL: {sl_price:.5f}, TP: {tp_price:.5f}")
                             
+                            candidate.volume, candidate.sl, candidate.tp = position_size, sl_price, tp_price
+                            if not risk_refreshed:
+                                risk_refreshed = True
+                                try:
+                                    get_portfolio_risk_engine().refresh(data, risk_symbols, timeframe)
+                                except Exception as e:
+                                    logger.warning(f"Portfolio risk refresh failed: {e}")
+                            can_trade, trade_error = gates.run(candidate, gate_ctx, EXECUTE)
+                            if not can_trade:
+                                logger.info(f"⏭️  {symbol}: {trade_error}")
+                                continue
+                            
                             # Place market order
                             success, order_result, error_msg = execution.place_market_order(
                                 symbol=symbol,
@@ -363,11 +406,18 @@ def main_trading_loop():
                                 sl_price=sl_price,
                                 tp_price=tp_price,
                                 comment=f"AI_SCALPING_{decision.action}_{execution_confidence:.0%}",
-                                atr=atr
+                                atr=atr,
+                                decision_time=decided_at,
+                                decision_price=current_price,
+                                context=gate_ctx
                             )
                             
                             if success and order_result:
                                 new_trades_count += 1  # 🔧 ONLY INCREMENT AFTER SUCCESSFUL EXECUTION
+                                # Exposición del ciclo al día con lo que se acaba de ejecutar
+                                gate_ctx.record_fill(symbol, {"symbol": symbol, "ticket": order_result.get("order", 0),
+                                                              "type": 0 if decision.action == "BUY" else 1,
+                                                              "volume": order_result.get("volume", position_size)})
                                 retcode = order_result.get("retcode")
                                 order_ticket = order_result.get("order", 0)
                                 logger.info(f"✅ {symbol}: Order executed successfully!")
@@ -417,12 +467,13 @@ def main_trading_loop():
                     
                 except Exception as e:
                     logger.error(f"Error evaluating {symbol}: {e}")
+            
+            gates.log_stats()
         
         logger.info(f"Trading loop complete: {new_trades_count} new opportunities evaluated")
         
         # Update shared state for UI
         try:
-            from app.core.shared_state import get_shared_state_manager
             shared_state = get_shared_state_manager()
             
             # Update MT5 status
@@ -456,17 +507,18 @@ def main_trading_loop():
         except Exception as e:
             logger.warning(f"Failed to update shared state: {e}")
         
+        # Snapshot periódico de cachés para arranques en caliente (WARM_START_INTERVAL_SECONDS)
+        get_warm_start().maybe_save()
+        
     except Exception as e:
         logger.error(f"Fatal error in trading loop: {e}", exc_info=True)
 
 
 if __name__ == "__main__":
     # Run trading loop every 60 seconds (infinite loop)
-    import time
     import logging
     import sys
     import signal
-    from app.core.logger import setup_logger
     
     logging.basicConfig(level=logging.INFO)
     logger = setup_logger("trading_loop_runner")
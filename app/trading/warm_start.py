@@ -0,0 +1,232 @@
+"""
+Warm-start snapshot of the in-memory caches, for fast restarts.
+
+After a restart the bot would refetch every symbol's bars, rebuild the
+portfolio covariance and lose the Gemini cache, so the first cycles were
+the slowest and the most expensive ones.
+This module pickles those caches to one local file on shutdown and every
+`WARM_START_INTERVAL_SECONDS` from the trading loop, and loads them back on
+start-up. (News, per-currency sentiment and symbol specs are already
+persisted in SQLite by app.news.ingestion and app.trading.symbol_specs.)
+
+A snapshot is used only if it has the current format version and trading
+mode and is younger than `WARM_START_MAX_AGE_MINUTES`. Inside it, each cache
+keeps its own entry timestamps, so TTLs carry on across the restart (bars
+older than the DataProvider TTL are topped up with only the bars formed
+since). Bars and the covariance buffer are reused only with the same price
+feed (same MT5 server and login, or the same simulator
+path); otherwise they would splice two different price series.
+
+Each cache implements `snapshot_state()` / `restore_state(state)`. The
+file is written to a temporary name and renamed, so a crash while saving
+leaves the previous snapshot intact.
+"""
+
+import importlib
+import os
+import pickle
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import get_config
+from app.core.logger import setup_logger
+
+logger = setup_logger("warm_start")
+
+SNAPSHOT_VERSION = 3
+
+
+@dataclass(frozen=True)
+class CacheSource:
+    """Where a cache lives: a module-level singleton (and attribute of it)"""
+    module: str
+    instance: str          # Global holding the singleton (None until first use)
+    factory: str           # get_x() creating it
+    attribute: Optional[str] = None
+    feed_bound: bool = False  # Only valid with the same price feed
+
+    def existing(self) -> Optional[Any]:
+        """The cache if its singleton was created in this process (never imports or creates it)"""
+        module = sys.modules.get(self.module)
+        obj = getattr(module, self.instance, None) if module else None
+        return getattr(obj, self.attribute, None) if obj is not None and self.attribute else obj
+
+    def create(self) -> Any:
+        obj = getattr(importlib.import_module(self.module), self.factory)()
+        return getattr(obj, self.attribute) if self.attribute else obj
+
+
+CACHE_SOURCES: Dict[str, CacheSource] = {
+    "bars": CacheSource("app.trading.data", "_data_provider", "get_data_provider", feed_bound=True),
+    "portfolio_risk": CacheSource("app.trading.portfolio_risk", "_portfolio_risk_engine",
+                                  "get_portfolio_risk_engine", feed_bound=True),
+    "ai_responses": CacheSource("app.ai.gemini_client", "_gemini_client", "get_gemini_client"),
+}
+
+
+class WarmStart:
+    """Save / restore the caches named in CACHE_SOURCES"""
+
+    def __init__(self, path: Optional[str] = None, max_age_minutes: Optional[float] = None,
+                 interval_seconds: Optional[float] = None, caches: Optional[Dict[str, Any]] = None,
+                 feed: Optional[Callable[[], Optional[str]]] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: Snapshot file (config storage.warm_start_path; "" disables)
+            max_age_minutes: Snapshots older than this are ignored
+            interval_seconds: Minimum time between periodic saves
+            caches: Objects to snapshot by name (default: the bot's singletons)
+            feed: Current price feed identity (default: MT5Client.feed_id)
+        """
+        storage = get_config().storage
+        path = storage.warm_start_path if path is None else path
+        self.path = Path(path) if path else None
+        self.max_age_minutes = storage.warm_start_max_age_minutes if max_age_minutes is None else max_age_minutes
+        self.interval_seconds = storage.warm_start_interval_seconds if interval_seconds is None else interval_seconds
+        self.caches = caches
+        self.feed = feed or self._mt5_feed
+        self.clock = clock
+        self.last_saved: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mt5_feed() -> Optional[str]:
+        from app.trading.mt5_client import get_mt5_client
+        return get_mt5_client().feed_id()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _live_caches(self) -> Dict[str, Any]:
+        if self.caches is not None:
+            return dict(self.caches)
+        live = {}
+        for name, source in CACHE_SOURCES.items():
+            cache = source.existing()
+            if cache is not None:
+                live[name] = cache
+        return live
+
+    def _target(self, name: str) -> Optional[Any]:
+        if self.caches is not None:
+            return self.caches.get(name)
+        source = CACHE_SOURCES.get(name)
+        return source.create() if source else None
+
+    @staticmethod
+    def _feed_bound(name: str) -> bool:
+        source = CACHE_SOURCES.get(name)
+        return source.feed_bound if source else False
+
+    # ---- save ------------------------------------------------------------------
+
+    def save(self) -> Dict[str, int]:
+        """Write the snapshot; returns entries saved per cache (empty if nothing was written)"""
+        if not self.enabled:
+            return {}
+        components, sizes = {}, {}
+        for name, cache in self._live_caches().items():
+            try:
+                state = cache.snapshot_state()
+            except Exception as e:
+                logger.warning(f"Warm start: could not snapshot {name}: {e}")
+                continue
+            components[name] = state
+            sizes[name] = len(state) if hasattr(state, '__len__') else 1
+        try:
+            feed = self.feed()
+        except Exception:
+            feed = None
+        payload = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": self.clock(),
+            "mode": get_config().trading.mode,
+            "feed": feed,
+            "components": components,
+        }
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                with open(tmp, "wb") as f:
+                    pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Warm start: could not write {self.path}: {e}")
+            return {}
+        self.last_saved = self.clock()
+        logger.info(f"Warm start: snapshot saved to {self.path} ({sizes})")
+        return sizes
+
+    def maybe_save(self) -> Dict[str, int]:
+        """Periodic save (at most once per interval)"""
+        if self.last_saved is not None and self.clock() - self.last_saved < self.interval_seconds:
+            return {}
+        return self.save()
+
+    # ---- restore ---------------------------------------------------------------
+
+    def load(self) -> Optional[Dict]:
+        """The snapshot payload if it exists, is readable and is still valid"""
+        if not self.enabled or not self.path.exists():
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Warm start: unreadable snapshot {self.path}: {e}")
+            return None
+        if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+            logger.info("Warm start: snapshot format changed, starting cold")
+            return None
+        age_minutes = (self.clock() - payload.get("saved_at", 0)) / 60
+        if age_minutes > self.max_age_minutes:
+            logger.info(f"Warm start: snapshot is {age_minutes:.0f}m old (max {self.max_age_minutes:.0f}m), starting cold")
+            return None
+        if payload.get("mode") != get_config().trading.mode:
+            logger.info(f"Warm start: snapshot is from {payload.get('mode')} mode, starting cold")
+            return None
+        return payload
+
+    def restore(self) -> Dict[str, int]:
+        """Load a valid snapshot into the caches; returns entries restored per cache"""
+        payload = self.load()
+        if payload is None:
+            return {}
+        try:
+            feed = self.feed()
+        except Exception:
+            feed = None
+        same_feed = feed is not None and feed == payload.get("feed")
+
+        restored = {}
+        for name, state in payload.get("components", {}).items():
+            if self._feed_bound(name) and not same_feed:
+                logger.info(f"Warm start: {name} skipped (price feed changed)")
+                continue
+            try:
+                target = self._target(name)
+                if target is not None:
+                    restored[name] = target.restore_state(state)
+            except Exception as e:
+                logger.warning(f"Warm start: could not restore {name}: {e}")
+        age_minutes = (self.clock() - payload["saved_at"]) / 60
+        logger.info(f"Warm start: restored {restored} from a {age_minutes:.1f}m old snapshot")
+        return restored
+
+
+# Global instance
+_warm_start: Optional[WarmStart] = None
+
+
+def get_warm_start() -> WarmStart:
+    """Get global warm-start snapshot manager"""
+    global _warm_start
+    if _warm_start is None:
+        _warm_start = WarmStart()
+    return _warm_start
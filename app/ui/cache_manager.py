@@ -1,136 +1,68 @@
-"""Advanced caching system for UI performance"""
+"""Caching helpers for UI performance (backed by app.core.cache)"""
 
-import time
-from typing import Any, Optional, Dict, Callable
+from typing import Any, Callable, Optional
 from functools import wraps
-import streamlit as st
-from datetime import datetime, timedelta
-import json
-
-class CacheManager:
-    """High-performance cache with TTL and compression"""
-    
-    def __init__(self):
-        self.memory_cache: Dict[str, Any] = {}
-        self.timestamps: Dict[str, float] = {}
-        self.ttls: Dict[str, int] = {}
-        
-    def set(self, key: str, value: Any, ttl: int = 300):
-        """Store with TTL (seconds)"""
-        self.memory_cache[key] = value
-        self.timestamps[key] = time.time()
-        self.ttls[key] = ttl
-        
-    def get(self, key: str) -> Optional[Any]:
-        """Retrieve if not expired"""
-        if key not in self.memory_cache:
-            return None
-        
-        age = time.time() - self.timestamps[key]
-        if age > self.ttls.get(key, 300):
-            del self.memory_cache[key]
-            return None
-        return self.memory_cache[key]
-    
-    def clear_expired(self):
-        """Remove all expired entries"""
-        now = time.time()
-        expired = [
-            k for k, ts in self.timestamps.items()
-            if now - ts > self.ttls.get(k, 300)
-        ]
-        for k in expired:
-            self.memory_cache.pop(k, None)
-            self.timestamps.pop(k, None)
-            self.ttls.pop(k, None)
-    
-    def clear(self):
-        """Clear all cache"""
-        self.memory_cache.clear()
-        self.timestamps.clear()
-        self.ttls.clear()
-
-
-# Global cache instance
-_cache = CacheManager()
-
-def get_cache() -> CacheManager:
-    """Get global cache manager"""
-    return _cache
 
+from app.core.cache import LRUCache, get_cache
+from app.core.cache import get_historical_cache as _core_historical_cache
 
-def streamlit_cache(ttl: int = 60, show_spinner: bool = False):
-    """Decorator for cached Streamlit functions"""
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
-            
-            # Check cache
-            cached = get_cache().get(key)
-            if cached is not None:
-                return cached
-            
-            # Execute function
-            if show_spinner:
-                with st.spinner(f"Loading {func.__name__}..."):
-                    result = func(*args, **kwargs)
-            else:
-                result = func(*args, **kwargs)
-            
-            # Store in cache
-            get_cache().set(key, result, ttl)
-            return result
-        return wrapper
-    return decorator
+# Backward-compatible name for the old ad-hoc TTL cache (same get/set(ttl) calls)
+CacheManager = LRUCache
+
+__all__ = [
+    "CacheManager",
+    "HistoricalDataCache",
+    "get_cache",
+    "get_historical_cache",
+    "streamlit_cache",
+]
 
 
 class HistoricalDataCache:
-    """Optimized cache for historical trading data"""
-    
-    def __init__(self, max_size: int = 100):
-        self.cache = {}
-        self.max_size = max_size
-        self.access_count = {}
-        self.last_update = {}
-        
+    """Old HistoricalDataCache API (`get(key, max_age_seconds)`, `set(key, value)`) over an LRUCache"""
+
+    def __init__(self, max_size: int = 100, cache: Optional[LRUCache] = None):
+        self.cache = cache or LRUCache(max_entries=max_size, default_ttl=None, name="historical")
+
     def get(self, key: str, max_age_seconds: int = 3600) -> Optional[Any]:
         """Get with age validation"""
-        if key not in self.cache:
-            return None
-        
-        age = time.time() - self.last_update.get(key, 0)
-        if age > max_age_seconds:
-            self.cache.pop(key, None)
-            return None
-        
-        self.access_count[key] = self.access_count.get(key, 0) + 1
-        return self.cache[key]
-    
+        return self.cache.get(key, max_age=max_age_seconds)
+
     def set(self, key: str, value: Any):
-        """Store with LRU eviction"""
-        # Evict least recently used if at capacity
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            lru_key = min(self.access_count, key=self.access_count.get)
-            self.cache.pop(lru_key, None)
-            self.access_count.pop(lru_key, None)
-        
-        self.cache[key] = value
-        self.last_update[key] = time.time()
-        self.access_count[key] = 0
-    
-    def clear(self):
-        """Clear cache"""
-        self.cache.clear()
-        self.access_count.clear()
-        self.last_update.clear()
-
-
-# Global historical cache
-_historical_cache = HistoricalDataCache()
+        """Store (LRU eviction, age checked on get)"""
+        self.cache.set(key, value, None)
+
+    def __getattr__(self, name: str) -> Any:
+        # clear(), stats(), get_or_load()... go to the shared LRUCache
+        return getattr(self.cache, name)
+
+
+_historical_cache: Optional[HistoricalDataCache] = None
+
 
 def get_historical_cache() -> HistoricalDataCache:
-    """Get historical data cache"""
+    """Historical data cache (shared with the API) with the old UI signature"""
+    global _historical_cache
+    if _historical_cache is None:
+        _historical_cache = HistoricalDataCache(cache=_core_historical_cache())
     return _historical_cache
 
+
+def streamlit_cache(ttl: int = 60, show_spinner: bool = False):
+    """Decorator for cached Streamlit functions (single-flight per argument set)"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # Generate cache key from function name and arguments
+            key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
+            
+            def load():
+                if show_spinner:
+                    import streamlit as st
+                    with st.spinner(f"Loading {func.__name__}..."):
+                        return func(*args, **kwargs)
+                return func(*args, **kwargs)
+            
+            return get_cache().get_or_load(key, load, ttl=ttl)
+        return wrapper
+    return decorator
@@ -0,0 +1,216 @@
+"""
+Live update support for the Streamlit dashboard.
+
+Instead of sleeping and rerunning the whole app, each tab is rendered as a
+fragment that refreshes on its own. Data loaders are memoized on the change
+feed versions of the topics they depend on, so a refresh only hits the
+database/MT5 when the API server reported a change for that topic.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+import httpx
+import streamlit as st
+
+from app.core.cache import LRUCache
+from app.core.change_feed import TOPICS
+from app.core.logger import setup_logger
+
+logger = setup_logger("ui_live_updates")
+
+API_BASE_URL = os.getenv("TRADING_API_URL", "http://localhost:8000")
+
+# Topics each tab depends on; tabs with no topics render once per full run
+TAB_TOPICS: Dict[str, Tuple[str, ...]] = {
+    "dashboard": ("positions", "account", "trades"),
+    "positions": ("positions", "account"),
+    "analysis": ("trades",),
+    "account": ("account", "trades"),
+    "settings": (),
+    "activity": ("trades",),
+    "statement": ("trades",),
+}
+
+
+class LiveFeedClient:
+    """
+    Polls the API change feed and tracks per-topic versions.
+
+    One instance is shared by every session in the Streamlit process and
+    polls at most once per `min_poll_seconds`. When the API is unreachable
+    it falls back to time-bucketed versions so data still refreshes every
+    `fallback_seconds`.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, min_poll_seconds: float = 1.0,
+                 fallback_seconds: float = 15.0):
+        self.base_url = base_url.rstrip("/")
+        self.min_poll_seconds = min_poll_seconds
+        self.fallback_seconds = fallback_seconds
+        self._lock = threading.Lock()
+        self._cursor = 0
+        self._versions: Dict[str, int] = {}
+        self._last_poll = 0.0
+        self._online = False
+        self._client = httpx.Client(timeout=1.0)
+
+    @property
+    def online(self) -> bool:
+        return self._online
+
+    def poll(self) -> Dict[str, int]:
+        """Refresh versions from the API (rate limited) and return them"""
+        with self._lock:
+            now = time.time()
+            if now - self._last_poll < self.min_poll_seconds:
+                return self._current_versions(now)
+            self._last_poll = now
+            try:
+                response = self._client.get(f"{self.base_url}/changes", params={"since": self._cursor})
+                response.raise_for_status()
+                payload = response.json()
+                self._cursor = payload.get("cursor", self._cursor)
+                self._versions = payload.get("versions", self._versions)
+                self._online = True
+            except Exception as e:
+                if self._online:
+                    logger.warning(f"Change feed unavailable, falling back to timed refresh: {e}")
+                self._online = False
+            return self._current_versions(now)
+
+    def _current_versions(self, now: float) -> Dict[str, int]:
+        if self._online:
+            return dict(self._versions)
+        bucket = int(now // self.fallback_seconds)
+        return {topic: bucket for topic in TOPICS}
+
+    def versions_for(self, topics: Iterable[str]) -> Tuple[int, ...]:
+        versions = self.poll()
+        return tuple(versions.get(topic, 0) for topic in topics)
+
+
+_feed_client: Optional[LiveFeedClient] = None
+
+
+def get_live_feed() -> LiveFeedClient:
+    """Get process-wide live feed client"""
+    global _feed_client
+    if _feed_client is None:
+        _feed_client = LiveFeedClient()
+    return _feed_client
+
+
+def versioned(*topics: str, max_age_seconds: Optional[float] = None) -> Callable:
+    """
+    Memoize a data loader until any of `topics` changes on the feed.
+
+    Versions are part of the cache key, so stale results simply age out of
+    the bounded LRU; concurrent sessions share a single load per change.
+    `max_age_seconds` also adds a time bucket to the key, for data that can
+    change without a feed event (e.g. MT5 dropping the connection).
+    """
+    def decorator(func: Callable) -> Callable:
+        results = LRUCache(max_entries=64, default_ttl=None, name=f"ui:{func.__name__}")
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            versions = get_live_feed().versions_for(topics)
+            if max_age_seconds:
+                versions += (int(time.time() // max_age_seconds),)
+            key = (args, tuple(sorted(kwargs.items())), versions)
+            return results.get_or_load(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = results  # type: ignore[attr-defined]
+        return wrapper
+    return decorator
+
+
+class RenderTimings:
+    """Rolling per-tab render durations (milliseconds)"""
+
+    def __init__(self, window: int = 50):
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._refreshes: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, tab: str, elapsed_ms: float, data_changed: bool):
+        with self._lock:
+            self._samples[tab].append(elapsed_ms)
+            if data_changed:
+                self._refreshes[tab] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out = {}
+            for tab, samples in self._samples.items():
+                ordered = sorted(samples)
+                out[tab] = {
+                    "renders": len(samples),
+                    "data_refreshes": self._refreshes[tab],
+                    "last_ms": samples[-1],
+                    "avg_ms": sum(samples) / len(samples),
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+            return out
+
+
+def get_render_timings() -> RenderTimings:
+    """Per-session render timings"""
+    if "render_timings" not in st.session_state:
+        st.session_state.render_timings = RenderTimings()
+    return st.session_state.render_timings
+
+
+def _fragment_decorator() -> Optional[Callable]:
+    """st.fragment (>=1.37) or st.experimental_fragment (>=1.33), if available"""
+    return getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def _timed_render(tab: str, render_fn: Callable[[], None], topics: Tuple[str, ...]):
+    seen_key = f"_live_versions_{tab}"
+    versions = get_live_feed().versions_for(topics) if topics else ()
+    data_changed = st.session_state.get(seen_key) != versions
+    st.session_state[seen_key] = versions
+
+    start = time.perf_counter()
+    render_fn()
+    get_render_timings().record(tab, (time.perf_counter() - start) * 1000, data_changed)
+
+
+def render_live_tab(tab: str, render_fn: Callable[[], None], live: bool, interval_seconds: int):
+    """
+    Render a tab, as a self-refreshing fragment when live mode is on.
+
+    Tabs without feed topics (settings) are never auto-refreshed. Without
+    fragment support the tab is rendered once per app run.
+    """
+    topics = TAB_TOPICS.get(tab, ())
+    fragment = _fragment_decorator()
+    if not live or not topics or fragment is None:
+        _timed_render(tab, render_fn, topics)
+        return
+
+    @fragment(run_every=interval_seconds)
+    def _live_fragment():
+        _timed_render(tab, render_fn, topics)
+
+    _live_fragment()
+
+
+def render_timings_panel() -> None:
+    """Show per-tab render timings collected this session"""
+    summary = get_render_timings().summary()
+    feed = get_live_feed()
+    st.caption(f"Change feed: {'connected' if feed.online else 'offline (timed refresh)'}")
+    if not summary:
+        st.caption("No renders recorded yet")
+        return
+    rows = [{"tab": tab, **stats} for tab, stats in sorted(summary.items())]
+    st.dataframe(rows, use_container_width=True, hide_index=True)
@@ -6,7 +6,7 @@ Focused on a cleaner UI, de-duplicated logic, and a statement view.
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import sqlite3
 
 import pandas as pd
@@ -18,6 +18,7 @@ from app.core.database import get_database_manager
 from app.core.logger import setup_logger
 from app.trading.mt5_client import get_mt5_client
 from app.ui.ui_components import section_header, stat_card, metric_grid, empty_state
+from app.ui.live_updates import versioned
 
 logger = setup_logger("ui_modern")
 
@@ -168,6 +169,8 @@ def _get_config():
     return st.session_state.config
 
 
+# Disconnects publish no account event: the status is re-read at least every 5s
+@versioned("account", max_age_seconds=5)
 def get_mt5_status() -> Dict[str, Any]:
     """Check MT5 connection status from shared state."""
     try:
@@ -192,6 +195,7 @@ def get_mt5_status() -> Dict[str, Any]:
     return {"connected": False}
 
 
+@versioned("trades")
 def get_trading_stats(days: int = 30) -> Dict[str, Any]:
     """Get trading statistics from the history database."""
     try:
@@ -202,6 +206,35 @@ def get_trading_stats(days: int = 30) -> Dict[str, Any]:
         return {}
 
 
+@versioned("positions")
+def _get_positions() -> List[Dict[str, Any]]:
+    """Open positions from MT5 (refetched only when the feed reports a change)."""
+    return get_mt5_client().get_positions()
+
+
+@versioned("account")
+def _get_account_info() -> Optional[Dict[str, Any]]:
+    return get_mt5_client().get_account_info()
+
+
+# Columns shown by the activity feed
+ACTIVITY_COLUMNS = (
+    "ticket", "open_timestamp", "close_timestamp", "symbol", "type",
+    "volume", "open_price", "close_price", "profit", "status",
+)
+
+
+@versioned("trades")
+def _get_recent_trades(days: int) -> List[Dict[str, Any]]:
+    return _get_db().get_trades(days=days, columns=ACTIVITY_COLUMNS)
+
+
+@versioned("trades")
+def _get_closed_trades(days: int, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+    end = datetime.now()
+    return _get_db().get_closed_trades(end - timedelta(days=days), end, symbol)
+
+
 def render_header() -> None:
     """Render the hero header with status chips."""
     mt5_status = get_mt5_status()
@@ -265,8 +298,7 @@ def render_sidebar() -> None:
         # Trading statistics
         st.markdown("### 📊 Quick Stats")
         try:
-            mt5_client = get_mt5_client()
-            positions = mt5_client.get_positions()
+            positions = _get_positions()
             
             if positions:
                 total_profit = sum(p.get('profit', 0) for p in positions)
@@ -287,10 +319,10 @@ def render_sidebar() -> None:
         st.markdown("### ⚙️ Settings")
         
         # Auto-refresh toggle
-        auto_refresh = st.toggle("Auto-refresh", value=True)
+        auto_refresh = st.toggle("Auto-refresh", value=True, key="auto_refresh")
         if auto_refresh:
-            refresh_rate = st.slider("Refresh rate (seconds)", 5, 60, 15, 5)
-            st.caption(f"Dashboard updates every {refresh_rate}s")
+            refresh_rate = st.slider("Refresh rate (seconds)", 5, 60, 15, 5, key="refresh_rate")
+            st.caption(f"Tabs poll the change feed every {refresh_rate}s and reload only changed data")
         
         # Risk profile selector
         st.selectbox(
@@ -388,8 +420,7 @@ def render_dashboard_tab() -> None:
     with col1:
         section_header("Open Positions Summary", "Live from MT5")
         try:
-            mt5_client = get_mt5_client()
-            positions = mt5_client.get_positions()
+            positions = _get_positions()
             
             if positions:
                 # Group by type
@@ -460,10 +491,7 @@ def render_dashboard_tab() -> None:
     )
 
     section_header("PnL curve", "Closed trades only")
-    db = _get_db()
-    end = datetime.now()
-    start = end - timedelta(days=30)
-    trades = db.get_closed_trades(start, end)
+    trades = _get_closed_trades(30)
     df = pd.DataFrame(trades)
     if df.empty:
         empty_state("No closed trades", "No closed trades found in the last 30 days.")
@@ -485,8 +513,7 @@ def render_positions_tab() -> None:
     
     try:
         # Get live positions from MT5
-        mt5_client = get_mt5_client()
-        positions = mt5_client.get_positions()
+        positions = _get_positions()
         
         if not positions:
             st.info("✅ No open positions - Account is flat")
@@ -793,8 +820,7 @@ def render_account_tab() -> None:
     section_header("Account details")
     
     try:
-        mt5_client = get_mt5_client()
-        account_info = mt5_client.get_account_info()
+        account_info = _get_account_info()
         
         if not account_info:
             st.warning("Could not retrieve account information from MT5")
@@ -878,10 +904,9 @@ def render_account_tab() -> None:
         # Historical performance from database
         st.markdown("### 📊 Historical Performance")
         
-        db = _get_db()
-        stats_7d = db.get_performance_summary(days=7)
-        stats_30d = db.get_performance_summary(days=30)
-        stats_90d = db.get_performance_summary(days=90)
+        stats_7d = get_trading_stats(days=7)
+        stats_30d = get_trading_stats(days=30)
+        stats_90d = get_trading_stats(days=90)
         
         col1, col2, col3 = st.columns(3)
         
@@ -921,8 +946,7 @@ def render_logs_tab() -> None:
     with col3:
         status_filter = st.selectbox("Status", ["All", "OPEN", "CLOSED"], index=0)
     
-    db = _get_db()
-    trades = db.get_trades(days=days_filter)
+    trades = _get_recent_trades(days_filter)
     
     if not trades:
         empty_state("No recent trades", f"No trades recorded in the last {days_filter} days.")
@@ -1104,8 +1128,10 @@ def render_statement_tab() -> None:
         days = int(range_key.replace("d", ""))
         start_date = end_date - timedelta(days=days)
 
-    db = _get_db()
-    trades = db.get_closed_trades(start_date, end_date, symbol_filter or None)
+    if range_key == "Custom":
+        trades = _get_db().get_closed_trades(start_date, end_date, symbol_filter or None)
+    else:
+        trades = _get_closed_trades(days, symbol_filter or None)
     df = pd.DataFrame(trades)
     if df.empty:
         empty_state(
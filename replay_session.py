@@ -0,0 +1,47 @@
+"""Replay a recorded MT5 session through the trading loop (offline, PAPER mode)"""
+
+import argparse
+import cProfile
+import json
+import pstats
+
+from app.core.logger import setup_logger
+from app.trading.mt5_journal import replay_session
+
+logger = setup_logger("replay_runner")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Replay a recorded MT5 session journal')
+
+    parser.add_argument('journal', type=str,
+                        help='Journal file recorded with MT5_RECORD_DIR')
+    parser.add_argument('--cycles', type=int, default=None,
+                        help='Replay at most this many cycles')
+    parser.add_argument('--profile', type=str, default=None,
+                        help='Write cProfile stats to this file')
+    parser.add_argument('--top', type=int, default=30,
+                        help='Functions to print from the profile (by cumulative time)')
+
+    return parser.parse_args()
+
+
+def main():
+    """Replay and report cycle timings"""
+    args = parse_args()
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    report = replay_session(args.journal, max_cycles=args.cycles)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(args.top)
+
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
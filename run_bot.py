@@ -25,6 +25,7 @@ from app.core.scheduler import TradingScheduler
 from app.core.database import get_database_manager
 from app.trading.mt5_client import get_mt5_client
 from app.trading.trading_loop import main_trading_loop
+from app.trading.warm_start import get_warm_start
 
 logger = setup_logger("bot_runner")
 
@@ -41,6 +42,7 @@ def signal_handler(sig, frame):
     if scheduler and scheduler.is_running():
         scheduler.stop()
         logger.info("✅ Scheduler stopped")
+    get_warm_start().save()
     time.sleep(1)
     sys.exit(0)
 
@@ -89,6 +91,11 @@ def main():
         db = get_database_manager()
         logger.info("✅ Database initialized")
         
+        # Reload bars / sentiment / AI caches saved by the previous run
+        restored = get_warm_start().restore()
+        if restored:
+            logger.info(f"✅ Warm start: {restored}")
+        
         # Start optimization scheduler (hourly adaptive risk parameters)
         from app.trading.optimization_scheduler import start_optimization_scheduler
         opt_scheduler = start_optimization_scheduler()
@@ -136,6 +143,7 @@ def main():
         _should_exit = True
         if scheduler and scheduler.is_running():
             scheduler.stop()
+        get_warm_start().save()
         logger.info("✅ Bot stopped gracefully")
         sys.exit(0)
     
@@ -0,0 +1,45 @@
+"""Load-test the trading loop against the simulated broker at several universe sizes"""
+
+import argparse
+import json
+
+from app.trading.load_harness import DEFAULT_LOOP, MARKET_DATA_LOOP, run_load_test
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Load-test the trading loop (simulated broker)')
+
+    parser.add_argument('--symbols', type=int, nargs='+', default=[50, 200, 1000],
+                        help='Universe sizes to test')
+    parser.add_argument('--accounts', type=int, default=1,
+                        help='Concurrent simulated accounts (one process each)')
+    parser.add_argument('--cycles', type=int, default=3,
+                        help='Loop cycles per account')
+    parser.add_argument('--interval', type=float, default=0.0,
+                        help='Pause between cycles (seconds)')
+    parser.add_argument('--workdir', type=str, default=None,
+                        help='Directory for per-account databases and logs (temporary by default)')
+    parser.add_argument('--loop', type=str, default=DEFAULT_LOOP,
+                        help=f'Cycle function as module:function ({MARKET_DATA_LOOP} for data traffic only)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write summaries and raw samples to this JSON file')
+
+    return parser.parse_args()
+
+
+def main():
+    """Run the scenarios and print one summary per universe size"""
+    args = parse_args()
+    results = run_load_test(args.symbols, accounts=args.accounts, cycles=args.cycles,
+                            workdir=args.workdir, loop=args.loop, interval=args.interval)
+
+    summaries = [r.summary() for r in results]
+    print(json.dumps(summaries, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([{**s, "runs": r.runs} for s, r in zip(summaries, results)], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
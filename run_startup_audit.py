@@ -0,0 +1,51 @@
+"""Audit the cold-start import time of the bot and the API server (python -X importtime)"""
+
+import argparse
+import json
+import sys
+
+from app.core.startup_audit import ENTRY_POINTS, run_startup_audit
+
+
+def parse_budget(value):
+    """name=seconds"""
+    name, _, seconds = value.partition('=')
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected name=seconds, got {value!r}")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Cold-start import audit of the bot entry points')
+
+    parser.add_argument('targets', nargs='*', default=list(ENTRY_POINTS),
+                        help=f'Entry points ({", ".join(ENTRY_POINTS)}) or module names')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Fresh interpreters per target (median is reported)')
+    parser.add_argument('--top', type=int, default=15,
+                        help='Slowest modules to list per target')
+    parser.add_argument('--budget', type=parse_budget, action='append', default=[],
+                        help='Override a budget, e.g. --budget api=1.2')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the report to this JSON file')
+
+    return parser.parse_args()
+
+
+def main():
+    """Print the report; exit 1 when a target is over budget or loads a heavy optional dependency"""
+    args = parse_args()
+    audits = run_startup_audit(args.targets, repeat=args.repeat, budgets=dict(args.budget))
+
+    report = [a.summary(args.top) for a in audits]
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if all(a.passed for a in audits) else 1)
+
+
+if __name__ == "__main__":
+    main()
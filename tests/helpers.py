@@ -0,0 +1,26 @@
+"""Shared test doubles for the demo-mode market"""
+
+from app.trading.mt5_client import MT5Client
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_760_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StaleQuoteClient(MT5Client):
+    """The first quote of each symbol is 50 points off the market, as if it moved after the snapshot"""
+
+    def __init__(self):
+        super().__init__()
+        self.quoted = set()
+
+    def symbol_info_tick(self, symbol):
+        tick = super().symbol_info_tick(symbol)
+        if symbol not in self.quoted:
+            self.quoted.add(symbol)
+            tick = {**tick, 'bid': tick['bid'] + 0.0050, 'ask': tick['ask'] + 0.0050}
+        return tick
@@ -0,0 +1,74 @@
+"""Tests for batch closes / modifies against the demo-mode market"""
+
+from app.core.config import get_config
+from app.core.database import DatabaseManager
+from app.trading.execution import ExecutionManager, OrderAction
+from app.trading.execution_telemetry import ExecutionTelemetry
+from app.trading.market_simulator import MarketSimulator
+from app.trading.mt5_client import MT5Client
+from tests.helpers import FakeClock, StaleQuoteClient
+
+
+def _manager(client, tmp_path):
+    manager = ExecutionManager.__new__(ExecutionManager)
+    manager.config, manager.mt5 = get_config(), client
+    manager.telemetry = ExecutionTelemetry(DatabaseManager(db_path=str(tmp_path / "h.db")))
+    return manager
+
+
+def test_batch_closes_and_modifies_with_requote(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_config().trading, "mode", "LIVE")
+    client = StaleQuoteClient()
+    sim = client._simulator = MarketSimulator(seed=5, clock=FakeClock())
+    tickets = [sim.open_position(symbol, side, 1.0)['order']
+               for symbol, side in [("EURUSD", "BUY"), ("GBPUSD", "SELL"), ("USDJPY", "BUY"), ("EURUSD", "SELL")]]
+
+    batch = _manager(client, tmp_path).execute_batch([
+        OrderAction(tickets[0]),
+        OrderAction(tickets[1], volume=0.5, comment="Partial"),
+        OrderAction(tickets[2], "MODIFY", sl=100.0),
+        OrderAction(tickets[3]),
+        OrderAction(999),
+    ], max_workers=3, max_retries=1)
+
+    results = batch.by_ticket()
+    assert [r.success for r in batch.results] == [True, True, True, True, False]
+    assert results[999].error == "Position 999 not found"
+    # Stale prices were requoted once, then filled at the market
+    assert results[tickets[0]].attempts == 2 and results[tickets[0]].retcode == 10009
+    assert results[tickets[0]].price == sim.tick("EURUSD")['bid']
+    assert results[tickets[2]].attempts == 1
+    assert {p['ticket']: p['volume'] for p in sim.positions()} == {tickets[1]: 0.5, tickets[2]: 1.0}
+    assert sim.positions("USDJPY")[0]['sl'] == 100.0
+    assert batch.total_latency_ms >= max(r.latency_ms for r in batch.results)
+
+
+def test_requote_gives_up_after_retries(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_config().trading, "mode", "LIVE")
+    client = StaleQuoteClient()
+    sim = client._simulator = MarketSimulator(seed=5, clock=FakeClock())
+    ticket = sim.open_position("EURUSD", "BUY", 1.0)['order']
+
+    (result,) = _manager(client, tmp_path).execute_batch([OrderAction(ticket)], max_retries=0).results
+    assert not result.success and result.retcode == 10004 and result.attempts == 1
+    assert len(sim.positions()) == 1
+
+
+def test_partial_close_volume_is_a_valid_lot(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_config().trading, "mode", "LIVE")
+    client = MT5Client()
+    sim = client._simulator = MarketSimulator(seed=5, clock=FakeClock())
+    tiny, small = (sim.open_position(symbol, "BUY", volume)['order']
+                   for symbol, volume in [("EURUSD", 0.01), ("GBPUSD", 0.03)])
+
+    batch = _manager(client, tmp_path).execute_batch([
+        OrderAction(tiny, volume=0.01, comment="Partial"),
+        OrderAction(small, volume=0.03, comment="Partial"),
+    ])
+
+    results = batch.by_ticket()
+    # 95% of 0.01 lots is below the 0.01 minimum: nothing is sent
+    assert not results[tiny].success and "below the broker minimum" in results[tiny].error
+    # 95% of 0.03 is 0.0285, rounded down to the 0.01 step
+    assert results[small].success and results[small].volume == 0.02
+    assert {p['ticket']: p['volume'] for p in sim.positions()} == {tiny: 0.01, small: 0.01}
@@ -0,0 +1,118 @@
+"""Tests for the shared LRU/TTL cache"""
+
+import threading
+import time
+
+import pytest
+
+from app.core.cache import LRUCache
+
+
+def test_lru_eviction_order_and_stats():
+    """Least recently used entry is evicted first and counted"""
+    cache = LRUCache(max_entries=2, default_ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # refresh "a"
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_ttl_and_max_age_expire_entries():
+    """Per-entry TTL and max_age both reject stale values and free their bytes"""
+    cache = LRUCache(default_ttl=None)
+    cache.set("short", "x", ttl=0.01)
+    cache.set("long", "y")
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("long", max_age=0.001) is None
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_byte_budget_bounds_cache():
+    """Entries are evicted once the byte budget is exceeded"""
+    cache = LRUCache(max_entries=100, max_bytes=100, default_ttl=None, sizeof=lambda v: len(v))
+    for i in range(5):
+        cache.set(i, "x" * 40)
+    assert cache.stats()["bytes"] <= 100
+    assert cache.keys() == [3, 4]
+
+    cache.set("huge", "x" * 1000)
+    assert "huge" not in cache
+
+
+def test_get_or_load_is_single_flight():
+    """Concurrent misses for the same key run the loader once"""
+    cache = LRUCache()
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1.0)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert results == ["value"] * 8
+    assert cache.stats()["coalesced_loads"] == 7
+
+
+def test_loader_errors_are_not_cached():
+    cache = LRUCache()
+
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("k", failing)
+    assert cache.get_or_load("k", lambda: 42) == 42
+
+
+def test_empty_results_use_short_ttl(monkeypatch):
+    """A failed/empty fetch is retried after empty_ttl instead of the full TTL"""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache(default_ttl=300, empty_ttl=5)
+    responses = iter([[], None, [1, 2]])
+    load = lambda: next(responses)
+
+    assert cache.get_or_load("k", load) == []
+    assert cache.get_or_load("k", load) == []  # Still within empty_ttl
+    now[0] += 6
+    assert cache.get_or_load("k", load) is None
+    now[0] += 6
+    assert cache.get_or_load("k", load) == [1, 2]
+    now[0] += 200
+    assert cache.get_or_load("k", load) == [1, 2]  # Full TTL for real data
+
+    uncached = LRUCache(empty_ttl=0)
+    assert uncached.get_or_load("k", lambda: {}) == {}
+    assert "k" not in uncached
+
+
+def test_legacy_historical_cache_signature():
+    from app.ui.cache_manager import HistoricalDataCache, get_historical_cache
+
+    cache = HistoricalDataCache(max_size=2)
+    cache.set("trades_7d", [1])
+    assert cache.get("trades_7d", max_age_seconds=3600) == [1]
+    assert cache.get("trades_7d", max_age_seconds=-1) is None
+    assert get_historical_cache().get("missing", max_age_seconds=3600) is None
+    assert "entries" in get_historical_cache().stats()
@@ -0,0 +1,87 @@
+"""Tests for the dashboard change feed"""
+
+import asyncio
+
+from app.core.change_feed import ChangeFeed
+
+
+def test_snapshot_emits_only_deltas():
+    """Unchanged snapshots produce no events; changes carry only the delta"""
+    feed = ChangeFeed()
+    first = feed.publish_snapshot("positions", [{"ticket": 1, "profit": 1.0}, {"ticket": 2, "profit": 2.0}])
+    assert len(first["added"]) == 2
+
+    assert feed.publish_snapshot("positions", [{"ticket": 1, "profit": 1.0}, {"ticket": 2, "profit": 2.0}]) is None
+
+    event = feed.publish_snapshot("positions", [{"ticket": 1, "profit": 5.0}])
+    assert event["updated"] == [{"ticket": 1, "profit": 5.0}]
+    assert event["removed"] == [2]
+    assert feed.versions()["positions"] == 2
+
+
+def test_state_and_cursor_polling():
+    """Account changes only report changed fields and polling honours the cursor"""
+    feed = ChangeFeed()
+    feed.publish_state("account", {"balance": 100.0, "equity": 100.0})
+    cursor = feed.seq
+    feed.publish_state("account", {"balance": 100.0, "equity": 101.0})
+    feed.publish_record("trades", {"ticket": 7, "status": "closed"})
+
+    result = feed.events_since(cursor)
+    assert [e["topic"] for e in result["events"]] == ["account", "trades"]
+    assert result["events"][0]["changed"] == {"equity": 101.0}
+    assert not result["reset"]
+
+    only_trades = feed.events_since(cursor, topics=["trades"])
+    assert len(only_trades["events"]) == 1
+
+
+def test_history_overflow_requests_reset():
+    """A cursor older than retained history must reload full state"""
+    feed = ChangeFeed(history_size=2)
+    for i in range(5):
+        feed.publish_record("trades", {"ticket": i})
+    assert feed.events_since(0)["reset"]
+    assert not feed.events_since(3)["reset"]
+
+
+def test_subscriber_receives_pushed_events():
+    """Events published from another thread reach asyncio subscribers"""
+    feed = ChangeFeed()
+
+    async def consume():
+        queue = feed.subscribe()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, feed.publish_record, "trades", {"ticket": 42})
+        event = await asyncio.wait_for(queue.get(), timeout=1.0)
+        feed.unsubscribe(queue)
+        return event
+
+    event = asyncio.run(consume())
+    assert event["upserted"][0]["ticket"] == 42
+    assert feed.subscriber_count() == 0
+
+
+def test_versioned_time_bucket_reloads_without_feed_event(monkeypatch):
+    """Loaders with max_age_seconds are re-run when the bucket rolls over, even with no new version"""
+    from app.ui import live_updates
+
+    class StaticFeed:
+        def versions_for(self, topics):
+            return tuple(1 for _ in topics)
+
+    now = [1000.0]
+    monkeypatch.setattr(live_updates, "get_live_feed", lambda: StaticFeed())
+    monkeypatch.setattr(live_updates.time, "time", lambda: now[0])
+    calls = []
+
+    @live_updates.versioned("account", max_age_seconds=5)
+    def status():
+        calls.append(now[0])
+        return {"connected": len(calls) == 1}
+
+    assert status() == {"connected": True}
+    now[0] += 2
+    assert status() == {"connected": True} and len(calls) == 1
+    now[0] += 5
+    assert status() == {"connected": False} and len(calls) == 2
@@ -0,0 +1,65 @@
+"""Tests for order latency / slippage telemetry"""
+
+from datetime import datetime
+
+import pytest
+
+from app.core.config import get_config
+from app.core.database import DatabaseManager
+from app.trading.execution import ExecutionManager, OrderAction
+from app.trading.execution_telemetry import ExecutionTelemetry, OrderTelemetry
+from app.trading.market_simulator import MarketSimulator
+from tests.helpers import FakeClock, StaleQuoteClient
+
+T0 = 1_760_000_000.0
+
+
+def _order(symbol, delay, slippage, drift, send_ms=40.0, requotes=0, success=True):
+    send = T0 + delay
+    return OrderTelemetry(symbol, "CLOSE", "SELL", decision_ts=T0, request_ts=send - 0.01, send_ts=send,
+                          fill_ts=send + send_ms / 1000, slippage_points=slippage, drift_points=drift,
+                          attempts=1 + requotes, requotes=requotes, retcode=10009, success=success)
+
+
+def test_rollups_and_latency_cost(tmp_path):
+    telemetry = ExecutionTelemetry(DatabaseManager(db_path=str(tmp_path / "h.db")))
+    for delay, drift in [(0.05, 1.0), (0.2, 2.5), (0.8, 8.5), (2.0, 20.5)]:
+        telemetry.record(_order("EURUSD", delay, slippage=0.0, drift=drift))
+    telemetry.record(_order("EURUSD", 0.05, slippage=4.0, drift=None, send_ms=200.0, requotes=2))
+    telemetry.record(_order("GBPUSD", 0.05, slippage=None, drift=None, success=False))
+
+    since = datetime.fromtimestamp(T0 - 3600)
+    buckets = {b["symbol"]: b for b in telemetry.rollups(since)}
+    eur = buckets["EURUSD"]
+    assert (eur["orders"], eur["fills"], eur["requotes"], eur["slipped"]) == (5, 5, 2, 5)
+    assert eur["avg_slippage_points"] == pytest.approx(0.8)
+    assert eur["avg_drift_points"] == pytest.approx(8.125)
+    assert eur["max_send_ms"] == pytest.approx(200.0)
+    assert buckets["GBPUSD"]["fills"] == 0 and telemetry.rollups(since, "GBPUSD")[0]["orders"] == 1
+
+    cost = telemetry.latency_cost(since, "EURUSD")
+    assert cost["orders"] == 5
+    assert cost["drift_points_per_second"] == pytest.approx(10.0)
+    assert [b["orders"] for b in cost["by_delay"]] == [2, 1, 1, 1]
+    assert cost["by_delay"][0]["avg_drift_points"] == pytest.approx(1.0)
+    assert telemetry.latency_cost(datetime.fromtimestamp(T0 + 3600))["orders"] == 0
+
+
+def test_batch_records_requotes_and_slippage(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_config().trading, "mode", "LIVE")
+    client = StaleQuoteClient()
+    sim = client._simulator = MarketSimulator(seed=5, clock=FakeClock(T0))
+    ticket = sim.open_position("EURUSD", "BUY", 1.0)['order']
+
+    manager = ExecutionManager.__new__(ExecutionManager)
+    manager.config, manager.mt5 = get_config(), client
+    manager.telemetry = ExecutionTelemetry(DatabaseManager(db_path=str(tmp_path / "h.db")))
+    manager.execute_batch([OrderAction(ticket, decision_time=T0 - 1.5)], positions=sim.positions())
+
+    with manager.telemetry.db.connection() as conn:
+        (row,) = [dict(r) for r in conn.execute("SELECT * FROM order_telemetry")]
+    # The stale quote was 50 points above the bid we finally sold at
+    assert (row["kind"], row["side"], row["attempts"], row["requotes"]) == ("CLOSE", "SELL", 2, 1)
+    assert row["slippage_points"] == pytest.approx(0.0050 / sim.spec("EURUSD").point)
+    assert row["drift_points"] == pytest.approx(0.0)
+    assert row["send_ts"] - row["decision_ts"] >= 1.5 and row["fill_ts"] >= row["send_ts"]
@@ -0,0 +1,65 @@
+"""The vectorized exit rules must match PositionManager.review_position_full"""
+
+import time
+
+import numpy as np
+
+from app.trading.exit_rules import PositionTable, evaluate_exits, TARGET_PARTIAL
+from app.trading.position_manager import PositionManager
+
+
+def _corpus(n, seed=0):
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    positions, analyses, trackers = [], {}, {}
+    for i in range(n):
+        symbol = f"SYM{i % 40}"
+        buy = bool(rng.integers(2))
+        entry = 1.1000
+        risk = float(rng.choice([0.0, 0.0010, 0.0025]))
+        sl = 0.0 if risk == 0 else (entry - risk if buy else entry + risk)
+        current = entry + float(rng.normal(0, 0.0025))
+        profit = round((current - entry if buy else entry - current) * 100000 * 0.1, 2)
+        hold = float(rng.integers(-5, 120)) + 0.2
+        position = {"ticket": 1000 + i, "symbol": symbol, "type": 0 if buy else 1,
+                    "price_open": entry, "price_current": current, "sl": sl, "tp": 0.0,
+                    "profit": profit, "volume": 0.1}
+        if i % 7:
+            position["time_msc"] = int((now - hold * 60) * 1000)
+        else:
+            position["time"] = int(now - hold * 60)
+        positions.append(position)
+        trackers[1000 + i] = max(profit, float(rng.choice([profit, 0.0, abs(profit) * 2, 40.0])))
+        analyses.setdefault(symbol, {
+            "signal": str(rng.choice(["BUY", "SELL", "HOLD"])),
+            "rsi": float(rng.choice([50.0, 85.0, 15.0, float(rng.uniform(0, 100))])),
+            "atr": float(rng.choice([0.0, 0.0008, 0.0020])),
+        })
+    return positions, analyses, trackers
+
+
+def test_batch_matches_per_position_review():
+    positions, analyses, trackers = _corpus(600)
+    manager = PositionManager.__new__(PositionManager)  # The rules need no broker
+
+    batch_tracker = dict(trackers)
+    batch = manager.review_positions(positions, analyses, signal_confidence=0.7,
+                                     max_profit_tracker=batch_tracker)
+    for position, result in zip(positions, batch):
+        analysis = analyses[position["symbol"]]
+        expected = manager.review_position_full(position, analysis["signal"], 0.7, analysis, trackers)
+        assert result == expected, position
+    assert batch_tracker == trackers
+    # Every rule is exercised by the corpus
+    rules = {r['reason'].split(':')[0] for r in batch if r['reason']}
+    assert len(rules) >= 7 and any(r['update_sl'] for r in batch)
+
+
+def test_partial_close_only_once_per_ticket():
+    position = {"ticket": 1, "symbol": "EURUSD", "type": 0, "price_open": 1.1000,
+                "price_current": 1.1012, "sl": 1.0990, "profit": 12.0, "time_msc": 0}
+    analyses = {"EURUSD": {"signal": "HOLD"}}
+    first = evaluate_exits(PositionTable.build([position], analyses))
+    taken = evaluate_exits(PositionTable.build([position], analyses, partial_enabled=[False]))
+    assert first.rule[0] == TARGET_PARTIAL and first.close_percent[0] == 0.5
+    assert taken.rule[0] != TARGET_PARTIAL
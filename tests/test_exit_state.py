@@ -0,0 +1,35 @@
+"""Tests for the per-ticket exit-state store"""
+
+from app.core.database import DatabaseManager
+from app.trading.exit_state import ExitStateStore
+
+
+def _position(ticket, symbol="EURUSD", type_=0, price=1.1000, profit=0.0):
+    return {"ticket": ticket, "symbol": symbol, "type": type_, "price_open": 1.1000,
+            "price_current": price, "profit": profit, "volume": 0.5}
+
+
+def test_reconcile_tracks_evicts_and_persists(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "h.db"))
+    store = ExitStateStore(db)
+
+    store.reconcile([_position(1, profit=20.0, price=1.1020), _position(2, "GBPUSD", type_=1)])
+    store.reconcile([_position(1, profit=5.0, price=1.1005), _position(2, "GBPUSD", type_=1, price=1.0990)])
+    first = store.get(1)
+    assert (first.max_profit, first.best_price) == (20.0, 1.1020)
+    assert store.get(2).best_price == 1.0990 and store.get(2).direction == "SELL"
+
+    first.trail_sl, first.scale_out_stage, first.closed_percent = 1.1010, 1, 0.5
+    assert store.flush() == 1
+    assert store.flush() == 0
+
+    # A restart restores trailing / scale-out state
+    restored = ExitStateStore(db).get(1)
+    assert (restored.trail_sl, restored.scale_out_stage, restored.closed_percent) == (1.1010, 1, 0.5)
+
+    # One empty snapshot is tolerated (broker errors also return []), two evict
+    assert store.reconcile([_position(1)]) == []
+    assert store.reconcile([_position(1)]) == [2]
+    assert 2 not in ExitStateStore(db)
+    assert store.evict(1) and len(ExitStateStore(db)) == 0
+
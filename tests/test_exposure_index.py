@@ -0,0 +1,48 @@
+"""The exposure index must agree with a scan of the open positions"""
+
+import random
+
+from app.trading.exposure_index import ExposureIndex, asset_class
+from app.trading.risk import RiskManager
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "EURJPY", "GBPJPY", "AUDCAD", "NZDUSD",
+           "USDCAD", "EURGBP", "BTCUSD", "ETHUSD", "XRPUSD", "GBPNZD", "AUDUSD"]
+
+
+def _scan_same_currency(symbol, open_symbols):
+    return sum(1 for s in open_symbols if s[:3] == symbol[:3] or s[3:6] == symbol[3:6])
+
+
+def test_incremental_index_matches_scan():
+    rng = random.Random(7)
+    risk = RiskManager()
+    index = risk.exposure_index([])
+    open_symbols = []
+    for _ in range(500):
+        if open_symbols and rng.random() < 0.4:
+            symbol = open_symbols.pop(rng.randrange(len(open_symbols)))
+            index.remove(symbol)
+        else:
+            symbol = rng.choice(SYMBOLS)
+            open_symbols.append(symbol)
+            index.add(symbol)
+        candidate = rng.choice(SYMBOLS)
+        assert index.total == len(open_symbols)
+        assert index.same_currency_count(candidate) == _scan_same_currency(candidate, open_symbols)
+        assert abs(index.risk_in_use - sum(risk.get_risk_pct_for_symbol(s) for s in open_symbols)) < 1e-9
+        assert risk.check_exposure_limits(candidate, index) == \
+            risk.check_portfolio_limits(candidate, list(open_symbols))
+
+
+def test_clusters_classes_and_snapshot():
+    index = ExposureIndex.from_symbols(["EURUSD", "USDJPY", "GBPJPY", "BTCUSD"])
+    assert index.cluster_count("GBPUSD") == 2   # USD cluster: EURUSD, USDJPY
+    assert index.cluster_count("CADJPY") == 2   # JPY cluster: USDJPY, GBPJPY
+    assert index.cluster_count("AUDCAD") == 0
+    assert (asset_class("BTCUSD"), asset_class("EURUSD"), asset_class("AUDCAD")) == \
+        ("CRYPTO", "FOREX_MAJOR", "FOREX_CROSS")
+    snapshot = index.snapshot()
+    assert snapshot["by_currency"]["USD"] == 3 and snapshot["by_currency"]["JPY"] == 2
+    assert snapshot["by_class"] == {"FOREX_MAJOR": 2, "FOREX_CROSS": 1, "CRYPTO": 1}
+    index.remove("AUDCAD")  # Not open: ignored
+    assert index.total == 4
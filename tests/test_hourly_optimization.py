@@ -0,0 +1,76 @@
+"""Tests for the concurrent hourly adaptive optimization cycle"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.core.database import DatabaseManager
+from app.core.rate_limit import RateLimiter
+
+
+def _trade(ticket, symbol, profit, minutes_ago=10):
+    closed = datetime.now() - timedelta(minutes=minutes_ago)
+    return {
+        "ticket": ticket, "symbol": symbol, "type": "BUY", "volume": 0.1,
+        "open_price": 1.0, "open_timestamp": (closed - timedelta(minutes=5)).isoformat(),
+        "close_price": 1.0, "close_timestamp": closed.isoformat(),
+        "profit": profit, "status": "closed",
+    }
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=50.0, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        assert limiter.acquire()
+    # 2 from the burst, then 4 more at 50/s
+    assert time.monotonic() - start >= 0.07
+    empty = RateLimiter(rate=0.1)
+    empty.acquire()
+    assert not empty.acquire(timeout=0.01)
+
+
+def test_cycle_uses_grouped_stats_and_swaps_params(tmp_path, monkeypatch):
+    from app.trading import adaptive_optimizer as ao
+
+    db = DatabaseManager(db_path=str(tmp_path / "h.db"))
+    for i, (symbol, profit) in enumerate([("EURUSD", 10), ("EURUSD", 5), ("EURUSD", -4),
+                                          ("GBPUSD", -8), ("GBPUSD", 2)]):
+        db.save_trade(_trade(1000 + i, symbol, profit))
+    db.save_trade(_trade(2000, "EURUSD", 99, minutes_ago=180))  # outside the hour
+
+    monkeypatch.setattr(ao, "get_database_manager", lambda: db)
+    optimizer = ao.AdaptiveRiskOptimizer()
+    optimizer.params_file = tmp_path / "adaptive_params.json"
+    optimizer.ticker_params = {}
+    monkeypatch.setattr(optimizer.config.trading, "default_symbols", ["EURUSD", "GBPUSD", "USDJPY"])
+    monkeypatch.setattr(optimizer, "_oos_validated", lambda symbol: True)
+
+    stats = optimizer.analyze_all_performance(["EURUSD", "GBPUSD", "USDJPY"])
+    assert stats["EURUSD"]["trades_count"] == 3 and stats["EURUSD"]["total_pnl"] == 11
+    assert stats["GBPUSD"]["wins"] == 1 and stats["GBPUSD"]["losses"] == 1
+    assert stats["USDJPY"]["status"] == "insufficient_data"
+
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_ai(symbol, performance):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        risk = 2.0 if performance["total_pnl"] > 0 else 1.0
+        return {"recommendation": "adjust", "max_risk_pct": risk, "max_positions": 3, "min_win_rate_pct": 45}
+
+    monkeypatch.setattr(optimizer, "optimize_with_ai", fake_ai)
+    before = optimizer.ticker_params
+    results = optimizer.hourly_optimization_cycle()
+
+    assert [r["symbol"] for r in results] == ["EURUSD", "GBPUSD"]
+    assert peak[0] == 2
+    assert before == {}  # the previous table was replaced, not mutated
+    assert optimizer.get_ticker_params("EURUSD")["max_risk_pct"] == 2.0
+    assert optimizer.get_ticker_params("GBPUSD")["max_risk_pct"] == 1.0
+    assert optimizer.params_file.exists()
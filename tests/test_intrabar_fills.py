@@ -0,0 +1,68 @@
+"""Tests for the intrabar fill model and symbol spec cache"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest.fill_model import IntrabarFills
+from app.core.database import DatabaseManager
+from app.trading.symbol_specs import SymbolSpec, SymbolSpecCache
+
+
+def _m1(prices, start="2024-01-01 00:00"):
+    prices = np.asarray(prices, dtype=float)
+    return pd.DataFrame({"time": pd.date_range(start, periods=len(prices), freq="1min"),
+                         "high": prices + 0.0001, "low": prices - 0.0001})
+
+
+def test_first_touch_uses_sub_bar_order():
+    spec = SymbolSpec("EURUSD")
+    # One M15 bar that spans both levels: price rallies to TP before dumping through SL
+    path = [1.1000, 1.1010, 1.1025, 1.1040, 1.1020, 1.0990, 1.0970] + [1.0970] * 8
+    fills = IntrabarFills(_m1(path), spec, chunk_size=4)
+    start, end = pd.Timestamp("2024-01-01 00:00"), pd.Timestamp("2024-01-01 00:15")
+
+    hit = fills.first_touch("BUY", sl_price=1.0980, tp_price=1.1035, start=start, end=end)
+    assert (hit.reason, hit.price, hit.time) == ("TP", 1.1035, pd.Timestamp("2024-01-01 00:03"))
+
+    short = fills.first_touch("SELL", sl_price=1.1030, tp_price=1.0975, start=start, end=end)
+    assert short.reason == "SL"
+
+    assert fills.first_touch("BUY", 1.0, 2.0, start, end) is None
+    assert not fills.covers(end, end + pd.Timedelta(minutes=15))
+
+    # The spread moves short exits (ask = bid + spread)
+    wide = IntrabarFills(_m1(path), SymbolSpec("EURUSD", spread_points=20), chunk_size=4)
+    assert wide.first_touch("SELL", sl_price=1.1040, tp_price=1.0900, start=start, end=end).time == \
+        pd.Timestamp("2024-01-01 00:02")
+
+
+def test_months_of_m1_resolve_quickly():
+    rng = np.random.default_rng(0)
+    n = 90 * 24 * 60
+    prices = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.0002, n)))
+    fills = IntrabarFills(_m1(prices), SymbolSpec("EURUSD"))
+    starts = pd.date_range("2024-01-01", periods=n // 15, freq="15min")[:-700]
+
+    began = time.perf_counter()
+    for k, t in enumerate(starts[::2]):
+        entry = prices[2 * k * 15]
+        fills.first_touch("BUY", entry - 0.002, entry + 0.003, t, t + pd.Timedelta(days=7))
+    assert time.perf_counter() - began < 10
+
+
+def test_spec_cache_persists_costs(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "h.db"))
+    cache = SymbolSpecCache(db)
+    assert cache.get("BTCUSD").contract_size == 1.0
+    assert cache.get("XAUUSD").contract_size == 100.0
+    assert cache.get("EURUSD").contract_size == 100000.0
+
+    cache.put(SymbolSpec("EURUSD", commission_per_lot=7.0, spread_points=12))
+    spec = SymbolSpecCache(db).get("EURUSD")
+    assert spec.commission_per_lot == 7.0
+    assert spec.spread == pytest.approx(0.0012)
+    assert spec.profit("BUY", 1.1000, 1.1010, 0.5) == pytest.approx(50.0 - 3.5)
+    assert spec.profit("SELL", 1.1000, 1.1010, 0.5) == pytest.approx(-50.0 - 3.5)
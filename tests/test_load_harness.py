@@ -0,0 +1,67 @@
+"""Tests for the multi-account load-test harness"""
+
+import os
+
+from app.core.config import REPO_DATA_DIR, state_file
+from app.trading.load_harness import MARKET_DATA_LOOP, make_universe, run_load_test
+
+
+def test_universe_grows_past_configured_symbols():
+    base = ["EURUSD", "GBPUSD", "EURUSD"]
+    symbols = make_universe(1000, base=base)
+    assert len(symbols) == len(set(symbols)) == 1000
+    assert symbols[:2] == ["EURUSD", "GBPUSD"]
+    assert any(s.endswith(".a") for s in symbols)
+    assert make_universe(5, base=base)[2:] == ["EURGBP", "EURAUD", "EURNZD"]
+
+
+def record_state_cycle():
+    """Loop writing a JSON state file, as the optimizers do"""
+    state_file("adaptive_params.json").write_text(os.path.basename(os.getcwd()))
+
+
+def test_accounts_run_in_isolated_processes(tmp_path):
+    (result,) = run_load_test([30], accounts=2, cycles=2, workdir=str(tmp_path), loop=MARKET_DATA_LOOP)
+    summary = result.summary()
+
+    assert summary["errors"] == []
+    assert summary["cycles"] == 4
+    assert summary["latency_max_s"] >= summary["latency_p50_s"] > 0
+    assert summary["peak_rss_mb"] > 0
+    scenario = tmp_path / "symbols_30_accounts_2"
+    assert (scenario / "account_0" / "data").is_dir() and (scenario / "account_1" / "data").is_dir()
+
+
+def test_state_files_are_per_account(tmp_path):
+    live_state = REPO_DATA_DIR / "adaptive_params.json"
+    before = live_state.read_bytes() if live_state.exists() else None
+    (result,) = run_load_test([5], accounts=2, cycles=1, workdir=str(tmp_path),
+                              loop="tests.test_load_harness:record_state_cycle")
+
+    assert result.summary()["errors"] == []
+    scenario = tmp_path / "symbols_5_accounts_2"
+    for i in range(2):
+        assert (scenario / f"account_{i}" / "data" / "adaptive_params.json").read_text() == f"account_{i}"
+    assert (live_state.read_bytes() if live_state.exists() else None) == before
+
+
+def test_state_file_users_resolve_under_state_dir(tmp_path, monkeypatch):
+    from app.ai.decision_orchestrator import DecisionOrchestrator
+    from app.ai.dynamic_decision_engine import DynamicRiskAdjuster, TickerPerformanceTracker
+    from app.ai.ticker_indicator_optimizer import TickerIndicatorOptimizer
+    from app.backtest.backtest_engine import BacktestEngine
+    from app.core import database
+    from app.core.config import get_config
+    from app.trading.adaptive_optimizer import AdaptiveRiskOptimizer
+
+    monkeypatch.setattr(database, "_db_manager", database.DatabaseManager(db_path=str(tmp_path / "h.db")))
+    monkeypatch.setattr(get_config().storage, "state_dir", str(tmp_path))
+    paths = [
+        BacktestEngine().results_file,
+        DecisionOrchestrator().report_file,
+        TickerPerformanceTracker().cache_file,
+        DynamicRiskAdjuster().params_file,
+        TickerIndicatorOptimizer().config_file,
+        AdaptiveRiskOptimizer().params_file,
+    ]
+    assert all(path.parent == tmp_path for path in paths)
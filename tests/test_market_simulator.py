@@ -0,0 +1,94 @@
+"""Tests for the demo-mode synthetic market"""
+
+import numpy as np
+
+from app.trading.market_simulator import MarketSimulator
+from tests.helpers import FakeClock
+
+
+def test_bars_and_ticks_are_consistent_over_time():
+    clock = FakeClock()
+    sim = MarketSimulator(seed=7, clock=clock)
+
+    m15 = sim.rates("EURUSD", 15, 200)
+    m1 = sim.rates("EURUSD", 1, 30)
+    h1 = sim.rates("EURUSD", 60, 5)
+    tick = sim.tick("EURUSD")
+    assert len(m15) == 200
+    assert m15[-1]['close'] == m1[-1]['close'] == h1[-1]['close'] == tick['bid']
+    assert tick['ask'] > tick['bid']
+    assert all(b['low'] <= min(b['open'], b['close']) and b['high'] >= max(b['open'], b['close']) for b in m15)
+    # Each bar opens at the previous bar's close
+    assert all(a['close'] == b['open'] for a, b in zip(m15, m15[1:]))
+    # An M15 bar is the aggregate of its minutes
+    minutes = sim.rates("EURUSD", 1, 15 * 10)
+    bar = m15[-5]
+    inside = [b for b in minutes if bar['time'] <= b['time'] < bar['time'] + 900]
+    assert (inside[0]['open'], inside[-1]['close']) == (bar['open'], bar['close'])
+    assert max(b['high'] for b in inside) == bar['high']
+
+    # Closed bars never change; new bars continue the path
+    clock.now += 3600
+    later = sim.rates("EURUSD", 15, 200)
+    closed = {b['time']: b for b in m15[:-1]}
+    assert all(closed[b['time']] == b for b in later if b['time'] in closed)
+    assert later[-1]['time'] - m15[-1]['time'] == 3600
+
+    # Same seed, same market, whatever the request order
+    other = MarketSimulator(seed=7, clock=FakeClock())
+    other.rates("EURUSD", 1, 5)
+    assert other.rates("EURUSD", 15, 200) == m15
+    assert MarketSimulator(seed=8, clock=FakeClock()).rates("EURUSD", 15, 200) != m15
+
+
+def test_volatility_tracks_asset_class():
+    sim = MarketSimulator(seed=1, clock=FakeClock())
+
+    def annual_vol(symbol):
+        closes = np.array([b['close'] for b in sim.rates(symbol, 60, 2000)])
+        return np.diff(np.log(closes)).std() * np.sqrt(365 * 24)
+
+    assert 0.03 < annual_vol("EURUSD") < 0.2
+    assert annual_vol("BTCUSD") > 3 * annual_vol("EURUSD")
+
+
+def test_orders_fill_and_stops_trigger():
+    clock = FakeClock()
+    sim = MarketSimulator(seed=3, clock=clock, initial_balance=10000.0)
+    tick = sim.tick("EURUSD")
+
+    result = sim.open_position("EURUSD", "BUY", 1.0, sl=tick['bid'] - 0.0010, tp=tick['bid'] + 0.0010)
+    assert result['retcode'] == 10009 and result['price'] == tick['ask']
+    (position,) = sim.positions()
+    assert position['profit'] == round((tick['bid'] - tick['ask']) * 100000, 2)
+    assert sim.account()['equity'] == sim.account()['balance'] + position['profit']
+
+    clock.now += 3 * 86400
+    assert sim.positions() == []
+    close = sim.deals()[-1]
+    assert close['entry'] == 1 and close['comment'] in ("[sl]", "[tp]")
+    assert close['price'] in (position['sl'], position['tp'])
+    assert sim.account()['balance'] == round(10000.0 + close['profit'], 2)
+
+    ticket = sim.open_position("GBPUSD", "SELL", 0.5)['order']
+    assert sim.modify_position(ticket, sl=5.0)
+    profit = sim.close_position(ticket)
+    assert profit is not None and sim.positions("GBPUSD") == []
+    assert sim.close_position(ticket) is None
+
+
+def test_history_window_is_bounded_during_long_runs():
+    """Forward growth is trimmed to the window; what is served matches an untrimmed path"""
+    clock = FakeClock()
+    sim = MarketSimulator(seed=5, clock=clock, max_history_minutes=3 * 1440)
+    reference = MarketSimulator(seed=5, clock=clock, max_history_minutes=60 * 1440)
+    for _ in range(40):  # 40 days, a tick every 6 hours
+        for _ in range(4):
+            clock.now += 6 * 3600
+            assert sim.bid("EURUSD") == reference.bid("EURUSD")
+        assert len(sim._path("EURUSD").closes) <= 3 * 1440 + 2 * 1440 + 1
+
+    recent = sim.rates("EURUSD", 15, 96)
+    assert recent == reference.rates("EURUSD", 15, 96)
+    # Older than the window is not served
+    assert len(sim.rates("EURUSD", 60, 24 * 10)) == 3 * 24
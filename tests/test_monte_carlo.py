@@ -0,0 +1,51 @@
+"""Tests for the vectorized Monte Carlo robustness engine"""
+
+import numpy as np
+import pytest
+
+from app.backtest.historical_engine import BacktestResults, BacktestTrade
+from app.backtest.metrics import calculate_metrics, calculate_monte_carlo_metrics
+from app.backtest.monte_carlo import run_monte_carlo
+
+
+def _max_dd_pct(pnl, initial):
+    equity = initial + np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.concatenate([[initial], equity]))[1:]
+    return float(((peak - equity) / peak).max() * 100)
+
+
+def test_permutation_keeps_trade_set_and_matches_reference_drawdown():
+    rng = np.random.default_rng(0)
+    pnl = rng.normal(10, 100, 300)
+    result = run_monte_carlo(pnl, n_paths=500, method="permutation", seed=7, chunk_size=128)
+
+    assert result.max_drawdown_pct.shape == (500,)
+    assert np.allclose(result.final_equity, 10000 + pnl.sum())
+    assert np.allclose(result.profit_factor, pnl[pnl > 0].sum() / -pnl[pnl < 0].sum())
+    # Original ordering is one possible path; its drawdown lies within the simulated range
+    reference = _max_dd_pct(pnl, 10000)
+    assert result.max_drawdown_pct.min() <= reference <= result.max_drawdown_pct.max()
+
+    again = run_monte_carlo(pnl, n_paths=500, method="permutation", seed=7, chunk_size=128, max_workers=1)
+    assert np.array_equal(again.max_drawdown_pct, result.max_drawdown_pct)
+
+
+def test_bootstrap_ruin_and_intervals():
+    losing = [-600.0] * 20 + [100.0] * 5
+    result = run_monte_carlo(losing, initial_balance=10000, n_paths=2000, seed=1, ruin_threshold_pct=50)
+    assert result.ruin_probability > 0.9
+    assert result.profit_probability == 0.0
+
+    trades = [{"pnl": p} for p in np.random.default_rng(2).normal(20, 80, 200)]
+    summary = calculate_monte_carlo_metrics(trades, n_paths=3000, seed=3)
+    point_pf = calculate_metrics(trades)["profit_factor"]
+    assert summary["profit_factor"]["ci"]["low"] < point_pf < summary["profit_factor"]["ci"]["high"]
+    assert summary["max_drawdown_pct"]["p5"] <= summary["max_drawdown_pct"]["p95"]
+
+    results = BacktestResults(trades=[BacktestTrade(entry_time=None, profit=t["pnl"]) for t in trades],
+                              parameters={"initial_balance": 5000.0})
+    mc = results.monte_carlo(n_paths=100, seed=3)
+    assert mc.initial_balance == 5000.0 and mc.n_trades == 200
+
+    with pytest.raises(ValueError):
+        run_monte_carlo([1.0], method="shuffle")
@@ -0,0 +1,82 @@
+"""Tests for MT5 response recording and deterministic replay"""
+
+import os
+import pickle
+import zlib
+
+from app.trading.data import DataProvider
+from app.trading.mt5_client import MT5Client
+from app.trading.mt5_journal import read_journal, replay_session
+
+
+def _cycle(client: MT5Client, provider: DataProvider):
+    """Stand-in for one loop cycle: the calls main_trading_loop makes most"""
+    client.mark_cycle()
+    provider._cache.clear()
+    return {
+        "account": client.get_account_info(),
+        "positions": client.get_positions(),
+        "tick": client.get_tick("EURUSD"),
+        "bars": provider.get_ohlc_data("EURUSD", "M15", 300)['close'].tolist(),
+        "gbp": client.get_rates("GBPUSD", 15, count=200),
+    }
+
+
+def test_replay_serves_recorded_session(tmp_path):
+    path = tmp_path / "session.mt5j"
+    client = MT5Client()
+    client.connect()
+    provider = DataProvider()
+    provider.mt5 = client
+
+    client.start_recording(path)
+    recorded = [_cycle(client, provider) for _ in range(3)]
+    client.stop_recording()
+
+    cycles = read_journal(path)
+    assert len(cycles) == 4  # Pre-loop section + 3 cycles
+    assert cycles[1].calls == 5
+
+    # Every call is served from the journal (served == 15), none from the demo market
+    replayed = []
+    report = replay_session(path, loop=lambda: replayed.append(_cycle(client, provider)), client=client)
+    assert replayed == recorded
+    assert report.cycles == 3 and report.served == 15 and not report.misses
+    assert client.replay is None
+
+
+def test_unrecorded_calls_fall_back_to_latest_response(tmp_path):
+    path = tmp_path / "session.mt5j"
+    client = MT5Client()
+    client.start_recording(path)
+    client.mark_cycle()
+    tick = client.get_tick("EURUSD")
+    client.mark_cycle()
+    client.stop_recording()
+
+    replay = client.start_replay(path)
+    client.mark_cycle()
+    assert client.get_tick("EURUSD") == tick
+    client.mark_cycle()
+    assert client.get_tick("EURUSD") == tick  # Not recorded in cycle 2: latest response
+    assert client.get_positions("XAUUSD") == []
+    assert sum(replay.misses.values()) == 2
+    client.stop_replay()
+
+
+def test_rate_arrays_are_delta_encoded(tmp_path):
+    path = tmp_path / "session.mt5j"
+    client = MT5Client()
+    journal = client.start_recording(path)
+    bars = [(1700000000 + 900 * i, 1.1, 1.2, 1.0, 1.1 + i * 1e-5, 100, 2, 0) for i in range(1000)]
+    for shift in range(20):
+        client.mark_cycle()
+        journal.record(("get_rates", ("EURUSD", 15, 1000, None)), bars[shift:] + bars[:shift])
+    client.stop_recording()
+
+    first = read_journal(path)[1].responses[("get_rates", ("EURUSD", 15, 1000, None))][0]
+    assert first == bars
+    last = read_journal(path)[-1].responses[("get_rates", ("EURUSD", 15, 1000, None))][0]
+    assert last == bars[19:] + bars[:19]
+    # 20 responses of 1000 bars cost little more than one
+    assert os.path.getsize(path) < 3 * len(zlib.compress(pickle.dumps(bars)))
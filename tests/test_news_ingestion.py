@@ -0,0 +1,94 @@
+"""Tests for per-currency news ingestion against a local NewsAPI stub"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.core.database import DatabaseManager
+from app.news.ingestion import NewsIngestor, NewsStore
+from app.news.provider_newsapi import NewsAPIProvider
+
+NOW = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+SHARED = {"title": "G7 ministers meet on currency markets", "url": "https://wire/g7"}
+
+HEADLINES = {
+    "EUR": [{"title": "ECB signals hawkish stance, euro rallies", "url": "https://a/eur"}, SHARED],
+    "USD": [SHARED],
+    "GBP": [{"title": "Sterling gains after data", "url": "https://a/gbp"}],
+    "JPY": [{"title": "Bank of Japan stays dovish, yen weakens", "url": "https://a/jpy"},
+            {"title": "BoJ rate cut bets grow as yen falls", "url": "https://b/jpy"}],
+}
+
+
+@pytest.fixture
+def newsapi_stub():
+    requests = []
+    in_flight = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            topic = parse_qs(url.query)["q"][0].split()[0]
+            with lock:
+                requests.append(topic)
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            time.sleep(0.2)
+            with lock:
+                in_flight["now"] -= 1
+            articles = [{**a, "publishedAt": NOW, "source": {"name": "Stub"}} for a in HEADLINES.get(topic, [])]
+            body = json.dumps({"status": "ok", "articles": articles}).encode()
+            self.send_response(200 if url.path == "/v2/everything" else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v2", requests, in_flight
+    server.shutdown()
+    server.server_close()
+
+
+def test_topics_fetched_once_concurrently_and_shared_by_pairs(tmp_path, newsapi_stub):
+    base_url, requests, in_flight = newsapi_stub
+    store = NewsStore(DatabaseManager(db_path=str(tmp_path / "news.db")))
+    # Left over from two days ago: past the 24h lookback, pruned by the refresh
+    two_days_ago = time.time() - 48 * 3600
+    store.save("EUR", [{"title": "Old euro story", "published_at": two_days_ago}], now=two_days_ago)
+    ingestor = NewsIngestor(NewsAPIProvider(api_key="k", base_url=base_url), store,
+                            ttl_minutes=60, max_concurrency=4)
+
+    added = ingestor.refresh(["EURUSD", "GBPUSD", "EURJPY", "USDJPY"])
+
+    # Four currencies, four requests in flight together (not 4 pairs x 2 sequential calls)
+    assert sorted(requests) == ["EUR", "GBP", "JPY", "USD"]
+    assert in_flight["peak"] == 4
+    # The wire story returned for EUR and USD is stored once and linked to both
+    assert sum(added.values()) == 5
+    with store.db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM news_articles").fetchone()[0] == 5
+        assert conn.execute("SELECT COUNT(*) FROM news_article_topics").fetchone()[0] == 6
+        links = conn.execute("SELECT topic FROM news_article_topics t JOIN news_articles a "
+                             "ON a.id = t.article_id WHERE a.url = ?", (SHARED["url"],)).fetchall()
+    assert sorted(r["topic"] for r in links) == ["EUR", "USD"]
+
+    # Hawkish euro and dovish yen: EURJPY up, USDJPY up (neutral USD), GBPUSD up
+    eurjpy = ingestor.pair_sentiment("EURJPY")
+    assert eurjpy["status"] == "derived" and eurjpy["score"] > 0.5
+    assert ingestor.pair_sentiment("USDJPY")["score"] > 0
+    assert ingestor.pair_sentiment("AUDNZD")["score"] is None
+
+    # Within the TTL nothing is refetched, whatever pairs ask for it
+    assert ingestor.refresh(["EURJPY", "GBPUSD"]) == {}
+    assert len(requests) == 4
@@ -0,0 +1,79 @@
+"""Tests for the vectorized parameter search"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.param_search import IndicatorCache, ParameterSearch, backtest_params
+
+SPACE = {
+    "rsi_buy": list(range(30, 45, 2)),
+    "rsi_sell": list(range(56, 71, 2)),
+    "ema_fast_period": [5, 8, 10, 12, 15],
+    "ema_slow_period": [20, 30, 40, 50],
+    "atr_multiplier": [1.0, 1.5, 2.0, 2.5, 3.0],
+}
+
+
+def _bars(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    spread = np.abs(rng.normal(0, 0.001, n))
+    return pd.DataFrame({"close": close, "high": close * (1 + spread), "low": close * (1 - spread)})
+
+
+def test_parameters_change_the_backtest_and_columns_are_shared():
+    cache = IndicatorCache(_bars())
+    base = {"rsi_buy": 35, "rsi_sell": 65, "ema_fast_period": 12, "ema_slow_period": 30, "atr_multiplier": 2.0}
+    a = backtest_params(cache, base)
+    b = backtest_params(cache, {**base, "rsi_buy": 44, "rsi_sell": 56})
+    c = backtest_params(cache, {**base, "atr_multiplier": 1.0})
+
+    assert a["trades"] > 0
+    assert b["trades"] > a["trades"]
+    assert c["total_return"] != a["total_return"]
+    # ema(12), ema(30), rsi, atr — reused across all three candidates
+    assert cache.computed == 4
+
+
+def test_bayesian_search_finds_planted_optimum():
+    """TPE should locate the peak of a known objective with a fraction of the grid"""
+    space = {"x": list(range(20)), "y": list(range(20))}
+
+    def objective(p):
+        return {"score": -((p["x"] - 13) ** 2 + (p["y"] - 4) ** 2)}
+
+    search = ParameterSearch(space, objective, method="bayesian", n_iter=80, seed=3)
+    best, result = search.run()
+    assert len(search.history) == 80
+    assert result["score"] >= -2
+
+
+def test_optimizer_writes_winners(tmp_path, monkeypatch):
+    from app.ai import ticker_indicator_optimizer as tio
+    from app.core.database import DatabaseManager
+
+    monkeypatch.setattr(tio, "get_database_manager", lambda: DatabaseManager(db_path=str(tmp_path / "h.db")))
+    optimizer = tio.TickerIndicatorOptimizer()
+    optimizer.config_file = tmp_path / "ticker_indicators.json"
+    optimizer.ticker_configs = {}
+    optimizer.walk_forward_enabled = False
+    bars = _bars()
+
+    class FakeData:
+        def get_ohlc_data(self, symbol, timeframe, count):
+            return bars
+
+    optimizer.strategy.data = FakeData()
+    result = optimizer.get_optimal_indicators("EURUSD")
+
+    assert result["test_combinations"] == optimizer.search_iterations
+    saved = json.loads(optimizer.config_file.read_text())["EURUSD"]
+    params = {k: saved["indicators"][k] for k in optimizer.test_ranges}
+    assert params["ema_fast_period"] < params["ema_slow_period"]
+    # The stored score is reproducible and beats the default configuration
+    cache = IndicatorCache(bars)
+    assert backtest_params(cache, params)["score"] == saved["optimization_score"]
+    defaults = optimizer._get_default_indicators("EURUSD")["indicators"]
+    assert saved["optimization_score"] >= backtest_params(cache, defaults)["score"]
@@ -0,0 +1,100 @@
+"""Tests for incremental performance rollups"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from app.core.database import DatabaseManager
+
+
+def _closed_trade(ticket, symbol, profit, close_ts):
+    return {
+        "ticket": ticket,
+        "symbol": symbol,
+        "type": "BUY",
+        "volume": 0.1,
+        "open_price": 1.1,
+        "open_timestamp": (close_ts - timedelta(minutes=30)).isoformat(),
+        "status": "open",
+    }, {
+        "close_price": 1.2,
+        "close_timestamp": close_ts.isoformat(),
+        "profit": profit,
+        "status": "closed",
+    }
+
+
+def test_rollups_update_incrementally_and_match_backfill(tmp_path):
+    """Closing trades updates rollups; a backfill produces the same buckets"""
+    db = DatabaseManager(db_path=str(tmp_path / "history.db"))
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    trades = [
+        _closed_trade(1, "EURUSD", 10.0, now - timedelta(days=1, hours=2)),
+        _closed_trade(2, "EURUSD", -4.0, now - timedelta(days=1, hours=1)),
+        _closed_trade(3, "GBPUSD", 6.0, now - timedelta(hours=1)),
+    ]
+    for opened, closed in trades:
+        db.save_trade(opened)
+        db.update_trade(opened["ticket"], closed)
+
+    # Correcting profit on an already closed trade must not double count
+    db.update_trade(3, {**trades[2][1], "profit": 8.0})
+
+    daily = db.get_performance_rollups("daily", now - timedelta(days=3))
+    assert sum(b["total_trades"] for b in daily) == 3
+    assert sum(b["net_profit"] for b in daily) == 14.0
+
+    by_symbol = db.get_performance_rollups("symbol_daily", now - timedelta(days=3), symbol="EURUSD")
+    assert sum(b["winning_trades"] for b in by_symbol) == 1
+    assert sum(b["losing_trades"] for b in by_symbol) == 1
+
+    incremental = {(b["bucket"], b["symbol"], b["total_trades"], b["net_profit"])
+                   for period in ("daily", "hourly", "symbol_daily")
+                   for b in db.get_performance_rollups(period, now - timedelta(days=3))}
+    db.rebuild_performance_rollups()
+    rebuilt = {(b["bucket"], b["symbol"], b["total_trades"], b["net_profit"])
+               for period in ("daily", "hourly", "symbol_daily")
+               for b in db.get_performance_rollups(period, now - timedelta(days=3))}
+    assert incremental == rebuilt
+
+    summary = db.get_performance_summary(days=7)
+    assert summary["total_trades"] == 3
+    assert summary["net_profit"] == 14.0
+    assert summary["profit_factor"] == 18.0 / 4.0
+
+
+def test_pre_rollup_database_is_backfilled_on_open(tmp_path):
+    """Opening a database from before the rollups fills them, so summaries match the raw trades"""
+    path = str(tmp_path / "old.db")
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, ticket BIGINT UNIQUE, symbol VARCHAR(20) NOT NULL,
+        type VARCHAR(10) NOT NULL, volume REAL NOT NULL, open_price REAL NOT NULL,
+        open_timestamp DATETIME NOT NULL, close_price REAL, close_timestamp DATETIME,
+        stop_loss REAL, take_profit REAL, profit REAL, commission REAL, swap REAL,
+        status VARCHAR(20) DEFAULT 'open', ai_decision_id INTEGER, analysis_id INTEGER, comment TEXT)""")
+    conn.execute("""CREATE TABLE performance_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME NOT NULL, period VARCHAR(20) NOT NULL,
+        total_trades INTEGER DEFAULT 0, winning_trades INTEGER DEFAULT 0, losing_trades INTEGER DEFAULT 0,
+        win_rate REAL, gross_profit REAL DEFAULT 0, gross_loss REAL DEFAULT 0, net_profit REAL DEFAULT 0,
+        max_drawdown REAL, sharpe_ratio REAL, profit_factor REAL,
+        starting_balance REAL, ending_balance REAL, equity_peak REAL)""")
+    profits = [12.0, -5.0, 3.5, -1.5, 7.0, -2.0]
+    for ticket, profit in enumerate(profits, start=1):
+        closed = now - timedelta(days=ticket, hours=1)
+        conn.execute("""INSERT INTO trades (ticket, symbol, type, volume, open_price, open_timestamp,
+                        close_price, close_timestamp, profit, status)
+                        VALUES (?, 'EURUSD', 'BUY', 0.1, 1.1, ?, 1.2, ?, ?, 'closed')""",
+                     (ticket, (closed - timedelta(minutes=30)).isoformat(), closed.isoformat(), profit))
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(db_path=path)
+    summary = db.get_performance_summary(days=30)
+    assert summary["total_trades"] == len(profits)
+    assert summary["net_profit"] == sum(profits)
+    assert summary["winning_trades"] == 3 and summary["gross_loss"] == 8.5
+    assert len(db.get_performance_rollups("symbol_daily", now - timedelta(days=30), symbol="EURUSD")) == 6
+
+    # Reopening does not rebuild (or double count) again
+    assert DatabaseManager(db_path=path).get_performance_summary(days=30) == summary
@@ -0,0 +1,66 @@
+"""Tests for the multi-symbol portfolio backtester"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest.portfolio_engine import PortfolioBacktester
+from app.core.database import DatabaseManager
+from app.trading.risk import RiskManager
+from app.trading.symbol_specs import SymbolSpecCache
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "EURGBP", "AUDUSD", "EURJPY", "NZDUSD", "USDCAD"]
+
+
+def _bars(seed, n=10000):
+    rng = np.random.default_rng(seed)
+    close = np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    spread = np.abs(rng.normal(0, 0.0007, n))
+    return pd.DataFrame({"time": pd.date_range("2024-01-01", periods=n, freq="15min"),
+                         "close": close, "high": close * (1 + spread), "low": close * (1 - spread)})
+
+
+def _max_overlap(trades, key):
+    """Largest number of simultaneously open trades satisfying key(trade)"""
+    events = sorted([(t.entry_time, 1) for t in trades if key(t)] + [(t.exit_time, -1) for t in trades if key(t)],
+                    key=lambda e: (e[0], e[1]))
+    level = peak = 0
+    for _, delta in events:
+        level += delta
+        peak = max(peak, level)
+    return peak
+
+
+def test_portfolio_respects_live_gates(tmp_path):
+    specs = SymbolSpecCache(DatabaseManager(db_path=str(tmp_path / "h.db")))
+    risk = RiskManager()
+    risk.max_total_exposure_pct = 100.0  # isolate the count and currency gates
+    risk.max_trades_per_currency = 3
+    data = {symbol: _bars(i) for i, symbol in enumerate(SYMBOLS)}
+
+    result = PortfolioBacktester(initial_balance=1e9, max_open_trades=4, risk=risk, symbol_specs=specs).run(data)
+
+    assert result.trades
+    assert result.max_concurrent_positions <= 4
+    assert _max_overlap(result.trades, lambda t: True) <= 4
+    # Same rule as RiskManager: a position shares the base or the quote currency
+    for probe in SYMBOLS:
+        assert _max_overlap(result.trades, lambda t: t.symbol[:3] == probe[:3] or t.symbol[3:6] == probe[3:6]) <= 4
+    assert "Max positions limit reached" in result.rejections
+    assert "Max trades per currency exceeded" in result.rejections
+    # Trades are settled in exit order and equity is shared
+    exits = [t.exit_time for t in result.trades]
+    assert exits == sorted(exits)
+    assert result.equity_curve[-1] == pytest.approx(1e9 + sum(t.profit for t in result.trades))
+
+
+def test_exposure_gate_caps_positions(tmp_path):
+    specs = SymbolSpecCache(DatabaseManager(db_path=str(tmp_path / "h.db")))
+    risk = RiskManager()
+    risk.max_total_exposure_pct = 0.06  # live units: majors risk 0.02 each -> at most 3 open
+    data = {symbol: _bars(i) for i, symbol in enumerate(["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"])}
+
+    result = PortfolioBacktester(initial_balance=1e9, risk=risk, symbol_specs=specs).run(data)
+
+    assert result.max_concurrent_positions == 3
+    assert "Max total exposure reached" in result.rejections
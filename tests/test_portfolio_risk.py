@@ -0,0 +1,126 @@
+"""Tests for the rolling covariance / portfolio VaR engine"""
+
+import numpy as np
+import pandas as pd
+
+from app.trading.portfolio_risk import PortfolioRiskEngine, RollingCovariance
+from app.trading.pretrade_gates import EXECUTE, GateContext, PortfolioVaRGate, PreTradePipeline, TradeCandidate
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "EURJPY"]
+
+
+def _closes(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.001, n)
+    returns = np.column_stack([common + rng.normal(0, 0.0004, n) for _ in SYMBOLS])
+    returns[:, 2] = -common + rng.normal(0, 0.0004, n)  # USDJPY moves against EURUSD / GBPUSD
+    start = np.array([1.10, 1.27, 150.0, 165.0])
+    times = pd.date_range("2026-01-05", periods=n, freq="15min")
+    return pd.DataFrame(start * np.exp(np.cumsum(returns, axis=0)), index=times, columns=SYMBOLS)
+
+
+def test_incremental_covariance_matches_full_window():
+    rng = np.random.default_rng(0)
+    rows = rng.normal(0, 1e-3, (730, 50))
+    cov = RollingCovariance(50, window=100)
+    i = 0
+    for k in [1, 7, 100, 3, 250, 1] * 10:
+        k = min(k, len(rows) - i)
+        if k == 0:
+            break
+        cov.push(rows[i:i + k])
+        i += k
+        window = rows[max(0, i - 100):i]
+        if len(window) >= 2:
+            assert np.allclose(cov.covariance(), np.cov(window, rowvar=False), atol=1e-15)
+
+
+def test_engine_updates_only_new_bars_and_prices_candidates():
+    closes = _closes()
+    full = PortfolioRiskEngine(window=100)
+    full.update(closes)
+    engine = PortfolioRiskEngine(window=100)
+    engine.update(closes.iloc[:250])
+    engine.update(closes.iloc[200:])  # Overlapping bars are skipped
+    assert np.allclose(engine.covariance, full.covariance, atol=1e-15)
+
+    positions = [{"symbol": "EURUSD", "type": 0, "volume": 1.0}, {"symbol": "USDJPY", "type": 1, "volume": 1.0}]
+    engine.set_positions(positions)
+    w = np.array([engine.exposure("EURUSD", 1.0, "BUY"), 0.0, engine.exposure("USDJPY", 1.0, "SELL"), 0.0])
+    assert abs(w[2] + 100000.0) < 1e-6  # USD-quoted base: USD notional is the contract
+    assert np.isclose(engine.portfolio_var(), engine.z * np.sqrt(w @ full.covariance @ w))
+
+    after, marginal = engine.candidate_var("GBPUSD", 1.0, "BUY")
+    w[1] = engine.exposure("GBPUSD", 1.0, "BUY")
+    assert np.isclose(after, engine.z * np.sqrt(w @ full.covariance @ w)) and marginal > 0
+    # Buying USDJPY offsets the correlated long-EUR exposure
+    assert engine.candidate_var("USDJPY", 1.0, "BUY")[1] < 0
+
+
+class AccountClient:
+    def __init__(self, equity):
+        self.equity = equity
+
+    def get_positions(self, symbol=None):
+        return [{"symbol": "EURUSD", "type": 0, "volume": 2.0}]
+
+    def get_account_info(self):
+        return {"equity": self.equity}
+
+    def get_symbol_info(self, symbol):
+        return {"trade_contract_size": 100000.0}
+
+
+def test_var_gate_rejects_only_risk_increasing_trades():
+    engine = PortfolioRiskEngine(window=100)
+    engine.update(_closes())
+    pipeline = PreTradePipeline([PortfolioVaRGate(engine, max_var_pct=1.0)])
+    ctx = GateContext(AccountClient(equity=20_000.0))
+
+    passed, reason = pipeline.run(TradeCandidate("GBPUSD", "BUY", volume=2.0), ctx, EXECUTE)
+    assert not passed and reason.startswith("portfolio_var: PORTFOLIO_VAR")
+    assert pipeline.run(TradeCandidate("EURUSD", "SELL", volume=1.0), ctx, EXECUTE) == (True, None)
+
+    # After a fill the exposure vector is rebuilt from the updated positions
+    ctx.record_fill("USDJPY", {"symbol": "USDJPY", "type": 0, "volume": 3.0})
+    assert pipeline.run(TradeCandidate("GBPUSD", "BUY", volume=0.5), ctx, EXECUTE) == (True, None)
+
+
+def test_symbol_set_change_keeps_history_of_remaining_symbols():
+    closes = _closes()
+    three = PortfolioRiskEngine(window=100)
+    three.update(closes[SYMBOLS[:3]].iloc[:300])
+    engine = PortfolioRiskEngine(window=100)
+    engine.update(closes[SYMBOLS[:3]].iloc[:250])
+
+    # EURJPY joins: the three others keep their 100-bar window
+    engine.update(closes.iloc[200:300])
+    assert engine.symbols == SYMBOLS
+    assert np.allclose(engine.covariance[:3, :3], three.covariance, atol=1e-15)
+    # Its first return is taken from its close at the last bar already seen
+    assert engine.cov.buffer[(engine.cov.head - 50) % 100, 3] != 0.0
+
+    # GBPUSD leaves: nothing is lost for the rest, and a full window later the matrix is exact
+    rest = [s for s in SYMBOLS if s != "GBPUSD"]
+    engine.update(closes[rest].iloc[250:400])
+    full = PortfolioRiskEngine(window=100)
+    full.update(closes[rest])
+    assert np.allclose(engine.covariance, full.covariance, atol=1e-15)
+
+
+def test_var_gate_rejects_symbols_without_enough_history():
+    closes = _closes()
+    engine = PortfolioRiskEngine(window=100, min_samples=30)
+    engine.update(closes[SYMBOLS[:3]].iloc[:250])
+    engine.update(closes.iloc[:260])  # EURJPY joins with 10 new bars
+    assert engine.history("EURUSD") == 100 and engine.history("EURJPY") == 10
+    pipeline = PreTradePipeline([PortfolioVaRGate(engine, max_var_pct=100.0)])
+    ctx = GateContext(AccountClient(equity=20_000.0))
+
+    passed, reason = pipeline.run(TradeCandidate("EURJPY", "BUY", volume=0.1), ctx, EXECUTE)
+    assert not passed and "only 10 bars of return history for EURJPY, need 30" in reason
+    assert pipeline.run(TradeCandidate("GBPUSD", "BUY", volume=0.1), ctx, EXECUTE) == (True, None)
+
+    engine.update(closes.iloc[:280])
+    assert engine.history("EURJPY") == 30
+    assert pipeline.run(TradeCandidate("EURJPY", "BUY", volume=0.1), ctx, EXECUTE) == (True, None)
@@ -0,0 +1,81 @@
+"""Tests for the pre-trade gate pipeline"""
+
+from app.trading.pretrade_gates import (
+    EXECUTE, SIGNAL, GateContext, PreTradePipeline, TradeCandidate, default_gates,
+)
+from app.trading.risk import RiskManager
+
+
+class CountingClient:
+    """Broker stub that counts every request"""
+
+    def __init__(self, positions, spreads):
+        self.positions, self.spreads = positions, spreads
+        self.calls = []
+
+    def get_positions(self, symbol=None):
+        self.calls.append("positions")
+        return list(self.positions)
+
+    def get_account_info(self):
+        self.calls.append("account")
+        return {"equity": 10_000.0, "balance": 10_000.0, "margin_free": 9_000.0, "margin": 1_000.0}
+
+    def symbol_info_tick(self, symbol):
+        self.calls.append(f"tick:{symbol}")
+        return {"bid": 1.1000, "ask": 1.1000 + self.spreads.get(symbol, 0.00002)}
+
+    def get_symbol_info(self, symbol):
+        self.calls.append(f"info:{symbol}")
+        return {"point": 0.00001, "digits": 5}
+
+
+def test_cheapest_first_with_shared_context():
+    client = CountingClient([{"symbol": "EURUSD"}], spreads={"GBPUSD": 0.0020})
+    pipeline = PreTradePipeline(default_gates(RiskManager()))
+    ctx = GateContext(client)
+
+    assert [g.name for g in pipeline.gates][:3] == ["confidence", "open_position", "free_margin"]
+    results = {s: pipeline.run(TradeCandidate(s), ctx) for s in ["EURUSD", "GBPUSD", "AUDCAD"]}
+
+    assert results["EURUSD"] == (False, "open_position: Already have open position")
+    assert results["GBPUSD"][1].startswith("spread: SPREAD_TOO_HIGH")
+    assert results["AUDCAD"] == (True, None)
+    # One positions / account fetch for the cycle; no tick for the rejected EURUSD
+    assert client.calls.count("positions") == 1 and client.calls.count("account") == 1
+    assert "tick:EURUSD" not in client.calls and client.calls.count("tick:AUDCAD") == 1
+
+    stats = pipeline.stats()
+    assert stats["open_position"] == {**stats["open_position"], "calls": 3, "rejections": 1}
+    assert stats["spread"]["calls"] == 2 and stats["spread"]["rejections"] == 1
+    assert stats["confidence"]["calls"] == 0
+
+    # A fill in the same cycle is seen by the next check without refetching positions
+    ctx.record_fill("AUDCAD")
+    assert pipeline.run(TradeCandidate("AUDCAD"), ctx) == (False, "open_position: Already have open position")
+    assert ctx.exposure.currency_count("CAD") == 1 and client.calls.count("positions") == 1
+
+
+def test_signal_and_execute_stages():
+    client = CountingClient([], spreads={})
+    pipeline = PreTradePipeline(default_gates(RiskManager()))
+    ctx = GateContext(client)
+
+    weak = TradeCandidate("EURUSD", "BUY", confidence=0.1)
+    assert pipeline.run(weak, ctx, SIGNAL)[1].startswith("confidence: CONFIDENCE_TOO_LOW")
+
+    trade = TradeCandidate("EURUSD", "BUY", volume=0.5, sl=1.0950, tp=1.1100, confidence=0.8)
+    assert pipeline.run(trade, ctx, SIGNAL) == (True, None)
+    assert pipeline.run(trade, ctx, EXECUTE) == (True, None)
+
+    trade.sl = 1.1010  # Above the bid
+    assert pipeline.run(trade, ctx, EXECUTE)[1].startswith("protective_stops: INVALID_STOPS")
+    trade.sl, trade.volume = 1.0950, 50.0  # 65k estimated margin
+    assert pipeline.run(trade, ctx, EXECUTE)[1].startswith("free_margin:")
+
+    # A fill refreshes the account and its symbol's tick, other ticks stay cached
+    ctx.tick("GBPUSD")
+    ctx.record_fill("EURUSD")
+    ctx.positions, ctx.tick("GBPUSD"), ctx.tick("EURUSD")
+    assert client.calls.count("positions") == 1 and client.calls.count("tick:GBPUSD") == 1
+    assert client.calls.count("tick:EURUSD") == 2
@@ -0,0 +1,74 @@
+"""Tests for analysis_history retention and downsampling"""
+
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.core.config import StorageConfig
+from app.core.database import DatabaseManager
+from app.core.retention import convert_to_incremental_vacuum, run_retention
+
+
+def _analysis(symbol, ts, rsi, signal):
+    return {
+        "timestamp": ts.isoformat(),
+        "symbol": symbol,
+        "timeframe": "M15",
+        "technical": {"signal": signal, "data": {"close": 1.0 + rsi / 1000, "rsi": rsi}},
+        "signal": signal,
+        "confidence": 0.5,
+        "combined_score": 0.1,
+    }
+
+
+def test_old_rows_are_archived_summarized_and_deleted(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "history.db"))
+    now = datetime(2026, 3, 20, 12, 0)
+    old_bar = datetime(2026, 3, 1, 10, 15)
+    for minute, (rsi, signal) in enumerate([(30, "BUY"), (50, "HOLD"), (70, "SELL")]):
+        db.save_analysis(_analysis("EURUSD", old_bar + timedelta(minutes=minute * 5), rsi, signal))
+    db.save_analysis(_analysis("EURUSD", now - timedelta(hours=1), 55, "HOLD"))
+
+    storage = StorageConfig(
+        ANALYSIS_RAW_RETENTION_DAYS=7,
+        ANALYSIS_SUMMARY_RETENTION_DAYS=3650,
+        ANALYSIS_ARCHIVE_DIR=str(tmp_path / "archive"),
+    )
+    result = run_retention(db, storage, now=now)
+
+    assert result["partitions"] == ["2026-03-01"]
+    assert result["deleted_rows"] == 3 and result["archived_rows"] == 3
+    assert result["after"]["analysis_rows"] == 1
+    assert set(result["before"]["latency_ms"]) == set(result["after"]["latency_ms"])
+
+    archive = tmp_path / "archive" / "analysis_history" / "2026" / "2026-03-01.ndjson.gz"
+    with gzip.open(archive, "rt") as f:
+        assert [json.loads(line)["tech_rsi"] for line in f] == [30, 50, 70]
+
+    with db.connection() as conn:
+        bar = dict(conn.execute("SELECT * FROM analysis_summary").fetchone())
+    assert bar["bar_time"] == "2026-03-01T10:15:00"
+    assert bar["samples"] == 3
+    assert (bar["buy_signals"], bar["sell_signals"], bar["hold_signals"]) == (1, 1, 1)
+    assert (bar["rsi_min"], bar["rsi_max"]) == (30, 70)
+    assert bar["last_signal"] == "SELL"
+
+    # A second run finds nothing left to downsample
+    assert run_retention(db, storage, now=now)["partitions"] == []
+
+
+
+def test_full_vacuum_conversion_only_on_request(tmp_path):
+    """The background job never runs the one-time full VACUUM; the manual run does, off the shared lock"""
+    db = DatabaseManager(db_path=str(tmp_path / "history.db"))
+    storage = StorageConfig(ANALYSIS_ARCHIVE_DIR=str(tmp_path / "archive"))
+
+    background = run_retention(db, storage)["maintenance"]
+    assert not background["converted_to_incremental"] and not background["incremental_auto_vacuum"]
+
+    # The conversion does not need the DatabaseManager lock (held here by a "writer")
+    with db.connection(), ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(convert_to_incremental_vacuum, db.db_path).result(timeout=10) is True
+    manual = run_retention(db, storage, convert=True)["maintenance"]
+    assert manual["incremental_auto_vacuum"] and not manual["converted_to_incremental"]
@@ -1,6 +1,7 @@
 """Tests for risk management"""
 
 import pytest
+from app.trading.pretrade_gates import GateContext, PortfolioLimitsGate, TradeCandidate
 from app.trading.risk import RiskManager
 
 
@@ -56,3 +57,25 @@ def test_atr_calculations():
     
     tp_distance = risk.calculate_take_profit_atr(atr_value, multiplier=2.5)
     assert tp_distance == 0.0025  # 25 pips
+
+
+
+def test_live_gate_and_backtest_share_exposure_units():
+    """The live gate and check_portfolio_limits (used by the backtester) apply the same limits"""
+    risk = RiskManager()
+    gate = PortfolioLimitsGate(risk)
+    open_symbols = ["EURUSD", "GBPUSD", "NZDUSD", "USDJPY", "EURJPY",
+                    "GBPJPY", "CHFJPY", "EURGBP", "EURCHF", "GBPCHF"]
+
+    def check(n):
+        ctx = GateContext(None, positions=[{"symbol": s} for s in open_symbols[:n]],
+                          account={"equity": 10_000.0}, risk_pct=risk.get_risk_pct_for_symbol)
+        return gate.check(TradeCandidate("AUDCAD"), ctx)
+
+    # Default limit: total exposure never binds before the position caps
+    assert check(len(open_symbols)) is None
+    assert risk.check_portfolio_limits("AUDCAD", open_symbols) == (True, None)
+    risk.max_total_exposure_pct = 0.06  # Same units as the per-trade risk fraction
+    assert check(2) is None and risk.check_portfolio_limits("AUDCAD", open_symbols[:2]) == (True, None)
+    assert check(3).startswith("Max total exposure reached")
+    assert risk.check_portfolio_limits("AUDCAD", open_symbols[:3])[1].startswith("Max total exposure reached")
@@ -0,0 +1,29 @@
+"""Tests for the cold-start import audit"""
+
+from app.core.startup_audit import audit_startup, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 |     plotly.io
+import time:      1500 |       2400 |   plotly
+import time:       400 |       2800 | app.backtest.visualizer
+"""
+
+
+def test_parse_importtime():
+    records = parse_importtime(SAMPLE)
+    assert [r.module for r in records] == ["_io", "plotly.io", "plotly", "app.backtest.visualizer"]
+    assert [r.depth for r in records] == [1, 2, 1, 0]
+    assert records[-1].cumulative_us == 2800 and records[-1].self_us == 400
+
+
+def test_entry_points_skip_heavy_optional_deps():
+    # The trading loop and the API server must start without Gemini / onnxruntime / Streamlit / plotly
+    for target in ["app.trading.trading_loop", "app.api.server", "app.backtest"]:
+        audit = audit_startup(target, target, repeat=1)
+        assert audit.error is None, audit.error
+        assert audit.heavy_modules == [], target
+        assert audit.median_s > 0 and audit.top(3)[0]["module"] == target
+
+    slow = audit_startup("bot", "app.trading.trading_loop", repeat=1, budget=0.0)
+    assert not slow.within_budget and not slow.passed
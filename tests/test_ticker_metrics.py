@@ -0,0 +1,52 @@
+"""Tests for batched per-ticker performance metrics"""
+
+from datetime import datetime, timedelta
+from statistics import mean, pstdev
+
+import pytest
+
+from app.core.database import DatabaseManager
+
+PROFITS = {"EURUSD": [12.0, -5.0, 8.0, 0.0, -3.5], "GBPUSD": [4.0, 6.0], "XAUUSD": [-2.0, -7.0, 9.0]}
+
+
+def test_batch_metrics_match_per_trade_math(tmp_path, monkeypatch):
+    from app.ai import dynamic_decision_engine as dde
+
+    db = DatabaseManager(db_path=str(tmp_path / "h.db"))
+    ticket = 1
+    closed = (datetime.now() - timedelta(minutes=20)).isoformat()
+    for symbol, profits in PROFITS.items():
+        for profit in profits:
+            db.save_trade({"ticket": ticket, "symbol": symbol, "type": "BUY", "volume": 0.1,
+                           "open_price": 1.0, "open_timestamp": closed, "close_timestamp": closed,
+                           "profit": profit, "status": "closed"})
+            ticket += 1
+
+    monkeypatch.setattr(dde, "get_database_manager", lambda: db)
+    tracker = dde.TickerPerformanceTracker()
+    tracker.cache_file = tmp_path / "ticker_performance.json"
+    tracker.performance_data = {}
+    saves = []
+    original_save = tracker._save_cache
+    monkeypatch.setattr(tracker, "_save_cache", lambda: (saves.append(1), original_save()))
+
+    metrics = tracker.calculate_all_metrics(list(PROFITS) + ["USDJPY"])
+
+    assert len(saves) == 1
+    assert set(tracker.performance_data) == set(PROFITS)
+    assert metrics["USDJPY"]["trades"] == 0
+
+    for symbol, profits in PROFITS.items():
+        decided = [p for p in profits if p != 0]
+        wins = [p for p in decided if p > 0]
+        losses = [-p for p in decided if p < 0]
+        m = metrics[symbol]
+        assert m["trades"] == len(decided)
+        assert m["win_rate"] == pytest.approx(len(wins) / len(decided))
+        assert m["profit_factor"] == pytest.approx(sum(wins) / sum(losses) if losses else 1.0)
+        assert m["total_pnl"] == pytest.approx(sum(decided))
+        expected_sharpe = mean(decided) / pstdev(decided) if wins and losses else 0.0
+        assert m["sharpe_ratio"] == pytest.approx(expected_sharpe)
+
+    assert tracker.calculate_ticker_metrics("GBPUSD")["trades"] == 2
@@ -0,0 +1,47 @@
+"""Tests for keyset-paginated trade history"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.database import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "history.db"))
+    base = datetime.now() - timedelta(hours=1)
+    for ticket in range(25):
+        db.save_trade({
+            "ticket": ticket,
+            "symbol": "EURUSD" if ticket % 2 else "GBPUSD",
+            "type": "BUY",
+            "volume": 0.1,
+            "open_price": 1.1,
+            # Pairs of trades share a timestamp so the id tie-breaker matters
+            "open_timestamp": (base + timedelta(seconds=ticket // 2)).isoformat(),
+            "status": "open",
+        })
+    return db
+
+
+def test_pages_cover_all_trades_once_in_order(db):
+    """Walking next_cursor returns every trade exactly once, newest first"""
+    seen, cursor = [], None
+    while True:
+        page = db.get_trades_page(limit=7, cursor=cursor, columns=["ticket", "symbol"])
+        assert all(set(t) == {"ticket", "symbol"} for t in page["trades"])
+        seen.extend(t["ticket"] for t in page["trades"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(range(24, -1, -1))
+    assert [t["ticket"] for t in db.iter_trades(symbol="EURUSD", batch_size=4)] == list(range(23, 0, -2))
+
+
+def test_invalid_columns_and_cursor_are_rejected(db):
+    with pytest.raises(ValueError):
+        db.get_trades_page(columns=["ticket; DROP TABLE trades"])
+    with pytest.raises(ValueError):
+        db.get_trades_page(cursor="not-a-cursor")
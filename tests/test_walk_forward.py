@@ -0,0 +1,52 @@
+"""Tests for walk-forward optimization and the promotion gate"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.walk_forward import PromotionGate, WalkForwardOptimizer, make_folds
+
+SPACE = {
+    "rsi_buy": [30, 35, 40],
+    "rsi_sell": [60, 65, 70],
+    "ema_fast_period": [5, 10],
+    "ema_slow_period": [20, 40],
+    "atr_multiplier": [1.5, 2.5],
+}
+
+
+def _random_walk(n=2500, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    spread = np.abs(rng.normal(0, 0.001, n))
+    return pd.DataFrame({"close": close, "high": close * (1 + spread), "low": close * (1 - spread)})
+
+
+def test_folds_tile_history_without_lookahead():
+    folds = make_folds(2000, train_bars=1000, test_bars=250)
+    assert [(f.test_start, f.test_end) for f in folds] == [(1000, 1250), (1250, 1500), (1500, 1750), (1750, 2000)]
+    assert all(f.train_end == f.test_start and f.train_end - f.train_start == 1000 for f in folds)
+
+    anchored = make_folds(2000, train_bars=1000, test_bars=500, anchored=True)
+    assert [f.train_start for f in anchored] == [0, 0]
+    assert anchored[-1].train_end == 1500
+
+
+def test_gate_decides_promotion():
+    bars = _random_walk()
+    strict = WalkForwardOptimizer(SPACE, train_bars=800, test_bars=300, method="random",
+                                  n_iter=12, seed=1, gate=PromotionGate(min_oos_profit_factor=10.0))
+    result = strict.run(bars, "EURUSD")
+    assert len(result.folds) == 5
+    assert result.recommended is not None
+    assert not result.promoted
+    assert any("profit factor" in r for r in result.rejection_reasons)
+
+    lenient = PromotionGate(min_oos_trades=0, min_oos_profit_factor=0.0, min_positive_fold_ratio=0.0,
+                            min_efficiency=float("-inf"), max_instability=1.0)
+    assert lenient.check(result) == (True, [])
+
+    payload = json.loads(json.dumps(result.to_dict()))
+    assert "returns" not in payload["out_of_sample"]
+    assert len(payload["folds"]) == 5
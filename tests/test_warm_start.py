@@ -0,0 +1,108 @@
+"""Tests for the warm-start cache snapshot"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ai.gemini_client import GeminiClient
+from app.core.config import get_config
+from app.trading.data import DataProvider
+from app.trading.market_simulator import MarketSimulator
+from app.trading.mt5_client import MT5Client
+from app.trading.portfolio_risk import PortfolioRiskEngine
+from app.trading.warm_start import WarmStart
+from tests.helpers import FakeClock
+
+T0 = 1_760_000_000.0
+
+
+class RecordingClient(MT5Client):
+    """Simulated broker that records the bar count of every rates request"""
+
+    def __init__(self, simulator, utc_offset_hours=0):
+        super().__init__()
+        self._simulator = simulator
+        self.utc_offset = utc_offset_hours * 3600
+        self.counts = []
+
+    def get_rates(self, symbol, timeframe, count=1000, start_time=None):
+        self.counts.append(count)
+        rates = super().get_rates(symbol, timeframe, count, start_time)
+        # Bar times in broker time, like a real MT5 server
+        return [{**r, 'time': r['time'] + self.utc_offset} for r in rates] if rates else rates
+
+
+def _restart(clock, utc_offset_hours=0):
+    """A new process: its own simulator and client, the same seed and day"""
+    return RecordingClient(MarketSimulator(seed=3, clock=clock), utc_offset_hours)
+
+
+@pytest.mark.parametrize("utc_offset_hours", [0, 3])
+def test_restart_tops_up_restored_bars(tmp_path, monkeypatch, utc_offset_hours):
+    clock = FakeClock(T0)
+    client = _restart(clock, utc_offset_hours)
+    before = DataProvider(client, clock=clock)
+    before.get_ohlc_data("EURUSD", "M15", 100)
+    path = str(tmp_path / "warm.pkl")
+    assert WarmStart(path, caches={"bars": before}, feed=client.feed_id, clock=clock).save() == {"bars": 1}
+
+    clock.now += 45 * 60
+    client = _restart(clock, utc_offset_hours)
+    after = DataProvider(client, clock=clock)
+    after.cache_ttl_seconds = 0  # Restored bars are stale: force the top-up path
+    assert WarmStart(path, caches={"bars": after}, feed=client.feed_id, clock=clock).restore() == {"bars": 1}
+
+    bars = after.get_ohlc_data("EURUSD", "M15", 100)
+    # Only the bars formed during the 45 minutes (plus the re-read last one), not 100
+    assert client.counts == [5]
+    pd.testing.assert_frame_equal(bars, after._fetch("EURUSD", "M15", 100))
+
+    # Another feed (another seed, or the next day's simulator path), too old, or another mode: cold start
+    other = DataProvider(RecordingClient(MarketSimulator(seed=4, clock=clock)), clock=clock)
+    assert WarmStart(path, caches={"bars": other}, feed=other.mt5.feed_id, clock=clock).restore() == {}
+    assert other._cache == {}
+    assert _restart(FakeClock(T0 + 86400)).feed_id() != client.feed_id()
+    assert WarmStart(path, max_age_minutes=30, caches={"bars": other}, feed=client.feed_id, clock=clock).load() is None
+    monkeypatch.setattr(get_config().trading, "mode", "BACKTEST")
+    assert WarmStart(path, caches={"bars": other}, feed=client.feed_id, clock=clock).load() is None
+
+
+def test_restored_covariance_carries_on(tmp_path):
+    rng = np.random.default_rng(7)
+    closes = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.001, (160, 3)), axis=0)),
+                          index=pd.date_range("2026-01-05", periods=160, freq="15min"),
+                          columns=["EURUSD", "GBPUSD", "USDJPY"])
+    engine = PortfolioRiskEngine(window=50)
+    engine.update(closes.iloc[:120])
+
+    path = str(tmp_path / "warm.pkl")
+    WarmStart(path, caches={"portfolio_risk": engine}, feed=lambda: "mt5:demo:1").save()
+
+    fresh_engine = PortfolioRiskEngine(window=50)
+    restored = WarmStart(path, caches={"portfolio_risk": fresh_engine}, feed=lambda: "mt5:demo:1").restore()
+    assert restored == {"portfolio_risk": 3}
+
+    # The restored covariance carries on exactly like the one that never restarted
+    np.testing.assert_allclose(fresh_engine.covariance, engine.covariance)
+    engine.update(closes)
+    fresh_engine.update(closes)
+    np.testing.assert_allclose(fresh_engine.covariance, engine.covariance, rtol=1e-10)
+
+
+def test_ai_responses_restore_only_fresh_entries_up_to_the_cap(tmp_path):
+    gemini = GeminiClient()
+    now = time.time()
+    for i, age_minutes in enumerate([300, 50, 40, 30, 20, 10]):
+        gemini._cache_response(f"p{i}", {"action": "HOLD", "n": i}, now - age_minutes * 60)
+    path = str(tmp_path / "warm.pkl")
+    WarmStart(path, caches={"ai_responses": gemini}, feed=lambda: None).save()
+
+    fresh = GeminiClient()
+    fresh.cache_ttl_seconds, fresh.cache_max_entries = 45 * 60, 3
+    fresh._cache_response("live", {"action": "BUY"})
+    assert WarmStart(path, caches={"ai_responses": fresh}, feed=lambda: None).restore() == {"ai_responses": 2}
+    # Stale (300m, 50m) entries dropped, then the oldest evicted to keep 3; the live one stays
+    assert list(fresh._prompt_cache) == ["p4", "p5", "live"]
+    assert fresh._cached_response("p5") == {"action": "HOLD", "n": 5}